@@ -1,11 +1,11 @@
 import asyncio
 from abc import abstractmethod
-from datetime import datetime
 
 from fastapi.encoders import jsonable_encoder
+from google.protobuf.struct_pb2 import ListValue
 
 from huggy.core.endpoint import AbstractEndpoint
-from huggy.core.endpoint.utils import to_days, to_float, to_int
+from huggy.core.endpoint.ranking_features import build_ranking_instances
 from huggy.schemas.playlist_params import PlaylistParams
 from huggy.schemas.recommendable_offer import RankedOffer, RecommendableOffer
 from huggy.schemas.user import UserContext
@@ -119,48 +119,8 @@ class ModelRankingEndpoint(RankingEndpoint):
         for i in range(0, len(events), batch_size):
             yield events[i : i + batch_size]
 
-    def get_instance(
-        self, recommendable_offers: list[RecommendableOffer]
-    ) -> list[dict]:
-        offers_list = []
-        for row in recommendable_offers:
-            offers_list.append(
-                {
-                    "offer_id": row.offer_id,
-                    "context": f"{self.context}:{row.item_origin}",
-                    "offer_subcategory_id": row.subcategory_id,
-                    "user_bookings_count": to_float(self.user.bookings_count),
-                    "user_clicks_count": to_float(self.user.clicks_count),
-                    "user_favorites_count": to_float(self.user.favorites_count),
-                    "user_deposit_remaining_credit": to_float(
-                        self.user.user_deposit_remaining_credit
-                    ),
-                    "user_is_geolocated": to_float(self.user.is_geolocated),
-                    "user_iris_x": to_float(self.user.longitude),
-                    "user_iris_y": to_float(self.user.latitude),
-                    "offer_user_distance": to_float(row.user_distance),
-                    "offer_booking_number": to_float(row.booking_number),
-                    "offer_booking_number_last_7_days": to_float(
-                        row.booking_number_last_7_days
-                    ),
-                    "offer_booking_number_last_14_days": to_float(
-                        row.booking_number_last_14_days
-                    ),
-                    "offer_booking_number_last_28_days": to_float(
-                        row.booking_number_last_28_days
-                    ),
-                    "offer_semantic_emb_mean": to_float(row.semantic_emb_mean),
-                    "offer_item_score": to_float(row.item_score),
-                    "offer_item_rank": to_float(row.item_rank),
-                    "offer_is_geolocated": to_float(row.is_geolocated),
-                    "offer_stock_price": to_float(row.stock_price),
-                    "offer_creation_days": to_days(row.offer_creation_date),
-                    "offer_stock_beginning_days": to_days(row.stock_beginning_date),
-                    "day_of_the_week": to_int(datetime.today().weekday()),
-                    "hour_of_the_day": to_int(datetime.now().hour),
-                }
-            )
-        return offers_list
+    def get_instance(self, recommendable_offers: list[RecommendableOffer]) -> ListValue:
+        return build_ranking_instances(recommendable_offers, self.user, self.context)
 
     async def model_score(
         self, recommendable_offers: list[RecommendableOffer]
@@ -200,7 +160,7 @@ class ModelRankingEndpoint(RankingEndpoint):
         results = await asyncio.gather(
             *[
                 endpoint_score(instances=x, endpoint_name=self.endpoint_name)
-                for x in list(self.batch_events(instances, batch_size=200))
+                for x in list(self.batch_events(instances.values, batch_size=200))
             ]
         )
 
@@ -273,39 +233,8 @@ class NoPopularModelRankingEndpoint(ModelRankingEndpoint):
 
     MODEL_ORIGIN = "no_popular_model"
 
-    def get_instance(
-        self, recommendable_offers: list[RecommendableOffer]
-    ) -> list[dict]:
-        offers_list = []
-        for row in recommendable_offers:
-            offers_list.append(
-                {
-                    "offer_id": row.offer_id,
-                    "context": f"{self.context}:{row.item_origin}",
-                    "offer_subcategory_id": row.subcategory_id,
-                    "user_bookings_count": to_float(self.user.bookings_count),
-                    "user_clicks_count": to_float(self.user.clicks_count),
-                    "user_favorites_count": to_float(self.user.favorites_count),
-                    "user_deposit_remaining_credit": to_float(
-                        self.user.user_deposit_remaining_credit
-                    ),
-                    "user_is_geolocated": to_float(self.user.is_geolocated),
-                    "user_iris_x": to_float(self.user.longitude),
-                    "user_iris_y": to_float(self.user.latitude),
-                    "offer_user_distance": to_float(row.user_distance),
-                    "offer_booking_number": 0,  # force theses metrics at 0.
-                    "offer_booking_number_last_7_days": 0,
-                    "offer_booking_number_last_14_days": 0,
-                    "offer_booking_number_last_28_days": 0,
-                    "offer_semantic_emb_mean": to_float(row.semantic_emb_mean),
-                    "offer_item_score": to_float(row.item_score),
-                    "offer_item_rank": to_float(row.item_rank),
-                    "offer_is_geolocated": to_float(row.is_geolocated),
-                    "offer_stock_price": to_float(row.stock_price),
-                    "offer_creation_days": to_days(row.offer_creation_date),
-                    "offer_stock_beginning_days": to_days(row.stock_beginning_date),
-                    "day_of_the_week": to_int(datetime.today().weekday()),
-                    "hour_of_the_day": to_int(datetime.now().hour),
-                }
-            )
-        return offers_list
+    def get_instance(self, recommendable_offers: list[RecommendableOffer]) -> ListValue:
+        # force the booking numbers at 0.
+        return build_ranking_instances(
+            recommendable_offers, self.user, self.context, with_booking_numbers=False
+        )
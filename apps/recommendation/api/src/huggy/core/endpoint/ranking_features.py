@@ -0,0 +1,138 @@
+import typing as t
+from datetime import datetime
+
+from google.protobuf.struct_pb2 import NULL_VALUE, ListValue, Struct
+
+from huggy.core.endpoint.utils import to_days, to_float, to_int
+from huggy.schemas.recommendable_offer import RecommendableOffer
+from huggy.schemas.user import UserContext
+
+BOOKING_NUMBER_FEATURES = {
+    "offer_booking_number": "booking_number",
+    "offer_booking_number_last_7_days": "booking_number_last_7_days",
+    "offer_booking_number_last_14_days": "booking_number_last_14_days",
+    "offer_booking_number_last_28_days": "booking_number_last_28_days",
+}
+
+
+def build_request_ranking_features(user: UserContext, now: datetime) -> Struct:
+    """
+    Builds the features shared by every offer of the request (user and time context).
+
+    Args:
+        user (UserContext): The user context.
+        now (datetime): Reference time of the request.
+
+    Returns:
+        Struct: The request-level features, copied into every ranking instance.
+    """
+    request_features = Struct()
+    request_features.update(
+        {
+            "user_bookings_count": to_float(user.bookings_count),
+            "user_clicks_count": to_float(user.clicks_count),
+            "user_favorites_count": to_float(user.favorites_count),
+            "user_deposit_remaining_credit": to_float(
+                user.user_deposit_remaining_credit
+            ),
+            "user_is_geolocated": to_float(user.is_geolocated),
+            "user_iris_x": to_float(user.longitude),
+            "user_iris_y": to_float(user.latitude),
+            "day_of_the_week": to_int(now.weekday()),
+            "hour_of_the_day": to_int(now.hour),
+        }
+    )
+    return request_features
+
+
+def build_offer_ranking_feature_columns(
+    recommendable_offers: list[RecommendableOffer],
+    context: str,
+    now: datetime,
+    with_booking_numbers: bool = True,  # noqa: FBT001, FBT002
+) -> dict[str, list[t.Any]]:
+    """
+    Builds the per-offer features, one column (list) per feature.
+
+    Args:
+        recommendable_offers (list[RecommendableOffer]): The offers to rank.
+        context (str): The recommendation context.
+        now (datetime): Reference time of the request.
+        with_booking_numbers (bool): When False, the booking numbers are forced to 0.
+
+    Returns:
+        dict[str, list]: The feature columns, in the order of the offers.
+    """
+    offers = recommendable_offers
+    feature_columns = {
+        "offer_id": [row.offer_id for row in offers],
+        "context": [f"{context}:{row.item_origin}" for row in offers],
+        "offer_subcategory_id": [row.subcategory_id for row in offers],
+        "offer_user_distance": [to_float(row.user_distance) for row in offers],
+        "offer_semantic_emb_mean": [to_float(row.semantic_emb_mean) for row in offers],
+        "offer_item_score": [to_float(row.item_score) for row in offers],
+        "offer_item_rank": [to_float(row.item_rank) for row in offers],
+        "offer_is_geolocated": [to_float(row.is_geolocated) for row in offers],
+        "offer_stock_price": [to_float(row.stock_price) for row in offers],
+        "offer_creation_days": [
+            to_days(row.offer_creation_date, now) for row in offers
+        ],
+        "offer_stock_beginning_days": [
+            to_days(row.stock_beginning_date, now) for row in offers
+        ],
+    }
+    for feature_name, attribute_name in BOOKING_NUMBER_FEATURES.items():
+        feature_columns[feature_name] = (
+            [to_float(getattr(row, attribute_name)) for row in offers]
+            if with_booking_numbers
+            else [0] * len(offers)
+        )
+    return feature_columns
+
+
+def build_ranking_instances(
+    recommendable_offers: list[RecommendableOffer],
+    user: UserContext,
+    context: str,
+    with_booking_numbers: bool = True,  # noqa: FBT001, FBT002
+    now: t.Optional[datetime] = None,
+) -> ListValue:
+    """
+    Builds the instances sent to the ranking endpoint, one per offer.
+
+    Request-level features are computed once and copied into each instance, and the
+    protobuf instances are written directly (no intermediate dict nor ParseDict).
+
+    Args:
+        recommendable_offers (list[RecommendableOffer]): The offers to rank.
+        user (UserContext): The user context.
+        context (str): The recommendation context.
+        with_booking_numbers (bool): When False, the booking numbers are forced to 0.
+        now (datetime): Reference time of the request (defaults to now).
+
+    Returns:
+        ListValue: One Struct of features per offer, in the order of the offers.
+    """
+    now = now or datetime.now()
+    request_features = build_request_ranking_features(user, now)
+    feature_columns = build_offer_ranking_feature_columns(
+        recommendable_offers, context, now, with_booking_numbers
+    )
+
+    ranking_instances = ListValue()
+    instances_fields = []
+    for _ in recommendable_offers:
+        ranking_instance = ranking_instances.values.add().struct_value
+        ranking_instance.MergeFrom(request_features)
+        instances_fields.append(ranking_instance.fields)
+
+    for feature_name, feature_column in feature_columns.items():
+        for instance_fields, value in zip(instances_fields, feature_column):
+            if value is None:
+                instance_fields[feature_name].null_value = NULL_VALUE
+            elif isinstance(value, str):
+                instance_fields[feature_name].string_value = value
+            else:
+                instance_fields[feature_name].number_value = value
+
+    return ranking_instances
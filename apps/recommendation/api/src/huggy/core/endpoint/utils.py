@@ -2,12 +2,15 @@ import typing as t
 from datetime import datetime
 
 
-def to_days(dt: t.Optional[datetime]) -> t.Optional[int]:
+def to_days(
+    dt: t.Optional[datetime], now: t.Optional[datetime] = None
+) -> t.Optional[int]:
     """
     Converts a given datetime object to the number of days from the current date.
 
     Args:
         dt (datetime): The datetime object to be converted.
+        now (datetime): Reference date, to compute it once per request (defaults to now).
 
     Returns:
         int: The number of days from the current date if `dt` is valid, else None.
@@ -17,7 +20,7 @@ def to_days(dt: t.Optional[datetime]) -> t.Optional[int]:
     """
     try:
         if dt is not None:
-            return (dt - datetime.now()).days
+            return (dt - (now or datetime.now())).days
     except Exception:
         pass
     return None
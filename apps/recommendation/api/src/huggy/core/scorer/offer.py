@@ -1,7 +1,9 @@
 import asyncio
+import math
 import typing as t
 from dataclasses import dataclass
 
+import numpy as np
 from aiocache import Cache
 from aiocache.serializers import PickleSerializer
 from sqlalchemy.exc import ProgrammingError
@@ -18,10 +20,13 @@ from huggy.crud.non_recommendable_offer import get_non_recommendable_items
 from huggy.crud.recommendable_offer import RecommendableOffer as RecommendableOfferDB
 from huggy.schemas.model_selection.model_configuration import QueryOrderChoices
 from huggy.utils.cloud_logging import logger
-from huggy.utils.distance import haversine_distance
+from huggy.utils.distance import haversine_distances
 from huggy.utils.exception import log_error
 from huggy.utils.hash import hash_from_keys
 
+# Fast-track (single venue) offers further than this from the user are not recommended
+DEFAULT_MAX_DISTANCE = 100_000
+
 OFFER_DB_CACHE = Cache(
     Cache.MEMORY, ttl=3000, serializer=PickleSerializer(), namespace="offer_db_cache"
 )
@@ -177,35 +182,42 @@ class OfferScorer:
 
         return result.recommendable_offer
 
-    async def get_distance(
+    async def get_fast_track_distances(
         self,
-        item: i.RecommendableItem,
+        items: list[i.RecommendableItem],
         user: u.UserContext,
-        default_max_distance: int,
         offer_latitude: t.Optional[float] = None,
         offer_longitude: t.Optional[float] = None,
-    ) -> float:
-        # If item is not geolocated then return
-        if not item.is_geolocated:
-            return None, True
-        # Else check user or offer statuses
-        if user is not None and user.is_geolocated:
-            distance = haversine_distance(
-                item.example_venue_latitude,
-                item.example_venue_longitude,
-                user.latitude,
-                user.longitude,
-            )
-
+    ) -> np.ndarray:
+        """
+        Distances between the example venue of each item and the input offers (if any)
+        or the user, computed in one vectorized call.
+        NaN for non-geolocated items or when no reference point is available.
+        """
         if offer_latitude is not None and offer_longitude is not None:
-            distance = haversine_distance(
-                item.example_venue_latitude,
-                item.example_venue_longitude,
-                offer_latitude,
-                offer_longitude,
-            )
-        within_radius = distance <= default_max_distance
-        return distance, within_radius
+            reference_latitude, reference_longitude = offer_latitude, offer_longitude
+        elif user is not None and user.is_geolocated:
+            reference_latitude, reference_longitude = user.latitude, user.longitude
+        else:
+            reference_latitude, reference_longitude = None, None
+
+        venue_latitudes = np.array(
+            [
+                item.example_venue_latitude if item.is_geolocated else None
+                for item in items
+            ],
+            dtype=np.float64,
+        )
+        venue_longitudes = np.array(
+            [
+                item.example_venue_longitude if item.is_geolocated else None
+                for item in items
+            ],
+            dtype=np.float64,
+        )
+        return haversine_distances(
+            venue_latitudes, venue_longitudes, reference_latitude, reference_longitude
+        )
 
     async def get_mean_offer_coordinates(
         self, input_offers: t.Optional[list[o.Offer]] = None
@@ -238,27 +250,34 @@ class OfferScorer:
             input_offers
         )
 
+        fast_track_items = []
         for v in recommendable_items_ids.values():
             if v.total_offers == 1 or not v.is_geolocated:
-                user_distance, within_radius = await self.get_distance(
-                    v,
-                    user,
-                    default_max_distance=100_000,
-                    offer_latitude=offer_latitude,
-                    offer_longitude=offer_longitude,
-                )
-                if within_radius:
-                    recommendable_offers.append(
-                        r_o.RecommendableOffer(
-                            offer_id=v.example_offer_id,
-                            user_distance=user_distance,
-                            venue_latitude=v.example_venue_latitude,
-                            venue_longitude=v.example_venue_longitude,
-                            **v.dict(),
-                        )
-                    )
+                fast_track_items.append(v)
             else:
                 multiple_item_offers.append(v)
+
+        fast_track_distances = await self.get_fast_track_distances(
+            fast_track_items,
+            user,
+            offer_latitude=offer_latitude,
+            offer_longitude=offer_longitude,
+        )
+        for v, user_distance in zip(fast_track_items, fast_track_distances.tolist()):
+            if not v.is_geolocated:
+                user_distance = None
+            # Geolocated items without distance cannot be checked against the radius
+            elif math.isnan(user_distance) or user_distance > DEFAULT_MAX_DISTANCE:
+                continue
+            recommendable_offers.append(
+                r_o.RecommendableOffer(
+                    offer_id=v.example_offer_id,
+                    user_distance=user_distance,
+                    venue_latitude=v.example_venue_latitude,
+                    venue_longitude=v.example_venue_longitude,
+                    **v.dict(),
+                )
+            )
         try:
             if len(multiple_item_offers) > 0:
                 offer_distances = await RecommendableOfferDB().get_nearest_offers(
@@ -1,11 +1,12 @@
 import typing as t
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.exc import ProgrammingError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import huggy.schemas.offer as o
 from huggy.crud.iris import Iris
+from huggy.models.iris_france import IrisFrance
 from huggy.models.item_ids import ItemIds
 from huggy.utils.exception import log_error
 
@@ -15,10 +16,18 @@ class Offer:
     async def parse_offer_list(
         db: AsyncSession, offer_list: list[str]
     ) -> list[o.Offer]:
-        offers = [
-            await Offer().get_offer_characteristics(db, offer_id)
-            for offer_id in offer_list
-        ]
+        if not offer_list:
+            return []
+        try:
+            offers = await Offer().get_offers_characteristics(db, offer_list)
+        except ProgrammingError as exc:
+            # e.g. no IRIS table: fall back on the lookups offer by offer
+            log_error(exc, message="Exception error on get_offers_characteristics")
+            await db.rollback()
+            offers = [
+                await Offer().get_offer_characteristics(db, offer_id)
+                for offer_id in offer_list
+            ]
         return [o for o in offers if o.found]
 
     async def get_item(self, db: AsyncSession, offer_id: str) -> t.Optional[ItemIds]:
@@ -82,3 +91,66 @@ class Offer:
             log_error(exc, message="Exception error on get_offer_characteristics")
 
         return offer
+
+    async def get_offers_characteristics(
+        self, db: AsyncSession, offer_ids: list[str]
+    ) -> list[o.Offer]:
+        """
+        Batched get_offer_characteristics: a single query fetches the item rows of
+        every offer, with the IRIS containing each venue as a correlated subquery.
+        Return : the offers in input order (found=False for unknown offers).
+
+        """
+        item_table: ItemIds = await ItemIds().get_available_table(db)
+        iris_france: IrisFrance = await IrisFrance().get_available_table(db)
+        iris_id = (
+            select(iris_france.id)
+            .where(
+                func.ST_Contains(
+                    iris_france.shape,
+                    func.ST_MakePoint(
+                        item_table.venue_longitude, item_table.venue_latitude
+                    ),
+                )
+            )
+            .limit(1)
+            .scalar_subquery()
+        )
+        rows = (
+            await db.execute(
+                select(item_table, iris_id.label("iris_id")).where(
+                    item_table.offer_id.in_(set(offer_ids))
+                )
+            )
+        ).all()
+        characteristics = {row[0].offer_id: row for row in rows}
+
+        offers = []
+        for offer_id in offer_ids:
+            if offer_id not in characteristics:
+                offers.append(
+                    o.Offer(
+                        offer_id=offer_id,
+                        latitude=None,
+                        longitude=None,
+                        iris_id=None,
+                        is_geolocated=False,
+                        found=False,
+                    )
+                )
+                continue
+            item, iris_id = characteristics[offer_id]
+            offers.append(
+                o.Offer(
+                    offer_id=offer_id,
+                    latitude=item.venue_latitude,
+                    longitude=item.venue_longitude,
+                    iris_id=str(iris_id) if iris_id is not None else None,
+                    is_geolocated=iris_id is not None,
+                    item_id=item.item_id,
+                    booking_number=item.booking_number,
+                    is_sensitive=bool(item.is_sensitive),
+                    found=True,
+                )
+            )
+        return offers
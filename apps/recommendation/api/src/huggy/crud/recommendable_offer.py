@@ -1,7 +1,7 @@
 from typing import Optional
 
 from pydantic import TypeAdapter
-from sqlalchemy import Integer, String, func, select, text
+from sqlalchemy import ARRAY, Integer, String, bindparam, func, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql.expression import literal_column
 
@@ -137,21 +137,26 @@ class RecommendableOffer:
             return literal_column("NULL").label("user_distance")
 
     def get_items(self, recommendable_items_ids: list[RecommendableItem]):
-        arr_sql = ",".join(
-            [
-                f"('{v.item_id}'::VARCHAR, {v.item_rank}::INT)"
-                for v in recommendable_items_ids
-            ]
-        )
-
+        # The ranked items are bound as two arrays: the statement text does not depend
+        # on the items, so the driver reuses its prepared statement.
         return (
             text(
-                f"""
-
+                """
                     SELECT s.item_id, s.item_rank
-                    FROM unnest(ARRAY[{arr_sql}])
-                    AS s(item_id VARCHAR, item_rank INT)
-            """
+                    FROM unnest(:item_ids, :item_ranks) AS s(item_id, item_rank)
+                """
+            )
+            .bindparams(
+                bindparam(
+                    "item_ids",
+                    value=[v.item_id for v in recommendable_items_ids],
+                    type_=ARRAY(String),
+                ),
+                bindparam(
+                    "item_ranks",
+                    value=[v.item_rank for v in recommendable_items_ids],
+                    type_=ARRAY(Integer),
+                ),
             )
             .columns(item_id=String, item_rank=Integer)
             .cte("ranked_items")
@@ -1,12 +1,25 @@
+import time
 from abc import abstractmethod
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 from sqlalchemy.orm import declarative_base
 
-from huggy.database.utils import check_table_exists
+from huggy.database.utils import find_first_existing_table
+from huggy.utils.env_vars import MATERIALIZED_TABLE_CACHE_TTL_SECONDS
 
 Base = declarative_base()
 
+# Resolved tables shared by every request of the process:
+# {(database url, candidate table names): (resolution time, table)}
+_available_table_cache: dict[tuple[str, tuple[str, ...]], tuple[float, Base]] = {}
+
+
+def clear_available_table_cache() -> None:
+    """
+    Forgets every resolved table, e.g. once the materialized views have been swapped.
+    """
+    _available_table_cache.clear()
+
 
 class MaterializedBase:
     @abstractmethod
@@ -14,13 +27,46 @@ class MaterializedBase:
         pass
 
     async def get_available_table(self, session: AsyncSession) -> Base:
-        table_names = []
-        for obj in self.materialized_tables():
-            try:
-                table_name = obj.__tablename__
-                table_names.append(table_name)
-                if await check_table_exists(session, table_name):
-                    return obj
-            except NameError:
-                print(f"Model {obj} is not defined")
-        raise Exception(f"Tables :  {', '.join(table_names)} not found.")
+        """
+        Returns the first existing table of materialized_tables() (_mv, then fallbacks).
+
+        Checking a table costs a catalog query, so the resolution of the preferred table
+        is cached for MATERIALIZED_TABLE_CACHE_TTL_SECONDS: the swap of the materialized
+        views keeps that table name in place. Once expired, the table is checked again
+        before being returned, so a table dropped in the meantime is never served.
+        Fallback tables only exist during a swap or after a failed refresh, so they are
+        never cached.
+        """
+        tables = self.materialized_tables()
+        if MATERIALIZED_TABLE_CACHE_TTL_SECONDS <= 0:
+            return await self._resolve_available_table(session.bind, tables)
+
+        cache_key = (str(session.bind.url), tuple(t.__tablename__ for t in tables))
+        cached_entry = _available_table_cache.get(cache_key)
+        if cached_entry is not None:
+            resolution_time, table = cached_entry
+            if (
+                time.monotonic() - resolution_time
+                < MATERIALIZED_TABLE_CACHE_TTL_SECONDS
+            ):
+                return table
+        return await self._resolve_available_table(session.bind, tables, cache_key)
+
+    async def _resolve_available_table(
+        self,
+        bind: AsyncEngine,
+        tables: list[Base],
+        cache_key: tuple[str, tuple[str, ...]] | None = None,
+    ) -> Base:
+        table_names = [table.__tablename__ for table in tables]
+        table_name = await find_first_existing_table(bind, table_names)
+        if table_name is None:
+            raise Exception(f"Tables :  {', '.join(table_names)} not found.")
+
+        table = tables[table_names.index(table_name)]
+        if cache_key is not None:
+            if table is tables[0]:
+                _available_table_cache[cache_key] = (time.monotonic(), table)
+            else:
+                _available_table_cache.pop(cache_key, None)
+        return table
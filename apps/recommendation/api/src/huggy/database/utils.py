@@ -1,5 +1,5 @@
 from sqlalchemy import inspect
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 
 
 async def get_table_names(session: AsyncSession) -> list[str]:
@@ -18,3 +18,19 @@ async def check_table_exists(session: AsyncSession, table_name: str) -> bool:
 
     async with session.bind.connect() as connection:
         return await connection.run_sync(__get)
+
+
+async def find_first_existing_table(
+    bind: AsyncEngine, table_names: list[str]
+) -> str | None:
+    """
+    Returns the first of table_names found in the database, checked in order on a
+    single connection (one catalog query per checked table).
+    """
+
+    def __get(engine):
+        inspector = inspect(engine)
+        return next((name for name in table_names if inspector.has_table(name)), None)
+
+    async with bind.connect() as connection:
+        return await connection.run_sync(__get)
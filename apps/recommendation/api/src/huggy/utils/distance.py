@@ -1,4 +1,7 @@
 import math
+import typing as t
+
+import numpy as np
 
 
 def haversine_distance(venue_latitude, venue_longitude, user_latitude, user_longitude):
@@ -27,3 +30,34 @@ def haversine_distance(venue_latitude, venue_longitude, user_latitude, user_long
     distance = earth_radius * c
 
     return distance * 1000
+
+
+def haversine_distances(
+    venue_latitudes: np.ndarray,
+    venue_longitudes: np.ndarray,
+    user_latitude: t.Optional[float],
+    user_longitude: t.Optional[float],
+) -> np.ndarray:
+    """
+    Vectorized haversine_distance: distances (in meters) between many venues and one point.
+    Missing coordinates (NaN venue coordinates, None point) give NaN distances.
+    """
+    if user_latitude is None or user_longitude is None:
+        return np.full(np.shape(venue_latitudes), np.nan)
+
+    earth_radius = 6371
+    venue_latitudes = np.radians(venue_latitudes)
+    venue_longitudes = np.radians(venue_longitudes)
+    user_latitude = math.radians(user_latitude)
+    user_longitude = math.radians(user_longitude)
+
+    dlat = user_latitude - venue_latitudes
+    dlon = user_longitude - venue_longitudes
+    a = (
+        np.sin(dlat / 2) ** 2
+        + np.cos(venue_latitudes) * math.cos(user_latitude) * np.sin(dlon / 2) ** 2
+    )
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    distances = earth_radius * c
+
+    return distances * 1000
@@ -37,6 +37,11 @@ SQL_BASE_PORT = os.environ.get("SQL_PORT", 5432)
 SQL_BASE_HOST = os.environ.get("SQL_HOST", "localhost")
 SQL_BASE_HOST_SECRET_ID = os.environ.get("SQL_HOST_SECRET_ID", "")
 API_TOKEN = "api_token"
+# Process-wide cache of the resolved materialized view (MaterializedBase.get_available_table).
+# 0 resolves the table on every query.
+MATERIALIZED_TABLE_CACHE_TTL_SECONDS = int(
+    os.environ.get("MATERIALIZED_TABLE_CACHE_TTL_SECONDS", 300)
+)
 
 if not API_LOCAL:
     SQL_BASE_SECRET_ID = os.environ.get(
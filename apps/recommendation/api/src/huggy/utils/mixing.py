@@ -1,8 +1,5 @@
-import collections
 import random
 
-import numpy as np
-
 from huggy.schemas.recommendable_offer import RankedOffer
 from huggy.utils.env_vars import NUMBER_OF_RECOMMENDATIONS
 
@@ -25,9 +22,11 @@ def order_offers_by_score_and_diversify_features(
     Return only the ids of these sorted offers.
     score_order_ascending is False, score = the higher the better
 
+    Groups listed in submixing_feature_dict are first diversified on their own feature
+    (one level, unless is_submixing). The round-robin stops at the end of the first round
+    reaching nb_reco_display offers.
     """
 
-    diversified_offers = []
     if shuffle_recommendation:
         for recommendation in scored_offers:
             setattr(recommendation, score_column, random.random())
@@ -35,58 +34,73 @@ def order_offers_by_score_and_diversify_features(
     offers_by_feature = _get_offers_grouped_by_feature(
         scored_offers, feature
     )  # here we group offers by cat (and score)
+    ordered_offer_groups = _order_offer_groups(
+        offers_by_feature,
+        score_column=score_column,
+        score_order_ascending=score_order_ascending,
+    )
 
-    to_submixed_data = {}
-    if submixing_feature_dict is not None:
-        for submixed_subcat in submixing_feature_dict:
+    if not is_submixing and submixing_feature_dict is not None:
+        for submixed_subcat, submixing_feature in submixing_feature_dict.items():
             if submixed_subcat in offers_by_feature:
-                to_submixed_data[submixed_subcat] = offers_by_feature[submixed_subcat]
-
-    offers_by_feature_ordered_by_frequency = collections.OrderedDict(
-        sorted(
-            offers_by_feature.items(),
-            key=lambda x: _get_number_of_offers_and_max_score_by_feature(
-                x,
-                score_column=score_column,
-                score_order_ascending=score_order_ascending,
-            ),
-            reverse=not score_order_ascending,
-        )
+                ordered_offer_groups[submixed_subcat] = _interleave_offer_groups(
+                    _order_offer_groups(
+                        _get_offers_grouped_by_feature(
+                            offers_by_feature[submixed_subcat], submixing_feature
+                        ),
+                        score_column=score_column,
+                        score_order_ascending=score_order_ascending,
+                    ).values()
+                )
+
+    return _interleave_offer_groups(
+        ordered_offer_groups.values(), nb_reco_display=nb_reco_display
     )
 
-    for offer_feature in offers_by_feature_ordered_by_frequency:
-        offers_by_feature_ordered_by_frequency[offer_feature] = sorted(
-            offers_by_feature_ordered_by_frequency[offer_feature],
+
+def _order_offer_groups(
+    offers_by_feature: dict,
+    score_column: str,
+    *,
+    score_order_ascending: bool,
+) -> dict:
+    """
+    Orders the groups by decreasing number of offers and best score, and the offers of
+    each group from the best score (ties keep the reverse of their input order).
+    """
+    ordered_features = sorted(
+        offers_by_feature.items(),
+        key=lambda x: _get_number_of_offers_and_max_score_by_feature(
+            x,
+            score_column=score_column,
+            score_order_ascending=score_order_ascending,
+        ),
+        reverse=not score_order_ascending,
+    )
+    return {
+        offer_feature: sorted(
+            offers,
             key=lambda k: getattr(k, score_column),
             reverse=score_order_ascending,
-        )
-    if (not is_submixing) and (len(to_submixed_data) > 0):
-        is_submixing = True
-        for subcat_to_mix in to_submixed_data:
-            submixed_data = order_offers_by_score_and_diversify_features(
-                to_submixed_data[subcat_to_mix],
-                score_column=score_column,
-                score_order_ascending=score_order_ascending,
-                shuffle_recommendation=None,
-                feature=submixing_feature_dict[subcat_to_mix],
-                nb_reco_display=len(to_submixed_data[subcat_to_mix]),
-                is_submixing=is_submixing,
-            )
-            submixed_data.reverse()
-            offers_by_feature_ordered_by_frequency[subcat_to_mix] = submixed_data
-    offers_by_feature_length = np.sum(
-        [len(offer_by_feature) for offer_by_feature in offers_by_feature.values()]
-    )
-    while len(diversified_offers) != offers_by_feature_length:
-        # here we pop one offer of eachsubcat
-        for offer_feature in offers_by_feature_ordered_by_frequency:
-            if offers_by_feature_ordered_by_frequency[offer_feature]:
-                diversified_offers.append(
-                    offers_by_feature_ordered_by_frequency[offer_feature].pop()
-                )
-        if len(diversified_offers) >= nb_reco_display:
-            break
+        )[::-1]
+        for offer_feature, offers in ordered_features
+    }
 
+
+def _interleave_offer_groups(offer_groups, nb_reco_display=None) -> list:
+    """
+    Round-robin over the ordered groups: round r takes the r-th offer of every group
+    holding more than r offers. Offers are read by index, in linear time.
+    """
+    diversified_offers = []
+    active_groups = list(offer_groups)
+    round_index = 0
+    while active_groups:
+        active_groups = [group for group in active_groups if len(group) > round_index]
+        diversified_offers.extend(group[round_index] for group in active_groups)
+        round_index += 1
+        if nb_reco_display is not None and len(diversified_offers) >= nb_reco_display:
+            break
     return diversified_offers
 
 
@@ -6,7 +6,7 @@ import grpc
 from aiocache import Cache, cached
 from fastapi.encoders import jsonable_encoder
 from google.api_core.exceptions import DeadlineExceeded
-from google.cloud import aiplatform
+from google.cloud import aiplatform_v1
 from google.protobuf import json_format
 from google.protobuf.struct_pb2 import Value
 
@@ -28,21 +28,31 @@ async def get_model(endpoint_name, location):
 
 
 async def __get_model(endpoint_name, location):
-    endpoint = aiplatform.Endpoint.list(
-        filter=f"display_name={endpoint_name}", location=location, project=GCP_PROJECT
-    )[0]
-    endpoint_dict = endpoint.to_dict()
+    client = await get_endpoint_client(f"{location}-aiplatform.googleapis.com")
+    response = await client.list_endpoints(
+        parent=f"projects/{GCP_PROJECT}/locations/{location}",
+        filter=f"display_name={endpoint_name}",
+    )
+    endpoint = response.endpoints[0]
     return {
-        "model_name": endpoint_dict["displayName"],
-        "model_version_id": endpoint_dict["deployedModels"][0]["displayName"],
-        "endpoint_path": endpoint_dict["name"],
+        "model_name": endpoint.display_name,
+        "model_version_id": endpoint.deployed_models[0].display_name,
+        "endpoint_path": endpoint.name,
     }
 
 
+# Async gRPC clients: the Vertex round trips are awaited instead of blocking the
+# event loop, so that the predictions gathered by the endpoints run concurrently.
 @cached(ttl=600, cache=Cache.MEMORY)
 async def get_client(api_endpoint):
     client_options = {"api_endpoint": api_endpoint}
-    return aiplatform.gapic.PredictionServiceClient(client_options=client_options)
+    return aiplatform_v1.PredictionServiceAsyncClient(client_options=client_options)
+
+
+@cached(ttl=600, cache=Cache.MEMORY)
+async def get_endpoint_client(api_endpoint):
+    client_options = {"api_endpoint": api_endpoint}
+    return aiplatform_v1.EndpointServiceAsyncClient(client_options=client_options)
 
 
 async def endpoint_score(
@@ -76,7 +86,7 @@ async def endpoint_score(
 
 async def predict_model(
     endpoint_name: str,
-    instances: Union[dict, list[dict]],
+    instances: Union[dict, list[dict], list[Value]],
     location: str = "europe-west1",
     api_endpoint: str = "europe-west1-aiplatform.googleapis.com",
 ) -> dict:
@@ -85,13 +95,13 @@ async def predict_model(
 
 async def __predict_model(
     endpoint_name: str,
-    instances: Union[dict, list[dict]],
+    instances: Union[dict, list[dict], list[Value]],
     location: str = "europe-west1",
     api_endpoint: str = "europe-west1-aiplatform.googleapis.com",
 ) -> dict:
     """
     `instances` can be either single instance of type dict or a list
-    of instances.
+    of instances, as dicts or as protobuf Values.
 
     """
 
@@ -117,23 +127,30 @@ async def __predict_model(
             )
         instances = instances if isinstance(instances, list) else [instances]
 
+        # Instances already built as protobuf (ranking features) are sent as is.
+        # Their payload is large (up to 24 features for 200 offers): only count them.
+        is_protobuf = all(isinstance(instance, Value) for instance in instances)
         logger.debug(
             "__predict_endpoint : predict",
             extra={
                 "event_name": "predict_model",
                 "endpoint_name": endpoint_name,
-                "details": {"instances": jsonable_encoder(instances)},
+                "details": {"instances_count": len(instances)}
+                if is_protobuf
+                else {"instances": jsonable_encoder(instances)},
             },
         )
 
-        instances = [
-            json_format.ParseDict(instance_dict, Value()) for instance_dict in instances
-        ]
+        if not is_protobuf:
+            instances = [
+                json_format.ParseDict(instance_dict, Value())
+                for instance_dict in instances
+            ]
         parameters_dict = {}
         parameters = json_format.ParseDict(parameters_dict, Value())
 
         try:
-            response = client.predict(
+            response = await client.predict(
                 endpoint=model_params["endpoint_path"],
                 instances=instances,
                 parameters=parameters,
@@ -0,0 +1,127 @@
+"""
+Benchmark: ranked items CTE of RecommendableOffer.get_nearest_offers, literal vs bound arrays.
+
+The ranked items used to be inlined in the SQL text (unnest(ARRAY[('id'::VARCHAR, rank::INT), ...])),
+so every request sent a distinct, large statement that Postgres parsed and planned from scratch
+and that asyncpg prepared again. They are now bound as two arrays (unnest(:item_ids, :item_ranks)).
+
+For --requests requests of --items ranked items, this script reports the statement text size and
+the number of distinct statement texts (each one is a new prepared statement and plan). With
+--execute, it also runs both CTEs against the local database and reports the latency percentiles.
+
+Usage:
+    PYTHONPATH=src API_LOCAL=1 python src/scripts/benchmark_ranked_items_query.py --items 600
+    make prepare_db && PYTHONPATH=src API_LOCAL=1 python src/scripts/benchmark_ranked_items_query.py --execute
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from types import SimpleNamespace
+
+from sqlalchemy import Integer, String, select, text
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from huggy.crud.recommendable_offer import RecommendableOffer
+from huggy.database.config import config
+from huggy.database.database import sessionmanager
+
+
+def get_items_with_literal_array(recommendable_items_ids):
+    """Reference: the ranked items inlined in the statement text (former get_items)."""
+    arr_sql = ",".join(
+        [
+            f"('{v.item_id}'::VARCHAR, {v.item_rank}::INT)"
+            for v in recommendable_items_ids
+        ]
+    )
+    return (
+        text(
+            f"""
+                SELECT s.item_id, s.item_rank
+                FROM unnest(ARRAY[{arr_sql}])
+                AS s(item_id VARCHAR, item_rank INT)
+            """
+        )
+        .columns(item_id=String, item_rank=Integer)
+        .cte("ranked_items")
+    )
+
+
+def build_requests(request_count: int, item_count: int) -> list[list[SimpleNamespace]]:
+    random_generator = random.Random(42)
+    return [
+        [
+            SimpleNamespace(
+                item_id=f"movie-{random_generator.randrange(100_000)}", item_rank=rank
+            )
+            for rank in range(item_count)
+        ]
+        for _ in range(request_count)
+    ]
+
+
+def build_statement(get_items, ranked_items):
+    ranked_items_cte = get_items(ranked_items)
+    return select(ranked_items_cte.c.item_id, ranked_items_cte.c.item_rank)
+
+
+async def time_execution(get_items, requests) -> list[float]:
+    latencies = []
+    async with sessionmanager.session() as session:
+        for ranked_items in requests:
+            start_time = time.perf_counter()
+            await session.execute(build_statement(get_items, ranked_items))
+            latencies.append(time.perf_counter() - start_time)
+    return latencies
+
+
+async def main(arguments: argparse.Namespace) -> None:
+    requests = build_requests(arguments.requests, arguments.items)
+    variants = {
+        "literal": get_items_with_literal_array,
+        "bound": RecommendableOffer().get_items,
+    }
+
+    print(
+        f"Requests: {arguments.requests} | Ranked items per request: {arguments.items}"
+    )
+    for label, get_items in variants.items():
+        statement_texts = [
+            str(
+                build_statement(get_items, ranked_items).compile(
+                    dialect=asyncpg.dialect()
+                )
+            )
+            for ranked_items in requests
+        ]
+        print(
+            f"{label:<8} statement text = "
+            f"{statistics.mean(len(t.encode()) for t in statement_texts):8.0f} bytes | "
+            f"distinct statements = {len(set(statement_texts))}"
+        )
+
+    if arguments.execute:
+        sessionmanager.init(config.DB_CONFIG)
+        try:
+            for label, get_items in variants.items():
+                latencies = sorted(await time_execution(get_items, requests))
+                print(
+                    f"{label:<8} p50 = {statistics.median(latencies) * 1e3:6.2f} ms | "
+                    f"p99 = {latencies[int(len(latencies) * 0.99) - 1] * 1e3:6.2f} ms"
+                )
+        finally:
+            await sessionmanager.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--items", type=int, default=600)
+    parser.add_argument("--execute", action="store_true")
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,107 @@
+"""
+Benchmark: database round trips of MaterializedBase.get_available_table per request.
+
+A v1 request resolves up to 6 materialized view families (user profile, IRIS, non
+recommendable items, nearest offers, item, similar artists). Each resolution opens a
+connection and runs one catalog query per checked table. This script resolves the 6
+families for --requests simulated requests, with the table cache disabled then enabled,
+and counts the connections and catalog queries issued per request.
+
+The round trips saved by the cache are unmeasured so far: the script has not been run
+against a database yet.
+
+Requires a database with the tables created (make prepare_db create_tables).
+
+Usage:
+    make benchmark_table_resolution
+    PYTHONPATH=src API_LOCAL=1 python src/scripts/benchmark_table_resolution.py --requests 200
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import event
+
+import huggy.database.base as base_module
+from huggy.database.config import config
+from huggy.database.database import sessionmanager
+from huggy.models.enriched_user import EnrichedUser
+from huggy.models.iris_france import IrisFrance
+from huggy.models.item_ids import ItemIds
+from huggy.models.non_recommendable_items import NonRecommendableItems
+from huggy.models.recommendable_offers_raw import RecommendableOffersRaw
+from huggy.models.similar_artist import SimilarArtist
+
+MATERIALIZED_FAMILIES = [
+    EnrichedUser,
+    IrisFrance,
+    NonRecommendableItems,
+    RecommendableOffersRaw,
+    ItemIds,
+    SimilarArtist,
+]
+
+
+async def run_requests(request_count: int, cache_ttl_seconds: int) -> dict[str, float]:
+    base_module.MATERIALIZED_TABLE_CACHE_TTL_SECONDS = cache_ttl_seconds
+    base_module.clear_available_table_cache()
+    counters = {"connections": 0, "queries": 0}
+
+    sync_engine = sessionmanager._engine.sync_engine
+
+    def count_checkout(*_):
+        counters["connections"] += 1
+
+    def count_query(*_):
+        counters["queries"] += 1
+
+    event.listen(sync_engine, "checkout", count_checkout)
+    event.listen(sync_engine, "before_cursor_execute", count_query)
+    start_time = time.perf_counter()
+    try:
+        for _ in range(request_count):
+            async with sessionmanager.session() as session:
+                for family in MATERIALIZED_FAMILIES:
+                    await family().get_available_table(session)
+    finally:
+        event.remove(sync_engine, "checkout", count_checkout)
+        event.remove(sync_engine, "before_cursor_execute", count_query)
+
+    elapsed_time = time.perf_counter() - start_time
+    return {
+        "connections": counters["connections"] / request_count,
+        "queries": counters["queries"] / request_count,
+        "latency_ms": elapsed_time * 1e3 / request_count,
+    }
+
+
+async def main(request_count: int, cache_ttl_seconds: int) -> None:
+    sessionmanager.init(config.DB_CONFIG)
+    try:
+        uncached = await run_requests(request_count, cache_ttl_seconds=0)
+        cached = await run_requests(request_count, cache_ttl_seconds=cache_ttl_seconds)
+    finally:
+        await sessionmanager.close()
+
+    print(
+        f"Requests: {request_count} | Families per request: {len(MATERIALIZED_FAMILIES)}"
+    )
+    for label, result in (("no cache", uncached), ("cache", cached)):
+        print(
+            f"{label:<9} connections/request = {result['connections']:5.2f} | "
+            f"queries/request = {result['queries']:5.2f} | "
+            f"resolution = {result['latency_ms']:6.2f} ms/request"
+        )
+    print(f"Queries removed per request: {uncached['queries'] - cached['queries']:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--cache-ttl-seconds", type=int, default=300)
+    arguments = parser.parse_args()
+
+    asyncio.run(main(arguments.requests, arguments.cache_ttl_seconds))
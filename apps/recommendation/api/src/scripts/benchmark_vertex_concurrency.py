@@ -0,0 +1,127 @@
+"""
+Load test: concurrency of the Vertex predictions gathered by the v1 endpoints.
+
+Sends --concurrency predictions with asyncio.gather, as OfferScorer.get_scoring and
+ModelRankingEndpoint._get_predictions do, --rounds times, and reports the wall time of
+a gather against the latency of a single prediction. With a non-blocking client, the
+gather takes about one prediction latency; with a client blocking the event loop, it
+takes the sum of all latencies.
+
+--simulated-latency-ms replaces Vertex by a fake client (no GCP access needed): an
+async one (the current client) and a blocking one (the former synchronous client).
+Otherwise, "tops" retrieval payloads are sent to --endpoint-name.
+
+Usage:
+    PYTHONPATH=src API_LOCAL=1 python src/scripts/benchmark_vertex_concurrency.py --simulated-latency-ms 100
+    PYTHONPATH=src API_LOCAL=1 python src/scripts/benchmark_vertex_concurrency.py \\
+        --endpoint-name recommendation_user_retrieval_dev --concurrency 4
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from types import SimpleNamespace
+
+import huggy.utils.vertex_ai as vertex_ai
+from huggy.core.model_selection.endpoint import RetrievalEndpointName
+from huggy.utils.vertex_ai import endpoint_score
+
+
+class SimulatedAsyncPredictionClient:
+    def __init__(self, latency_seconds: float):
+        self.latency_seconds = latency_seconds
+
+    async def predict(self, endpoint, instances, parameters, timeout):
+        await asyncio.sleep(self.latency_seconds)
+        return SimpleNamespace(predictions=[])
+
+
+class SimulatedBlockingPredictionClient(SimulatedAsyncPredictionClient):
+    async def predict(self, endpoint, instances, parameters, timeout):
+        time.sleep(self.latency_seconds)  # As the former synchronous client
+        return SimpleNamespace(predictions=[])
+
+
+def use_simulated_client(client: SimulatedAsyncPredictionClient) -> None:
+    async def get_client(api_endpoint):
+        return client
+
+    async def get_model(endpoint_name, location):
+        return {"model_name": "simulated", "model_version_id": "0", "endpoint_path": ""}
+
+    vertex_ai.get_client = get_client
+    vertex_ai.get_model = get_model
+
+
+def build_tops_instance() -> dict:
+    return {
+        "model_type": "tops",
+        "vector_column_name": "booking_number_desc",
+        "size": 10,
+        "params": {},
+        "debug": 1,
+        "call_id": str(uuid.uuid4()),
+    }
+
+
+async def run_load_test(endpoint_name: str, concurrency: int, round_count: int) -> str:
+    single_latencies, gather_latencies = [], []
+    for _ in range(round_count):
+        start_time = time.perf_counter()
+        await endpoint_score(endpoint_name, build_tops_instance())
+        single_latencies.append(time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        await asyncio.gather(
+            *[
+                endpoint_score(endpoint_name, build_tops_instance())
+                for _ in range(concurrency)
+            ]
+        )
+        gather_latencies.append(time.perf_counter() - start_time)
+
+    single_ms = statistics.median(single_latencies) * 1e3
+    gather_ms = statistics.median(gather_latencies) * 1e3
+    return (
+        f"single p50 = {single_ms:7.1f} ms | gather of {concurrency} p50 = "
+        f"{gather_ms:7.1f} ms | effective concurrency = "
+        f"{concurrency * single_ms / gather_ms:4.1f}"
+    )
+
+
+async def main(arguments: argparse.Namespace) -> None:
+    if arguments.simulated_latency_ms is None:
+        print(
+            await run_load_test(
+                arguments.endpoint_name, arguments.concurrency, arguments.rounds
+            )
+        )
+        return
+
+    latency_seconds = arguments.simulated_latency_ms / 1e3
+    for label, client in (
+        ("blocking", SimulatedBlockingPredictionClient(latency_seconds)),
+        ("async", SimulatedAsyncPredictionClient(latency_seconds)),
+    ):
+        use_simulated_client(client)
+        result = await run_load_test(
+            "simulated", arguments.concurrency, arguments.rounds
+        )
+        print(f"{label:<9} {result}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--endpoint-name",
+        default=RetrievalEndpointName.recommendation_user_retrieval.value,
+    )
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--simulated-latency-ms", type=float, default=None)
+
+    asyncio.run(main(parser.parse_args()))
@@ -10,6 +10,7 @@ from httpx import ASGITransport
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from huggy import init_app
+from huggy.database.base import clear_available_table_cache
 from huggy.database.config import config
 from huggy.database.database import sessionmanager
 from huggy.database.session import get_db
@@ -152,6 +153,7 @@ async def drop_mv_database(
     """
     async with sessionmanager.session() as session:
         await clean_db(session, models=[EnrichedUserMv, RecommendableOffersRawMv])
+        clear_available_table_cache()
         try:
             yield session
         finally:
@@ -178,6 +180,7 @@ async def drop_mv_and_tmp_database(
                 RecommendableOffersRawMvTmp,
             ],
         )
+        clear_available_table_cache()
         try:
             yield session
         finally:
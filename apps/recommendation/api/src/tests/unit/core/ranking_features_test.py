@@ -0,0 +1,114 @@
+from datetime import datetime
+
+from google.protobuf import json_format
+
+from huggy.core.endpoint.ranking_features import build_ranking_instances
+from huggy.schemas.recommendable_offer import RecommendableOffer
+from huggy.schemas.user import UserContext
+
+NOW = datetime(2026, 3, 12, 15, 30)  # A Thursday
+
+USER = UserContext(
+    user_id="111",
+    longitude=2.35,
+    latitude=48.85,
+    is_geolocated=True,
+    bookings_count=3,
+    clicks_count=1,
+    favorites_count=1,
+    user_deposit_remaining_credit=120,
+)
+
+
+def build_offer(offer_id: str, **overrides) -> RecommendableOffer:
+    return RecommendableOffer(
+        **{
+            "offer_id": offer_id,
+            "item_id": f"item-{offer_id}",
+            "item_rank": 2,
+            "item_score": 0.5,
+            "item_origin": "user_based",
+            "item_cluster_id": None,
+            "item_topic_id": None,
+            "semantic_emb_mean": 0.25,
+            "is_geolocated": True,
+            "booking_number": 10,
+            "booking_number_last_7_days": 1,
+            "booking_number_last_14_days": 2,
+            "booking_number_last_28_days": 4,
+            "stock_price": 12.5,
+            "category": "LIVRE",
+            "subcategory_id": "LIVRE_PAPIER",
+            "search_group_name": "LIVRES",
+            "offer_creation_date": datetime(2026, 3, 2, 15, 30),
+            "stock_beginning_date": None,
+            "gtl_id": None,
+            "gtl_l3": None,
+            "gtl_l4": None,
+            "total_offers": 1,
+            "example_offer_id": None,
+            "example_venue_latitude": None,
+            "example_venue_longitude": None,
+            "user_distance": 1500.0,
+            "venue_latitude": None,
+            "venue_longitude": None,
+            **overrides,
+        }
+    )
+
+
+def test_build_ranking_instances_matches_the_feature_dicts():
+    offers = [
+        build_offer("offer-a"),
+        build_offer("offer-b", item_score=None, user_distance=None),
+    ]
+
+    instances = json_format.MessageToDict(
+        build_ranking_instances(offers, USER, "recommendation", now=NOW)
+    )
+
+    assert instances[0] == {
+        "offer_id": "offer-a",
+        "context": "recommendation:user_based",
+        "offer_subcategory_id": "LIVRE_PAPIER",
+        "user_bookings_count": 3.0,
+        "user_clicks_count": 1.0,
+        "user_favorites_count": 1.0,
+        "user_deposit_remaining_credit": 120.0,
+        "user_is_geolocated": 1.0,
+        "user_iris_x": 2.35,
+        "user_iris_y": 48.85,
+        "offer_user_distance": 1500.0,
+        "offer_booking_number": 10.0,
+        "offer_booking_number_last_7_days": 1.0,
+        "offer_booking_number_last_14_days": 2.0,
+        "offer_booking_number_last_28_days": 4.0,
+        "offer_semantic_emb_mean": 0.25,
+        "offer_item_score": 0.5,
+        "offer_item_rank": 2.0,
+        "offer_is_geolocated": 1.0,
+        "offer_stock_price": 12.5,
+        "offer_creation_days": -10.0,
+        "offer_stock_beginning_days": None,
+        "day_of_the_week": 3.0,
+        "hour_of_the_day": 15.0,
+    }
+    assert instances[1]["offer_id"] == "offer-b"
+    assert instances[1]["offer_item_score"] is None
+    assert instances[1]["offer_user_distance"] is None
+
+
+def test_build_ranking_instances_forces_booking_numbers_to_zero():
+    instances = json_format.MessageToDict(
+        build_ranking_instances(
+            [build_offer("offer-a")],
+            USER,
+            "recommendation",
+            with_booking_numbers=False,
+            now=NOW,
+        )
+    )
+
+    assert instances[0]["offer_booking_number"] == 0
+    assert instances[0]["offer_booking_number_last_28_days"] == 0
+    assert instances[0]["offer_item_rank"] == 2.0
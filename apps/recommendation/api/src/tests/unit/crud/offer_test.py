@@ -0,0 +1,35 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from huggy.crud.offer import Offer
+
+
+@pytest.mark.parametrize(
+    "offer_ids",
+    [
+        [],
+        ["offer-movie-1"],
+        ["offer-movie-3", "unknown-offer", "offer-movie-1", "offer-movie-3"],
+    ],
+)
+async def test_parse_offer_list_matches_offer_by_offer_characterization(
+    setup_default_database: AsyncSession, offer_ids: list[str]
+):
+    """
+    The batched query should return the found offers in input order, as the
+    lookups offer by offer.
+
+    """
+    expected_offers = [
+        offer
+        for offer_id in offer_ids
+        if (
+            offer := await Offer().get_offer_characteristics(
+                setup_default_database, offer_id
+            )
+        ).found
+    ]
+
+    offers = await Offer.parse_offer_list(setup_default_database, offer_ids)
+
+    assert offers == expected_offers
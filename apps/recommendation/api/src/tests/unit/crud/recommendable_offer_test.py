@@ -1,6 +1,8 @@
 import logging
 
 import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import asyncpg
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from huggy.crud.recommendable_offer import RecommendableOffer as RecommendableOfferDB
@@ -209,3 +211,17 @@ class RecommendableOfferTest:
             assert abs(result.user_distance - expected.user_distance) // 1000 == 0, (
                 "Distances should be the same in kilometers."
             )
+
+    def test_ranked_items_are_bound_outside_of_the_statement_text(self):
+        """The statement text must not depend on the ranked items (prepared statement reuse)."""
+        statement_texts = [
+            str(
+                select(RecommendableOfferDB().get_items(items)).compile(
+                    dialect=asyncpg.dialect()
+                )
+            )
+            for items in (items_paris, items_all)
+        ]
+
+        assert statement_texts[0] == statement_texts[1]
+        assert all(item.item_id not in statement_texts[1] for item in items_all)
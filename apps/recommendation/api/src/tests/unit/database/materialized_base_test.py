@@ -0,0 +1,71 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+import huggy.database.base as base_module
+from huggy.database.base import MaterializedBase, clear_available_table_cache
+
+
+class FakeTableMv:
+    __tablename__ = "fake_table_mv"
+
+
+class FakeTableMvOld:
+    __tablename__ = "fake_table_mv_old"
+
+
+class FakeTable(MaterializedBase):
+    def materialized_tables(self):
+        return [FakeTableMv, FakeTableMvOld]
+
+
+SESSION = SimpleNamespace(bind=SimpleNamespace(url="postgresql+asyncpg://test/db"))
+
+
+@pytest.fixture()
+def existing_tables(monkeypatch):
+    """Tables found in the fake database, counting the catalog lookups."""
+    tables = {"fake_table_mv", "fake_table_mv_old"}
+
+    async def find_first_existing_table(bind, table_names):
+        return next((name for name in table_names if name in tables), None)
+
+    lookup = AsyncMock(side_effect=find_first_existing_table)
+    monkeypatch.setattr(base_module, "find_first_existing_table", lookup)
+    clear_available_table_cache()
+    yield SimpleNamespace(tables=tables, lookup=lookup)
+    clear_available_table_cache()
+
+
+class MaterializedBaseTest:
+    async def test_resolves_the_preferred_table_once(self, existing_tables):
+        tables = [await FakeTable().get_available_table(SESSION) for _ in range(5)]
+
+        assert tables == [FakeTableMv] * 5
+        assert existing_tables.lookup.call_count == 1
+
+    async def test_fallback_tables_are_not_cached(self, existing_tables):
+        existing_tables.tables.discard("fake_table_mv")
+
+        assert await FakeTable().get_available_table(SESSION) is FakeTableMvOld
+        assert await FakeTable().get_available_table(SESSION) is FakeTableMvOld
+        assert existing_tables.lookup.call_count == 2
+
+    async def test_expired_table_is_checked_again_before_being_served(
+        self, existing_tables, monkeypatch
+    ):
+        await FakeTable().get_available_table(SESSION)
+        monkeypatch.setattr(base_module, "MATERIALIZED_TABLE_CACHE_TTL_SECONDS", 0.01)
+        await asyncio.sleep(0.02)
+        existing_tables.tables.discard("fake_table_mv")
+
+        assert await FakeTable().get_available_table(SESSION) is FakeTableMvOld
+        assert existing_tables.lookup.call_count == 2
+
+    async def test_missing_tables_raise(self, existing_tables):
+        existing_tables.tables.clear()
+
+        with pytest.raises(Exception, match="fake_table_mv, fake_table_mv_old"):
+            await FakeTable().get_available_table(SESSION)
@@ -1,4 +1,7 @@
-from huggy.utils.distance import haversine_distance
+import numpy as np
+import pytest
+
+from huggy.utils.distance import haversine_distance, haversine_distances
 
 # Coordinates for Paris and Marseille
 paris_lat = 48.8566
@@ -11,3 +14,24 @@ expected_distance = 660478
 def test_haversine_distance():
     distance = haversine_distance(paris_lat, paris_lon, marseille_lat, marseille_lon)
     assert (distance - expected_distance) // 1000 == 0, "distance should be equal"
+
+
+def test_haversine_distances_matches_scalar_version():
+    distances = haversine_distances(
+        np.array([paris_lat, marseille_lat, np.nan]),
+        np.array([paris_lon, marseille_lon, paris_lon]),
+        marseille_lat,
+        marseille_lon,
+    )
+    assert distances[0] == pytest.approx(
+        haversine_distance(paris_lat, paris_lon, marseille_lat, marseille_lon)
+    )
+    assert distances[1] == 0
+    assert np.isnan(distances[2])
+
+
+def test_haversine_distances_without_reference_point():
+    distances = haversine_distances(
+        np.array([paris_lat]), np.array([paris_lon]), None, None
+    )
+    assert np.isnan(distances).all()
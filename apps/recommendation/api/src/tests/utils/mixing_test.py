@@ -1,7 +1,16 @@
+import collections
+import random
+
+import numpy as np
+import pytest
 from numpy.testing import assert_array_equal
 
 from huggy.schemas.recommendable_offer import RankedOffer
-from huggy.utils.mixing import order_offers_by_score_and_diversify_features
+from huggy.utils.mixing import (
+    _get_number_of_offers_and_max_score_by_feature,
+    _get_offers_grouped_by_feature,
+    order_offers_by_score_and_diversify_features,
+)
 
 mock_scored_offers = [
     RankedOffer(
@@ -190,6 +199,86 @@ mock_scored_offers = [
         offer_origin="default",
     ),
 ]
+
+
+def legacy_order_offers_by_score_and_diversify_features(
+    scored_offers,
+    score_column="offer_rank",
+    score_order_ascending=True,
+    feature="subcategory_id",
+    nb_reco_display=20,
+    is_submixing=False,
+    submixing_feature_dict=None,
+):
+    """Recursive version with list.pop(), kept as the reference behaviour."""
+    diversified_offers = []
+    offers_by_feature = _get_offers_grouped_by_feature(scored_offers, feature)
+    to_submixed_data = {}
+    if submixing_feature_dict is not None:
+        for submixed_subcat in submixing_feature_dict:
+            if submixed_subcat in offers_by_feature:
+                to_submixed_data[submixed_subcat] = offers_by_feature[submixed_subcat]
+    offers_by_feature_ordered_by_frequency = collections.OrderedDict(
+        sorted(
+            offers_by_feature.items(),
+            key=lambda x: _get_number_of_offers_and_max_score_by_feature(
+                x,
+                score_column=score_column,
+                score_order_ascending=score_order_ascending,
+            ),
+            reverse=not score_order_ascending,
+        )
+    )
+    for offer_feature in offers_by_feature_ordered_by_frequency:
+        offers_by_feature_ordered_by_frequency[offer_feature] = sorted(
+            offers_by_feature_ordered_by_frequency[offer_feature],
+            key=lambda k: getattr(k, score_column),
+            reverse=score_order_ascending,
+        )
+    if (not is_submixing) and (len(to_submixed_data) > 0):
+        for subcat_to_mix in to_submixed_data:
+            submixed_data = legacy_order_offers_by_score_and_diversify_features(
+                to_submixed_data[subcat_to_mix],
+                score_column=score_column,
+                score_order_ascending=score_order_ascending,
+                feature=submixing_feature_dict[subcat_to_mix],
+                nb_reco_display=len(to_submixed_data[subcat_to_mix]),
+                is_submixing=True,
+            )
+            submixed_data.reverse()
+            offers_by_feature_ordered_by_frequency[subcat_to_mix] = submixed_data
+    offers_by_feature_length = np.sum(
+        [len(offer_by_feature) for offer_by_feature in offers_by_feature.values()]
+    )
+    while len(diversified_offers) != offers_by_feature_length:
+        for offer_feature in offers_by_feature_ordered_by_frequency:
+            if offers_by_feature_ordered_by_frequency[offer_feature]:
+                diversified_offers.append(
+                    offers_by_feature_ordered_by_frequency[offer_feature].pop()
+                )
+        if len(diversified_offers) >= nb_reco_display:
+            break
+    return diversified_offers
+
+
+def build_random_scored_offers(seed):
+    random_generator = random.Random(seed)
+    subcategory_ids = ["LIVRE_PAPIER", "CINEMA", "SPECTACLE", "CONCERT"]
+    return [
+        mock_scored_offers[0].model_copy(
+            update={
+                "offer_id": f"offer_{offer_index}",
+                "item_id": f"offer_{offer_index}",
+                "subcategory_id": random_generator.choice(subcategory_ids),
+                "gtl_id": random_generator.choice(["01010000", "01020500", None]),
+                # few distinct scores: offers and groups tie
+                "offer_score": random_generator.choice([0.1, 0.5, 0.9]),
+            }
+        )
+        for offer_index in range(random_generator.randint(0, 150))
+    ]
+
+
 ## Reminder on diversification rule
 # output list is order by top score of the category, picking one in each category
 # until reaching Nb of Recommendations
@@ -238,3 +327,27 @@ class DiversificationTest:
             mock_expected_submixing_output,
             ids,
         )
+
+    @pytest.mark.parametrize("seed", range(30))
+    @pytest.mark.parametrize("nb_reco_display", [1, 20, 60, 1000])
+    @pytest.mark.parametrize("score_order_ascending", [True, False])
+    def test_diversification_matches_legacy_recursive_version(
+        self, seed, nb_reco_display, score_order_ascending
+    ):
+        scored_offers = build_random_scored_offers(seed)
+        diversification_params = {
+            "score_column": "offer_score",
+            "score_order_ascending": score_order_ascending,
+            "feature": "subcategory_id",
+            "nb_reco_display": nb_reco_display,
+            "submixing_feature_dict": {"LIVRE_PAPIER": "gtl_id"},
+        }
+
+        offers = order_offers_by_score_and_diversify_features(
+            scored_offers, shuffle_recommendation=None, **diversification_params
+        )
+        expected_offers = legacy_order_offers_by_score_and_diversify_features(
+            scored_offers, **diversification_params
+        )
+
+        assert [x.offer_id for x in offers] == [x.offer_id for x in expected_offers]
@@ -0,0 +1,54 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import huggy.utils.vertex_ai as vertex_ai
+from huggy.utils.vertex_ai import endpoint_score
+
+VERTEX_LATENCY_SECONDS = 0.1
+MODEL_PARAMS = {
+    "model_name": "ranking",
+    "model_version_id": "v1",
+    "endpoint_path": "projects/p/locations/l/endpoints/1",
+}
+
+
+class FakePredictionServiceAsyncClient:
+    async def predict(self, endpoint, instances, parameters, timeout):
+        await asyncio.sleep(VERTEX_LATENCY_SECONDS)
+        return SimpleNamespace(predictions=[0.5] * len(instances))
+
+
+@pytest.fixture()
+def fake_vertex(monkeypatch):
+    async def get_client(api_endpoint):
+        return FakePredictionServiceAsyncClient()
+
+    async def get_model(endpoint_name, location):
+        return MODEL_PARAMS
+
+    monkeypatch.setattr(vertex_ai, "get_client", get_client)
+    monkeypatch.setattr(vertex_ai, "get_model", get_model)
+
+
+async def test_endpoint_score_returns_the_predictions(fake_vertex):
+    result = await endpoint_score("ranking", [{"offer_id": "1"}, {"offer_id": "2"}])
+
+    assert result.status == "success"
+    assert result.predictions == [0.5, 0.5]
+    assert result.model_version == "v1"
+
+
+async def test_gathered_predictions_run_concurrently(fake_vertex):
+    """The batches scored by the ranking endpoint must not wait for each other."""
+    batch_count = 5
+    start_time = time.perf_counter()
+
+    results = await asyncio.gather(
+        *[endpoint_score("ranking", [{"offer_id": "1"}]) for _ in range(batch_count)]
+    )
+
+    assert len(results) == batch_count
+    assert time.perf_counter() - start_time < 2 * VERTEX_LATENCY_SECONDS
@@ -0,0 +1,122 @@
+/* Create the function computing the nearest offers of multi-venue items per H3 cell.
+ We use a function otherwise the materialized view is a dependency of the tables and blocks the drop operation.
+
+ For every item offered in several venues and every H3 cell (resolution 6) within 10 rings of one
+ of its venues, keeps the 5 offers closest to the center of the cell (offer_rank 1 = closest), and
+ the center distance of the 6th one (next_candidate_distance, NULL when every candidate is kept).
+ 10 rings at resolution 6 cover more than 50 km around every point of the cell.
+
+ The recommendation API (v2) looks up the cell of the user, re-computes the exact distances and
+ falls back to its live query when the kept offers cannot prove which one is the closest.
+
+ Requires the h3 extension (h3-pg >= 4). Reads recommendable_offers_raw_mv and venue_h3_mapping_mv:
+ run once these have been refreshed. */
+CREATE EXTENSION IF NOT EXISTS h3;
+
+DROP FUNCTION IF EXISTS get_item_h3_closest_offers_{{ ts_nodash  }} CASCADE;
+CREATE OR REPLACE FUNCTION get_item_h3_closest_offers_{{ ts_nodash  }}()
+RETURNS TABLE (
+                item_id varchar,
+                user_h3_cell varchar,
+                offer_rank integer,
+                offer_id varchar,
+                venue_id integer,
+                cell_center_distance double precision,
+                next_candidate_distance double precision
+                ) AS
+$body$
+BEGIN
+    RETURN QUERY
+    WITH item_venues AS (
+        -- One row per (item, offer, venue): screenings of the same offer share their venue
+        SELECT DISTINCT
+            ro.item_id,
+            ro.offer_id,
+            ro.venue_id,
+            v.latitude,
+            v.longitude,
+            v.h3_res6
+        FROM public.recommendable_offers_raw_mv ro
+        JOIN public.venue_h3_mapping_mv v ON v.venue_id = ro.venue_id
+        WHERE v.h3_res6 IS NOT NULL
+    ),
+    multi_venue_items AS (
+        SELECT iv.item_id
+        FROM item_venues iv
+        GROUP BY iv.item_id
+        HAVING COUNT(*) > 1
+    ),
+    candidate_offers AS (
+        -- Each offer is a candidate for every cell around its venue
+        SELECT
+            iv.item_id,
+            iv.offer_id,
+            iv.venue_id,
+            iv.latitude,
+            iv.longitude,
+            h3_grid_disk(iv.h3_res6::h3index, 10) AS user_h3_cell
+        FROM item_venues iv
+        JOIN multi_venue_items mvi ON mvi.item_id = iv.item_id
+    ),
+    candidate_distances AS (
+        -- Same Haversine formula as the API (core/geo.py build_haversine_distance_expression)
+        SELECT
+            co.item_id,
+            co.user_h3_cell,
+            co.offer_id,
+            co.venue_id,
+            6371000.0 * acos(least(1.0,
+                sin(radians(co.latitude)) * sin(radians(cell_center[1]))
+                + cos(radians(co.latitude)) * cos(radians(cell_center[1]))
+                * cos(radians(cell_center[0]) - radians(co.longitude))
+            )) AS cell_center_distance
+        FROM candidate_offers co
+        CROSS JOIN LATERAL (SELECT h3_cell_to_lat_lng(co.user_h3_cell) AS cell_center) AS center
+    ),
+    ranked_candidates AS (
+        SELECT
+            cd.*,
+            ROW_NUMBER() OVER (
+                PARTITION BY cd.item_id, cd.user_h3_cell
+                ORDER BY cd.cell_center_distance, cd.offer_id, cd.venue_id
+            )::integer AS offer_rank
+        FROM candidate_distances cd
+    ),
+    bounded_candidates AS (
+        SELECT
+            rc.*,
+            MAX(rc.cell_center_distance) FILTER (WHERE rc.offer_rank = 6)
+                OVER (PARTITION BY rc.item_id, rc.user_h3_cell) AS next_candidate_distance
+        FROM ranked_candidates rc
+        WHERE rc.offer_rank <= 6
+    )
+    SELECT
+        bc.item_id,
+        bc.user_h3_cell::varchar,
+        bc.offer_rank,
+        bc.offer_id,
+        bc.venue_id,
+        bc.cell_center_distance,
+        bc.next_candidate_distance
+    FROM bounded_candidates bc
+    WHERE bc.offer_rank <= 5;
+END;
+$body$
+LANGUAGE plpgsql;
+
+
+-- Create tmp Materialized view
+DROP MATERIALIZED VIEW IF EXISTS item_h3_closest_offers_mv_tmp;
+CREATE MATERIALIZED VIEW IF NOT EXISTS item_h3_closest_offers_mv_tmp AS
+SELECT * FROM get_item_h3_closest_offers_{{ ts_nodash  }}()
+WITH NO DATA;
+
+
+-- Create indexes
+CREATE UNIQUE INDEX IF NOT EXISTS unique_idx_item_h3_closest_offers_mv_tmp_{{ ts_nodash  }}
+ON public.item_h3_closest_offers_mv_tmp
+USING btree (user_h3_cell, item_id, offer_rank);
+
+
+-- Refresh state
+REFRESH MATERIALIZED VIEW item_h3_closest_offers_mv_tmp;
@@ -0,0 +1,134 @@
+"""
+Benchmark: venues scanned by the closest offer query, per fixed H3 resolution vs the venue density map.
+
+Builds synthetic venues (dense Paris and Lyon clusters over a uniform rural background), builds the
+VenueDensityMap from their resolution 7 cell counts, then samples users where the venues are and
+counts, for each fixed resolution and for the resolution picked by the map:
+- the venues scanned, i.e. the venues whose H3 cell at that resolution lies in the user disk
+  (exact count, not the estimate of the map),
+- the H3 cells bound in the query,
+- the share of users whose scanned venues stay within the target.
+
+The defaults (2 x 4000 clustered venues, 20000 rural venues, a 4300 venues target) put the target
+between the venues scanned at resolutions 5 and 6 in the clusters, where picking the resolution per
+area pays off. With much denser clusters, no resolution within the cell budget meets the target.
+
+Usage:
+    make benchmark-adaptive-h3-resolution
+    PYTHONPATH=src uv run python benchmarks/adaptive_h3_resolution_benchmark.py --cluster-venues 15000 --users 100
+"""
+
+import argparse
+import random
+import statistics
+import time
+from collections import Counter
+
+import h3
+
+from config import settings
+from core.geo import H3_SEARCH_RADIUS_IN_KM
+from core.venue_density import VENUE_DENSITY_COUNT_H3_RESOLUTION
+from core.venue_density import VenueDensityMap
+from services.h3 import calculate_h3_k_rings_to_cover_search_radius
+
+
+# (latitude, longitude, latitude spread, longitude spread) of the dense clusters
+VENUE_CLUSTERS = ((48.8566, 2.3522, 0.15, 0.2), (45.764, 4.8357, 0.08, 0.1))
+# Rural background: mainland France bounding box
+MIN_LATITUDE, MAX_LATITUDE = 43.0, 50.5
+MIN_LONGITUDE, MAX_LONGITUDE = -1.5, 7.5
+
+
+def build_venue_locations(cluster_venue_count: int, rural_venue_count: int) -> list[tuple[float, float]]:
+    random_generator = random.Random(42)
+    venue_locations = [
+        (random_generator.gauss(latitude, latitude_spread), random_generator.gauss(longitude, longitude_spread))
+        for latitude, longitude, latitude_spread, longitude_spread in VENUE_CLUSTERS
+        for _ in range(cluster_venue_count)
+    ]
+    venue_locations += [
+        (random_generator.uniform(MIN_LATITUDE, MAX_LATITUDE), random_generator.uniform(MIN_LONGITUDE, MAX_LONGITUDE))
+        for _ in range(rural_venue_count)
+    ]
+    return venue_locations
+
+
+def format_distribution(values: list[int]) -> str:
+    sorted_values = sorted(values)
+    return (
+        f"p50 = {statistics.median(sorted_values):>8.0f} | p99 = {sorted_values[int(len(sorted_values) * 0.99) - 1]:>8}"
+    )
+
+
+def run_benchmark(arguments: argparse.Namespace) -> None:
+    resolutions = sorted(settings.VALID_H3_RESOLUTIONS)
+    venue_locations = build_venue_locations(arguments.cluster_venues, arguments.rural_venues)
+    venue_counts_by_cell = {
+        resolution: Counter(
+            h3.latlng_to_cell(latitude, longitude, resolution) for latitude, longitude in venue_locations
+        )
+        for resolution in {*resolutions, VENUE_DENSITY_COUNT_H3_RESOLUTION}
+    }
+
+    loading_start_time = time.perf_counter()
+    density_map = VenueDensityMap(
+        venue_counts_by_cell[VENUE_DENSITY_COUNT_H3_RESOLUTION],
+        arguments.max_scanned_venues,
+        resolutions,
+        arguments.max_bound_cells,
+    )
+    loading_duration = time.perf_counter() - loading_start_time
+
+    # Users are where the venues are
+    user_locations = random.Random(7).sample(venue_locations, arguments.users)
+    scanned_venues_by_strategy: dict[str, list[int]] = {}
+    bound_cells_by_strategy: dict[str, list[int]] = {}
+    measured_by_resolution: dict[tuple[int, int], tuple[int, int]] = {}
+
+    for user_index, (latitude, longitude) in enumerate(user_locations):
+        adaptive_resolution = density_map.select_resolution(latitude, longitude)
+        for resolution in resolutions:
+            k_rings = calculate_h3_k_rings_to_cover_search_radius(
+                search_radius_in_km=H3_SEARCH_RADIUS_IN_KM, resolution=resolution
+            )
+            disk = h3.grid_disk(h3.latlng_to_cell(latitude, longitude, resolution), k_rings)
+            scanned_venues = sum(venue_counts_by_cell[resolution].get(cell, 0) for cell in disk)
+            measured_by_resolution[user_index, resolution] = scanned_venues, len(disk)
+            scanned_venues_by_strategy.setdefault(f"fixed {resolution}", []).append(scanned_venues)
+            bound_cells_by_strategy.setdefault(f"fixed {resolution}", []).append(len(disk))
+
+        scanned_venues, bound_cell_count = measured_by_resolution[user_index, adaptive_resolution]
+        scanned_venues_by_strategy.setdefault("adaptive", []).append(scanned_venues)
+        bound_cells_by_strategy.setdefault("adaptive", []).append(bound_cell_count)
+
+    print(
+        f"Venues: {len(venue_locations)} | Users: {arguments.users} | Target: {arguments.max_scanned_venues} venues | "
+        f"Density map: {len(density_map)} coarse cells built in {loading_duration:.2f} s"
+    )
+    for strategy, scanned_venues_per_user in scanned_venues_by_strategy.items():
+        within_target_ratio = sum(
+            scanned_venues <= arguments.max_scanned_venues for scanned_venues in scanned_venues_per_user
+        ) / len(scanned_venues_per_user)
+        print(
+            f"{strategy:<9} venues scanned {format_distribution(scanned_venues_per_user)} | "
+            f"cells bound {format_distribution(bound_cells_by_strategy[strategy])} | "
+            f"within target: {within_target_ratio:6.1%}"
+        )
+    print(f"Density map statistics: {density_map.get_statistics()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cluster-venues", type=int, default=4_000, help="Venues of each dense cluster.")
+    parser.add_argument("--rural-venues", type=int, default=20_000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--max-scanned-venues", type=int, default=4_300)
+    parser.add_argument("--max-bound-cells", type=int, default=settings.GEOSPATIAL_RETRIEVAL_MAX_BOUND_H3_CELLS)
+    arguments = parser.parse_args()
+
+    run_benchmark(arguments)
+
+
+if __name__ == "__main__":
+    main()
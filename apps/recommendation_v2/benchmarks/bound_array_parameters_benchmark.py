@@ -0,0 +1,262 @@
+"""
+Benchmark: closest offer query with IN lists vs bound arrays (= ANY) on a local PostGIS.
+
+Starts a local PostGIS container (same image as the integration tests), fills the venue and
+recommendable offer tables with synthetic Île-de-France data, then replays the same requests
+(random user location, random number of candidate items) through:
+- the statement as written before, with `IN (...)` lists of item IDs and H3 cells: one statement
+  text per list length, so asyncpg prepares (and PostgreSQL parses and plans) most requests again,
+- find_closest_offers_with_h3_index, which binds both lists as arrays: a single statement text.
+
+Each variant runs on a single pooled connection configured like services.db (prepared statement
+cache size and plan_cache_mode). The benchmark prints latency percentiles, checks both variants
+return the same offers, and reads pg_prepared_statements to report the statements prepared on the
+connection and the custom plans built vs generic plans reused (planning skipped).
+
+Not run yet: the gain of the bound arrays over the IN lists is unmeasured. Record the numbers
+here (and in the commit that changes the queries) once it has been run against PostGIS.
+
+Usage (requires Docker):
+    make benchmark-bound-array-parameters
+    PYTHONPATH=src uv run python benchmarks/bound_array_parameters_benchmark.py --requests 1000
+    PYTHONPATH=src uv run python benchmarks/bound_array_parameters_benchmark.py --plan-cache-mode force_generic_plan
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import time
+
+import h3
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import aliased
+from testcontainers.postgres import PostgresContainer
+
+from config import settings
+from core.geo import H3_SEARCH_RADIUS_IN_KM
+from core.geo import MAX_DISTANCE_METERS_FOR_OFFER_RETRIEVAL
+from core.geo import build_haversine_distance_expression
+from core.geo import find_closest_offers_with_h3_index
+from core.user_context import UserContext
+from models.offer import RecommendableOffers
+from models.venue import Venue
+from services.h3 import calculate_h3_k_rings_to_cover_search_radius
+from services.h3 import get_h3_index_from_coordinates
+
+
+# Synthetic venues over Île-de-France
+MIN_LATITUDE, MAX_LATITUDE = 48.5, 49.1
+MIN_LONGITUDE, MAX_LONGITUDE = 1.9, 2.8
+H3_RESOLUTIONS = (5, 6, 7, 8, 9)
+
+
+async def find_closest_offers_with_in_lists(
+    db: AsyncSession, item_ids: list[str], user_context: UserContext, *, resolution: int
+):
+    """Reference: find_closest_offers_with_h3_index as written before, with IN lists."""
+    if user_context.latitude is None or user_context.longitude is None:
+        return []
+    user_lat, user_lng = user_context.latitude, user_context.longitude
+
+    user_h3_cell = get_h3_index_from_coordinates(user_lat, user_lng, resolution=resolution)
+    k_rings = calculate_h3_k_rings_to_cover_search_radius(
+        search_radius_in_km=H3_SEARCH_RADIUS_IN_KM, resolution=resolution
+    )
+    candidate_h3_cells = h3.grid_disk(user_h3_cell, k=k_rings)
+    h3_index_column = getattr(Venue, f"h3_res{resolution}")
+
+    deduped_offers_by_venue = (
+        sa.select(RecommendableOffers)
+        .join(Venue, RecommendableOffers.venue_id == Venue.venue_id)
+        .where(RecommendableOffers.item_id.in_(item_ids), h3_index_column.in_(candidate_h3_cells))
+        .distinct(RecommendableOffers.offer_id, RecommendableOffers.venue_id)
+        .subquery()
+    )
+    deduped_offers = aliased(RecommendableOffers, deduped_offers_by_venue)
+    distance_expr = build_haversine_distance_expression(user_lat, user_lng, Venue).label("calc_distance")
+    stmt = (
+        sa.select(deduped_offers, distance_expr)
+        .join(Venue, deduped_offers.venue_id == Venue.venue_id)
+        .where(distance_expr <= MAX_DISTANCE_METERS_FOR_OFFER_RETRIEVAL)
+        .distinct(deduped_offers.item_id)
+        .order_by(deduped_offers.item_id, distance_expr.asc())
+    )
+    result = await db.execute(stmt)
+    return result.all()
+
+
+async def fill_tables(database_url: str, venue_count: int, offer_count: int, item_count: int) -> None:
+    engine = create_async_engine(database_url)
+    random_generator = random.Random(42)
+
+    venues = []
+    for venue_id in range(venue_count):
+        latitude = random_generator.uniform(MIN_LATITUDE, MAX_LATITUDE)
+        longitude = random_generator.uniform(MIN_LONGITUDE, MAX_LONGITUDE)
+        venues.append(
+            {
+                "venue_id": venue_id,
+                "latitude": latitude,
+                "longitude": longitude,
+                **{
+                    f"h3_res{resolution}": h3.latlng_to_cell(latitude, longitude, resolution)
+                    for resolution in H3_RESOLUTIONS
+                },
+            }
+        )
+    offers = []
+    for offer_index in range(offer_count):
+        venue = random_generator.choice(venues)
+        offers.append(
+            {
+                "unique_id": f"unique-{offer_index}",
+                "booking_number": 0,
+                "default_max_distance": 50_000,
+                "item_id": f"item-{random_generator.randrange(item_count)}",
+                "offer_id": f"offer-{offer_index}",
+                "venue_id": venue["venue_id"],
+                "venue_latitude": venue["latitude"],
+                "venue_longitude": venue["longitude"],
+            }
+        )
+
+    async with engine.begin() as connection:
+        await connection.execute(sa.text("CREATE EXTENSION IF NOT EXISTS postgis"))
+        await connection.run_sync(Venue.metadata.create_all, tables=[Venue.__table__, RecommendableOffers.__table__])
+        await connection.execute(sa.insert(Venue), venues)
+        await connection.execute(sa.insert(RecommendableOffers), offers)
+        await connection.execute(
+            sa.text("CREATE INDEX IF NOT EXISTS offers_item_id_idx ON recommendable_offers_raw_mv (item_id)")
+        )
+        await connection.execute(sa.text("ANALYZE"))
+    await engine.dispose()
+
+
+def build_requests(request_count: int, item_count: int) -> list[tuple[UserContext, list[str]]]:
+    random_generator = random.Random(7)
+    return [
+        (
+            UserContext(
+                user_id="benchmark",
+                latitude=random_generator.uniform(MIN_LATITUDE, MAX_LATITUDE),
+                longitude=random_generator.uniform(MIN_LONGITUDE, MAX_LONGITUDE),
+            ),
+            [
+                f"item-{item_index}"
+                for item_index in random_generator.sample(range(item_count), random_generator.randint(20, 600))
+            ],
+        )
+        for _ in range(request_count)
+    ]
+
+
+def format_latencies(label: str, latencies_in_seconds: list[float]) -> str:
+    latencies_in_ms = sorted(latency * 1e3 for latency in latencies_in_seconds)
+    p50 = statistics.median(latencies_in_ms)
+    p99 = latencies_in_ms[int(len(latencies_in_ms) * 0.99) - 1]
+    return f"{label:<10} p50 = {p50:7.2f} ms | p99 = {p99:7.2f} ms | mean = {statistics.fmean(latencies_in_ms):7.2f} ms"
+
+
+async def replay_requests(
+    database_url: str,
+    find_closest_offers,
+    replayed_requests: list[tuple[UserContext, list[str]]],
+    prepared_statement_cache_size: int,
+    plan_cache_mode: str,
+) -> tuple[list[float], list[list[tuple[str, str]]], sa.Row]:
+    # A single connection, so that every request shares its prepared statements
+    engine = create_async_engine(
+        database_url,
+        pool_size=1,
+        max_overflow=0,
+        connect_args={
+            "prepared_statement_cache_size": prepared_statement_cache_size,
+            "server_settings": {"plan_cache_mode": plan_cache_mode},
+        },
+    )
+    latencies, closest_offers = [], []
+    async with async_sessionmaker(bind=engine, expire_on_commit=False)() as db:
+        for user_context, item_ids in replayed_requests:
+            start_time = time.perf_counter()
+            rows = await find_closest_offers(
+                db, item_ids, user_context, resolution=settings.GEOSPATIAL_RETRIEVAL_H3_RESOLUTION
+            )
+            latencies.append(time.perf_counter() - start_time)
+            closest_offers.append(sorted((offer.item_id, offer.offer_id) for offer, _ in rows))
+
+        prepared_statements_result = await db.execute(
+            sa.text(
+                "SELECT count(*) AS statement_count, sum(custom_plans) AS custom_plans, "
+                "sum(generic_plans) AS generic_plans FROM pg_prepared_statements "
+                "WHERE statement NOT LIKE '%pg_prepared_statements%'"
+            )
+        )
+        prepared_statements = prepared_statements_result.one()
+    await engine.dispose()
+    return latencies, closest_offers, prepared_statements
+
+
+async def run_benchmark(database_url: str, arguments: argparse.Namespace) -> None:
+    await fill_tables(database_url, arguments.venues, arguments.offers, arguments.items)
+    replayed_requests = build_requests(arguments.requests, arguments.items)
+
+    print(
+        f"Venues: {arguments.venues} | Offers: {arguments.offers} | Requests: {arguments.requests} | "
+        f"Statement cache: {arguments.prepared_statement_cache_size} | plan_cache_mode: {arguments.plan_cache_mode}"
+    )
+    results = {}
+    for label, find_closest_offers in (
+        ("IN lists", find_closest_offers_with_in_lists),
+        ("= ANY", find_closest_offers_with_h3_index),
+    ):
+        latencies, closest_offers, prepared_statements = await replay_requests(
+            database_url,
+            find_closest_offers,
+            replayed_requests,
+            arguments.prepared_statement_cache_size,
+            arguments.plan_cache_mode,
+        )
+        results[label] = closest_offers
+        print(format_latencies(label, latencies))
+        print(
+            f"{'':<10} prepared statements cached: {prepared_statements.statement_count} | "
+            f"custom plans: {prepared_statements.custom_plans or 0} | "
+            f"generic plans reused: {prepared_statements.generic_plans or 0}"
+        )
+
+    mismatch_count = sum(
+        in_list_offers != any_offers
+        for in_list_offers, any_offers in zip(results["IN lists"], results["= ANY"], strict=True)
+    )
+    print(f"Mismatches: {mismatch_count} / {arguments.requests}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--venues", type=int, default=5000)
+    parser.add_argument("--offers", type=int, default=100_000)
+    parser.add_argument("--items", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument(
+        "--prepared-statement-cache-size", type=int, default=settings.DATABASE_PREPARED_STATEMENT_CACHE_SIZE
+    )
+    parser.add_argument(
+        "--plan-cache-mode",
+        default=settings.DATABASE_PLAN_CACHE_MODE,
+        choices=["auto", "force_generic_plan", "force_custom_plan"],
+    )
+    arguments = parser.parse_args()
+    logging.disable(logging.INFO)  # log_execution_time logs every request
+
+    with PostgresContainer(image="postgis/postgis:15-3.3-alpine") as postgres:
+        database_url = postgres.get_connection_url().replace("psycopg2", "asyncpg")
+        asyncio.run(run_benchmark(database_url, arguments))
+
+
+if __name__ == "__main__":
+    main()
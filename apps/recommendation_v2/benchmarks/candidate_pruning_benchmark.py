@@ -0,0 +1,189 @@
+"""
+Offline replay: tuning K of the pre-ranking candidate pruning (CANDIDATE_PRUNING_MAX_ITEMS_PER_GROUP).
+
+Replays playlist requests (candidate items with the ranking score each offer obtained) through
+ranking and diversification, once with every candidate and once for each K after
+prune_candidate_items_per_group, and reports for each K:
+- the number of candidates left to resolve and rank (spatial SQL and ranking payload size),
+- the share of the unpruned final playlist still recommended (overlap@60),
+- the share of requests whose final playlist is unchanged.
+
+Without --fixture, synthetic requests mimic a warm-start playlist: 4 retrieval sources of 150
+items (1 personalized, 3 tops) over a skewed search group distribution, with ranking scores
+correlated to the retrieval rank. A recorded fixture is a JSON list of requests, each request
+being a list of items (RecommendableItem fields) with an extra "ranking_score" field.
+
+Usage:
+    make benchmark-candidate-pruning
+    PYTHONPATH=src uv run python benchmarks/candidate_pruning_benchmark.py --requests 100 --k 10 20 30 50
+    PYTHONPATH=src uv run python benchmarks/candidate_pruning_benchmark.py --fixture replay.json
+"""
+
+import argparse
+import json
+import logging
+import random
+import statistics
+from datetime import UTC
+from datetime import datetime
+from pathlib import Path
+
+from core.diversification import apply_offer_diversification
+from core.retrieval import build_enriched_offer_from_item
+from core.retrieval import deduplicate_candidate_items_by_item_id
+from core.retrieval import prune_candidate_items_per_group
+from schemas.vertex_prediction_item import ItemOrigin
+from schemas.vertex_prediction_item import RecommendableItem
+
+
+PLAYLIST_SIZE = 60
+SEARCH_GROUP_WEIGHTS = {
+    "LIVRES": 30,
+    "CINEMA": 15,
+    "SPECTACLES": 12,
+    "MUSIQUE": 10,
+    "CONCERTS_FESTIVALS": 8,
+    "FILMS_DOCUMENTAIRES_SERIES": 7,
+    "ARTS_LOISIRS_CREATIFS": 6,
+    "MUSEES_VISITES_CULTURELLES": 5,
+    "JEUX_JEUX_VIDEOS": 4,
+    "INSTRUMENTS": 3,
+}
+RETRIEVAL_SOURCES = (
+    (ItemOrigin.USER_BASED, 150),
+    (ItemOrigin.TOPS, 150),
+    (ItemOrigin.TOPS, 150),
+    (ItemOrigin.TOPS, 150),
+)
+
+
+def build_item(item_id: str, item_origin: ItemOrigin, item_rank: int, search_group_name: str) -> RecommendableItem:
+    return RecommendableItem(
+        item_id=item_id,
+        item_origin=item_origin,
+        item_rank=item_rank,
+        item_score=1.0 / (1 + item_rank),
+        item_cluster_id=None,
+        item_topic_id=None,
+        semantic_emb_mean=None,
+        booking_number=0,
+        booking_number_last_7_days=0,
+        booking_number_last_14_days=0,
+        booking_number_last_28_days=0,
+        stock_price=10.0,
+        category=search_group_name,
+        subcategory_id=search_group_name,
+        search_group_name=search_group_name,
+        offer_creation_date=datetime(2026, 1, 1, tzinfo=UTC),
+        stock_beginning_date=None,
+        gtl_id=f"gtl-{hash(item_id) % 8}",
+        gtl_l3=None,
+        gtl_l4=None,
+        is_geolocated=False,
+        total_offers=1,
+        example_offer_id=f"offer-{item_id}",
+        example_venue_latitude=None,
+        example_venue_longitude=None,
+    )
+
+
+def build_synthetic_requests(request_count: int) -> list[tuple[list[RecommendableItem], dict[str, float]]]:
+    random_generator = random.Random(42)
+    search_group_names = list(SEARCH_GROUP_WEIGHTS)
+    search_group_weights = list(SEARCH_GROUP_WEIGHTS.values())
+    catalog_size = 3000
+
+    replayed_requests = []
+    for _ in range(request_count):
+        candidate_items, ranking_scores = [], {}
+        for item_origin, source_size in RETRIEVAL_SOURCES:
+            for item_rank in range(source_size):
+                item_id = f"item-{random_generator.randrange(catalog_size)}"
+                search_group_name = random_generator.choices(search_group_names, search_group_weights)[0]
+                candidate_items.append(build_item(item_id, item_origin, item_rank, search_group_name))
+                # The ranking model mostly agrees with the retrieval rank, with a personal touch
+                ranking_scores.setdefault(item_id, 1.0 / (1 + item_rank) ** 0.5 + random_generator.gauss(0, 0.1))
+        replayed_requests.append((deduplicate_candidate_items_by_item_id(candidate_items), ranking_scores))
+    return replayed_requests
+
+
+def load_recorded_requests(fixture_path: Path) -> list[tuple[list[RecommendableItem], dict[str, float]]]:
+    replayed_requests = []
+    for recorded_items in json.loads(fixture_path.read_text()):
+        ranking_scores = {
+            recorded_item["item_id"]: recorded_item.pop("ranking_score") for recorded_item in recorded_items
+        }
+        candidate_items = [RecommendableItem(**recorded_item) for recorded_item in recorded_items]
+        replayed_requests.append((candidate_items, ranking_scores))
+    return replayed_requests
+
+
+def replay_playlist(candidate_items: list[RecommendableItem], ranking_scores: dict[str, float]) -> list[str]:
+    """Ranking (replayed scores) then diversification and truncation, as the playlist pipeline."""
+    offers = [
+        build_enriched_offer_from_item(
+            item,
+            offer_id=item.example_offer_id or item.item_id,
+            offer_creation_date=item.offer_creation_date,
+            stock_beginning_date=item.stock_beginning_date,
+            venue_latitude=None,
+            venue_longitude=None,
+            offer_user_distance=None,
+        )
+        for item in candidate_items
+    ]
+    for offer in offers:
+        offer.ranking_score = ranking_scores.get(offer.item_id, 0.0)
+    ranked_offers = sorted(offers, key=lambda offer: offer.ranking_score, reverse=True)
+    diversified_offers = apply_offer_diversification(
+        ranked_offers, should_shuffle_initial_list=False, limit=PLAYLIST_SIZE
+    )
+    return [offer.item_id for offer in diversified_offers]
+
+
+def run_replay(
+    replayed_requests: list[tuple[list[RecommendableItem], dict[str, float]]], max_items_per_group_values: list[int]
+) -> None:
+    reference_playlists = [
+        replay_playlist(candidate_items, ranking_scores) for candidate_items, ranking_scores in replayed_requests
+    ]
+    candidate_counts = [len(candidate_items) for candidate_items, _ in replayed_requests]
+
+    print(f"Requests: {len(replayed_requests)} | Candidates per request: {statistics.mean(candidate_counts):.0f}")
+    print(f"{'K':>5} | {'candidates':>10} | {'reduction':>9} | {'overlap@60':>10} | {'unchanged':>9}")
+    for max_items_per_group in max_items_per_group_values:
+        kept_counts, overlaps, unchanged_count = [], [], 0
+        for (candidate_items, ranking_scores), reference_playlist in zip(
+            replayed_requests, reference_playlists, strict=True
+        ):
+            pruned_items = prune_candidate_items_per_group(candidate_items, max_items_per_group)
+            pruned_playlist = replay_playlist(pruned_items, ranking_scores)
+            kept_counts.append(len(pruned_items))
+            overlaps.append(len(set(pruned_playlist) & set(reference_playlist)) / max(1, len(reference_playlist)))
+            unchanged_count += pruned_playlist == reference_playlist
+
+        print(
+            f"{max_items_per_group:>5} | {statistics.mean(kept_counts):>10.0f} | "
+            f"{statistics.mean(candidate_counts) / statistics.mean(kept_counts):>8.1f}x | "
+            f"{statistics.mean(overlaps):>10.1%} | {unchanged_count / len(replayed_requests):>9.1%}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 10, 20, 30, 50])
+    parser.add_argument("--fixture", type=Path, default=None, help="Recorded requests (JSON)")
+    arguments = parser.parse_args()
+    logging.disable(logging.INFO)  # Diversification logs every replayed playlist
+
+    replayed_requests = (
+        load_recorded_requests(arguments.fixture)
+        if arguments.fixture is not None
+        else build_synthetic_requests(arguments.requests)
+    )
+    run_replay(replayed_requests, arguments.k)
+
+
+if __name__ == "__main__":
+    main()
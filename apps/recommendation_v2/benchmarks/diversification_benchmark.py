@@ -0,0 +1,167 @@
+"""
+Benchmark: diversification strategies on a ranked list of candidates.
+
+Builds synthetic ranked offers (ranking scores, item clusters, topics and semantic_emb_mean), then
+selects the final list with the Round-Robin strategy and with the vectorized greedy MMR, prints
+latency percentiles and checks the MMR picks against a pure Python reference that recomputes every
+pairwise similarity at each step. The MMR budget is 1 ms for 600 candidates.
+
+Usage:
+    make benchmark-diversification
+    PYTHONPATH=src uv run python benchmarks/diversification_benchmark.py --candidates 600 --limit 60
+"""
+
+import argparse
+import logging
+import random
+import statistics
+import time
+from datetime import UTC
+from datetime import datetime
+
+from core.diversification import MMR_CLUSTER_SIMILARITY_WEIGHT
+from core.diversification import MMR_EMBEDDING_SIMILARITY_WEIGHT
+from core.diversification import MMR_TOPIC_SIMILARITY_WEIGHT
+from core.diversification import MaximalMarginalRelevanceDiversification
+from core.diversification import RoundRobinDiversification
+from core.retrieval import build_enriched_offer_from_item
+from schemas.enriched_offer import EnrichedRecommendableOffer
+from schemas.vertex_prediction_item import ItemOrigin
+from schemas.vertex_prediction_item import RecommendableItem
+
+
+MMR_LATENCY_BUDGET_MS = 1.0
+SEARCH_GROUP_NAMES = ["LIVRES", "CINEMA", "SPECTACLES", "MUSIQUE", "CONCERTS_FESTIVALS", "INSTRUMENTS"]
+
+
+def build_ranked_offers(candidate_count: int) -> list[EnrichedRecommendableOffer]:
+    random_generator = random.Random(42)
+    offers = []
+    for offer_index in range(candidate_count):
+        search_group_name = random_generator.choice(SEARCH_GROUP_NAMES)
+        item = RecommendableItem(
+            item_id=f"item-{offer_index}",
+            item_origin=ItemOrigin.USER_BASED,
+            item_rank=offer_index,
+            item_score=random_generator.random(),
+            item_cluster_id=random_generator.choice([None, *(f"cluster-{index}" for index in range(40))]),
+            item_topic_id=random_generator.choice([None, *(f"topic-{index}" for index in range(15))]),
+            semantic_emb_mean=random_generator.choice([None, random_generator.gauss(0, 1)]),
+            booking_number=0,
+            booking_number_last_7_days=0,
+            booking_number_last_14_days=0,
+            booking_number_last_28_days=0,
+            stock_price=10.0,
+            category=search_group_name,
+            subcategory_id=search_group_name,
+            search_group_name=search_group_name,
+            offer_creation_date=datetime(2026, 1, 1, tzinfo=UTC),
+            stock_beginning_date=None,
+            gtl_id=random_generator.choice([None, "gtl-1", "gtl-2", "gtl-3"]),
+            gtl_l3=None,
+            gtl_l4=None,
+            is_geolocated=False,
+            total_offers=1,
+            example_offer_id=f"offer-{offer_index}",
+            example_venue_latitude=None,
+            example_venue_longitude=None,
+        )
+        offer = build_enriched_offer_from_item(
+            item,
+            offer_id=item.example_offer_id,
+            offer_creation_date=item.offer_creation_date,
+            stock_beginning_date=None,
+            venue_latitude=None,
+            venue_longitude=None,
+            offer_user_distance=None,
+        )
+        offer.ranking_score = random_generator.random()
+        offers.append(offer)
+    return sorted(offers, key=lambda offer: offer.ranking_score, reverse=True)
+
+
+def select_with_reference_mmr(
+    offers: list[EnrichedRecommendableOffer], relevance_weight: float, limit: int
+) -> list[EnrichedRecommendableOffer]:
+    """Reference: textbook greedy MMR, every pairwise similarity recomputed in Python at each step."""
+    scores = [offer.ranking_score for offer in offers]
+    score_range = max(scores) - min(scores)
+    relevances = [(score - min(scores)) / score_range for score in scores]
+    embeddings = [offer.semantic_emb_mean for offer in offers if offer.semantic_emb_mean is not None]
+    embedding_range = (max(embeddings) - min(embeddings)) or 1.0
+
+    def similarity(first: EnrichedRecommendableOffer, second: EnrichedRecommendableOffer) -> float:
+        first_item, second_item = first.item, second.item
+        value = 0.0
+        if first_item.item_cluster_id is not None and first_item.item_cluster_id == second_item.item_cluster_id:
+            value += MMR_CLUSTER_SIMILARITY_WEIGHT
+        if first_item.item_topic_id is not None and first_item.item_topic_id == second_item.item_topic_id:
+            value += MMR_TOPIC_SIMILARITY_WEIGHT
+        if first_item.semantic_emb_mean is not None and second_item.semantic_emb_mean is not None:
+            distance = abs(first_item.semantic_emb_mean - second_item.semantic_emb_mean) / embedding_range
+            value += MMR_EMBEDDING_SIMILARITY_WEIGHT * max(0.0, 1.0 - distance)
+        return value
+
+    selected_indices: list[int] = []
+    remaining_indices = list(range(len(offers)))
+    while remaining_indices and len(selected_indices) < limit:
+        best_index = max(
+            remaining_indices,
+            key=lambda index: (
+                relevance_weight * relevances[index]
+                - (1 - relevance_weight)
+                * max((similarity(offers[index], offers[selected]) for selected in selected_indices), default=0.0),
+                -index,  # ties: first ranked offer, as np.argmax
+            ),
+        )
+        selected_indices.append(best_index)
+        remaining_indices.remove(best_index)
+    return [offers[index] for index in selected_indices]
+
+
+def format_latencies(label: str, latencies_in_seconds: list[float]) -> str:
+    latencies_in_ms = sorted(latency * 1e3 for latency in latencies_in_seconds)
+    p50 = statistics.median(latencies_in_ms)
+    p99 = latencies_in_ms[int(len(latencies_in_ms) * 0.99) - 1]
+    return f"{label:<12} p50 = {p50:6.3f} ms | p99 = {p99:6.3f} ms"
+
+
+def run_benchmark(candidate_count: int, limit: int, run_count: int, relevance_weight: float) -> None:
+    offers = build_ranked_offers(candidate_count)
+    strategies = {
+        "Round-Robin": RoundRobinDiversification(),
+        "MMR": MaximalMarginalRelevanceDiversification(relevance_weight=relevance_weight),
+    }
+
+    print(f"Candidates: {candidate_count} | Limit: {limit} | MMR relevance weight: {relevance_weight}")
+    latencies_by_strategy: dict[str, list[float]] = {}
+    for label, strategy in strategies.items():
+        latencies = latencies_by_strategy[label] = []
+        for _ in range(run_count):
+            start_time = time.perf_counter()
+            strategy.diversify(offers, limit=limit)
+            latencies.append(time.perf_counter() - start_time)
+        print(format_latencies(label, latencies))
+
+    reference_ids = [offer.offer_id for offer in select_with_reference_mmr(offers, relevance_weight, limit)]
+    mmr_ids = [offer.offer_id for offer in strategies["MMR"].diversify(offers, limit=limit)]
+    mismatch_count = sum(reference_id != mmr_id for reference_id, mmr_id in zip(reference_ids, mmr_ids, strict=True))
+    mmr_p50 = statistics.median(latencies_by_strategy["MMR"]) * 1e3
+    print(f"MMR mismatches vs reference: {mismatch_count}")
+    print(f"MMR p50 within the {MMR_LATENCY_BUDGET_MS} ms budget: {mmr_p50 <= MMR_LATENCY_BUDGET_MS}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=600)
+    parser.add_argument("--limit", type=int, default=60)
+    parser.add_argument("--runs", type=int, default=500)
+    parser.add_argument("--relevance-weight", type=float, default=0.7)
+    arguments = parser.parse_args()
+    logging.disable(logging.INFO)  # Diversification logs every run
+
+    run_benchmark(arguments.candidates, arguments.limit, arguments.runs, arguments.relevance_weight)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Benchmark: memory of the candidate items and enriched offers of one request.
+
+Validates synthetic retrieval records into items, then builds one enriched offer per item, with:
+- the previous representation: RecommendableItem as a pydantic BaseModel, and an
+  EnrichedRecommendableOffer dataclass (with `__dict__`) copying ~20 attributes of its item;
+- the current one: slotted RecommendableItem, and slotted EnrichedRecommendableOffer
+  referencing its item.
+
+Memory and allocation counts are measured with tracemalloc, latencies without it.
+
+Usage:
+    make benchmark-enriched-offer-memory
+    PYTHONPATH=src uv run python benchmarks/enriched_offer_memory_benchmark.py --items 600 --runs 100
+"""
+
+import argparse
+import dataclasses
+import random
+import statistics
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+from pydantic import TypeAdapter
+from pydantic import create_model
+
+from core.retrieval import build_enriched_offer_from_item
+from schemas.vertex_prediction_item import RecommendableItem
+
+
+# Previous representations, rebuilt from the current field definitions.
+LegacyRecommendableItem = create_model(
+    "LegacyRecommendableItem", **{field.name: (field.type, ...) for field in dataclasses.fields(RecommendableItem)}
+)
+LEGACY_COPIED_ITEM_FIELDS = (
+    "item_id",
+    "is_geolocated",
+    "item_score",
+    "item_rank",
+    "item_origin",
+    "semantic_emb_mean",
+    "stock_price",
+    "category",
+    "subcategory_id",
+    "search_group_name",
+    "booking_number",
+    "booking_number_last_7_days",
+    "booking_number_last_14_days",
+    "booking_number_last_28_days",
+)
+LegacyEnrichedRecommendableOffer = dataclasses.make_dataclass(
+    "LegacyEnrichedRecommendableOffer",
+    [
+        "offer_id",
+        "offer_creation_date",
+        "stock_beginning_date",
+        "venue_latitude",
+        "venue_longitude",
+        "offer_user_distance",
+        *LEGACY_COPIED_ITEM_FIELDS,
+        ("ranking_score", float, dataclasses.field(default=0.0)),
+    ],
+)
+
+
+# Builds the items and the enriched offers: the pipeline keeps both alive until the response is sent.
+OffersBuilder = Callable[[list[dict[str, Any]]], tuple[list[Any], list[Any]]]
+
+
+def build_retrieval_records(item_count: int) -> list[dict[str, Any]]:
+    """Records as produced by the retrieval decoder (one dict per prediction)."""
+    random_generator = random.Random(42)
+    records = []
+    for item_number in range(item_count):
+        is_geolocated = random_generator.random() < 0.7  # noqa: PLR2004
+        records.append(
+            {
+                "item_id": f"item-{item_number}",
+                "item_origin": "user_based",
+                "item_rank": float(item_number),
+                "item_score": random_generator.random(),
+                "item_cluster_id": f"cluster-{item_number % 50}",
+                "item_topic_id": f"topic-{item_number % 20}",
+                "semantic_emb_mean": random_generator.random(),
+                "booking_number": float(random_generator.randint(0, 1000)),
+                "booking_number_last_7_days": float(random_generator.randint(0, 10)),
+                "booking_number_last_14_days": float(random_generator.randint(0, 20)),
+                "booking_number_last_28_days": float(random_generator.randint(0, 40)),
+                "stock_price": round(random_generator.uniform(0, 100), 2),
+                "category": "LIVRE",
+                "subcategory_id": "LIVRE_PAPIER",
+                "search_group_name": "LIVRES",
+                "offer_creation_date": "2024-01-01T00:00:00",
+                "stock_beginning_date": None,
+                "gtl_id": "01020000",
+                "gtl_l3": "Romans",
+                "gtl_l4": None,
+                "is_geolocated": is_geolocated,
+                "total_offers": 1.0,
+                "example_offer_id": f"offer-{item_number}",
+                "example_venue_latitude": 48.8566 + random_generator.uniform(-1, 1) if is_geolocated else None,
+                "example_venue_longitude": 2.3522 + random_generator.uniform(-1, 1) if is_geolocated else None,
+            }
+        )
+    return records
+
+
+def build_legacy_offers(records: list[dict[str, Any]]) -> tuple[list[Any], list[Any]]:
+    items = TypeAdapter(list[LegacyRecommendableItem]).validate_python(records)
+    return items, [
+        LegacyEnrichedRecommendableOffer(
+            offer_id=item.example_offer_id,
+            offer_creation_date=item.offer_creation_date,
+            stock_beginning_date=item.stock_beginning_date,
+            venue_latitude=item.example_venue_latitude,
+            venue_longitude=item.example_venue_longitude,
+            offer_user_distance=None,
+            **{field_name: getattr(item, field_name) for field_name in LEGACY_COPIED_ITEM_FIELDS},
+        )
+        for item in items
+    ]
+
+
+def build_current_offers(records: list[dict[str, Any]]) -> tuple[list[Any], list[Any]]:
+    items = TypeAdapter(list[RecommendableItem]).validate_python(records)
+    return items, [
+        build_enriched_offer_from_item(
+            item,
+            offer_id=item.example_offer_id,
+            offer_creation_date=item.offer_creation_date,
+            stock_beginning_date=item.stock_beginning_date,
+            venue_latitude=item.example_venue_latitude,
+            venue_longitude=item.example_venue_longitude,
+            offer_user_distance=None,
+        )
+        for item in items
+    ]
+
+
+def measure_memory(build_offers: OffersBuilder, records: list[dict[str, Any]]) -> str:
+    build_offers(records)  # Warm up the validators outside of the measure
+    tracemalloc.start()
+    items_and_offers = build_offers(records)
+    snapshot = tracemalloc.take_snapshot()
+    _, peak_size = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items_and_offers
+
+    statistics_by_line = snapshot.statistics("lineno")
+    retained_size = sum(statistic.size for statistic in statistics_by_line)
+    retained_blocks = sum(statistic.count for statistic in statistics_by_line)
+    retained_in_kib, peak_in_kib = retained_size / 1024, peak_size / 1024
+    return f"retained = {retained_in_kib:7.1f} KiB in {retained_blocks:5d} blocks | peak = {peak_in_kib:7.1f} KiB"
+
+
+def measure_latency(build_offers: OffersBuilder, records: list[dict[str, Any]], run_count: int) -> str:
+    latencies_in_ms = []
+    for _ in range(run_count):
+        start_time = time.perf_counter()
+        build_offers(records)
+        latencies_in_ms.append((time.perf_counter() - start_time) * 1e3)
+    latencies_in_ms.sort()
+    p50 = statistics.median(latencies_in_ms)
+    p99 = latencies_in_ms[int(len(latencies_in_ms) * 0.99) - 1]
+    return f"p50 = {p50:6.2f} ms | p99 = {p99:6.2f} ms"
+
+
+def run_benchmark(item_count: int, run_count: int) -> None:
+    records = build_retrieval_records(item_count)
+    print(f"Items: {item_count}")
+    for label, build_offers in (("Previous", build_legacy_offers), ("Current", build_current_offers)):
+        print(f"{label:<10} {measure_memory(build_offers, records)}")
+        print(f"{'':<10} {measure_latency(build_offers, records, run_count)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=600)
+    parser.add_argument("--runs", type=int, default=100)
+    arguments = parser.parse_args()
+
+    run_benchmark(arguments.items, arguments.runs)
+
+
+if __name__ == "__main__":
+    main()
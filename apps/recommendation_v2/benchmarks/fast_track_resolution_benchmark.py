@@ -0,0 +1,141 @@
+"""
+Benchmark: fast-track venue resolution of candidate items, scalar loop vs vectorized batch.
+
+Builds synthetic single-venue and digital items around Paris, then resolves them with the
+previous per-item loop (scalar Haversine + one EnrichedRecommendableOffer built per item)
+and with the vectorized batch (resolve_fast_track_items), checks that both agree and prints
+latency percentiles.
+
+Usage:
+    make benchmark-fast-track-resolution
+    PYTHONPATH=src uv run python benchmarks/fast_track_resolution_benchmark.py --items 600 --runs 200
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from core.geo import calculate_haversine_distance_in_meters
+from core.retrieval import DEFAULT_MAX_DISTANCE_IN_METERS
+from core.retrieval import resolve_fast_track_items
+from core.user_context import UserContext
+from schemas.enriched_offer import EnrichedRecommendableOffer
+from schemas.vertex_prediction_item import ItemOrigin
+from schemas.vertex_prediction_item import RecommendableItem
+
+
+PARIS_LATITUDE, PARIS_LONGITUDE = 48.8566, 2.3522
+
+
+def build_fast_track_items(item_count: int) -> list[RecommendableItem]:
+    random_generator = random.Random(42)
+    items = []
+    for item_number in range(item_count):
+        is_geolocated = random_generator.random() < 0.7  # noqa: PLR2004
+        items.append(
+            RecommendableItem(
+                item_id=f"item-{item_number}",
+                item_origin=ItemOrigin.USER_BASED,
+                item_rank=item_number,
+                item_score=random_generator.random(),
+                item_cluster_id=None,
+                item_topic_id=None,
+                semantic_emb_mean=None,
+                booking_number=10,
+                booking_number_last_7_days=1,
+                booking_number_last_14_days=2,
+                booking_number_last_28_days=4,
+                stock_price=10.0,
+                category="LIVRE",
+                subcategory_id="LIVRE_PAPIER",
+                search_group_name="LIVRES",
+                offer_creation_date=None,
+                stock_beginning_date=None,
+                gtl_id=None,
+                gtl_l3=None,
+                gtl_l4=None,
+                is_geolocated=is_geolocated,
+                total_offers=1,
+                example_offer_id=f"offer-{item_number}",
+                example_venue_latitude=PARIS_LATITUDE + random_generator.uniform(-1.5, 1.5) if is_geolocated else None,
+                example_venue_longitude=PARIS_LONGITUDE + random_generator.uniform(-2, 2) if is_geolocated else None,
+            )
+        )
+    return items
+
+
+def resolve_fast_track_items_with_scalar_loop(
+    items: list[RecommendableItem], user_context: UserContext
+) -> list[EnrichedRecommendableOffer]:
+    """The fast-track branch as it was before the vectorized batch."""
+    enriched_offers = []
+    for item in items:
+        calculated_distance = None
+        if item.is_geolocated and user_context.is_geolocated:
+            calculated_distance = calculate_haversine_distance_in_meters(
+                user_context.latitude, user_context.longitude, item.example_venue_latitude, item.example_venue_longitude
+            )
+            if calculated_distance is not None and calculated_distance > DEFAULT_MAX_DISTANCE_IN_METERS:
+                continue
+
+        enriched_offers.append(
+            EnrichedRecommendableOffer(
+                offer_id=item.example_offer_id,
+                item=item,
+                offer_creation_date=item.offer_creation_date,
+                stock_beginning_date=item.stock_beginning_date,
+                venue_latitude=item.example_venue_latitude,
+                venue_longitude=item.example_venue_longitude,
+                offer_user_distance=calculated_distance,
+            )
+        )
+    return enriched_offers
+
+
+def format_latencies(label: str, latencies_in_seconds: list[float]) -> str:
+    latencies_in_us = sorted(latency * 1e6 for latency in latencies_in_seconds)
+    p50 = statistics.median(latencies_in_us)
+    p99 = latencies_in_us[int(len(latencies_in_us) * 0.99) - 1]
+    return f"{label:<12} p50 = {p50:10.1f} µs | p99 = {p99:10.1f} µs"
+
+
+def run_benchmark(item_count: int, run_count: int) -> None:
+    items = build_fast_track_items(item_count)
+    user_context = UserContext(user_id="benchmark-user", latitude=PARIS_LATITUDE, longitude=PARIS_LONGITUDE)
+
+    scalar_latencies, vectorized_latencies = [], []
+    for _ in range(run_count):
+        start_time = time.perf_counter()
+        scalar_offers = resolve_fast_track_items_with_scalar_loop(items, user_context)
+        scalar_latencies.append(time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        vectorized_offers, _ = resolve_fast_track_items(items, user_context)
+        vectorized_latencies.append(time.perf_counter() - start_time)
+
+    scalar_distances = {offer.offer_id: offer.offer_user_distance for offer in scalar_offers}
+    vectorized_distances = {offer.offer_id: offer.offer_user_distance for offer in vectorized_offers}
+    mismatch_count = sum(
+        (scalar_distances.get(offer_id) is None) != (distance is None)
+        or (distance is not None and abs(distance - scalar_distances[offer_id]) > 1e-6)  # noqa: PLR2004
+        for offer_id, distance in vectorized_distances.items()
+    ) + abs(len(scalar_distances) - len(vectorized_distances))
+
+    print(f"Items: {item_count} | resolved offers: {len(vectorized_offers)}")
+    print(format_latencies("Scalar", scalar_latencies))
+    print(format_latencies("Vectorized", vectorized_latencies))
+    print(f"Mismatches: {mismatch_count}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=600)
+    parser.add_argument("--runs", type=int, default=200)
+    arguments = parser.parse_args()
+
+    run_benchmark(arguments.items, arguments.runs)
+
+
+if __name__ == "__main__":
+    main()
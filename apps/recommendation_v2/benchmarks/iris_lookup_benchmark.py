@@ -0,0 +1,160 @@
+"""
+Benchmark: IRIS lookup through PostGIS vs the in-memory spatial index.
+
+Starts a local PostGIS container (same image as the integration tests), fills `iris_france`
+with a synthetic grid of polygons, then resolves the same random points with both paths,
+checks that they agree and prints latency percentiles.
+
+Usage (requires Docker):
+    make benchmark-iris-lookup
+    PYTHONPATH=src uv run python benchmarks/iris_lookup_benchmark.py --grid-size 150 --lookups 2000
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import statistics
+import time
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from testcontainers.postgres import PostgresContainer
+
+from core.geo import get_iris_id_from_coordinates
+from core.iris_index import build_iris_spatial_index
+from models.iris import IrisFrance
+
+
+# Synthetic IRIS grid over Île-de-France
+GRID_ORIGIN_LONGITUDE = 1.5
+GRID_ORIGIN_LATITUDE = 48.1
+GRID_CELL_SIZE_IN_DEGREES = 0.01
+
+
+def build_wavy_square_wkt(column: int, row: int, vertices_per_side: int) -> str:
+    """
+    Builds a grid cell whose sides are slightly wavy, so polygons carry a realistic number of
+    vertices (real IRIS contours have hundreds) while still tiling the plane without gaps.
+    """
+    min_longitude = GRID_ORIGIN_LONGITUDE + column * GRID_CELL_SIZE_IN_DEGREES
+    min_latitude = GRID_ORIGIN_LATITUDE + row * GRID_CELL_SIZE_IN_DEGREES
+    amplitude = GRID_CELL_SIZE_IN_DEGREES / 20
+
+    def wave(step: int) -> float:
+        return amplitude * math.sin(math.pi * step / vertices_per_side)
+
+    steps = range(vertices_per_side)
+    ring = (
+        [(min_longitude + GRID_CELL_SIZE_IN_DEGREES * s / vertices_per_side, min_latitude + wave(s)) for s in steps]
+        + [
+            (
+                min_longitude + GRID_CELL_SIZE_IN_DEGREES + wave(s),
+                min_latitude + GRID_CELL_SIZE_IN_DEGREES * s / vertices_per_side,
+            )
+            for s in steps
+        ]
+        + [
+            (
+                min_longitude + GRID_CELL_SIZE_IN_DEGREES * (1 - s / vertices_per_side),
+                min_latitude + GRID_CELL_SIZE_IN_DEGREES + wave(s),
+            )
+            for s in steps
+        ]
+        + [
+            (min_longitude + wave(s), min_latitude + GRID_CELL_SIZE_IN_DEGREES * (1 - s / vertices_per_side))
+            for s in steps
+        ]
+    )
+    ring.append(ring[0])
+    return "POLYGON((" + ", ".join(f"{longitude} {latitude}" for longitude, latitude in ring) + "))"
+
+
+def format_latencies(label: str, latencies_in_seconds: list[float]) -> str:
+    latencies_in_us = sorted(latency * 1e6 for latency in latencies_in_seconds)
+    p50 = statistics.median(latencies_in_us)
+    p99 = latencies_in_us[int(len(latencies_in_us) * 0.99) - 1]
+    return (
+        f"{label:<12} p50 = {p50:10.1f} µs | p99 = {p99:10.1f} µs | mean = {statistics.fmean(latencies_in_us):10.1f} µs"
+    )
+
+
+async def run_benchmark(database_url: str, grid_size: int, vertices_per_side: int, lookup_count: int) -> None:
+    engine = create_async_engine(database_url, poolclass=NullPool)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    async with engine.begin() as connection:
+        await connection.execute(sa.text("CREATE EXTENSION IF NOT EXISTS postgis"))
+        await connection.run_sync(IrisFrance.metadata.create_all, tables=[IrisFrance.__table__])
+        await connection.execute(sa.delete(IrisFrance))
+        await connection.execute(
+            sa.insert(IrisFrance),
+            [
+                {
+                    "id": f"iris-{column}-{row}",
+                    "iriscode": column * grid_size + row,
+                    "shape": build_wavy_square_wkt(column, row, vertices_per_side),
+                }
+                for column in range(grid_size)
+                for row in range(grid_size)
+            ],
+        )
+        await connection.execute(
+            sa.text("CREATE INDEX IF NOT EXISTS iris_france_shape_idx ON iris_france USING GIST (shape)")
+        )
+        await connection.execute(sa.text("ANALYZE iris_france"))
+
+    grid_extent = grid_size * GRID_CELL_SIZE_IN_DEGREES
+    random_generator = random.Random(42)
+    sampled_points = [
+        (
+            GRID_ORIGIN_LATITUDE + random_generator.uniform(-0.05, grid_extent + 0.05),
+            GRID_ORIGIN_LONGITUDE + random_generator.uniform(-0.05, grid_extent + 0.05),
+        )
+        for _ in range(lookup_count)
+    ]
+
+    async with session_factory() as db:
+        loading_start_time = time.perf_counter()
+        index = await build_iris_spatial_index(db)
+        loading_duration = time.perf_counter() - loading_start_time
+
+        postgis_latencies, postgis_iris_ids = [], []
+        for latitude, longitude in sampled_points:
+            start_time = time.perf_counter()
+            postgis_iris_ids.append(await get_iris_id_from_coordinates(db, latitude, longitude))
+            postgis_latencies.append(time.perf_counter() - start_time)
+
+    index_latencies, index_iris_ids = [], []
+    for latitude, longitude in sampled_points:
+        start_time = time.perf_counter()
+        index_iris_ids.append(index.find_iris_id(latitude, longitude))
+        index_latencies.append(time.perf_counter() - start_time)
+
+    await engine.dispose()
+
+    mismatch_count = sum(
+        postgis_id != index_id for postgis_id, index_id in zip(postgis_iris_ids, index_iris_ids, strict=True)
+    )
+    print(f"Polygons: {len(index)} | vertices: {index.vertex_count} | index loading: {loading_duration:.2f} s")
+    print(format_latencies("PostGIS", postgis_latencies))
+    print(format_latencies("In-memory", index_latencies))
+    print(f"Mismatches: {mismatch_count} / {lookup_count}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--grid-size", type=int, default=100, help="The grid holds grid-size² polygons.")
+    parser.add_argument("--vertices-per-side", type=int, default=50)
+    parser.add_argument("--lookups", type=int, default=1000)
+    arguments = parser.parse_args()
+
+    with PostgresContainer(image="postgis/postgis:15-3.3-alpine") as postgres:
+        database_url = postgres.get_connection_url().replace("psycopg2", "asyncpg")
+        asyncio.run(run_benchmark(database_url, arguments.grid_size, arguments.vertices_per_side, arguments.lookups))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark: in-process scoring of the ranking features with the local LightGBM model.
+
+Trains a synthetic LightGBM model shaped like the ranking model (numerical features with missing
+values, one categorical feature), saves and loads it as LOCAL_RANKING_MODEL_PATH would, then
+scores feature columns with LocalRankingModel (feature matrix assembly + `booster.predict`) and
+prints latency percentiles. Pass --model to benchmark an exported artifact instead.
+
+Usage:
+    make benchmark-local-ranking-model
+    PYTHONPATH=src uv run python benchmarks/local_ranking_model_benchmark.py --rows 600 --trees 500 --leaves 31
+    PYTHONPATH=src uv run python benchmarks/local_ranking_model_benchmark.py --model model.txt
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import lightgbm
+import numpy as np
+
+from core.local_ranking_model import LocalRankingModel
+
+
+FEATURE_COUNT = 21
+CATEGORICAL_FEATURE_INDEX = 2
+CATEGORIES = ["CINE", "LIVRE_PAPIER", "SPECTACLE", "CONCERT", "MUSEE", "JEU_EN_LIGNE"]
+TRAINING_ROW_COUNT = 20000
+MISSING_VALUE_RATIO = 0.1
+
+
+def build_feature_matrix(row_count: int, random_generator: np.random.Generator) -> np.ndarray:
+    feature_matrix = random_generator.uniform(0, 100, size=(row_count, FEATURE_COUNT))
+    feature_matrix[random_generator.random(feature_matrix.shape) < MISSING_VALUE_RATIO] = np.nan
+    feature_matrix[:, CATEGORICAL_FEATURE_INDEX] = random_generator.integers(0, len(CATEGORIES), size=row_count)
+    return feature_matrix
+
+
+def train_synthetic_model(model_path: Path, tree_count: int, leaf_count: int) -> None:
+    random_generator = np.random.default_rng(42)
+    feature_matrix = build_feature_matrix(TRAINING_ROW_COUNT, random_generator)
+    labels = random_generator.integers(0, 2, size=TRAINING_ROW_COUNT)
+    booster = lightgbm.train(
+        {"objective": "binary", "num_leaves": leaf_count, "min_data_in_leaf": 5, "seed": 42, "verbosity": -1},
+        lightgbm.Dataset(
+            feature_matrix,
+            label=labels,
+            feature_name=[f"feature_{feature_index}" for feature_index in range(FEATURE_COUNT)],
+            categorical_feature=[CATEGORICAL_FEATURE_INDEX],
+        ),
+        num_boost_round=tree_count,
+    )
+    # As if trained on a pandas category column: the categories are saved with the model
+    booster.pandas_categorical = [CATEGORIES]
+    booster.save_model(model_path)
+
+
+def build_feature_columns(model: LocalRankingModel, row_count: int) -> dict[str, list[float | str | None]]:
+    """Columns as core.ranking builds them: None for missing values, strings for categories."""
+    random_generator = np.random.default_rng(7)
+    feature_columns: dict[str, list[float | str | None]] = {}
+    for feature_name in model.feature_names:
+        if feature_name in model.category_codes:
+            feature_columns[feature_name] = [
+                str(category) for category in random_generator.choice([*CATEGORIES, "UNKNOWN"], size=row_count)
+            ]
+        else:
+            values = random_generator.uniform(0, 100, size=row_count)
+            feature_columns[feature_name] = [
+                None if random_generator.random() < MISSING_VALUE_RATIO else float(value) for value in values
+            ]
+    return feature_columns
+
+
+def format_latencies(label: str, latencies_in_seconds: list[float]) -> str:
+    latencies_in_ms = sorted(latency * 1e3 for latency in latencies_in_seconds)
+    p50 = statistics.median(latencies_in_ms)
+    p99 = latencies_in_ms[int(len(latencies_in_ms) * 0.99) - 1]
+    return f"{label:<12} p50 = {p50:8.2f} ms | p99 = {p99:8.2f} ms"
+
+
+def run_benchmark(model_path: Path, row_count: int, run_count: int) -> None:
+    model = LocalRankingModel.from_file(model_path)
+    feature_columns = build_feature_columns(model, row_count)
+
+    matrix_latencies, predict_latencies = [], []
+    for _ in range(run_count):
+        start_time = time.perf_counter()
+        feature_matrix = model.build_feature_matrix(feature_columns, row_count)
+        matrix_latencies.append(time.perf_counter() - start_time)
+        start_time = time.perf_counter()
+        model.booster.predict(feature_matrix, num_threads=1)
+        predict_latencies.append(time.perf_counter() - start_time)
+
+    print(f"Rows: {row_count} | Trees: {model.tree_count} | Features: {len(model.feature_names)}")
+    print(format_latencies("Matrix", matrix_latencies))
+    print(format_latencies("Predict", predict_latencies))
+    print(
+        format_latencies(
+            "Total", [sum(latencies) for latencies in zip(matrix_latencies, predict_latencies, strict=True)]
+        )
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=600)
+    parser.add_argument("--trees", type=int, default=500)
+    parser.add_argument("--leaves", type=int, default=31)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--model", type=Path, default=None, help="LightGBM text model (booster.save_model)")
+    arguments = parser.parse_args()
+
+    if arguments.model is not None:
+        run_benchmark(arguments.model, arguments.rows, arguments.runs)
+        return
+    with tempfile.TemporaryDirectory() as model_directory:
+        model_path = Path(model_directory) / "model.txt"
+        train_synthetic_model(model_path, arguments.trees, arguments.leaves)
+        run_benchmark(model_path, arguments.rows, arguments.runs)
+
+
+if __name__ == "__main__":
+    main()
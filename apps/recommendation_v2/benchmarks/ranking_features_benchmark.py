@@ -0,0 +1,166 @@
+"""
+Benchmark: construction of the Vertex AI ranking instances, per-offer dicts vs batch builder.
+
+Builds synthetic enriched offers, then the protobuf instances sent to the ranking endpoint with
+the previous path (one feature dict per offer, `datetime.now` called per offer, then one
+`json_format.ParseDict` per instance) and with the batch builder (build_vertex_ranking_instances),
+checks that both produce the same instances and prints latency percentiles.
+
+Usage:
+    make benchmark-ranking-features
+    PYTHONPATH=src uv run python benchmarks/ranking_features_benchmark.py --offers 600 --runs 200
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+from typing import Any
+
+from google.protobuf import json_format
+from google.protobuf.struct_pb2 import ListValue
+from google.protobuf.struct_pb2 import Value
+
+from core.ranking import build_vertex_ranking_instances
+from core.ranking import calculate_days_since
+from core.retrieval import build_enriched_offer_from_item
+from core.user_context import UserContext
+from schemas.enriched_offer import EnrichedRecommendableOffer
+from schemas.vertex_prediction_item import ItemOrigin
+from schemas.vertex_prediction_item import RecommendableItem
+
+
+def build_enriched_offers(offer_count: int) -> list[EnrichedRecommendableOffer]:
+    random_generator = random.Random(42)
+    offers = []
+    for offer_number in range(offer_count):
+        is_geolocated = random_generator.random() < 0.7  # noqa: PLR2004
+        creation_date = datetime(2025, 1, 1, tzinfo=UTC) + timedelta(hours=random_generator.randint(0, 8000))
+        item = RecommendableItem(
+            item_id=f"item-{offer_number}",
+            item_origin=ItemOrigin.USER_BASED,
+            item_rank=offer_number,
+            item_score=random_generator.random(),
+            item_cluster_id=None,
+            item_topic_id=None,
+            semantic_emb_mean=random_generator.random(),
+            booking_number=random_generator.randint(0, 1000),
+            booking_number_last_7_days=random_generator.randint(0, 10),
+            booking_number_last_14_days=random_generator.randint(0, 20),
+            booking_number_last_28_days=random_generator.randint(0, 40),
+            stock_price=round(random_generator.uniform(0, 100), 2),
+            category="LIVRE",
+            subcategory_id="LIVRE_PAPIER",
+            search_group_name="LIVRES",
+            offer_creation_date=creation_date,
+            stock_beginning_date=creation_date + timedelta(days=30) if is_geolocated else None,
+            gtl_id=None,
+            gtl_l3=None,
+            gtl_l4=None,
+            is_geolocated=is_geolocated,
+            total_offers=1,
+            example_offer_id=f"offer-{offer_number}",
+            example_venue_latitude=None,
+            example_venue_longitude=None,
+        )
+        offers.append(
+            build_enriched_offer_from_item(
+                item,
+                offer_id=f"offer-{offer_number}",
+                offer_creation_date=item.offer_creation_date,
+                stock_beginning_date=item.stock_beginning_date,
+                venue_latitude=None,
+                venue_longitude=None,
+                offer_user_distance=random_generator.uniform(0, 50_000) if is_geolocated else None,
+            )
+        )
+    return offers
+
+
+def build_ranking_features_per_offer(
+    offer: EnrichedRecommendableOffer, user_context: UserContext, context_name: str = "recommendation"
+) -> dict[str, Any]:
+    """The per-offer feature dict as it was before the batch builder."""
+    return {
+        "offer_id": str(offer.offer_id),
+        "context": f"{context_name}:{offer.item_origin}",
+        "user_bookings_count": float(user_context.bookings_count),
+        "user_clicks_count": float(user_context.clicks_count),
+        "user_favorites_count": float(user_context.favorites_count),
+        "user_deposit_remaining_credit": float(user_context.remaining_credit),
+        "user_is_geolocated": float(user_context.is_geolocated),
+        "user_iris_x": float(user_context.longitude) if user_context.longitude else None,
+        "user_iris_y": float(user_context.latitude) if user_context.latitude else None,
+        "offer_user_distance": offer.offer_user_distance,
+        "offer_subcategory_id": offer.subcategory_id,
+        "offer_stock_price": float(offer.stock_price or 0.0),
+        "offer_semantic_emb_mean": float(offer.semantic_emb_mean or 0.0),
+        "offer_is_geolocated": 1.0 if offer.is_geolocated else 0.0,
+        "offer_creation_days": calculate_days_since(offer.offer_creation_date),
+        "offer_stock_beginning_days": calculate_days_since(offer.stock_beginning_date),
+        "offer_booking_number": float(offer.booking_number),
+        "offer_booking_number_last_7_days": float(offer.booking_number_last_7_days),
+        "offer_booking_number_last_14_days": float(offer.booking_number_last_14_days),
+        "offer_booking_number_last_28_days": float(offer.booking_number_last_28_days),
+        "offer_item_score": float(offer.item_score or 0.0),
+        "offer_item_rank": float(offer.item_rank),
+        "day_of_the_week": datetime.now(UTC).weekday(),
+        "hour_of_the_day": datetime.now(UTC).hour,
+    }
+
+
+def build_ranking_instances_per_offer(
+    offers: list[EnrichedRecommendableOffer], user_context: UserContext
+) -> list[Value]:
+    feature_payloads = [build_ranking_features_per_offer(offer, user_context) for offer in offers]
+    return [json_format.ParseDict(payload, Value()) for payload in feature_payloads]
+
+
+def format_latencies(label: str, latencies_in_seconds: list[float]) -> str:
+    latencies_in_ms = sorted(latency * 1e3 for latency in latencies_in_seconds)
+    p50 = statistics.median(latencies_in_ms)
+    p99 = latencies_in_ms[int(len(latencies_in_ms) * 0.99) - 1]
+    return f"{label:<12} p50 = {p50:7.2f} ms | p99 = {p99:7.2f} ms"
+
+
+def run_benchmark(offer_count: int, run_count: int) -> None:
+    offers = build_enriched_offers(offer_count)
+    user_context = UserContext(
+        user_id="benchmark-user", latitude=48.8566, longitude=2.3522, bookings_count=12, clicks_count=80
+    )
+
+    per_offer_latencies, batch_latencies = [], []
+    for _ in range(run_count):
+        start_time = time.perf_counter()
+        per_offer_instances = build_ranking_instances_per_offer(offers, user_context)
+        per_offer_latencies.append(time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        batch_instances: ListValue = build_vertex_ranking_instances(offers, user_context)
+        batch_latencies.append(time.perf_counter() - start_time)
+
+    mismatch_count = sum(
+        per_offer_instance != batch_instance
+        for per_offer_instance, batch_instance in zip(per_offer_instances, batch_instances.values, strict=True)
+    )
+
+    print(f"Offers: {offer_count}")
+    print(format_latencies("Per offer", per_offer_latencies))
+    print(format_latencies("Batch", batch_latencies))
+    print(f"Mismatches: {mismatch_count}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--offers", type=int, default=600)
+    parser.add_argument("--runs", type=int, default=200)
+    arguments = parser.parse_args()
+
+    run_benchmark(arguments.offers, arguments.runs)
+
+
+if __name__ == "__main__":
+    main()
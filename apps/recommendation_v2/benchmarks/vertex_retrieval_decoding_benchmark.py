@@ -0,0 +1,162 @@
+"""
+Benchmark: decoding of a Vertex AI retrieval response, proto-plus wrappers vs raw protobuf.
+
+Decodes the same PredictResponse with the previous per-item loop (proto-plus mapping access and
+one RecommendableItem built per prediction), with the strict decoding (VERTEX_RETRIEVAL_STRICT_DECODING)
+and with the default raw protobuf decoding, checks that all of them agree and prints latency percentiles.
+
+The response is synthetic by default (600 items). A recorded response can be replayed instead
+with --fixture, pointing to a PredictResponse serialized as JSON (json_format.MessageToJson).
+
+Usage:
+    make benchmark-vertex-retrieval-decoding
+    PYTHONPATH=src uv run python benchmarks/vertex_retrieval_decoding_benchmark.py --items 600 --runs 100
+    PYTHONPATH=src uv run python benchmarks/vertex_retrieval_decoding_benchmark.py --fixture response.json
+"""
+
+import argparse
+import random
+import statistics
+import time
+from pathlib import Path
+
+from google.cloud import aiplatform_v1
+from google.protobuf import json_format
+
+from connectors.vertex_prediction_decoder import decode_retrieval_predictions
+from schemas.vertex_prediction_item import ItemOrigin
+from schemas.vertex_prediction_item import RecommendableItem
+
+
+def build_synthetic_response(item_count: int) -> aiplatform_v1.PredictResponse:
+    random_generator = random.Random(42)
+    predictions = []
+    for item_number in range(item_count):
+        is_geolocated = random_generator.random() < 0.7  # noqa: PLR2004
+        predictions.append(
+            {
+                "item_id": f"item-{item_number}",
+                "idx": item_number,
+                "_distance": random_generator.random(),
+                "cluster_id": f"cluster-{item_number % 50}",
+                "topic_id": f"topic-{item_number % 20}",
+                "semantic_emb_mean": random_generator.random(),
+                "is_geolocated": int(is_geolocated),
+                "booking_number": random_generator.randint(0, 1000),
+                "booking_number_last_7_days": random_generator.randint(0, 10),
+                "booking_number_last_14_days": random_generator.randint(0, 20),
+                "booking_number_last_28_days": random_generator.randint(0, 40),
+                "stock_price": round(random_generator.uniform(0, 100), 2),
+                "category": "LIVRE",
+                "subcategory_id": "LIVRE_PAPIER",
+                "search_group_name": "LIVRES",
+                "offer_creation_date": "2024-01-01T00:00:00",
+                "stock_beginning_date": None,
+                "gtl_id": "01020000",
+                "gtl_l3": "Romans",
+                "gtl_l4": None,
+                "total_offers": random_generator.randint(1, 5),
+                "example_offer_id": f"offer-{item_number}",
+                "example_venue_latitude": 48.8566 + random_generator.uniform(-1, 1) if is_geolocated else None,
+                "example_venue_longitude": 2.3522 + random_generator.uniform(-1, 1) if is_geolocated else None,
+            }
+        )
+    raw_response = json_format.ParseDict(
+        {"predictions": predictions, "deployed_model_id": "benchmark"},
+        aiplatform_v1.PredictResponse.pb(aiplatform_v1.PredictResponse()),
+    )
+    return aiplatform_v1.PredictResponse.wrap(raw_response)
+
+
+def load_recorded_response(fixture_path: Path) -> aiplatform_v1.PredictResponse:
+    raw_response = json_format.Parse(
+        fixture_path.read_text(), aiplatform_v1.PredictResponse.pb(aiplatform_v1.PredictResponse())
+    )
+    return aiplatform_v1.PredictResponse.wrap(raw_response)
+
+
+def decode_with_proto_plus_loop(response: aiplatform_v1.PredictResponse) -> list[RecommendableItem]:
+    """The retrieval parsing as it was before the raw protobuf decoding."""
+    parsed_predictions = []
+    for raw_prediction in response.predictions:
+        parsed_predictions.append(
+            RecommendableItem(
+                item_id=raw_prediction["item_id"],
+                item_rank=raw_prediction["idx"],
+                item_score=raw_prediction.get("_distance", None),
+                item_origin=ItemOrigin.USER_BASED,
+                item_cluster_id=raw_prediction.get("cluster_id", None),
+                item_topic_id=raw_prediction.get("topic_id", None),
+                semantic_emb_mean=raw_prediction.get("semantic_emb_mean", None),
+                is_geolocated=bool(raw_prediction["is_geolocated"]),
+                booking_number=raw_prediction["booking_number"],
+                booking_number_last_7_days=raw_prediction["booking_number_last_7_days"],
+                booking_number_last_14_days=raw_prediction["booking_number_last_14_days"],
+                booking_number_last_28_days=raw_prediction["booking_number_last_28_days"],
+                stock_price=raw_prediction["stock_price"],
+                category=raw_prediction["category"],
+                subcategory_id=raw_prediction["subcategory_id"],
+                search_group_name=raw_prediction["search_group_name"],
+                offer_creation_date=raw_prediction["offer_creation_date"],
+                stock_beginning_date=raw_prediction["stock_beginning_date"],
+                gtl_id=raw_prediction["gtl_id"],
+                gtl_l3=raw_prediction["gtl_l3"],
+                gtl_l4=raw_prediction["gtl_l4"],
+                total_offers=raw_prediction["total_offers"],
+                example_offer_id=raw_prediction.get("example_offer_id", None),
+                example_venue_latitude=raw_prediction.get("example_venue_latitude", None),
+                example_venue_longitude=raw_prediction.get("example_venue_longitude", None),
+            )
+        )
+    return parsed_predictions
+
+
+def format_latencies(label: str, latencies_in_seconds: list[float]) -> str:
+    latencies_in_ms = sorted(latency * 1e3 for latency in latencies_in_seconds)
+    p50 = statistics.median(latencies_in_ms)
+    p99 = latencies_in_ms[int(len(latencies_in_ms) * 0.99) - 1]
+    return f"{label:<12} p50 = {p50:8.2f} ms | p99 = {p99:8.2f} ms"
+
+
+def run_benchmark(response: aiplatform_v1.PredictResponse, run_count: int) -> None:
+    decoders = {
+        "Proto-plus": decode_with_proto_plus_loop,
+        "Strict": lambda response: decode_retrieval_predictions(response, ItemOrigin.USER_BASED, strict=True),
+        "Raw": lambda response: decode_retrieval_predictions(response, ItemOrigin.USER_BASED, strict=False),
+    }
+    latencies: dict[str, list[float]] = {label: [] for label in decoders}
+    decoded_items: dict[str, list[RecommendableItem]] = {}
+    for _ in range(run_count):
+        for label, decoder in decoders.items():
+            start_time = time.perf_counter()
+            decoded_items[label] = decoder(response)
+            latencies[label].append(time.perf_counter() - start_time)
+
+    reference_items = decoded_items["Proto-plus"]
+    mismatch_count = sum(
+        sum(item != reference_item for item, reference_item in zip(items, reference_items, strict=False))
+        + abs(len(items) - len(reference_items))
+        for items in decoded_items.values()
+    )
+
+    print(f"Predictions: {len(response.predictions)}")
+    for label, decoder_latencies in latencies.items():
+        print(format_latencies(label, decoder_latencies))
+    print(f"Mismatches: {mismatch_count}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=600)
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--fixture", type=Path, default=None, help="Recorded PredictResponse (JSON)")
+    arguments = parser.parse_args()
+
+    response = (
+        load_recorded_response(arguments.fixture) if arguments.fixture else build_synthetic_response(arguments.items)
+    )
+    run_benchmark(response, arguments.runs)
+
+
+if __name__ == "__main__":
+    main()
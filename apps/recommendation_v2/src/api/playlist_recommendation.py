@@ -114,18 +114,40 @@ async def get_playlist(
         extra={"user_id": user_id},
     )
 
-    # Delegate the heavy lifting to the core orchestration pipeline
-    result = await generate_playlist_recommendations(
-        db=db, user_id=user_id, latitude=latitude, longitude=longitude, params=params
+    async def _run_pipeline_and_store_result() -> RecommendationResponse:
+        # Delegate the heavy lifting to the core orchestration pipeline
+        pipeline_result = await generate_playlist_recommendations(
+            db=db, user_id=user_id, latitude=latitude, longitude=longitude, params=params
+        )
+
+        # Store the newly generated result in Cache
+        if settings.REDIS_CACHE_ENABLED:
+            await redis_api.store_endpoint_response(
+                namespace_prefix="playlist_recommendation",
+                request_signature_data=request_signature_data,
+                response_model_instance=pipeline_result,
+            )
+
+        return pipeline_result
+
+    # Identical concurrent requests share a single pipeline run instead of all missing the cache at once
+    result, is_shared_result = await redis_api.run_pipeline_once(
+        namespace_prefix="playlist_recommendation",
+        request_signature_data=request_signature_data,
+        response_model_class=RecommendationResponse,
+        run_pipeline=_run_pipeline_and_store_result,
     )
 
-    # Store the newly generated result in Cache
-    if settings.REDIS_CACHE_ENABLED:
-        await redis_api.store_endpoint_response(
-            namespace_prefix="playlist_recommendation",
-            request_signature_data=request_signature_data,
-            response_model_instance=result,
+    if is_shared_result:
+        # Served like a cache hit: the original call_id is preserved and the response is not tracked again.
+        shared_result = result.model_copy(deep=True)
+        shared_result.from_cache = True
+        shared_result.params.unique_call_id = str(uuid.uuid4())
+        logger.info(
+            "🤝 Coalesced — returning playlist_recommendation computed by an identical request.",
+            extra={"user_id": user_id, "call_id": shared_result.params.call_id},
         )
+        return shared_result
 
     logger.info(
         "✅ playlist_recommendation pipeline completed.",
@@ -144,26 +144,48 @@ async def get_similar_offers(  # noqa: PLR0913
         extra={"offer_id": offer_id, "retrieval_model": retrieval_model},
     )
 
-    # Delegate the heavy lifting to the core orchestration pipeline
-    result = await generate_similar_offers(
-        db=db,
-        offer_id=offer_id,
-        user_id=user_id,
-        categories=categories,
-        subcategories=subcategories,
-        search_group_names=search_group_names,
-        latitude=latitude,
-        longitude=longitude,
-        retrieval_model=retrieval_model,
+    async def _run_pipeline_and_store_result() -> SimilarOfferResponse:
+        # Delegate the heavy lifting to the core orchestration pipeline
+        pipeline_result = await generate_similar_offers(
+            db=db,
+            offer_id=offer_id,
+            user_id=user_id,
+            categories=categories,
+            subcategories=subcategories,
+            search_group_names=search_group_names,
+            latitude=latitude,
+            longitude=longitude,
+            retrieval_model=retrieval_model,
+        )
+
+        # Store the newly generated result in Cache
+        if settings.REDIS_CACHE_ENABLED:
+            await redis_api.store_endpoint_response(
+                namespace_prefix="similar_offer",
+                request_signature_data=request_signature_data,
+                response_model_instance=pipeline_result,
+            )
+
+        return pipeline_result
+
+    # Identical concurrent requests share a single pipeline run instead of all missing the cache at once
+    result, is_shared_result = await redis_api.run_pipeline_once(
+        namespace_prefix="similar_offer",
+        request_signature_data=request_signature_data,
+        response_model_class=SimilarOfferResponse,
+        run_pipeline=_run_pipeline_and_store_result,
     )
 
-    # Store the newly generated result in Cache
-    if settings.REDIS_CACHE_ENABLED:
-        await redis_api.store_endpoint_response(
-            namespace_prefix="similar_offer",
-            request_signature_data=request_signature_data,
-            response_model_instance=result,
+    if is_shared_result:
+        # Served like a cache hit: the original call_id is preserved and the response is not tracked again.
+        shared_result = result.model_copy(deep=True)
+        shared_result.from_cache = True
+        shared_result.params.unique_call_id = str(uuid.uuid4())
+        logger.info(
+            "🤝 Coalesced — returning similar_offers computed by an identical request.",
+            extra={"offer_id": offer_id, "call_id": shared_result.params.call_id},
         )
+        return shared_result
 
     logger.info(
         "✅ similar_offers pipeline completed.",
@@ -74,6 +74,15 @@ DATABASE_URL: str = os.getenv(
 
 DATABASE_STATEMENT_TIMEOUT_MS: int = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", "10000"))
 
+# Prepared statements kept per connection by the asyncpg dialect (LRU, 0 disables the cache).
+# Hot queries bind their variable-length lists as arrays (= ANY($n)), so each statement is
+# prepared once per connection instead of once per list length.
+DATABASE_PREPARED_STATEMENT_CACHE_SIZE: int = int(os.environ.get("DB_PREPARED_STATEMENT_CACHE_SIZE", "256"))
+# PostgreSQL plan_cache_mode of the prepared statements (auto | force_generic_plan | force_custom_plan).
+# With "auto", PostgreSQL switches to a generic plan, skipping planning, after 5 custom plans
+# if the generic plan is not estimated more expensive.
+DATABASE_PLAN_CACHE_MODE: str = os.environ.get("DB_PLAN_CACHE_MODE", "auto")
+
 
 # --- 5. Google Cloud Platform & Vertex AI ---
 GCP_PROJECT: str = os.environ.get("GCP_PROJECT", "passculture-data-ehp")
@@ -88,6 +97,29 @@ VERTEX_RANKING_ENDPOINT_NAME: str = os.environ.get("VERTEX_RANKING_ENDPOINT_NAME
 
 VERTEX_PREDICTION_TIMEOUT: float = float(os.environ.get("VERTEX_PREDICTION_TIMEOUT", "10.0" if IS_LOCAL else "2.0"))
 
+# In-process LRU cache for "tops" retrieval responses. Tops payloads carry no user signal besides
+# shared filters (price ceiling, categories...), so many requests send the exact same payload.
+# Entries expire after the TTL below or at REDIS_CACHE_RESET_HOUR, whichever comes first.
+VERTEX_TOPS_LOCAL_CACHE_ENABLED: bool = bool(int(os.environ.get("VERTEX_TOPS_LOCAL_CACHE_ENABLED", "1")))
+VERTEX_TOPS_LOCAL_CACHE_MAX_ENTRIES: int = int(os.environ.get("VERTEX_TOPS_LOCAL_CACHE_MAX_ENTRIES", "1024"))
+VERTEX_TOPS_LOCAL_CACHE_TTL_SECONDS: int = int(os.environ.get("VERTEX_TOPS_LOCAL_CACHE_TTL_SECONDS", "900"))
+
+# Retrieval predictions are decoded straight from the raw protobuf, reading each field with the
+# type the model schema declares (values of another type are validated as sent). Debug switch:
+# decode every value according to its actual type.
+VERTEX_RETRIEVAL_STRICT_DECODING: bool = bool(int(os.environ.get("VERTEX_RETRIEVAL_STRICT_DECODING", "0")))
+
+# The ranking instances are split into batches of this size, sent concurrently to the ranking
+# endpoint. A batch that fails or times out only loses its own scores: its offers fall back to
+# their retrieval item_rank, after the scored offers. 0 sends every instance in a single call.
+VERTEX_RANKING_BATCH_SIZE: int = int(os.environ.get("VERTEX_RANKING_BATCH_SIZE", "200"))
+
+# In-process ranking: the LightGBM ranking model exported as text (booster.save_model) is loaded
+# from LOCAL_RANKING_MODEL_PATH at startup and scores the offers in a worker thread, instead of the
+# Vertex ranking endpoint. Vertex stays the fallback if the model cannot be loaded or scoring fails.
+LOCAL_RANKING_MODEL_ENABLED: bool = bool(int(os.environ.get("LOCAL_RANKING_MODEL_ENABLED", "0")))
+LOCAL_RANKING_MODEL_PATH: str = os.environ.get("LOCAL_RANKING_MODEL_PATH", "")
+
 # --- 6. Swagger UI for API Testing ---
 SWAGGER_UI_EXAMPLE_USER_ID: str = os.environ.get("SWAGGER_UI_EXAMPLE_USER_ID", "")
 SWAGGER_UI_EXAMPLE_OFFER_ID: str = os.environ.get("SWAGGER_UI_EXAMPLE_OFFER_ID", "")
@@ -103,11 +135,82 @@ REDIS_MONITOR_INTERVAL_SECONDS: int = int(os.environ.get("REDIS_MONITOR_INTERVAL
 REDIS_CA_CERT_PATH: str = os.environ.get("REDIS_CA_CERT_PATH", "")  # Path to PEM file for Redis TLS
 REDIS_AUTH_STRING: str = os.environ.get("REDIS_AUTH_STRING", "")  # Optional auth string for Redis
 
+# Request coalescing ("single-flight"): identical concurrent cache misses share a single pipeline run.
+# The in-process layer works per worker; the optional Redis layer extends it across workers with a
+# short-lived SET NX lock (requires REDIS_CACHE_ENABLED). Waiters give up after the timeout and run
+# the pipeline themselves.
+SINGLE_FLIGHT_ENABLED: bool = bool(int(os.environ.get("SINGLE_FLIGHT_ENABLED", "1")))
+REDIS_SINGLE_FLIGHT_ENABLED: bool = bool(int(os.environ.get("REDIS_SINGLE_FLIGHT_ENABLED", "0")))
+REDIS_SINGLE_FLIGHT_LOCK_TTL_SECONDS: int = int(os.environ.get("REDIS_SINGLE_FLIGHT_LOCK_TTL_SECONDS", "10"))
+REDIS_SINGLE_FLIGHT_WAIT_TIMEOUT_SECONDS: float = float(
+    os.environ.get("REDIS_SINGLE_FLIGHT_WAIT_TIMEOUT_SECONDS", "3.0")
+)
+REDIS_SINGLE_FLIGHT_POLL_INTERVAL_SECONDS: float = float(
+    os.environ.get("REDIS_SINGLE_FLIGHT_POLL_INTERVAL_SECONDS", "0.05")
+)
+
 # --- 9. Model Context Configuration ---
 SIMILAR_OFFER_MODEL_CONTEXT: str = os.environ.get("SIMILAR_OFFER_MODEL_CONTEXT", "default")
 PLAYLIST_RECOMMENDATION_MODEL_CONTEXT: str = os.environ.get("RECO_MODEL_CONTEXT", "default")
 
-# --- 10. Geospatial Configuration ---
+# --- 10. Candidate Pruning ---
+# Pre-ranking pruning: between the booked-items filter and venue resolution, only the best candidates
+# (lowest item_rank, then highest item_score) of each (item_origin, search_group_name) group are kept,
+# shrinking the spatial resolution and the ranking payload. Every group keeps up to K items so that
+# diversification still has enough material. Tune K with `make benchmark-candidate-pruning`.
+CANDIDATE_PRUNING_ENABLED: bool = bool(int(os.environ.get("CANDIDATE_PRUNING_ENABLED", "0")))
+CANDIDATE_PRUNING_MAX_ITEMS_PER_GROUP: int = int(os.environ.get("CANDIDATE_PRUNING_MAX_ITEMS_PER_GROUP", "30"))
+
+# --- 11. Non-Recommendable Items Cache ---
+# Per-user cache of the non-recommendable (already booked) item ids, read before the candidate filter.
+# Sets are cached in Redis (requires REDIS_CACHE_ENABLED) until REDIS_CACHE_RESET_HOUR, when the
+# NonRecommendableItems table is rebuilt, with a short-lived in-process LRU layer in front of Redis.
+NON_RECOMMENDABLE_ITEMS_CACHE_ENABLED: bool = bool(int(os.environ.get("NON_RECOMMENDABLE_ITEMS_CACHE_ENABLED", "0")))
+NON_RECOMMENDABLE_ITEMS_LOCAL_CACHE_MAX_ENTRIES: int = int(
+    os.environ.get("NON_RECOMMENDABLE_ITEMS_LOCAL_CACHE_MAX_ENTRIES", "10000")
+)
+NON_RECOMMENDABLE_ITEMS_LOCAL_CACHE_TTL_SECONDS: int = int(
+    os.environ.get("NON_RECOMMENDABLE_ITEMS_LOCAL_CACHE_TTL_SECONDS", "60")
+)
+
+# --- 12. Booked Items Exclusion in Retrieval ---
+# Booked-items exclusion pushed into retrieval: the already booked item ids are fetched before the
+# Vertex call (instead of concurrently with it) and sent as an "item_id $nin" filter, so that they no
+# longer take retrieval slots. Only user-specific payloads carry it: shared "tops" payloads stay
+# cacheable. The post-retrieval filter stays as a safety net (and handles ids beyond the cap).
+# Best paired with NON_RECOMMENDABLE_ITEMS_CACHE_ENABLED, which takes the fetch off the database.
+RETRIEVAL_BOOKED_ITEMS_EXCLUSION_ENABLED: bool = bool(
+    int(os.environ.get("RETRIEVAL_BOOKED_ITEMS_EXCLUSION_ENABLED", "0"))
+)
+RETRIEVAL_BOOKED_ITEMS_EXCLUSION_MAX_ITEMS: int = int(
+    os.environ.get("RETRIEVAL_BOOKED_ITEMS_EXCLUSION_MAX_ITEMS", "500")
+)
+
+# --- 13. Diversification ---
+# Diversification strategy of each endpoint: "round_robin" (categorical Round-Robin on the search group,
+# sub-mixed on the GTL for books) or "mmr" (greedy Maximal Marginal Relevance over the item clusters,
+# topics and semantic embeddings). The MMR weight trades relevance (1.0 = ranking order) for diversity.
+VALID_DIVERSIFICATION_STRATEGIES: tuple[str, ...] = ("round_robin", "mmr")
+PLAYLIST_RECOMMENDATION_DIVERSIFICATION_STRATEGY: str = os.environ.get(
+    "PLAYLIST_RECOMMENDATION_DIVERSIFICATION_STRATEGY", "round_robin"
+)
+SIMILAR_OFFER_DIVERSIFICATION_STRATEGY: str = os.environ.get("SIMILAR_OFFER_DIVERSIFICATION_STRATEGY", "round_robin")
+MMR_DIVERSIFICATION_RELEVANCE_WEIGHT: float = float(os.environ.get("MMR_DIVERSIFICATION_RELEVANCE_WEIGHT", "0.7"))
+if not 0.0 <= MMR_DIVERSIFICATION_RELEVANCE_WEIGHT <= 1.0:  # pragma: no cover
+    raise RuntimeError(
+        f"Invalid MMR_DIVERSIFICATION_RELEVANCE_WEIGHT={MMR_DIVERSIFICATION_RELEVANCE_WEIGHT!r}. Must be within [0, 1]."
+    )
+for diversification_strategy in (
+    PLAYLIST_RECOMMENDATION_DIVERSIFICATION_STRATEGY,
+    SIMILAR_OFFER_DIVERSIFICATION_STRATEGY,
+):
+    if diversification_strategy not in VALID_DIVERSIFICATION_STRATEGIES:  # pragma: no cover
+        raise RuntimeError(
+            f"Invalid diversification strategy {diversification_strategy!r}. "
+            f"Must be one of {VALID_DIVERSIFICATION_STRATEGIES}."
+        )
+
+# --- 14. Geospatial Configuration ---
 GEOSPATIAL_RETRIEVAL_H3_RESOLUTION: int = int(os.environ.get("GEOSPATIAL_RETRIEVAL_H3_RESOLUTION", "5"))
 
 # Fail-fast: only resolutions that are materialised as indexed
@@ -120,3 +223,49 @@ if GEOSPATIAL_RETRIEVAL_H3_RESOLUTION not in VALID_H3_RESOLUTIONS:  # pragma: no
     )
 
 CACHE_H3_RESOLUTION: int = int(os.environ.get("CACHE_H3_RESOLUTION", "8"))
+
+# Per-request H3 resolution of the closest offer query, picked from a venue density map of the
+# coarse cells (resolution 5) loaded at startup and reloaded every night at REDIS_CACHE_RESET_HOUR:
+# the coarsest resolution whose disk is estimated to scan at most GEOSPATIAL_RETRIEVAL_MAX_SCANNED_VENUES
+# venues, among the resolutions whose disk binds at most GEOSPATIAL_RETRIEVAL_MAX_BOUND_H3_CELLS cells
+# (300: resolutions 5 and 6, 61 and 271 cells). GEOSPATIAL_RETRIEVAL_H3_RESOLUTION stays the fallback
+# while the map is not loaded.
+# Selection counters are logged every GEOSPATIAL_RETRIEVAL_H3_RESOLUTION_STATS_LOG_INTERVAL_SECONDS.
+GEOSPATIAL_RETRIEVAL_ADAPTIVE_H3_RESOLUTION_ENABLED: bool = bool(
+    int(os.environ.get("GEOSPATIAL_RETRIEVAL_ADAPTIVE_H3_RESOLUTION_ENABLED", "0"))
+)
+GEOSPATIAL_RETRIEVAL_MAX_SCANNED_VENUES: int = int(os.environ.get("GEOSPATIAL_RETRIEVAL_MAX_SCANNED_VENUES", "5000"))
+GEOSPATIAL_RETRIEVAL_MAX_BOUND_H3_CELLS: int = int(os.environ.get("GEOSPATIAL_RETRIEVAL_MAX_BOUND_H3_CELLS", "300"))
+GEOSPATIAL_RETRIEVAL_H3_RESOLUTION_STATS_LOG_INTERVAL_SECONDS: int = int(
+    os.environ.get("GEOSPATIAL_RETRIEVAL_H3_RESOLUTION_STATS_LOG_INTERVAL_SECONDS", "600")
+)
+
+# LRU cache of the H3 cells covering the search radius around a user cell (services.h3), one entry per
+# user cell. A disk holds ~60 cells (~5 KB) at resolution 5, ~1,500 (~110 KB) at resolution 7 and
+# ~9,500 (~700 KB) at resolution 8: lower the size when retrieving at fine resolutions.
+H3_GRID_DISK_CACHE_MAX_ENTRIES: int = int(os.environ.get("H3_GRID_DISK_CACHE_MAX_ENTRIES", "2048"))
+
+# Resolve multi-venue items from the nightly precomputed table item_h3_closest_offers_mv (indexed lookup
+# on the user H3 cell + exact distance re-check) before falling back to the live H3 / Haversine query.
+# Requires the table to be built by apps/recommendation/db/scripts/create_item_h3_closest_offers_mv.sql.
+PRECOMPUTED_CLOSEST_OFFERS_ENABLED: bool = bool(int(os.environ.get("PRECOMPUTED_CLOSEST_OFFERS_ENABLED", "0")))
+
+# In-memory item venue index: the offers of every item (with their venue coordinates) are loaded into
+# NumPy arrays at startup and reloaded every night at REDIS_CACHE_RESET_HOUR, and multi-venue items are
+# resolved in process. Costs a few hundred MB per worker: disabled by default.
+IN_MEMORY_VENUE_RESOLVER_ENABLED: bool = bool(int(os.environ.get("IN_MEMORY_VENUE_RESOLVER_ENABLED", "0")))
+
+# In-memory IRIS spatial index: the IRIS polygons are loaded in the background at startup and reloaded
+# every night at REDIS_CACHE_RESET_HOUR. IRIS lookups fall back to PostGIS while the index is not loaded.
+# Disabled by default until its parity with PostGIS is checked (benchmarks/iris_lookup_benchmark.py).
+IRIS_SPATIAL_INDEX_ENABLED: bool = bool(int(os.environ.get("IRIS_SPATIAL_INDEX_ENABLED", "0")))
+
+# In-process memo of IRIS lookups keyed on a fine H3 cell (resolution 10 ≈ 76 m edges). Cells lying
+# entirely inside one IRIS resolve to the cached id, border cells fall through to the exact lookup.
+# Hit / border / miss counters are logged every IRIS_H3_CELL_CACHE_STATS_LOG_INTERVAL_SECONDS.
+IRIS_H3_CELL_CACHE_ENABLED: bool = bool(int(os.environ.get("IRIS_H3_CELL_CACHE_ENABLED", "0")))
+IRIS_H3_CELL_CACHE_RESOLUTION: int = int(os.environ.get("IRIS_H3_CELL_CACHE_RESOLUTION", "10"))
+IRIS_H3_CELL_CACHE_MAX_ENTRIES: int = int(os.environ.get("IRIS_H3_CELL_CACHE_MAX_ENTRIES", "50000"))
+IRIS_H3_CELL_CACHE_STATS_LOG_INTERVAL_SECONDS: int = int(
+    os.environ.get("IRIS_H3_CELL_CACHE_STATS_LOG_INTERVAL_SECONDS", "600")
+)
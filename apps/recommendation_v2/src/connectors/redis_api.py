@@ -1,5 +1,9 @@
+import asyncio
 import hashlib
 import json
+import uuid
+from collections.abc import Awaitable
+from collections.abc import Callable
 from datetime import UTC
 from datetime import datetime
 from datetime import time
@@ -11,6 +15,7 @@ from pydantic import BaseModel
 from config import settings
 from services.logger import logger
 from services.redis import redis_cache_service
+from services.single_flight import single_flight_service
 
 
 class RedisAPI:
@@ -143,5 +148,158 @@ class RedisAPI:
             },
         )
 
+    @staticmethod
+    async def fetch_cached_members(cache_key: str) -> set[str] | None:
+        """
+        Retrieves a set cached with store_members.
+
+        Args:
+            cache_key: The string identifier of the set.
+
+        Returns:
+            Optional[set[str]]: The cached members (possibly none), or None on a cache miss.
+        """
+        if not settings.REDIS_CACHE_ENABLED:
+            return None
+
+        cached_members = await redis_cache_service.get_set_members(cache_key=cache_key)
+
+        logger.debug(
+            "💾 Redis set cache HIT." if cached_members is not None else "🔍 Redis set cache MISS.",
+            extra={"cache_key": cache_key},
+        )
+        return cached_members
+
+    @staticmethod
+    async def store_members(cache_key: str, members: set[str]) -> None:
+        """
+        Stores a set in Redis until the next database population time.
+
+        Args:
+            cache_key: The string identifier of the set.
+            members: The members to store (an empty set is cached too).
+        """
+        if not settings.REDIS_CACHE_ENABLED:
+            return
+
+        await redis_cache_service.replace_set_members(
+            cache_key=cache_key,
+            members=members,
+            time_to_live_in_seconds=RedisAPI.calculate_seconds_until_next_database_population_time(),
+        )
+
+    @staticmethod
+    async def wait_for_cached_response(
+        namespace_prefix: str, request_signature_data: dict[str, Any], response_model_class: type[BaseModel]
+    ) -> BaseModel | None:
+        """
+        Polls Redis until another worker stores the response, or the wait timeout elapses.
+
+        Args:
+            namespace_prefix: A string representing the domain/feature.
+            request_signature_data: A dictionary containing all the unique request parameters.
+            response_model_class: The Pydantic model class to instantiate with the cached data.
+
+        Returns:
+            Optional[BaseModel]: The instantiated response model if it appeared in time, otherwise None.
+        """
+        cache_key = RedisAPI.generate_cache_key(
+            namespace_prefix=namespace_prefix, request_signature_data=request_signature_data
+        )
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.REDIS_SINGLE_FLIGHT_WAIT_TIMEOUT_SECONDS
+
+        while loop.time() < deadline:
+            await asyncio.sleep(settings.REDIS_SINGLE_FLIGHT_POLL_INTERVAL_SECONDS)
+
+            cached_data = await redis_cache_service.get_cached_value(cache_key=cache_key)
+            if cached_data is not None:
+                return response_model_class(**cached_data)
+
+        logger.warning(
+            "⏳ Timed out waiting for another worker's response. Running the pipeline locally.",
+            extra={"cache_key": cache_key, "namespace": namespace_prefix},
+        )
+        return None
+
+    @staticmethod
+    async def run_pipeline_once[ResponseModel: BaseModel](
+        namespace_prefix: str,
+        request_signature_data: dict[str, Any],
+        response_model_class: type[ResponseModel],
+        run_pipeline: Callable[[], Awaitable[ResponseModel]],
+    ) -> tuple[ResponseModel, bool]:
+        """
+        Runs an endpoint pipeline after a cache miss, coalescing identical concurrent requests.
+
+        Coalescing happens at two levels:
+        1. In-process (SINGLE_FLIGHT_ENABLED): concurrent requests with the same signature
+           in this worker await the first one instead of running the pipeline again.
+        2. Cross-worker (REDIS_SINGLE_FLIGHT_ENABLED): the in-process leader takes a short-lived
+           Redis lock. If another worker already holds it, the leader waits for that worker to
+           store the response in cache, and only runs the pipeline itself after a timeout.
+
+        Args:
+            namespace_prefix: A string representing the domain/feature.
+            request_signature_data: A dictionary containing all the unique request parameters.
+            response_model_class: The Pydantic model class to instantiate with cached data.
+            run_pipeline: Factory running the pipeline and storing its response in cache.
+
+        Returns:
+            tuple[BaseModel, bool]: The response, and True if it was produced by another request
+                (shared object: callers must copy it before mutating it).
+        """
+
+        async def _run_pipeline_with_distributed_lock() -> tuple[ResponseModel, bool]:
+            if not (settings.REDIS_CACHE_ENABLED and settings.REDIS_SINGLE_FLIGHT_ENABLED):
+                return await run_pipeline(), False
+
+            cache_key = RedisAPI.generate_cache_key(
+                namespace_prefix=namespace_prefix, request_signature_data=request_signature_data
+            )
+            lock_key = f"{cache_key}:lock"
+            lock_token = str(uuid.uuid4())
+
+            lock_acquired = await redis_cache_service.acquire_lock(
+                lock_key=lock_key,
+                lock_token=lock_token,
+                time_to_live_in_seconds=settings.REDIS_SINGLE_FLIGHT_LOCK_TTL_SECONDS,
+            )
+
+            if lock_acquired:
+                try:
+                    return await run_pipeline(), False
+                finally:
+                    await redis_cache_service.release_lock(lock_key=lock_key, lock_token=lock_token)
+
+            cached_response = await RedisAPI.wait_for_cached_response(
+                namespace_prefix=namespace_prefix,
+                request_signature_data=request_signature_data,
+                response_model_class=response_model_class,
+            )
+            if isinstance(cached_response, response_model_class):
+                return cached_response, True
+
+            return await run_pipeline(), False
+
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return await _run_pipeline_with_distributed_lock()
+
+        flight_key = RedisAPI.generate_cache_key(
+            namespace_prefix=namespace_prefix, request_signature_data=request_signature_data
+        )
+        (response, is_shared_across_workers), is_shared_in_process = await single_flight_service.run(
+            flight_key=flight_key, run_call=_run_pipeline_with_distributed_lock
+        )
+
+        if is_shared_in_process:
+            logger.debug(
+                "🤝 Request coalesced with an identical in-flight request.",
+                extra={"flight_key": flight_key, "namespace": namespace_prefix},
+            )
+
+        return response, is_shared_in_process or is_shared_across_workers
+
 
 redis_api = RedisAPI()
@@ -1,9 +1,11 @@
 import traceback
 
 from fastapi import HTTPException
+from google.protobuf.struct_pb2 import ListValue
 from pydantic import BaseModel
 
 from config import settings
+from connectors.vertex_prediction_decoder import decode_retrieval_predictions
 from schemas.vertex_prediction_item import ItemOrigin
 from schemas.vertex_prediction_item import RecommendableItem
 from services.logger import logger
@@ -108,36 +110,9 @@ class VertexAPI:
             model_type = feature_payloads[0]["model_type"]
             item_origin = self.get_item_origin(model_type)
 
-            parsed_predictions = []
-            for raw_prediction in response.predictions:
-                parsed_item = RecommendableItem(
-                    item_id=raw_prediction["item_id"],
-                    item_rank=raw_prediction["idx"],
-                    item_score=raw_prediction.get("_distance", None),
-                    item_origin=item_origin,
-                    item_cluster_id=raw_prediction.get("cluster_id", None),
-                    item_topic_id=raw_prediction.get("topic_id", None),
-                    semantic_emb_mean=raw_prediction.get("semantic_emb_mean", None),
-                    is_geolocated=bool(raw_prediction["is_geolocated"]),
-                    booking_number=raw_prediction["booking_number"],
-                    booking_number_last_7_days=raw_prediction["booking_number_last_7_days"],
-                    booking_number_last_14_days=raw_prediction["booking_number_last_14_days"],
-                    booking_number_last_28_days=raw_prediction["booking_number_last_28_days"],
-                    stock_price=raw_prediction["stock_price"],
-                    category=raw_prediction["category"],
-                    subcategory_id=raw_prediction["subcategory_id"],
-                    search_group_name=raw_prediction["search_group_name"],
-                    offer_creation_date=raw_prediction["offer_creation_date"],
-                    stock_beginning_date=raw_prediction["stock_beginning_date"],
-                    gtl_id=raw_prediction["gtl_id"],
-                    gtl_l3=raw_prediction["gtl_l3"],
-                    gtl_l4=raw_prediction["gtl_l4"],
-                    total_offers=raw_prediction["total_offers"],
-                    example_offer_id=raw_prediction.get("example_offer_id", None),
-                    example_venue_latitude=raw_prediction.get("example_venue_latitude", None),
-                    example_venue_longitude=raw_prediction.get("example_venue_longitude", None),
-                )
-                parsed_predictions.append(parsed_item)
+            parsed_predictions = decode_retrieval_predictions(
+                response, item_origin, strict=settings.VERTEX_RETRIEVAL_STRICT_DECODING
+            )
 
             logger.debug(
                 "✅ Vertex retrieval predictions fetched successfully.",
@@ -166,12 +141,12 @@ class VertexAPI:
             # Fail gracefully by returning an empty list rather than crashing the API
             return VertexPredictionResult(status="error", model_display_name=self.endpoint_name, predictions=[])
 
-    async def fetch_ranking_predictions(self, feature_payloads: list[dict]) -> list[RankingPrediction]:
+    async def fetch_ranking_predictions(self, feature_payloads: list[dict] | ListValue) -> list[RankingPrediction]:
         """
         Calls the Ranking model to score a specific list of resolved offers.
 
         Args:
-            feature_payloads (list[dict]): The enriched features for the user and each offer.
+            feature_payloads (list[dict] | ListValue): The enriched features for the user and each offer.
 
         Returns:
             list[RankingPrediction]: The validated offer IDs mapped to their ML score.
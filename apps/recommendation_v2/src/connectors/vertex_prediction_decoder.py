@@ -0,0 +1,163 @@
+"""
+Decoding of the raw retrieval predictions returned by Vertex AI into RecommendableItem.
+
+Each retrieval prediction is a protobuf `Struct` of ~25 values, for up to ~600 items per request.
+Reading them through the proto-plus wrappers of the client library (`response.predictions[i][key]`)
+marshals every value into a Python object and dominates the parsing time. The fast path reads
+the underlying protobuf messages directly, with the accessor matching the type each field is
+expected to have (`number_value`, `string_value`), and validates all the records in one batch.
+
+The fast path checks the kind of each value: a null or a value sent with an unexpected kind
+(e.g. a string where a number is expected) is decoded according to its actual kind instead, so
+that such mismatches surface as validation errors rather than as defaults of the expected kind.
+The strict path (VERTEX_RETRIEVAL_STRICT_DECODING) decodes every value according to its actual kind.
+"""
+
+from collections.abc import Iterable
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from google.protobuf.message import Message
+from google.protobuf.struct_pb2 import Value
+from pydantic import TypeAdapter
+
+from schemas.vertex_prediction_item import ItemOrigin
+from schemas.vertex_prediction_item import RecommendableItem
+
+
+@dataclass(frozen=True)
+class RetrievalPredictionField:
+    """
+    Maps a key of the raw retrieval prediction to a RecommendableItem field.
+
+    Attributes:
+        raw_key: Key in the prediction returned by the retrieval model.
+        item_field: Name of the RecommendableItem field.
+        value_accessor: Protobuf `Value` accessor of the expected kind.
+        is_required: Whether a prediction missing the key is invalid.
+        is_nullable: Whether the value may be null.
+    """
+
+    raw_key: str
+    item_field: str
+    value_accessor: str
+    is_required: bool = True
+    is_nullable: bool = False
+
+
+RETRIEVAL_PREDICTION_FIELDS: tuple[RetrievalPredictionField, ...] = (
+    RetrievalPredictionField("item_id", "item_id", "string_value"),
+    RetrievalPredictionField("idx", "item_rank", "number_value"),
+    RetrievalPredictionField("_distance", "item_score", "number_value", is_required=False, is_nullable=True),
+    RetrievalPredictionField("cluster_id", "item_cluster_id", "string_value", is_required=False, is_nullable=True),
+    RetrievalPredictionField("topic_id", "item_topic_id", "string_value", is_required=False, is_nullable=True),
+    RetrievalPredictionField(
+        "semantic_emb_mean", "semantic_emb_mean", "number_value", is_required=False, is_nullable=True
+    ),
+    RetrievalPredictionField("is_geolocated", "is_geolocated", "number_value"),
+    RetrievalPredictionField("booking_number", "booking_number", "number_value"),
+    RetrievalPredictionField("booking_number_last_7_days", "booking_number_last_7_days", "number_value"),
+    RetrievalPredictionField("booking_number_last_14_days", "booking_number_last_14_days", "number_value"),
+    RetrievalPredictionField("booking_number_last_28_days", "booking_number_last_28_days", "number_value"),
+    RetrievalPredictionField("stock_price", "stock_price", "number_value"),
+    RetrievalPredictionField("category", "category", "string_value"),
+    RetrievalPredictionField("subcategory_id", "subcategory_id", "string_value"),
+    RetrievalPredictionField("search_group_name", "search_group_name", "string_value"),
+    RetrievalPredictionField("offer_creation_date", "offer_creation_date", "string_value", is_nullable=True),
+    RetrievalPredictionField("stock_beginning_date", "stock_beginning_date", "string_value", is_nullable=True),
+    RetrievalPredictionField("gtl_id", "gtl_id", "string_value", is_nullable=True),
+    RetrievalPredictionField("gtl_l3", "gtl_l3", "string_value", is_nullable=True),
+    RetrievalPredictionField("gtl_l4", "gtl_l4", "string_value", is_nullable=True),
+    RetrievalPredictionField("total_offers", "total_offers", "number_value"),
+    RetrievalPredictionField("example_offer_id", "example_offer_id", "string_value", is_required=False),
+    RetrievalPredictionField(
+        "example_venue_latitude", "example_venue_latitude", "number_value", is_required=False, is_nullable=True
+    ),
+    RetrievalPredictionField(
+        "example_venue_longitude", "example_venue_longitude", "number_value", is_required=False, is_nullable=True
+    ),
+)
+
+_recommendable_items_adapter = TypeAdapter(list[RecommendableItem])
+
+
+def decode_struct_value(value: Value) -> Any:
+    """
+    Converts a protobuf `Value` to the matching Python scalar, according to its actual kind.
+    Lists and nested structs are not expected in retrieval predictions and are returned as is.
+    """
+    value_kind = value.WhichOneof("kind")
+    if value_kind is None or value_kind == "null_value":
+        return None
+    return getattr(value, value_kind)
+
+
+def _decode_protobuf_prediction(prediction_fields: Mapping[str, Value], *, strict: bool) -> dict[str, Any]:
+    """
+    Decodes the fields of one raw prediction `Struct` into a RecommendableItem record.
+
+    Raises:
+        KeyError: If a required key is missing.
+    """
+    record: dict[str, Any] = {}
+    for field in RETRIEVAL_PREDICTION_FIELDS:
+        value = prediction_fields.get(field.raw_key)
+        if value is None:
+            if field.is_required:
+                raise KeyError(field.raw_key)
+            record[field.item_field] = None
+        elif strict or value.WhichOneof("kind") != field.value_accessor:
+            # Null or unexpected kind: left to the validation of the item schema
+            record[field.item_field] = decode_struct_value(value)
+        else:
+            record[field.item_field] = getattr(value, field.value_accessor)
+    return record
+
+
+def _decode_mapping_prediction(prediction: Mapping[str, Any]) -> dict[str, Any]:
+    """
+    Decodes one prediction already converted to a mapping (e.g. by the proto-plus wrappers).
+
+    Raises:
+        KeyError: If a required key is missing.
+    """
+    return {
+        field.item_field: prediction[field.raw_key] if field.is_required else prediction.get(field.raw_key)
+        for field in RETRIEVAL_PREDICTION_FIELDS
+    }
+
+
+def decode_retrieval_predictions(response: Any, item_origin: ItemOrigin, *, strict: bool) -> list[RecommendableItem]:
+    """
+    Decodes the predictions of a Vertex AI retrieval response into RecommendableItem.
+
+    Args:
+        response: The PredictResponse returned by the Vertex AI client. Responses whose
+            predictions are plain mappings (e.g. test doubles) are decoded by key.
+        item_origin: Origin of the items (deduced from the model type and endpoint).
+        strict: Decode every value according to its actual kind instead of its expected kind.
+
+    Returns:
+        list[RecommendableItem]: The validated items, in the order of the predictions.
+
+    Raises:
+        KeyError: If a prediction misses a required key.
+        pydantic.ValidationError: If a decoded value does not match the item schema.
+    """
+    raw_response = getattr(response, "_pb", None)
+    if isinstance(raw_response, Message):
+        raw_predictions: Iterable[Value] = raw_response.predictions
+        records = [
+            _decode_protobuf_prediction(raw_prediction.struct_value.fields, strict=strict)
+            for raw_prediction in raw_predictions
+        ]
+    else:
+        records = [_decode_mapping_prediction(prediction) for prediction in response.predictions]
+
+    for record in records:
+        record["item_origin"] = item_origin
+        record["is_geolocated"] = bool(record["is_geolocated"])
+
+    # One validation call for the whole batch: cheaper than building the items one by one.
+    return _recommendable_items_adapter.validate_python(records)
@@ -1,19 +1,22 @@
+import asyncio
 import uuid
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import settings
-from core.diversification import apply_offer_diversification
-from core.geo import get_iris_id_from_coordinates
+from core.diversification import get_diversification_strategy
 from core.ranking import rank_and_sort_offers_with_vertex
+from core.retrieval import apply_candidate_pruning
 from core.retrieval import build_all_playlist_recommendation_retrieval_payloads
 from core.retrieval import fetch_all_playlist_recommendation_retrieval_predictions_from_vertex
+from core.retrieval import fetch_already_booked_item_ids
+from core.retrieval import fetch_item_ids_to_exclude_from_retrieval
 from core.retrieval import filter_out_already_booked_items
 from core.retrieval import resolve_closest_venues_from_items
 from core.tracking import log_past_offer_context_to_sink
 from core.user_context import UNAUTHENTICATED_USER_ID
 from core.user_context import UserContext
-from models.user import EnrichedUser
+from core.user_context import fetch_user_record_and_iris_id
 from schemas.playlist_recommendation import PlaylistRequestParams
 from schemas.playlist_recommendation import RecommendationMetadata
 from schemas.playlist_recommendation import RecommendationResponse
@@ -57,8 +60,8 @@ async def generate_playlist_recommendations(
     call_id = str(uuid.uuid4())
     call_id_context.set(call_id)
 
-    db_user = await db.get(EnrichedUser, user_id)
-    iris_id = await get_iris_id_from_coordinates(db, latitude, longitude)
+    # User profile and IRIS zone are fetched in a single database round-trip
+    db_user, iris_id = await fetch_user_record_and_iris_id(db, user_id, latitude, longitude)
 
     user_context = UserContext.build_from_database_record(
         user_id=user_id,
@@ -83,9 +86,15 @@ async def generate_playlist_recommendations(
     )
 
     # --- 2. Retrieval Phase ---
+    # Booked items excluded in the retrieval filters must be known before building the payloads.
+    # Cold start users only send the shared tops payload, which never carries the exclusion.
+    excluded_item_ids = await fetch_item_ids_to_exclude_from_retrieval(
+        db=db, user_id=user_context.user_id, is_user_specific_retrieval=not user_context.is_cold_start
+    )
+
     # Build all retrieval payloads (1 for cold start, 4 for warm start) and fetch them in parallel
     retrieval_payloads = build_all_playlist_recommendation_retrieval_payloads(
-        user_context=user_context, call_id=call_id, params=params
+        user_context=user_context, call_id=call_id, params=params, excluded_item_ids=excluded_item_ids
     )
 
     logger.info(
@@ -97,9 +106,17 @@ async def generate_playlist_recommendations(
         },
     )
 
-    raw_candidate_items = await fetch_all_playlist_recommendation_retrieval_predictions_from_vertex(
-        retrieval_payloads=retrieval_payloads
-    )
+    if excluded_item_ids is not None:
+        raw_candidate_items = await fetch_all_playlist_recommendation_retrieval_predictions_from_vertex(
+            retrieval_payloads=retrieval_payloads
+        )
+        already_booked_item_ids = excluded_item_ids
+    else:
+        # The booked items query does not depend on the retrieval results: run it while Vertex AI is working
+        raw_candidate_items, already_booked_item_ids = await asyncio.gather(
+            fetch_all_playlist_recommendation_retrieval_predictions_from_vertex(retrieval_payloads=retrieval_payloads),
+            fetch_already_booked_item_ids(db=db, user_id=user_context.user_id),
+        )
 
     logger.info(
         "📦 Raw candidates retrieved from Vertex AI.",
@@ -108,7 +125,10 @@ async def generate_playlist_recommendations(
 
     # --- 3. Filtering Phase & Resolution ---
     unbooked_candidate_items = await filter_out_already_booked_items(
-        db=db, candidate_items=raw_candidate_items, user_id=user_context.user_id
+        db=db,
+        candidate_items=raw_candidate_items,
+        user_id=user_context.user_id,
+        already_booked_item_ids=already_booked_item_ids,
     )
 
     logger.info(
@@ -118,12 +138,16 @@ async def generate_playlist_recommendations(
             "before_filter": len(raw_candidate_items),
             "after_filter": len(unbooked_candidate_items),
             "filtered_out": len(raw_candidate_items) - len(unbooked_candidate_items),
+            "excluded_in_retrieval": excluded_item_ids is not None,
         },
     )
 
     # Convert abstract items into actionable offers, keeping only the closest venues for physical items
+    # (the candidates are first pruned per retrieval source and search group when CANDIDATE_PRUNING_ENABLED)
     resolved_offers = await resolve_closest_venues_from_items(
-        db=db, candidate_items=unbooked_candidate_items, user_context=user_context
+        db=db,
+        candidate_items=apply_candidate_pruning(unbooked_candidate_items, call_id=call_id),
+        user_context=user_context,
     )
 
     logger.info(
@@ -141,19 +165,19 @@ async def generate_playlist_recommendations(
     )
 
     # --- 5. Diversification & Truncation Phase ---
-    # Shuffle and interleave categories to ensure a diverse final playlist
-    diversified_offers = apply_offer_diversification(ranked_offers, should_shuffle_initial_list=False)
-
-    # Cap the final playlist to a strict maximum
-    final_playlist = diversified_offers[:PLAYLIST_RECOMMENDATION_MAXIMUM_SIZE]
+    # Diversify with the strategy of the endpoint (categorical Round-Robin or MMR) to ensure a diverse
+    # final playlist, capped to a strict maximum (only the kept offers are selected)
+    final_playlist = get_diversification_strategy(settings.PLAYLIST_RECOMMENDATION_DIVERSIFICATION_STRATEGY).diversify(
+        ranked_offers, limit=PLAYLIST_RECOMMENDATION_MAXIMUM_SIZE
+    )
 
     logger.info(
         "🎨 Diversification applied — final playlist ready.",
         extra={
             "call_id": call_id,
-            "after_diversification": len(diversified_offers),
+            "diversification_strategy": settings.PLAYLIST_RECOMMENDATION_DIVERSIFICATION_STRATEGY,
             "final_playlist_size": len(final_playlist),
-            "truncated": len(diversified_offers) > len(final_playlist),
+            "truncated": len(ranked_offers) > len(final_playlist),
         },
     )
 
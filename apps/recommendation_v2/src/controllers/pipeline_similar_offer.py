@@ -1,3 +1,4 @@
+import asyncio
 import uuid
 
 from sqlalchemy import select
@@ -5,19 +6,21 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import settings
 from controllers.pipeline_playlist_recommendation import generate_playlist_recommendations
-from core.diversification import apply_offer_diversification
-from core.geo import get_iris_id_from_coordinates
+from core.diversification import get_diversification_strategy
 from core.ranking import rank_and_sort_offers_with_vertex
+from core.retrieval import apply_candidate_pruning
 from core.retrieval import build_similar_offer_retrieval_payload
+from core.retrieval import fetch_already_booked_item_ids
 from core.retrieval import fetch_graph_predictions_from_vertex
+from core.retrieval import fetch_item_ids_to_exclude_from_retrieval
 from core.retrieval import fetch_retrieval_predictions_from_vertex
 from core.retrieval import filter_out_already_booked_items
 from core.retrieval import resolve_closest_venues_from_items
 from core.tracking import log_past_offer_context_to_sink
 from core.user_context import UNAUTHENTICATED_USER_ID
 from core.user_context import UserContext
+from core.user_context import fetch_user_record_and_iris_id
 from models.offer import RecommendableOffers
-from models.user import EnrichedUser
 from schemas.categories import CategoryEnum
 from schemas.categories import SearchGroupNameEnum
 from schemas.categories import SubcategoryEnum
@@ -113,9 +116,9 @@ async def generate_similar_offers(  # noqa: PLR0913
 
     # 1.3. Build user context (use provided user_id or default to unauthenticated)
     effective_user_id = user_id if user_id else UNAUTHENTICATED_USER_ID
-    db_user = await db.get(EnrichedUser, effective_user_id)
-    iris_id = await get_iris_id_from_coordinates(db, latitude, longitude)
-    # If latitude and longitude are None, get_iris_id_from_coordinates returns None
+    # User profile and IRIS zone are fetched in a single database round-trip.
+    # If latitude and longitude are None, the IRIS id is None.
+    db_user, iris_id = await fetch_user_record_and_iris_id(db, effective_user_id, latitude, longitude)
 
     user_context = UserContext.build_from_database_record(
         user_id=effective_user_id,
@@ -148,6 +151,16 @@ async def generate_similar_offers(  # noqa: PLR0913
             "has_filters": any([categories, subcategories, search_group_names]),
         },
     )
+
+    # Booked items are only needed for authenticated users. Excluded in the retrieval filters, they must be
+    # known before building the payload, otherwise they are fetched while Vertex AI is working.
+    should_filter_booked_items = bool(user_context.is_authenticated and user_context.user_id)
+    excluded_item_ids = await fetch_item_ids_to_exclude_from_retrieval(
+        db=db,
+        user_id=user_context.user_id,
+        is_user_specific_retrieval=should_filter_booked_items and reference_item_id is not None,
+    )
+
     retrieval_payload = build_similar_offer_retrieval_payload(
         user_context=user_context,
         call_id=call_id,
@@ -155,11 +168,22 @@ async def generate_similar_offers(  # noqa: PLR0913
         categories=categories,
         subcategories=subcategories,
         search_group_names=search_group_names,
+        excluded_item_ids=excluded_item_ids,
     )
-    if retrieval_model == SimilarOfferModelChoices.graph:
-        vertex_raw_predictions = await fetch_graph_predictions_from_vertex(prediction_payload=retrieval_payload)
+    fetch_predictions_from_vertex = (
+        fetch_graph_predictions_from_vertex
+        if retrieval_model == SimilarOfferModelChoices.graph
+        else fetch_retrieval_predictions_from_vertex
+    )
+
+    if should_filter_booked_items and excluded_item_ids is None:
+        vertex_raw_predictions, already_booked_item_ids = await asyncio.gather(
+            fetch_predictions_from_vertex(prediction_payload=retrieval_payload),
+            fetch_already_booked_item_ids(db=db, user_id=user_context.user_id),
+        )
     else:
-        vertex_raw_predictions = await fetch_retrieval_predictions_from_vertex(prediction_payload=retrieval_payload)
+        vertex_raw_predictions = await fetch_predictions_from_vertex(prediction_payload=retrieval_payload)
+        already_booked_item_ids = excluded_item_ids or set()
 
     logger.info(
         "📦 Raw candidates retrieved from Vertex AI.",
@@ -168,9 +192,12 @@ async def generate_similar_offers(  # noqa: PLR0913
 
     # --- 3. Filtering Phase ---
     # Remove already-booked items if the user is authenticated
-    if user_context.is_authenticated and user_context.user_id:
+    if should_filter_booked_items:
         unbooked_candidate_items = await filter_out_already_booked_items(
-            db=db, candidate_items=vertex_raw_predictions.predictions, user_id=user_context.user_id
+            db=db,
+            candidate_items=vertex_raw_predictions.predictions,
+            user_id=user_context.user_id,
+            already_booked_item_ids=already_booked_item_ids,
         )
         logger.info(
             "🚫 Already-booked items filtered out.",
@@ -179,6 +206,7 @@ async def generate_similar_offers(  # noqa: PLR0913
                 "before_filter": len(vertex_raw_predictions.predictions),
                 "after_filter": len(unbooked_candidate_items),
                 "filtered_out": len(vertex_raw_predictions.predictions) - len(unbooked_candidate_items),
+                "excluded_in_retrieval": excluded_item_ids is not None,
             },
         )
     else:
@@ -186,8 +214,11 @@ async def generate_similar_offers(  # noqa: PLR0913
 
     # --- 4. Resolution Phase ---
     # Convert abstract items into actionable offers, keeping only the closest venues for physical items
+    # (the candidates are first pruned per retrieval source and search group when CANDIDATE_PRUNING_ENABLED)
     resolved_offers = await resolve_closest_venues_from_items(
-        db=db, candidate_items=unbooked_candidate_items, user_context=user_context
+        db=db,
+        candidate_items=apply_candidate_pruning(unbooked_candidate_items, call_id=call_id),
+        user_context=user_context,
     )
 
     logger.info(
@@ -205,17 +236,17 @@ async def generate_similar_offers(  # noqa: PLR0913
     )
 
     # --- 6. Diversification & Truncation Phase ---
-    # Shuffle and interleave categories to ensure a diverse final list
-    diversified_offers = apply_offer_diversification(ranked_offers, should_shuffle_initial_list=False)
-
-    # Cap the final list to a strict maximum
-    final_similar_offers = diversified_offers[:SIMILAR_OFFERS_LIST_MAXIMUM_SIZE]
+    # Diversify with the strategy of the endpoint (categorical Round-Robin or MMR) to ensure a diverse
+    # final list, capped to a strict maximum (only the kept offers are selected)
+    final_similar_offers = get_diversification_strategy(settings.SIMILAR_OFFER_DIVERSIFICATION_STRATEGY).diversify(
+        ranked_offers, limit=SIMILAR_OFFERS_LIST_MAXIMUM_SIZE
+    )
 
     logger.info(
         "🎨 Diversification applied — final similar offers list ready.",
         extra={
             "call_id": call_id,
-            "after_diversification": len(diversified_offers),
+            "diversification_strategy": settings.SIMILAR_OFFER_DIVERSIFICATION_STRATEGY,
             "final_list_size": len(final_similar_offers),
         },
     )
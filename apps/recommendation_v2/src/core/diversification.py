@@ -1,6 +1,14 @@
+import math
 import random
+from abc import ABC
+from abc import abstractmethod
 from collections import defaultdict
+from collections.abc import Callable
+from enum import StrEnum
 
+import numpy as np
+
+from config import settings
 from schemas.enriched_offer import EnrichedRecommendableOffer
 from services.logger import logger
 
@@ -10,6 +18,14 @@ DEFAULT_SUB_MIXING_CONFIG = {
     "LIVRES": "gtl_id",
 }
 
+# MMR similarity between two items: weights of a shared cluster, a shared topic and
+# of the closeness of their semantic_emb_mean (scaled to the candidates' range).
+MMR_CLUSTER_SIMILARITY_WEIGHT = 0.5
+MMR_TOPIC_SIMILARITY_WEIGHT = 0.3
+MMR_EMBEDDING_SIMILARITY_WEIGHT = 0.2
+# Offers whose MMR scores penalized by the similarity to them are computed at once (the likely next picks)
+MMR_SCORE_BATCH_SIZE = 32
+
 
 def _group_offers_by_attribute(
     offers: list[EnrichedRecommendableOffer], attribute_name: str
@@ -37,8 +53,23 @@ def _group_offers_by_attribute(
     return dict(grouped_offers)
 
 
+def _sort_offer_group_keys_by_priority(offer_groups: dict[str, list[EnrichedRecommendableOffer]]) -> list[str]:
+    """
+    Orders the group keys for the Round-Robin:
+    1. By the number of items in the group (descending)
+    2. By the maximum item_score found within the group (descending)
+    """
+    return sorted(
+        offer_groups.keys(),
+        key=lambda key: (len(offer_groups[key]), max(offer.item_score or 0 for offer in offer_groups[key])),
+        reverse=True,
+    )
+
+
 def _interleave_offer_groups_round_robin(
     offer_groups: dict[str, list[EnrichedRecommendableOffer]],
+    limit: int | None = None,
+    sorted_group_keys: list[str] | None = None,
 ) -> list[EnrichedRecommendableOffer]:
     """
     Merges multiple grouped lists of offers using a Round-Robin algorithm.
@@ -54,35 +85,34 @@ def _interleave_offer_groups_round_robin(
 
         Output sequence: A1 -> B1 -> C1 -> A2 -> B2 -> A3
 
+    Round r takes the r-th offer of every group holding more than r offers: the groups are read
+    by index (no list.pop(0) / list.remove, linear in the produced offers) and the merge stops
+    as soon as `limit` offers are produced.
+
     Args:
         offer_groups (dict[str, list[EnrichedRecommendableOffer]]): The grouped offers to interleave.
+        limit (int | None): Maximum number of offers to produce. Defaults to None (every offer).
+        sorted_group_keys (list[str] | None): Group priority, when computed before the groups were
+                                              truncated. Defaults to the priority of offer_groups.
 
     Returns:
         list[EnrichedRecommendableOffer]: A single, flat, diversified list of offers.
     """
-    interleaved_result = []
-
-    # Sort the group keys:
-    # 1. By the number of items in the group (descending)
-    # 2. By the maximum item_score found within the group (descending)
-    sorted_group_keys = sorted(
-        offer_groups.keys(),
-        key=lambda key: (len(offer_groups[key]), max(offer.item_score or 0 for offer in offer_groups[key])),
-        reverse=True,
-    )
-
-    # Initialize buckets based on the sorted priority
-    active_buckets = [offer_groups[key] for key in sorted_group_keys]
-
-    # Round-Robin extraction: take the first item of each bucket sequentially
-    while active_buckets:
-        for bucket in list(active_buckets):
-            if not bucket:
-                active_buckets.remove(bucket)
-                continue
-
-            # Pop the first element of the current bucket and append it to the result
-            interleaved_result.append(bucket.pop(0))
+    if sorted_group_keys is None:
+        sorted_group_keys = _sort_offer_group_keys_by_priority(offer_groups)
+    buckets = [offer_groups[key] for key in sorted_group_keys]
+    total_offer_count = sum(len(bucket) for bucket in buckets)
+    output_size = total_offer_count if limit is None else min(limit, total_offer_count)
+
+    interleaved_result: list[EnrichedRecommendableOffer] = []
+    round_index = 0
+    while len(interleaved_result) < output_size:
+        buckets = [bucket for bucket in buckets if len(bucket) > round_index]
+        for bucket in buckets:
+            interleaved_result.append(bucket[round_index])
+            if len(interleaved_result) == output_size:
+                break
+        round_index += 1
 
     return interleaved_result
 
@@ -92,6 +122,7 @@ def apply_offer_diversification(
     sub_mixing_configuration: dict[str, str] | None = None,
     *,
     should_shuffle_initial_list: bool = False,
+    limit: int | None = None,
 ) -> list[EnrichedRecommendableOffer]:
     """
     Applies business rules to ensure the final recommendation playlist is diverse.
@@ -106,9 +137,12 @@ def apply_offer_diversification(
                                                           Defaults to DEFAULT_SUB_MIXING_CONFIG.
         should_shuffle_initial_list (bool): If True, randomly shuffles offers before grouping.
                                             Defaults to False.
+        limit (int | None): Size of the returned playlist: only the first `limit` offers of the
+                            interleaving are produced (and sub-mixed). Defaults to None (every offer).
 
     Returns:
-        list[EnrichedRecommendableOffer]: The diversified playlist ready to be truncated and returned.
+        list[EnrichedRecommendableOffer]: The diversified playlist, the first `limit` offers of the
+                                          full interleaving.
     """
     if not offers:
         return []
@@ -132,7 +166,11 @@ def apply_offer_diversification(
         },
     )
 
+    # The group priority is read before the sub-mixed categories are truncated to `limit`
+    sorted_group_keys = _sort_offer_group_keys_by_priority(primary_offer_groups)
+
     # --- 3. Sub-mixing Phase (Specific Categories) ---
+    # No category contributes more than `limit` offers to the playlist: only those are sub-mixed
     for category, sub_attribute in configuration.items():
         if category in primary_offer_groups:
             # Extract the specific category (e.g., 'LIVRES')
@@ -142,13 +180,15 @@ def apply_offer_diversification(
             sub_grouped_offers = _group_offers_by_attribute(category_specific_offers, sub_attribute)
 
             # Interleave the sub-groups
-            mixed_category_offers = _interleave_offer_groups_round_robin(sub_grouped_offers)
+            mixed_category_offers = _interleave_offer_groups_round_robin(sub_grouped_offers, limit=limit)
 
             # Replace the original flat list with the internally diversified one
             primary_offer_groups[category] = mixed_category_offers
 
     # --- 4. Final Global Interleaving ---
-    final_diversified_playlist = _interleave_offer_groups_round_robin(primary_offer_groups)
+    final_diversified_playlist = _interleave_offer_groups_round_robin(
+        primary_offer_groups, limit=limit, sorted_group_keys=sorted_group_keys
+    )
 
     logger.debug(
         "✅ Diversification completed.",
@@ -156,3 +196,196 @@ def apply_offer_diversification(
     )
 
     return final_diversified_playlist
+
+
+# ---------------------------------------------------------------------------
+# Diversification strategies
+# ---------------------------------------------------------------------------
+
+
+class DiversificationStrategyChoices(StrEnum):
+    round_robin = "round_robin"
+    mmr = "mmr"
+
+
+class DiversificationStrategy(ABC):
+    """Re-orders the ranked offers into the final (diversified) list, of at most `limit` offers."""
+
+    name: DiversificationStrategyChoices
+
+    @abstractmethod
+    def diversify(
+        self, offers: list[EnrichedRecommendableOffer], *, limit: int | None = None
+    ) -> list[EnrichedRecommendableOffer]: ...
+
+
+class RoundRobinDiversification(DiversificationStrategy):
+    """Categorical Round-Robin on search_group_name, sub-mixed on gtl_id for books (apply_offer_diversification)."""
+
+    name = DiversificationStrategyChoices.round_robin
+
+    def __init__(self, sub_mixing_configuration: dict[str, str] | None = None) -> None:
+        self.sub_mixing_configuration = sub_mixing_configuration
+
+    def diversify(
+        self, offers: list[EnrichedRecommendableOffer], *, limit: int | None = None
+    ) -> list[EnrichedRecommendableOffer]:
+        return apply_offer_diversification(offers, self.sub_mixing_configuration, limit=limit)
+
+
+class MaximalMarginalRelevanceDiversification(DiversificationStrategy):
+    """
+    Greedy Maximal Marginal Relevance over the item clusters, topics and semantic embeddings.
+
+    Each step picks the offer maximising
+        relevance_weight * relevance - (1 - relevance_weight) * max similarity to the picked offers
+    where the relevance is the min-max scaled ranking_score (the ranked position when every offer
+    has the same score, e.g. ranking fallback). The MMR score of every offer is kept in one array,
+    lowered with the similarity to the last pick only.
+
+    Two shortcuts keep the picks of the step by step greedy while cutting its NumPy calls:
+    - Offers whose weighted relevance is below the `limit`-th best one by more than the maximum
+      penalty can never be picked (an unpicked offer among the `limit` best always scores higher):
+      they are dropped upfront.
+    - The scores penalized by the similarity to a pick are computed for MMR_SCORE_BATCH_SIZE
+      offers at a time: the best remaining ones, which are the likely next picks since MMR scores
+      only decrease. A pick then costs three calls, and a new batch is only computed when the pick
+      falls outside the batches already computed.
+    """
+
+    name = DiversificationStrategyChoices.mmr
+
+    def __init__(self, relevance_weight: float) -> None:
+        self.relevance_weight = relevance_weight
+
+    @staticmethod
+    def _encode_labels(labels: list[str | None]) -> np.ndarray:
+        """Integer codes of the labels within the call, missing labels made distinct (never similar)."""
+        is_missing = np.fromiter([label is None for label in labels], dtype=bool, count=len(labels))
+        _, codes = np.unique(np.array([label or "" for label in labels], dtype=str), return_inverse=True)
+        codes[is_missing] = -1 - np.flatnonzero(is_missing)
+        return codes
+
+    @staticmethod
+    def _compute_relevances(offers: list[EnrichedRecommendableOffer]) -> np.ndarray:
+        ranking_scores = np.fromiter([offer.ranking_score for offer in offers], dtype=np.float64, count=len(offers))
+        score_range = ranking_scores.max() - ranking_scores.min()
+        if score_range > 0:
+            return (ranking_scores - ranking_scores.min()) / score_range
+        return 1.0 - np.arange(len(offers), dtype=np.float64) / len(offers)
+
+    def _select_candidate_indices(self, relevance_scores: np.ndarray, output_size: int) -> np.ndarray:
+        """Indices of the offers that may be picked, in ranked order."""
+        max_penalty = (1.0 - self.relevance_weight) * (
+            MMR_CLUSTER_SIMILARITY_WEIGHT + MMR_TOPIC_SIMILARITY_WEIGHT + MMR_EMBEDDING_SIMILARITY_WEIGHT
+        )
+        offer_count = len(relevance_scores)
+        last_pick_relevance_score = np.partition(relevance_scores, offer_count - output_size)[offer_count - output_size]
+        return np.flatnonzero(relevance_scores >= last_pick_relevance_score - max_penalty)
+
+    def _build_penalized_scores_function(
+        self, offers: list[EnrichedRecommendableOffer], relevance_scores: np.ndarray, candidate_indices: np.ndarray
+    ) -> Callable[[np.ndarray], np.ndarray]:
+        """
+        Returns the function computing, for the given picks (positions in candidate_indices), the
+        score of every candidate penalized by its similarity to each pick: one row per pick.
+        """
+        diversity_weight = 1.0 - self.relevance_weight
+        items = [offer.item for offer in offers]
+        # The embedding range is taken over all the offers: only the labels are read for the candidates alone
+        candidate_items = [items[candidate_index] for candidate_index in candidate_indices.tolist()]
+        cluster_codes = self._encode_labels([item.item_cluster_id for item in candidate_items])
+        topic_codes = self._encode_labels([item.item_topic_id for item in candidate_items])
+        embeddings = np.fromiter(
+            [math.nan if item.semantic_emb_mean is None else item.semantic_emb_mean for item in items],
+            dtype=np.float64,
+            count=len(items),
+        )
+
+        # Similarity penalties are pre-multiplied by the diversity weight
+        cluster_penalty = diversity_weight * MMR_CLUSTER_SIMILARITY_WEIGHT
+        topic_penalty = diversity_weight * MMR_TOPIC_SIMILARITY_WEIGHT
+        has_embedding = ~np.isnan(embeddings)
+        embedding_range = np.ptp(embeddings[has_embedding]) if has_embedding.any() else 0.0
+        embedding_penalty = diversity_weight * MMR_EMBEDDING_SIMILARITY_WEIGHT
+        # penalty = embedding_penalty - |e_i - e_j| scaled (clipped at 0): a missing embedding is infinitely far
+        scaled_embeddings = np.where(has_embedding, embeddings * (embedding_penalty / (embedding_range or 1.0)), np.inf)
+
+        scaled_embeddings = scaled_embeddings[candidate_indices]
+        relevance_scores = relevance_scores[candidate_indices]
+
+        def compute_penalized_scores(pick_indices: np.ndarray) -> np.ndarray:
+            penalties = cluster_penalty * (cluster_codes[pick_indices, None] == cluster_codes)
+            penalties += topic_penalty * (topic_codes[pick_indices, None] == topic_codes)
+            # Two missing embeddings give NaN (inf - inf): fmax reads it as no similarity
+            with np.errstate(invalid="ignore"):
+                embedding_penalties = np.abs(scaled_embeddings - scaled_embeddings[pick_indices, None])
+            np.subtract(embedding_penalty, embedding_penalties, out=embedding_penalties)
+            np.fmax(embedding_penalties, 0.0, out=embedding_penalties)
+            penalties += embedding_penalties
+            return np.subtract(relevance_scores, penalties, out=penalties)
+
+        return compute_penalized_scores
+
+    def diversify(
+        self, offers: list[EnrichedRecommendableOffer], *, limit: int | None = None
+    ) -> list[EnrichedRecommendableOffer]:
+        if not offers:
+            return []
+        output_size = len(offers) if limit is None else min(limit, len(offers))
+
+        relevance_scores = self.relevance_weight * self._compute_relevances(offers)
+        candidate_indices = self._select_candidate_indices(relevance_scores, output_size)
+        compute_penalized_scores = self._build_penalized_scores_function(offers, relevance_scores, candidate_indices)
+
+        # From here on, offers are designated by their position in candidate_indices
+        offer_count = len(candidate_indices)
+        mmr_scores = relevance_scores[candidate_indices]
+        # Scores of the offers penalized by the similarity to each offer, once computed
+        penalized_scores: dict[int, np.ndarray] = {}
+        is_penalized_score_computed = np.zeros(offer_count, dtype=bool)
+        selected_indices = []
+        for pick_count in range(output_size):
+            selected_index = int(mmr_scores.argmax())
+            selected_indices.append(selected_index)
+
+            selected_penalized_scores = penalized_scores.get(selected_index)
+            if selected_penalized_scores is None:
+                # The pick and the best remaining offers without penalized scores yet, no more than picks left
+                batch_size = min(MMR_SCORE_BATCH_SIZE, output_size - pick_count)
+                batch_scores = np.where(is_penalized_score_computed, -np.inf, mmr_scores)
+                # The pick first: on tied scores, argpartition may leave it out of the batch
+                batch_scores[selected_index] = np.inf
+                batch_indices = np.argpartition(batch_scores, offer_count - batch_size)[offer_count - batch_size :]
+                is_penalized_score_computed[batch_indices] = True
+                for offer_index, offer_penalized_scores in zip(
+                    batch_indices.tolist(), compute_penalized_scores(batch_indices), strict=True
+                ):
+                    penalized_scores[offer_index] = offer_penalized_scores
+                selected_penalized_scores = penalized_scores[selected_index]
+
+            # Excluded from the next picks: -inf stays below any penalized score
+            mmr_scores[selected_index] = -np.inf
+            # The max similarity only grows: the MMR score is the min over the picks
+            np.minimum(mmr_scores, selected_penalized_scores, out=mmr_scores)
+
+        logger.debug(
+            "✅ Diversification completed.",
+            extra={"input_offers": len(offers), "output_offers": output_size, "strategy": self.name},
+        )
+
+        return [offers[candidate_index] for candidate_index in candidate_indices[selected_indices].tolist()]
+
+
+def get_diversification_strategy(strategy_name: str) -> DiversificationStrategy:
+    """
+    Builds the diversification strategy selected for an endpoint
+    (PLAYLIST_RECOMMENDATION_DIVERSIFICATION_STRATEGY / SIMILAR_OFFER_DIVERSIFICATION_STRATEGY).
+    """
+    match DiversificationStrategyChoices(strategy_name):
+        case DiversificationStrategyChoices.round_robin:
+            return RoundRobinDiversification()
+        case DiversificationStrategyChoices.mmr:
+            return MaximalMarginalRelevanceDiversification(
+                relevance_weight=settings.MMR_DIVERSIFICATION_RELEVANCE_WEIGHT
+            )
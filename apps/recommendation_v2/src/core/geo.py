@@ -1,18 +1,34 @@
 import math
+from collections.abc import Sequence
+from dataclasses import dataclass
 from typing import TYPE_CHECKING
+from typing import Any
 
 import h3
+import numpy as np
+from sqlalchemy import ARRAY
+from sqlalchemy import BindParameter
+from sqlalchemy import Select
+from sqlalchemy import String
+from sqlalchemy import and_
+from sqlalchemy import any_
+from sqlalchemy import bindparam
 from sqlalchemy import func
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import aliased
 from sqlalchemy.sql import ColumnElement
 
+from config import settings
+from core.iris_index import IRIS_H3_BORDER_CELL
+from core.iris_index import iris_h3_cell_cache
+from core.iris_index import iris_spatial_index_service
 from models.iris import IrisFrance
+from models.item_h3_closest_offer import ItemH3ClosestOffer
 from models.offer import RecommendableOffers
 from models.venue import Venue
-from services.h3 import calculate_h3_k_rings_to_cover_search_radius
-from services.h3 import get_h3_index_from_coordinates
+from services.h3 import get_h3_cell_boundary_wkt
+from services.h3 import get_h3_cells_covering_search_radius
 from utils.benchmark import log_execution_time
 
 
@@ -23,14 +39,191 @@ H3_SEARCH_RADIUS_IN_KM = 50.0
 EARTH_RADIUS_METERS = 6371000
 MAX_DISTANCE_METERS_FOR_OFFER_RETRIEVAL = H3_SEARCH_RADIUS_IN_KM * 1000.0
 
+# Resolution of the user cells in item_h3_closest_offers_mv (see create_item_h3_closest_offers_mv.sql)
+PRECOMPUTED_CLOSEST_OFFERS_H3_RESOLUTION = 6
+# Added to the cell radius: H3 cell edges are geodesic arcs, not straight lines between vertices
+H3_CELL_RADIUS_SAFETY_MARGIN_IN_METERS = 10.0
+
+
+def bind_string_array(key: str, values: list[str]) -> BindParameter:
+    """
+    Binds a list of strings as a single array parameter, to be compared with `column == any_(...)`.
+
+    `column.in_(values)` renders one placeholder per value, so each list length is a different
+    statement for PostgreSQL (parsed and planned again, and prepared again by asyncpg). The array
+    keeps the statement text identical whatever the number of values.
+
+    Args:
+        key (str): The bind parameter name.
+        values (list[str]): The values to bind.
+
+    Returns:
+        BindParameter: A `VARCHAR[]` bind parameter.
+    """
+    return bindparam(key, value=list(values), type_=ARRAY(String))
+
+
+def build_iris_id_from_coordinates_query(latitude: float, longitude: float) -> Select:
+    """
+    Builds the PostGIS query selecting the IRIS polygon that contains a point.
+
+    Exposed separately so that callers can embed it as a scalar subquery in a larger
+    statement (see build_iris_lookup_subqueries).
+
+    Args:
+        latitude (float): The point latitude in decimal degrees.
+        longitude (float): The point longitude in decimal degrees.
+
+    Returns:
+        Select: A query returning the matching IRIS id(s), at most one row.
+    """
+    # WARNING: PostGIS ST_MakePoint requires coordinates in (Longitude, Latitude) order (X, Y).
+    user_location_point = func.ST_MakePoint(longitude, latitude)
+
+    # ST_Contains checks if the polygon ('shape') completely envelops the 'point'
+    return select(IrisFrance.id).where(func.ST_Contains(IrisFrance.shape, user_location_point)).limit(1)
+
+
+def build_h3_cell_inside_iris_query(latitude: float, longitude: float, h3_cell: str) -> Select:
+    """
+    Builds the PostGIS query telling whether the IRIS polygon containing a point also
+    contains the whole H3 cell around it (used to classify cells of the IRIS H3 cell cache).
+
+    Args:
+        latitude (float): The point latitude in decimal degrees.
+        longitude (float): The point longitude in decimal degrees.
+        h3_cell (str): The H3 cell containing the point.
+
+    Returns:
+        Select: A query returning a single boolean, or no row if no IRIS contains the point.
+    """
+    user_location_point = func.ST_MakePoint(longitude, latitude)
+    h3_cell_polygon = func.ST_GeomFromText(get_h3_cell_boundary_wkt(h3_cell))
+
+    return (
+        select(func.ST_Contains(IrisFrance.shape, h3_cell_polygon))
+        .where(func.ST_Contains(IrisFrance.shape, user_location_point))
+        .limit(1)
+    )
+
+
+@dataclass
+class InMemoryIrisLookup:
+    """
+    Outcome of find_iris_id_in_memory.
+
+    Attributes:
+        is_resolved: True if iris_id is final, False if the database must be queried.
+        iris_id: The IRIS id containing the point (None if outside every IRIS).
+        h3_cell_to_classify: H3 cell not yet in the IRIS H3 cell cache, to classify
+            from the database result when the lookup is not resolved.
+    """
+
+    is_resolved: bool
+    iris_id: str | None = None
+    h3_cell_to_classify: str | None = None
+
+
+def find_iris_id_in_memory(latitude: float, longitude: float) -> InMemoryIrisLookup:
+    """
+    Resolves the IRIS zone of a point without querying the database, when possible.
+
+    1. H3 cell cache: a point in a cell known to lie inside one IRIS resolves to its id.
+    2. In-memory spatial index (if loaded): exact point-in-polygon test. The H3 cell of the
+       point is classified at the same time (interior or border) and cached.
+
+    Args:
+        latitude (float): The point latitude in decimal degrees.
+        longitude (float): The point longitude in decimal degrees.
+
+    Returns:
+        InMemoryIrisLookup: The lookup outcome.
+    """
+    h3_cell_to_classify = None
+
+    if settings.IRIS_H3_CELL_CACHE_ENABLED:
+        h3_cell = h3.latlng_to_cell(latitude, longitude, iris_h3_cell_cache.resolution)
+        cached_entry = iris_h3_cell_cache.get_cached_entry(h3_cell)
+
+        if cached_entry is None:
+            h3_cell_to_classify = h3_cell
+        elif cached_entry != IRIS_H3_BORDER_CELL:
+            return InMemoryIrisLookup(is_resolved=True, iris_id=cached_entry)
+
+    iris_spatial_index = iris_spatial_index_service.index
+    if iris_spatial_index is None:
+        return InMemoryIrisLookup(is_resolved=False, h3_cell_to_classify=h3_cell_to_classify)
+
+    iris_id = iris_spatial_index.find_iris_id(latitude, longitude)
+
+    if h3_cell_to_classify is not None:
+        is_cell_inside_iris = iris_id is not None and iris_spatial_index.covers_area(
+            iris_id, h3.cell_to_boundary(h3_cell_to_classify)
+        )
+        iris_h3_cell_cache.store(h3_cell_to_classify, iris_id, is_cell_inside_iris=is_cell_inside_iris)
+
+    return InMemoryIrisLookup(is_resolved=True, iris_id=iris_id)
+
+
+def build_iris_lookup_subqueries(
+    latitude: float, longitude: float, in_memory_lookup: InMemoryIrisLookup
+) -> list[ColumnElement]:
+    """
+    Builds the scalar subqueries resolving in the database an IRIS lookup left unresolved in memory.
+
+    The first one selects the IRIS id containing the point. When the lookup has an H3 cell to
+    classify, a second one tells whether that IRIS also contains the whole cell, so that the cell
+    is classified in the same round-trip. Read their values with apply_iris_lookup_result.
+
+    Args:
+        latitude (float): The point latitude in decimal degrees.
+        longitude (float): The point longitude in decimal degrees.
+        in_memory_lookup (InMemoryIrisLookup): The unresolved outcome of find_iris_id_in_memory.
+
+    Returns:
+        list[ColumnElement]: The labeled scalar subqueries, to select in a statement.
+    """
+    iris_lookup_subqueries = [
+        build_iris_id_from_coordinates_query(latitude, longitude).scalar_subquery().label("iris_id")
+    ]
+    h3_cell_to_classify = in_memory_lookup.h3_cell_to_classify
+    if h3_cell_to_classify is not None:
+        iris_lookup_subqueries.append(
+            build_h3_cell_inside_iris_query(latitude, longitude, h3_cell_to_classify)
+            .scalar_subquery()
+            .label("is_h3_cell_inside_iris")
+        )
+    return iris_lookup_subqueries
+
+
+def apply_iris_lookup_result(in_memory_lookup: InMemoryIrisLookup, iris_lookup_values: Sequence[Any]) -> str | None:
+    """
+    Reads the values of the build_iris_lookup_subqueries columns, caching the H3 cell classification.
+
+    Args:
+        in_memory_lookup (InMemoryIrisLookup): The lookup the subqueries were built for.
+        iris_lookup_values (Sequence[Any]): The values of the subqueries, in order.
+
+    Returns:
+        str | None: The IRIS id containing the point, None if outside every IRIS.
+    """
+    iris_id, *h3_cell_classification = iris_lookup_values
+    h3_cell_to_classify = in_memory_lookup.h3_cell_to_classify
+    if h3_cell_to_classify is not None:
+        (is_cell_inside_iris,) = h3_cell_classification
+        iris_h3_cell_cache.store(h3_cell_to_classify, iris_id, is_cell_inside_iris=bool(is_cell_inside_iris))
+    return iris_id
+
 
 async def get_iris_id_from_coordinates(db: AsyncSession, latitude: float | None, longitude: float | None) -> str | None:
     """
     Finds the ID of the French IRIS (geographical polygon) that contains the user's GPS coordinates.
 
     IRIS (Îlots Regroupés pour l'Information Statistique) is a French geographical
-    division used for statistical purposes. This function performs a spatial query
-    using PostGIS to determine which specific polygon envelops the given point.
+    division used for statistical purposes. The IRIS is first looked up in memory
+    (H3 cell cache, then in-memory IRIS index, see find_iris_id_in_memory); otherwise
+    this function performs a spatial query using PostGIS to determine which polygon
+    envelops the point.
 
     Args:
         db (AsyncSession): The active asynchronous database session.
@@ -46,18 +239,14 @@ async def get_iris_id_from_coordinates(db: AsyncSession, latitude: float | None,
     if latitude is None or longitude is None:
         return None
 
-    # --- 2. Construct Spatial Point ---
-    # WARNING: PostGIS ST_MakePoint requires coordinates in (Longitude, Latitude) order (X, Y).
-    user_location_point = func.ST_MakePoint(longitude, latitude)
+    # --- 2. In-Memory Lookup (H3 cell cache, then index loaded at startup and refreshed nightly) ---
+    in_memory_lookup = find_iris_id_in_memory(latitude, longitude)
+    if in_memory_lookup.is_resolved:
+        return in_memory_lookup.iris_id
 
-    # --- 3. Execute Spatial Intersection Query ---
-    # ST_Contains checks if the polygon ('shape') completely envelops the 'point'
-    intersecting_iris_query = select(IrisFrance.id).where(func.ST_Contains(IrisFrance.shape, user_location_point))
-
-    result = await db.execute(intersecting_iris_query)
-    iris_db_id = result.scalars().first()
-
-    return iris_db_id
+    # --- 3. Fallback: Execute Spatial Intersection Query ---
+    result = await db.execute(select(*build_iris_lookup_subqueries(latitude, longitude, in_memory_lookup)))
+    return apply_iris_lookup_result(in_memory_lookup, result.one())
 
 
 def build_haversine_distance_expression(latitude: float, longitude: float, venue_model: type[Venue]) -> ColumnElement:
@@ -99,6 +288,26 @@ def build_haversine_distance_expression(latitude: float, longitude: float, venue
     return distance_expression
 
 
+def build_candidate_h3_cells_condition(user_h3_cell: str, *, resolution: int) -> ColumnElement:
+    """
+    Builds the condition keeping the venues located in the H3 cells covering the search radius.
+
+    The cells within the k-rings covering H3_SEARCH_RADIUS_IN_KM around the user cell (filled disk)
+    are matched against the h3_res{resolution} column.
+
+    Args:
+        user_h3_cell (str): The H3 cell of the user, at `resolution`.
+        resolution (int): H3 resolution used for grid filtering.
+
+    Returns:
+        ColumnElement: The condition on the Venue H3 column.
+    """
+    candidate_h3_cells = get_h3_cells_covering_search_radius(user_h3_cell, search_radius_in_km=H3_SEARCH_RADIUS_IN_KM)
+    return getattr(Venue, f"h3_res{resolution}") == any_(
+        bind_string_array("candidate_h3_cells", list(candidate_h3_cells))
+    )
+
+
 @log_execution_time
 async def find_closest_offers_with_h3_index(
     db: AsyncSession,
@@ -121,8 +330,9 @@ async def find_closest_offers_with_h3_index(
     unnecessarily large join and speeds up the query significantly.
 
     Process:
-    1. Determine the H3 cells covering a ~50km radius around the user.
-    2. Filter venues located within these H3 cells using the indexed column.
+    1. Determine the H3 cells covering a ~50km radius around the user (cached per user cell).
+    2. Filter venues located within these H3 cells using the indexed column. Item IDs and cells are
+       bound as arrays, so the statement text does not change with their number.
     3. Deduplicate offers by (offer_id, venue_id) at runtime to avoid redundant distance
        computations for offers with multiple rows per venue (e.g. cinema screenings).
        Note: this is a quickfix — deduplication should eventually be handled upstream
@@ -146,17 +356,7 @@ async def find_closest_offers_with_h3_index(
     user_lng: float = user_context.longitude
 
     # Identify the H3 cell containing the user
-    user_h3_cell = get_h3_index_from_coordinates(user_lat, user_lng, resolution=resolution)
-
-    # Estimate the number of H3 rings needed to cover the search radius (50km)
-    k_rings = calculate_h3_k_rings_to_cover_search_radius(
-        search_radius_in_km=H3_SEARCH_RADIUS_IN_KM, resolution=resolution
-    )
-
-    # Get all cells within 'rings_count' distance (filled disk)
-    candidate_h3_cells = h3.grid_disk(user_h3_cell, k=k_rings)
-
-    h3_index_column = getattr(Venue, f"h3_res{resolution}")
+    user_h3_cell = h3.latlng_to_cell(user_lat, user_lng, resolution)
 
     # TODO (lmontier, jmontagnat, 2026-07-01):
     #  This deduplication is a runtime quickfix. Offers with multiple rows per
@@ -169,8 +369,8 @@ async def find_closest_offers_with_h3_index(
         select(RecommendableOffers)
         .join(Venue, RecommendableOffers.venue_id == Venue.venue_id)
         .where(
-            RecommendableOffers.item_id.in_(item_ids),
-            h3_index_column.in_(candidate_h3_cells),
+            RecommendableOffers.item_id == any_(bind_string_array("item_ids", item_ids)),
+            build_candidate_h3_cells_condition(user_h3_cell, resolution=resolution),
         )
         .distinct(RecommendableOffers.offer_id, RecommendableOffers.venue_id)
         .subquery()
@@ -200,6 +400,105 @@ async def find_closest_offers_with_h3_index(
     return result.all()
 
 
+def calculate_h3_cell_radius_in_meters(h3_cell: str) -> float:
+    """
+    Returns the largest distance between the center of an H3 cell and any point of the cell.
+
+    Args:
+        h3_cell (str): The H3 cell.
+
+    Returns:
+        float: The cell radius in meters, safety margin included.
+    """
+    center_latitude, center_longitude = h3.cell_to_latlng(h3_cell)
+    vertex_distances = [
+        calculate_haversine_distance_in_meters(center_latitude, center_longitude, vertex_latitude, vertex_longitude)
+        or 0.0
+        for vertex_latitude, vertex_longitude in h3.cell_to_boundary(h3_cell)
+    ]
+    return max(vertex_distances) + H3_CELL_RADIUS_SAFETY_MARGIN_IN_METERS
+
+
+@log_execution_time
+async def find_closest_offers_with_precomputed_table(
+    db: AsyncSession,
+    item_ids: list[str],
+    user_context: "UserContext",
+) -> tuple[list[tuple[RecommendableOffers, float]], list[str]]:
+    """
+    Retrieves the closest offer for each item from the nightly precomputed nearest offers.
+
+    item_h3_closest_offers_mv stores, per (item_id, H3 cell), the few offers closest to the center
+    of the cell. The lookup is an indexed point query on the user cell; the exact distance between
+    the user and each stored offer is then re-computed with the same Haversine expression as
+    find_closest_offers_with_h3_index.
+
+    The closest stored offer is proven to be the closest offer overall when no offer left out of
+    the table can be nearer to the user. Offers left out are at least `next_candidate_distance`
+    away from the cell center, hence at least `next_candidate_distance - cell radius` away from
+    the user. Items failing this check (or missing from the table) are returned as unresolved,
+    for the caller to resolve them with find_closest_offers_with_h3_index.
+
+    Args:
+        db (AsyncSession): The active database session.
+        item_ids (list[str]): List of Item IDs to find offers for.
+        user_context (UserContext): User's context containing GPS coordinates.
+
+    Returns:
+        tuple: The (RecommendableOffers, calc_distance) rows of the resolved items (closer than
+            MAX_DISTANCE_METERS_FOR_OFFER_RETRIEVAL), and the IDs of the unresolved items.
+    """
+    if not user_context.is_geolocated or user_context.latitude is None or user_context.longitude is None:
+        return [], []
+
+    user_h3_cell = h3.latlng_to_cell(
+        user_context.latitude, user_context.longitude, PRECOMPUTED_CLOSEST_OFFERS_H3_RESOLUTION
+    )
+    user_h3_cell_radius = calculate_h3_cell_radius_in_meters(user_h3_cell)
+
+    distance_expr = build_haversine_distance_expression(user_context.latitude, user_context.longitude, Venue).label(
+        "calc_distance"
+    )
+
+    stmt = (
+        select(RecommendableOffers, distance_expr, ItemH3ClosestOffer.next_candidate_distance)
+        .join(
+            ItemH3ClosestOffer,
+            and_(
+                ItemH3ClosestOffer.item_id == RecommendableOffers.item_id,
+                ItemH3ClosestOffer.offer_id == RecommendableOffers.offer_id,
+                ItemH3ClosestOffer.venue_id == RecommendableOffers.venue_id,
+            ),
+        )
+        .join(Venue, Venue.venue_id == ItemH3ClosestOffer.venue_id)
+        .where(
+            ItemH3ClosestOffer.user_h3_cell == user_h3_cell,
+            ItemH3ClosestOffer.item_id == any_(bind_string_array("item_ids", item_ids)),
+        )
+        # Keep only one offer per item (the closest one to the user)
+        .distinct(ItemH3ClosestOffer.item_id)
+        .order_by(ItemH3ClosestOffer.item_id, distance_expr.asc())
+    )
+
+    result = await db.execute(stmt)
+
+    resolved_rows: list[tuple[RecommendableOffers, float]] = []
+    resolved_item_ids: set[str] = set()
+
+    for offer, distance, next_candidate_distance in result.all():
+        is_proven_closest = next_candidate_distance is None or distance <= next_candidate_distance - user_h3_cell_radius
+        if not is_proven_closest:
+            continue
+
+        resolved_item_ids.add(offer.item_id)
+        if distance <= MAX_DISTANCE_METERS_FOR_OFFER_RETRIEVAL:
+            resolved_rows.append((offer, distance))
+
+    unresolved_item_ids = [item_id for item_id in item_ids if item_id not in resolved_item_ids]
+
+    return resolved_rows, unresolved_item_ids
+
+
 def calculate_haversine_distance_in_meters(
     user_lat: float | None, user_lon: float | None, offer_lat: float | None, offer_lon: float | None
 ) -> float | None:
@@ -232,3 +531,34 @@ def calculate_haversine_distance_in_meters(
     distance = 2 * EARTH_RADIUS_METERS * math.atan2(math.sqrt(haversine_a), math.sqrt(1 - haversine_a))
 
     return distance
+
+
+def calculate_haversine_distances_in_meters(
+    user_lat: float | None, user_lon: float | None, offer_latitudes: np.ndarray, offer_longitudes: np.ndarray
+) -> np.ndarray:
+    """
+    Vectorized calculate_haversine_distance_in_meters: distances between the user and many points at once.
+
+    Args:
+        user_lat (float | None): User's latitude in decimal degrees.
+        user_lon (float | None): User's longitude in decimal degrees.
+        offer_latitudes (np.ndarray): Offer venue latitudes in decimal degrees (NaN when missing).
+        offer_longitudes (np.ndarray): Offer venue longitudes in decimal degrees (NaN when missing).
+
+    Returns:
+        np.ndarray: The distances in meters, NaN where any coordinate is missing.
+    """
+    if user_lat is None or user_lon is None:
+        return np.full(offer_latitudes.shape, np.nan)
+
+    user_lat_rad = math.radians(user_lat)
+    offer_lat_rad = np.radians(offer_latitudes)
+
+    delta_lat_rad = np.radians(offer_latitudes - user_lat)
+    delta_lon_rad = np.radians(offer_longitudes - user_lon)
+
+    haversine_a = (
+        np.sin(delta_lat_rad / 2) ** 2 + math.cos(user_lat_rad) * np.cos(offer_lat_rad) * np.sin(delta_lon_rad / 2) ** 2
+    )
+
+    return 2 * EARTH_RADIUS_METERS * np.arctan2(np.sqrt(haversine_a), np.sqrt(1 - haversine_a))
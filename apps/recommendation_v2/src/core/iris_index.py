@@ -0,0 +1,433 @@
+"""
+In-process spatial index of the French IRIS polygons.
+
+Resolving the IRIS zone of a user is a point-in-polygon query. Running it in PostGIS costs a
+database round-trip on every request, although the polygons only change when the tables are
+repopulated overnight. This module loads every polygon once into worker memory and answers the
+same question with a dictionary lookup followed by a vectorised point-in-polygon test.
+
+PostGIS stays the fallback: as long as the index is not loaded (startup failure, feature flag
+off), core.geo.get_iris_id_from_coordinates keeps querying the database.
+"""
+
+import asyncio
+import json
+import math
+import time
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from connectors.redis_api import RedisAPI
+from models.iris import IrisFrance
+from services.db import AsyncSessionFactory
+from services.local_cache import LocalLRUCache
+from services.logger import logger
+
+
+# Side (in degrees) of the square buckets of the lat/lon grid. 0.05° is ~5.5 km of latitude:
+# most buckets hold a handful of candidate polygons, and large rural IRIS are not registered
+# in too many buckets.
+IRIS_INDEX_BUCKET_SIZE_IN_DEGREES = 0.05
+
+# Coordinates precision requested from ST_AsGeoJSON (7 decimals ≈ 1 cm), to keep the payload small.
+IRIS_GEOJSON_MAX_DECIMAL_DIGITS = 7
+
+MIN_RING_VERTEX_COUNT = 3
+
+# Value cached for H3 cells crossed by an IRIS border: lookups in these cells need an exact test.
+IRIS_H3_BORDER_CELL = "__border__"
+
+
+def extract_polygon_rings(geometry: dict[str, Any]) -> list[list[list[float]]]:
+    """
+    Flattens a GeoJSON Polygon or MultiPolygon into its list of rings (outer rings and holes).
+
+    Args:
+        geometry (dict): A GeoJSON geometry object.
+
+    Returns:
+        list: Every ring of the geometry, each ring being a list of [longitude, latitude] positions.
+
+    Raises:
+        ValueError: If the geometry is neither a Polygon nor a MultiPolygon.
+    """
+    if geometry["type"] == "Polygon":
+        return list(geometry["coordinates"])
+    if geometry["type"] == "MultiPolygon":
+        return [ring for polygon in geometry["coordinates"] for ring in polygon]
+
+    raise ValueError(f"Unsupported IRIS geometry type: {geometry['type']}")
+
+
+class IrisSpatialIndex:
+    """
+    Immutable in-memory index answering "which IRIS polygon contains this point?".
+
+    Layout:
+    - Every vertex of every polygon is stored in two flat NumPy arrays (longitudes, latitudes).
+      A polygon is a [start, end) slice of these arrays; a boolean array flags the last vertex
+      of each ring so that no edge is drawn between two consecutive rings.
+    - A regular lat/lon grid maps each bucket to the polygons whose bounding box overlaps it.
+
+    Lookup:
+    1. Fetch the candidate polygons of the bucket containing the point (dictionary access).
+    2. Discard candidates whose bounding box does not contain the point.
+    3. Run an even-odd ray casting test on the remaining candidates. Counting crossings over
+       every ring of a polygon handles holes and multi-part polygons at once.
+    """
+
+    def __init__(
+        self,
+        iris_geometries: Iterable[tuple[str, dict[str, Any]]],
+        bucket_size_in_degrees: float = IRIS_INDEX_BUCKET_SIZE_IN_DEGREES,
+    ) -> None:
+        """
+        Builds the index. This is CPU-bound: run it in a thread when the event loop is serving requests.
+
+        Args:
+            iris_geometries: (iris_id, GeoJSON Polygon/MultiPolygon) pairs.
+            bucket_size_in_degrees: Side of the square grid buckets.
+        """
+        self._bucket_size_in_degrees = bucket_size_in_degrees
+        self._iris_ids: list[str] = []
+        self._polygon_vertex_ranges: list[tuple[int, int]] = []
+        self._polygon_bounding_boxes: list[tuple[float, float, float, float]] = []
+        self._polygon_indices_by_iris_id: dict[str, int] = {}
+        self._bucket_polygon_indices: dict[tuple[int, int], list[int]] = {}
+
+        rings_vertices: list[np.ndarray] = []
+        vertex_count = 0
+
+        for iris_id, geometry in iris_geometries:
+            polygon_rings_vertices = []
+            for ring in extract_polygon_rings(geometry):
+                ring_vertices = np.asarray(ring, dtype=np.float64)[:, :2]
+                if len(ring_vertices) < MIN_RING_VERTEX_COUNT:
+                    continue
+                # Close the ring explicitly so that its closing edge is part of the vertex slice.
+                if not np.array_equal(ring_vertices[0], ring_vertices[-1]):
+                    ring_vertices = np.vstack([ring_vertices, ring_vertices[:1]])
+                polygon_rings_vertices.append(ring_vertices)
+
+            if not polygon_rings_vertices:
+                continue
+
+            polygon_vertices = np.concatenate(polygon_rings_vertices)
+            min_longitude, min_latitude = polygon_vertices.min(axis=0).tolist()
+            max_longitude, max_latitude = polygon_vertices.max(axis=0).tolist()
+
+            polygon_index = len(self._iris_ids)
+            self._iris_ids.append(iris_id)
+            self._polygon_indices_by_iris_id[iris_id] = polygon_index
+            self._polygon_vertex_ranges.append((vertex_count, vertex_count + len(polygon_vertices)))
+            self._polygon_bounding_boxes.append((min_longitude, min_latitude, max_longitude, max_latitude))
+            for bucket_key in self._iter_bucket_keys(min_longitude, min_latitude, max_longitude, max_latitude):
+                self._bucket_polygon_indices.setdefault(bucket_key, []).append(polygon_index)
+
+            rings_vertices.extend(polygon_rings_vertices)
+            vertex_count += len(polygon_vertices)
+
+        all_vertices = np.concatenate(rings_vertices) if rings_vertices else np.empty((0, 2), dtype=np.float64)
+        self._vertex_longitudes = np.ascontiguousarray(all_vertices[:, 0])
+        self._vertex_latitudes = np.ascontiguousarray(all_vertices[:, 1])
+
+        ring_last_vertex_positions = np.cumsum([len(ring_vertices) for ring_vertices in rings_vertices]) - 1
+        self._is_ring_last_vertex = np.zeros(vertex_count, dtype=bool)
+        self._is_ring_last_vertex[ring_last_vertex_positions.astype(np.int64)] = True
+
+    @classmethod
+    def from_geojson_rows(cls, iris_geojson_rows: Iterable[tuple[str, str]]) -> "IrisSpatialIndex":
+        """
+        Builds the index from (iris_id, GeoJSON string) rows, as returned by fetch_iris_geojson_rows.
+
+        Args:
+            iris_geojson_rows: Rows of IRIS ids and their serialised GeoJSON geometry.
+
+        Returns:
+            IrisSpatialIndex: The built index.
+        """
+        return cls((iris_id, json.loads(geojson)) for iris_id, geojson in iris_geojson_rows if geojson)
+
+    def __len__(self) -> int:
+        return len(self._iris_ids)
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self._vertex_longitudes)
+
+    def _bucket_index(self, coordinate: float) -> int:
+        return math.floor(coordinate / self._bucket_size_in_degrees)
+
+    def _iter_bucket_keys(
+        self, min_longitude: float, min_latitude: float, max_longitude: float, max_latitude: float
+    ) -> Iterator[tuple[int, int]]:
+        for longitude_bucket in range(self._bucket_index(min_longitude), self._bucket_index(max_longitude) + 1):
+            for latitude_bucket in range(self._bucket_index(min_latitude), self._bucket_index(max_latitude) + 1):
+                yield longitude_bucket, latitude_bucket
+
+    def _polygon_contains_point(self, polygon_index: int, latitude: float, longitude: float) -> bool:
+        """
+        Even-odd ray casting test: casts a ray from the point towards +longitude and counts
+        the polygon edges it crosses. An odd count means the point is inside.
+        """
+        start, end = self._polygon_vertex_ranges[polygon_index]
+        edge_start_longitudes = self._vertex_longitudes[start : end - 1]
+        edge_end_longitudes = self._vertex_longitudes[start + 1 : end]
+        edge_start_latitudes = self._vertex_latitudes[start : end - 1]
+        edge_end_latitudes = self._vertex_latitudes[start + 1 : end]
+
+        # Edges straddling the point latitude (excluding the fake edges linking two rings)
+        straddling_edges = np.flatnonzero(
+            ((edge_start_latitudes > latitude) != (edge_end_latitudes > latitude))
+            & ~self._is_ring_last_vertex[start : end - 1]
+        )
+        if straddling_edges.size == 0:
+            return False
+
+        start_longitudes = edge_start_longitudes[straddling_edges]
+        start_latitudes = edge_start_latitudes[straddling_edges]
+        crossing_longitudes = start_longitudes + (latitude - start_latitudes) * (
+            edge_end_longitudes[straddling_edges] - start_longitudes
+        ) / (edge_end_latitudes[straddling_edges] - start_latitudes)
+
+        return bool(np.count_nonzero(longitude < crossing_longitudes) % 2)
+
+    def find_iris_id(self, latitude: float, longitude: float) -> str | None:
+        """
+        Finds the ID of the IRIS polygon containing the given point.
+
+        Args:
+            latitude (float): The point latitude in decimal degrees.
+            longitude (float): The point longitude in decimal degrees.
+
+        Returns:
+            str | None: The ID of the matching IRIS, or None if the point is outside every polygon.
+        """
+        bucket_key = (self._bucket_index(longitude), self._bucket_index(latitude))
+
+        for polygon_index in self._bucket_polygon_indices.get(bucket_key, ()):
+            min_longitude, min_latitude, max_longitude, max_latitude = self._polygon_bounding_boxes[polygon_index]
+            if not (min_longitude <= longitude <= max_longitude and min_latitude <= latitude <= max_latitude):
+                continue
+            if self._polygon_contains_point(polygon_index, latitude, longitude):
+                return self._iris_ids[polygon_index]
+
+        return None
+
+    def covers_area(self, iris_id: str, area_boundary: Sequence[tuple[float, float]]) -> bool:
+        """
+        Tells whether an IRIS polygon entirely contains a small convex area (e.g. an H3 cell).
+
+        The area is inside the polygon when one of its vertices is inside and no polygon edge
+        touches the area. Edges are compared with the bounding box of the area, which is
+        conservative: an edge passing close to the area makes it count as not covered.
+
+        Args:
+            iris_id (str): The ID of the IRIS polygon.
+            area_boundary: The (latitude, longitude) vertices of the convex area.
+
+        Returns:
+            bool: True if the area lies entirely inside the IRIS polygon.
+        """
+        polygon_index = self._polygon_indices_by_iris_id.get(iris_id)
+        if polygon_index is None or not area_boundary:
+            return False
+
+        first_latitude, first_longitude = area_boundary[0]
+        if not self._polygon_contains_point(polygon_index, first_latitude, first_longitude):
+            return False
+
+        area_latitudes = [latitude for latitude, _ in area_boundary]
+        area_longitudes = [longitude for _, longitude in area_boundary]
+        min_latitude, max_latitude = min(area_latitudes), max(area_latitudes)
+        min_longitude, max_longitude = min(area_longitudes), max(area_longitudes)
+
+        start, end = self._polygon_vertex_ranges[polygon_index]
+        edge_start_longitudes = self._vertex_longitudes[start : end - 1]
+        edge_end_longitudes = self._vertex_longitudes[start + 1 : end]
+        edge_start_latitudes = self._vertex_latitudes[start : end - 1]
+        edge_end_latitudes = self._vertex_latitudes[start + 1 : end]
+
+        edges_touching_area = (
+            ~self._is_ring_last_vertex[start : end - 1]
+            & (np.minimum(edge_start_longitudes, edge_end_longitudes) <= max_longitude)
+            & (np.maximum(edge_start_longitudes, edge_end_longitudes) >= min_longitude)
+            & (np.minimum(edge_start_latitudes, edge_end_latitudes) <= max_latitude)
+            & (np.maximum(edge_start_latitudes, edge_end_latitudes) >= min_latitude)
+        )
+
+        return not edges_touching_area.any()
+
+
+async def fetch_iris_geojson_rows(db: AsyncSession) -> list[tuple[str, str]]:
+    """
+    Fetches every IRIS polygon serialised as GeoJSON.
+
+    Args:
+        db (AsyncSession): The active asynchronous database session.
+
+    Returns:
+        list[tuple[str, str]]: (iris_id, GeoJSON geometry) rows.
+    """
+    iris_geojson_query = select(
+        IrisFrance.id, func.ST_AsGeoJSON(IrisFrance.shape, IRIS_GEOJSON_MAX_DECIMAL_DIGITS)
+    ).where(IrisFrance.shape.is_not(None))
+
+    result = await db.execute(iris_geojson_query)
+    return [(iris_id, geojson) for iris_id, geojson in result.all()]
+
+
+async def build_iris_spatial_index(db: AsyncSession) -> IrisSpatialIndex:
+    """
+    Loads the IRIS polygons from the database and builds the in-memory index.
+
+    Parsing and indexing tens of thousands of polygons takes a few seconds of CPU, so it runs in
+    a worker thread to keep the event loop responsive during the nightly reload.
+
+    Args:
+        db (AsyncSession): The active asynchronous database session.
+
+    Returns:
+        IrisSpatialIndex: The freshly built index.
+    """
+    iris_geojson_rows = await fetch_iris_geojson_rows(db)
+    return await asyncio.to_thread(IrisSpatialIndex.from_geojson_rows, iris_geojson_rows)
+
+
+class IrisSpatialIndexService:
+    """
+    Holds the IRIS spatial index of the worker and reloads it after the nightly table refresh.
+
+    Reloads build a new index on the side and swap it in with a single assignment, so lookups
+    never observe a partially built index. A failed reload keeps the previous index (or, at
+    startup, leaves the PostGIS fallback in place).
+    """
+
+    def __init__(self) -> None:
+        self.index: IrisSpatialIndex | None = None
+
+    async def reload(self) -> None:
+        """
+        (Re)builds the index from the database. Never raises: errors are logged.
+        """
+        loading_start_time = time.perf_counter()
+
+        try:
+            async with AsyncSessionFactory() as db:
+                new_index = await build_iris_spatial_index(db)
+        except Exception as loading_error:
+            logger.error(
+                "🗺️ IRIS spatial index loading failed, IRIS lookups keep using the "
+                f"{'previous index' if self.index is not None else 'PostGIS fallback'}",
+                extra={"error_type": type(loading_error).__name__, "error_detail": str(loading_error)},
+            )
+            return
+
+        if len(new_index) == 0:
+            logger.warning("🗺️ IRIS spatial index loading returned no polygon, index not replaced")
+            return
+
+        self.index = new_index
+        # Cells were classified against the previous polygons.
+        iris_h3_cell_cache.clear()
+        logger.info(
+            "🗺️ IRIS spatial index loaded",
+            extra={
+                "iris_polygon_count": len(new_index),
+                "iris_vertex_count": new_index.vertex_count,
+                "loading_duration_seconds": time.perf_counter() - loading_start_time,
+            },
+        )
+
+
+class IrisH3CellCache:
+    """
+    Memoizes IRIS lookups per fine H3 cell.
+
+    Many requests come from the same places (city centres, campuses, location presets). Once
+    a cell is known to lie entirely inside one IRIS polygon, every point of that cell resolves
+    to the cached id without any spatial test. Cells crossed by an IRIS border (or outside of
+    every IRIS) are cached as IRIS_H3_BORDER_CELL, and points falling in them still go through
+    the exact lookup.
+
+    Counters:
+    - hit_count: lookups answered from an interior cell.
+    - border_count: lookups in a known border cell (exact test required).
+    - miss_count: lookups in a cell not classified yet (exact test and classification required).
+    A high border ratio means the resolution is too coarse for the IRIS sizes.
+    """
+
+    def __init__(self, resolution: int, max_entries: int) -> None:
+        self.resolution = resolution
+        self.hit_count = 0
+        self.border_count = 0
+        self.miss_count = 0
+        self._cached_cells = LocalLRUCache(max_entries=max_entries)
+
+    def __len__(self) -> int:
+        return len(self._cached_cells)
+
+    def get_cached_entry(self, h3_cell: str) -> str | None:
+        """
+        Returns the cached IRIS id of an interior cell, IRIS_H3_BORDER_CELL for a border cell,
+        or None for a cell not classified yet.
+        """
+        cached_entry = self._cached_cells.get_value(h3_cell)
+
+        if cached_entry is None:
+            self.miss_count += 1
+        elif cached_entry == IRIS_H3_BORDER_CELL:
+            self.border_count += 1
+        else:
+            self.hit_count += 1
+
+        return cached_entry
+
+    def store(self, h3_cell: str, iris_id: str | None, *, is_cell_inside_iris: bool) -> None:
+        """
+        Stores the classification of a cell until the next nightly database population.
+
+        Args:
+            h3_cell (str): The H3 cell of the looked-up point.
+            iris_id (str | None): The IRIS id found by the exact lookup for that point.
+            is_cell_inside_iris (bool): Whether the whole cell lies inside that IRIS polygon.
+        """
+        self._cached_cells.set_value(
+            h3_cell,
+            iris_id if iris_id is not None and is_cell_inside_iris else IRIS_H3_BORDER_CELL,
+            time_to_live_in_seconds=RedisAPI.calculate_seconds_until_next_database_population_time(),
+        )
+
+    def get_statistics(self) -> dict[str, int | float]:
+        lookup_count = self.hit_count + self.border_count + self.miss_count
+        return {
+            "h3_resolution": self.resolution,
+            "cached_cell_count": len(self),
+            "hit_count": self.hit_count,
+            "border_count": self.border_count,
+            "miss_count": self.miss_count,
+            "hit_ratio": self.hit_count / lookup_count if lookup_count else 0.0,
+        }
+
+    def clear(self) -> None:
+        """
+        Drops every cached cell and resets the counters.
+        """
+        self._cached_cells.clear()
+        self.hit_count = 0
+        self.border_count = 0
+        self.miss_count = 0
+
+
+iris_spatial_index_service = IrisSpatialIndexService()
+iris_h3_cell_cache = IrisH3CellCache(
+    resolution=settings.IRIS_H3_CELL_CACHE_RESOLUTION, max_entries=settings.IRIS_H3_CELL_CACHE_MAX_ENTRIES
+)
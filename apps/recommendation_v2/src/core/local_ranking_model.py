@@ -0,0 +1,191 @@
+"""
+In-process scorer for the ranking model, as an alternative to the Vertex AI ranking endpoint.
+
+The ranking model is a LightGBM gradient boosted tree ensemble. Scoring ~600 rows with it is
+cheap compared to the gRPC round trip to Vertex, so the model artifact exported with
+`booster.save_model("model.txt")` is loaded from a local path with LightGBM itself and scored in
+a worker thread.
+
+String features must have been trained as pandas `category` columns: their categories are stored
+in the model file (`pandas_categorical`) and mapped to the same codes before scoring.
+"""
+
+import asyncio
+import math
+import time
+from collections.abc import Mapping
+from collections.abc import Sequence
+from pathlib import Path
+
+import lightgbm
+import numpy as np
+
+from config import settings
+from services.logger import logger
+
+
+class LocalRankingModel:
+    """LightGBM booster loaded from a text model, with the feature matrix assembly of the ranking features."""
+
+    def __init__(self, booster: lightgbm.Booster) -> None:
+        """
+        Args:
+            booster (lightgbm.Booster): A booster loaded from a model file, so that it carries its pandas categories.
+
+        Raises:
+            ValueError: If the model is not single-output or its categories do not match its categorical features.
+        """
+        if booster.num_model_per_iteration() != 1:
+            raise ValueError("Only single-output LightGBM models are supported")
+
+        self.booster = booster
+        self.feature_names: list[str] = booster.feature_name()
+        self.category_codes = self._read_category_codes()
+
+    @classmethod
+    def from_file(cls, model_path: str | Path) -> "LocalRankingModel":
+        return cls(lightgbm.Booster(model_file=str(model_path)))
+
+    def _read_category_codes(self) -> dict[str, dict[str, int]]:
+        """
+        Maps each categorical feature to its {category: code} dictionary.
+
+        Categorical features are the ones with category values in the model `feature_infos`. The
+        category names come from `pandas_categorical`, one list per categorical feature in column order.
+        """
+        # The feature infos are in the model header: dumping a single iteration is enough
+        feature_infos = self.booster.dump_model(num_iteration=1)["feature_infos"]
+        categorical_feature_names = [
+            feature_name
+            for feature_name in self.feature_names
+            if feature_name in feature_infos and feature_infos[feature_name]["values"]
+        ]
+
+        pandas_categorical = self.booster.pandas_categorical or []
+        if len(pandas_categorical) != len(categorical_feature_names):
+            raise ValueError(
+                f"LightGBM model has {len(categorical_feature_names)} categorical features "
+                f"but {len(pandas_categorical)} pandas category lists"
+            )
+
+        return {
+            feature_name: {str(category): code for code, category in enumerate(categories)}
+            for feature_name, categories in zip(categorical_feature_names, pandas_categorical, strict=True)
+        }
+
+    @property
+    def tree_count(self) -> int:
+        return self.booster.num_trees()
+
+    def build_feature_matrix(
+        self, feature_columns: Mapping[str, np.ndarray | Sequence[str | None] | float | None], row_count: int
+    ) -> np.ndarray:
+        """
+        Assembles the feature matrix in the column order of the model.
+
+        Args:
+            feature_columns (Mapping): One entry per model feature: a column of `row_count` values
+                (numbers, or strings for categorical features), or a scalar shared by every row.
+                None stands for a missing value.
+            row_count (int): The number of rows to score.
+
+        Returns:
+            np.ndarray: A (row_count, feature_count) float64 matrix, NaN for missing values and
+                for categories unknown to the model.
+
+        Raises:
+            ValueError: If a model feature is absent from `feature_columns`.
+        """
+        feature_matrix = np.empty((row_count, len(self.feature_names)), dtype=np.float64)
+        for feature_index, feature_name in enumerate(self.feature_names):
+            if feature_name not in feature_columns:
+                raise ValueError(f"Missing ranking feature for the local model: {feature_name}")
+            feature_column = feature_columns[feature_name]
+
+            category_codes = self.category_codes.get(feature_name)
+            if category_codes is not None:
+                categories = (
+                    [feature_column] * row_count
+                    if feature_column is None or isinstance(feature_column, str | int | float)
+                    else feature_column
+                )
+                feature_matrix[:, feature_index] = [
+                    math.nan if category is None else category_codes.get(str(category), math.nan)
+                    for category in categories
+                ]
+            elif feature_column is None:
+                feature_matrix[:, feature_index] = math.nan
+            else:
+                feature_matrix[:, feature_index] = np.asarray(feature_column, dtype=np.float64)
+
+        return feature_matrix
+
+    def predict_columns(
+        self, feature_columns: Mapping[str, np.ndarray | Sequence[str | None] | float | None], row_count: int
+    ) -> np.ndarray:
+        """
+        Scores rows given as feature columns (see build_feature_matrix) like the model served by Vertex
+        (probabilities for binary objectives). CPU-bound: run it in a thread.
+        """
+        feature_matrix = self.build_feature_matrix(feature_columns, row_count)
+        # One OpenMP thread: the gunicorn workers already share the cores
+        return np.asarray(self.booster.predict(feature_matrix, num_threads=1))
+
+
+class LocalRankingModelService:
+    """
+    Holds the local ranking model of the worker.
+
+    While no model is loaded (feature flag off, loading failure), ranking keeps calling Vertex.
+    """
+
+    def __init__(self) -> None:
+        self.model: LocalRankingModel | None = None
+
+    async def load(self, model_path: str | None = None) -> None:
+        """
+        Loads the model from LOCAL_RANKING_MODEL_PATH (or `model_path`). Never raises: errors are logged.
+        """
+        model_path = model_path or settings.LOCAL_RANKING_MODEL_PATH
+        loading_start_time = time.perf_counter()
+
+        try:
+            new_model = await asyncio.to_thread(LocalRankingModel.from_file, model_path)
+        except Exception as loading_error:
+            logger.error(
+                "🌲 Local ranking model loading failed, ranking keeps using the Vertex endpoint",
+                extra={
+                    "model_path": model_path,
+                    "error_type": type(loading_error).__name__,
+                    "error_detail": str(loading_error),
+                },
+            )
+            return
+
+        self.model = new_model
+        logger.info(
+            "🌲 Local ranking model loaded",
+            extra={
+                "model_path": model_path,
+                "tree_count": new_model.tree_count,
+                "feature_count": len(new_model.feature_names),
+                "loading_duration_seconds": time.perf_counter() - loading_start_time,
+            },
+        )
+
+    async def score(
+        self, feature_columns: Mapping[str, np.ndarray | Sequence[str | None] | float | None], row_count: int
+    ) -> np.ndarray:
+        """
+        Scores the rows in a worker thread, keeping the event loop free.
+
+        Raises:
+            RuntimeError: If no model is loaded.
+            ValueError: If a model feature is missing.
+        """
+        if self.model is None:
+            raise RuntimeError("The local ranking model is not loaded")
+        return await asyncio.to_thread(self.model.predict_columns, feature_columns, row_count)
+
+
+local_ranking_model_service = LocalRankingModelService()
@@ -1,9 +1,18 @@
+import asyncio
+import math
+import time
 from datetime import UTC
 from datetime import datetime
 from typing import TYPE_CHECKING
-from typing import Any
 
+import numpy as np
+from google.protobuf.struct_pb2 import NULL_VALUE
+from google.protobuf.struct_pb2 import ListValue
+from google.protobuf.struct_pb2 import Struct
+
+from config import settings
 from connectors import ranking_api_client
+from core.local_ranking_model import local_ranking_model_service
 from core.user_context import UserContext
 from schemas.enriched_offer import EnrichedRecommendableOffer
 from services.logger import logger
@@ -13,6 +22,9 @@ if TYPE_CHECKING:
     from connectors.vertex_api import RankingPrediction
 
 
+SECONDS_PER_DAY = 86_400
+
+
 def calculate_days_since(target_date: datetime | None) -> float | None:
     """
     Calculates the number of full days elapsed between a given date and now.
@@ -36,36 +48,43 @@ def calculate_days_since(target_date: datetime | None) -> float | None:
     return float(time_delta.days)
 
 
-def _build_vertex_ranking_features(
-    offer: EnrichedRecommendableOffer,
-    user_context: UserContext,
-    context_name: str = "recommendation",
-) -> dict[str, Any]:
+def calculate_days_since_array(target_dates: list[datetime | None], now: datetime) -> np.ndarray:
     """
-    Constructs the feature vector required by the Vertex AI Ranking model.
+    Vectorized `calculate_days_since`: full days elapsed between each date and `now`.
 
-    This maps our internal database/context models to the exact schema expected
-    by the ML ranking endpoint (ISO V1 format).
+    Naive dates are considered as UTC, as in `calculate_days_since`.
 
     Args:
-        offer (EnrichedRecommendableOffer): The resolved offer to be scored.
-        user_context (UserContext): The user's profile and behavioral data.
-        context_name (str): The origin context of the recommendation.
+        target_dates (list[datetime | None]): The dates to compare against `now`.
+        now (datetime): The timezone-aware reference time of the request.
 
     Returns:
-        dict[str, Any]: A flat dictionary of features ready for Vertex AI prediction.
+        np.ndarray: The number of days elapsed (float64), NaN where the date is missing.
     """
+    target_timestamps = np.array(
+        [
+            None
+            if target_date is None
+            else (target_date if target_date.tzinfo is not None else target_date.replace(tzinfo=UTC)).timestamp()
+            for target_date in target_dates
+        ],
+        dtype=np.float64,
+    )
+    return np.floor((now.timestamp() - target_timestamps) / SECONDS_PER_DAY)
 
-    # TODO: Investigate if all these features strictly require casting to float,
-    #  as it might mask underlying type issues or add unnecessary overhead.
 
-    # TODO: Create a dedicated Pydantic model for this feature vector payload
-    #  to ensure strict validation, type safety, and automatic serialization.
+def _build_request_ranking_features(user_context: UserContext, now: datetime) -> dict[str, float | int | None]:
+    """
+    Builds the features shared by every offer of the request (user and real-time context).
 
+    Args:
+        user_context (UserContext): The user's profile and behavioral data.
+        now (datetime): The reference time of the request.
+
+    Returns:
+        dict: The request-level features, shared by every ranking instance.
+    """
     return {
-        # --- Identifiers & Context ---
-        "offer_id": str(offer.offer_id),
-        "context": f"{context_name}:{offer.item_origin}",
         # --- User Behavioral Features ---
         "user_bookings_count": float(user_context.bookings_count),
         "user_clicks_count": float(user_context.clicks_count),
@@ -75,27 +94,210 @@ def _build_vertex_ranking_features(
         "user_is_geolocated": float(user_context.is_geolocated),
         "user_iris_x": float(user_context.longitude) if user_context.longitude else None,
         "user_iris_y": float(user_context.latitude) if user_context.latitude else None,
-        "offer_user_distance": offer.offer_user_distance,
+        # --- Real-Time Contextual Features ---
+        "day_of_the_week": now.weekday(),
+        "hour_of_the_day": now.hour,
+    }
+
+
+def _build_offer_ranking_feature_columns(
+    offers: list[EnrichedRecommendableOffer], context_name: str, now: datetime
+) -> tuple[dict[str, list[str]], dict[str, np.ndarray]]:
+    """
+    Builds the per-offer features, one column per feature.
+
+    Args:
+        offers (list[EnrichedRecommendableOffer]): The resolved offers to be scored.
+        context_name (str): The origin context of the recommendation.
+        now (datetime): The reference time of the request.
+
+    Returns:
+        tuple: The string feature columns, and the number feature columns (NaN for missing values).
+    """
+    string_feature_columns = {
+        # --- Identifiers & Context ---
+        "offer_id": [str(offer.offer_id) for offer in offers],
+        "context": [f"{context_name}:{offer.item_origin}" for offer in offers],
+        # --- Offer Static Features ---
+        "offer_subcategory_id": [offer.subcategory_id for offer in offers],
+    }
+    number_feature_columns = {
+        # --- User Geographical Features ---
+        "offer_user_distance": np.array([offer.offer_user_distance for offer in offers], dtype=np.float64),
         # --- Offer Static Features ---
-        "offer_subcategory_id": offer.subcategory_id,
-        "offer_stock_price": float(offer.stock_price or 0.0),
-        "offer_semantic_emb_mean": float(offer.semantic_emb_mean or 0.0),
-        "offer_is_geolocated": 1.0 if offer.is_geolocated else 0.0,
+        "offer_stock_price": np.array([offer.stock_price or 0.0 for offer in offers], dtype=np.float64),
+        "offer_semantic_emb_mean": np.array([offer.semantic_emb_mean or 0.0 for offer in offers], dtype=np.float64),
+        "offer_is_geolocated": np.array([bool(offer.is_geolocated) for offer in offers], dtype=np.float64),
         # --- Offer Temporal Features ---
-        "offer_creation_days": calculate_days_since(offer.offer_creation_date),
-        "offer_stock_beginning_days": calculate_days_since(offer.stock_beginning_date),
+        "offer_creation_days": calculate_days_since_array([offer.offer_creation_date for offer in offers], now),
+        "offer_stock_beginning_days": calculate_days_since_array([offer.stock_beginning_date for offer in offers], now),
         # --- Offer Popularity/Score Features ---
-        "offer_booking_number": float(offer.booking_number),
-        "offer_booking_number_last_7_days": float(offer.booking_number_last_7_days),
-        "offer_booking_number_last_14_days": float(offer.booking_number_last_14_days),
-        "offer_booking_number_last_28_days": float(offer.booking_number_last_28_days),
-        "offer_item_score": float(offer.item_score or 0.0),
-        "offer_item_rank": float(offer.item_rank),
-        # --- Real-Time Contextual Features ---
-        "day_of_the_week": datetime.now(UTC).weekday(),
-        "hour_of_the_day": datetime.now(UTC).hour,
+        "offer_booking_number": np.array([offer.booking_number for offer in offers], dtype=np.float64),
+        "offer_booking_number_last_7_days": np.array(
+            [offer.booking_number_last_7_days for offer in offers], dtype=np.float64
+        ),
+        "offer_booking_number_last_14_days": np.array(
+            [offer.booking_number_last_14_days for offer in offers], dtype=np.float64
+        ),
+        "offer_booking_number_last_28_days": np.array(
+            [offer.booking_number_last_28_days for offer in offers], dtype=np.float64
+        ),
+        "offer_item_score": np.array([offer.item_score or 0.0 for offer in offers], dtype=np.float64),
+        "offer_item_rank": np.array([offer.item_rank for offer in offers], dtype=np.float64),
+    }
+    return string_feature_columns, number_feature_columns
+
+
+def build_vertex_ranking_instances(
+    offers: list[EnrichedRecommendableOffer],
+    user_context: UserContext,
+    context_name: str = "recommendation",
+    now: datetime | None = None,
+) -> ListValue:
+    """
+    Constructs the instances required by the Vertex AI Ranking model, one per offer.
+
+    This maps our internal database/context models to the exact schema expected
+    by the ML ranking endpoint (ISO V1 format). Request-level features are computed
+    once, per-offer features as columns, and the protobuf instances sent over gRPC
+    are written directly (no intermediate dict nor `json_format.ParseDict`).
+
+    Args:
+        offers (list[EnrichedRecommendableOffer]): The resolved offers to be scored.
+        user_context (UserContext): The user's profile and behavioral data.
+        context_name (str): The origin context of the recommendation.
+        now (datetime | None): The reference time of the request (defaults to the current UTC time).
+
+    Returns:
+        ListValue: One Struct of features per offer, in the order of the offers.
+    """
+    now = now or datetime.now(UTC)
+    request_features = Struct()
+    request_features.update(_build_request_ranking_features(user_context, now))
+    string_feature_columns, number_feature_columns = _build_offer_ranking_feature_columns(offers, context_name, now)
+
+    ranking_instances = ListValue()
+    instances_fields = []
+    for _ in offers:
+        ranking_instance = ranking_instances.values.add().struct_value
+        ranking_instance.MergeFrom(request_features)
+        instances_fields.append(ranking_instance.fields)
+
+    for feature_name, string_column in string_feature_columns.items():
+        for instance_fields, string_value in zip(instances_fields, string_column, strict=True):
+            instance_fields[feature_name].string_value = string_value
+
+    for feature_name, number_column in number_feature_columns.items():
+        for instance_fields, number_value in zip(instances_fields, number_column.tolist(), strict=True):
+            if math.isnan(number_value):
+                instance_fields[feature_name].null_value = NULL_VALUE
+            else:
+                instance_fields[feature_name].number_value = number_value
+
+    return ranking_instances
+
+
+def _split_into_batches(
+    offers: list[EnrichedRecommendableOffer], batch_size: int
+) -> list[list[EnrichedRecommendableOffer]]:
+    """Splits the offers into consecutive batches of `batch_size` offers (a single batch when batch_size <= 0)."""
+    if batch_size <= 0:
+        return [offers]
+    return [offers[batch_start : batch_start + batch_size] for batch_start in range(0, len(offers), batch_size)]
+
+
+def _item_rank_sort_key(offer: EnrichedRecommendableOffer) -> float:
+    """Retrieval order: ascending item_rank, offers without item_rank last."""
+    return offer.item_rank if offer.item_rank is not None else float("inf")
+
+
+async def _score_offers_with_local_model(
+    offers: list[EnrichedRecommendableOffer], user_context: UserContext, now: datetime
+) -> list[float] | None:
+    """
+    Scores the offers with the in-process ranking model (see core.local_ranking_model).
+
+    Args:
+        offers (list[EnrichedRecommendableOffer]): The offers to be scored.
+        user_context (UserContext): The current user's profile and state.
+        now (datetime): The reference time of the request.
+
+    Returns:
+        list[float] | None: The score of each offer, in the order of the offers, or None when
+            scoring failed (the caller then falls back to the Vertex endpoint).
+    """
+    string_feature_columns, number_feature_columns = _build_offer_ranking_feature_columns(offers, "recommendation", now)
+    feature_columns = {
+        **_build_request_ranking_features(user_context, now),
+        **string_feature_columns,
+        **number_feature_columns,
     }
 
+    start_time = time.perf_counter()
+    try:
+        scores = await local_ranking_model_service.score(feature_columns, row_count=len(offers))
+    except Exception as scoring_error:
+        logger.error(
+            "💥 Local ranking model scoring failed — falling back to the Vertex ranking endpoint.",
+            extra={
+                "error_type": type(scoring_error).__name__,
+                "error_detail": str(scoring_error),
+                "user_id": user_context.user_id,
+            },
+        )
+        return None
+
+    logger.debug(
+        "⏱️ Offers scored by the local ranking model.",
+        extra={
+            "offers_count": len(offers),
+            "latency_ms": round((time.perf_counter() - start_time) * 1000, 2),
+            "user_id": user_context.user_id,
+        },
+    )
+    return scores.tolist()
+
+
+async def _fetch_ranking_batch_scores(
+    offer_batch: list[EnrichedRecommendableOffer], user_context: UserContext, now: datetime, batch_index: int
+) -> dict[str, float] | None:
+    """
+    Scores one batch of offers with the Vertex AI Ranking model.
+
+    Args:
+        offer_batch (list[EnrichedRecommendableOffer]): The offers of the batch.
+        user_context (UserContext): The current user's profile and state.
+        now (datetime): The reference time of the request, shared by every batch.
+        batch_index (int): Position of the batch in the request, for the metrics.
+
+    Returns:
+        dict[str, float] | None: The predicted score of each offer id, or None when the batch
+            failed or timed out (the connector returns no prediction in that case).
+    """
+    ranking_instances = build_vertex_ranking_instances(offer_batch, user_context, now=now)
+
+    start_time = time.perf_counter()
+    predictions: list[RankingPrediction] = await ranking_api_client.fetch_ranking_predictions(
+        feature_payloads=ranking_instances
+    )
+    latency_ms = (time.perf_counter() - start_time) * 1000
+
+    logger.debug(
+        "⏱️ Vertex ranking batch scored.",
+        extra={
+            "batch_index": batch_index,
+            "batch_size": len(offer_batch),
+            "predictions_count": len(predictions),
+            "latency_ms": round(latency_ms, 2),
+            "is_success": bool(predictions),
+            "user_id": user_context.user_id,
+        },
+    )
+
+    if not predictions:
+        return None
+    return {prediction.offer_id: prediction.score for prediction in predictions}
+
 
 async def rank_and_sort_offers_with_vertex(
     offers: list[EnrichedRecommendableOffer], user_context: UserContext
@@ -103,8 +305,11 @@ async def rank_and_sort_offers_with_vertex(
     """
     Scores a list of candidate offers using the Vertex AI Ranking model and sorts them.
 
-    If the ML model fails or returns empty predictions, it falls back to a deterministic
-    sorting based on the baseline 'item_rank' provided during the retrieval phase.
+    When LOCAL_RANKING_MODEL_ENABLED, the offers are scored in process by the local ranking model,
+    Vertex being the fallback if it is not loaded or fails. Otherwise (or on that fallback), the
+    offers are scored in batches of VERTEX_RANKING_BATCH_SIZE sent concurrently. The offers of
+    a batch that fails or returns empty predictions fall back to a deterministic sorting based on
+    the baseline 'item_rank' provided during the retrieval phase, after the scored offers.
 
     Args:
         offers (list[EnrichedRecommendableOffer]): The filtered list of offers to be ranked.
@@ -116,42 +321,77 @@ async def rank_and_sort_offers_with_vertex(
     if not offers:
         return []
 
-    # --- 1. Prepare Features & Call Model ---
-    ranking_instances = [_build_vertex_ranking_features(offer, user_context) for offer in offers]
+    now = datetime.now(UTC)
+
+    # --- 0. In-Process Model (no network hop) ---
+    if settings.LOCAL_RANKING_MODEL_ENABLED and local_ranking_model_service.model is not None:
+        local_scores = await _score_offers_with_local_model(offers, user_context, now)
+        if local_scores is not None:
+            for offer, local_score in zip(offers, local_scores, strict=True):
+                offer.ranking_score = local_score
+            return sorted(offers, key=lambda offer: offer.ranking_score, reverse=True)
+
+    # --- 1. Prepare Features & Call Model (one concurrent call per batch) ---
+    offer_batches = _split_into_batches(offers, settings.VERTEX_RANKING_BATCH_SIZE)
 
     logger.debug(
         "📤 Sending offers to Vertex AI ranking model.",
-        extra={"offers_to_rank": len(ranking_instances), "user_id": user_context.user_id},
+        extra={"offers_to_rank": len(offers), "batches_count": len(offer_batches), "user_id": user_context.user_id},
     )
 
-    predictions: list[RankingPrediction] = await ranking_api_client.fetch_ranking_predictions(
-        feature_payloads=ranking_instances
+    batches_scores = await asyncio.gather(
+        *(
+            _fetch_ranking_batch_scores(offer_batch, user_context, now, batch_index)
+            for batch_index, offer_batch in enumerate(offer_batches)
+        )
     )
 
     # --- 2. Fallback Mechanism ---
     # If Vertex prediction fails or returns nothing, fallback to the retrieval 'item_rank'
-    if not predictions:
+    failed_batches_count = sum(batch_scores is None for batch_scores in batches_scores)
+    if failed_batches_count == len(offer_batches):
         logger.warning(
             "⚠️ Vertex ranking returned no predictions — falling back to item_rank ordering.",
             extra={"offers_count": len(offers), "user_id": user_context.user_id},
         )
-        return sorted(offers, key=lambda o: o.item_rank if o.item_rank is not None else float("inf"))
+        return sorted(offers, key=_item_rank_sort_key)
 
-    # --- 3. Map Scores & Sort ---
-    prediction_score_map: dict[str, float] = {prediction.offer_id: prediction.score for prediction in predictions}
+    if failed_batches_count:
+        logger.warning(
+            "⚠️ Some Vertex ranking batches returned no predictions — their offers fall back to item_rank ordering.",
+            extra={
+                "failed_batches_count": failed_batches_count,
+                "batches_count": len(offer_batches),
+                "user_id": user_context.user_id,
+            },
+        )
 
-    for offer in offers:
-        # Attach the dynamic score to the offer object for downstream logging (default to 0.0)
-        offer.ranking_score = prediction_score_map.get(str(offer.offer_id), 0.0)
+    # --- 3. Map Scores & Sort ---
+    scored_offers: list[EnrichedRecommendableOffer] = []
+    fallback_offers: list[EnrichedRecommendableOffer] = []
+    predictions_count = 0
+    for offer_batch, batch_scores in zip(offer_batches, batches_scores, strict=True):
+        if batch_scores is None:
+            fallback_offers.extend(offer_batch)
+            continue
+        predictions_count += len(batch_scores)
+        for offer in offer_batch:
+            # Attach the dynamic score to the offer object for downstream logging (default to 0.0)
+            offer.ranking_score = batch_scores.get(str(offer.offer_id), 0.0)
+        scored_offers.extend(offer_batch)
 
     logger.debug(
         "✅ Ranking scores applied to offers.",
         extra={
-            "ranked_count": len(predictions),
-            "unmatched_count": len(offers) - len(predictions),
+            "ranked_count": predictions_count,
+            "unmatched_count": len(scored_offers) - predictions_count,
+            "fallback_count": len(fallback_offers),
             "user_id": user_context.user_id,
         },
     )
 
-    # Sort descending based on the predicted score attached to the object (highest score first)
-    return sorted(offers, key=lambda offer: offer.ranking_score, reverse=True)
+    # Sort descending based on the predicted score attached to the object (highest score first),
+    # then the offers of the failed batches in their retrieval order
+    return sorted(scored_offers, key=lambda offer: offer.ranking_score, reverse=True) + sorted(
+        fallback_offers, key=_item_rank_sort_key
+    )
@@ -1,16 +1,24 @@
 import asyncio
+import math
+from collections import defaultdict
+from datetime import datetime
 from typing import Any
 
+import numpy as np
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import settings
 from connectors import graph_api_client
 from connectors import retrieval_api_client
+from connectors.redis_api import RedisAPI
 from connectors.vertex_api import VertexPredictionResult
-from core.geo import calculate_haversine_distance_in_meters
+from core.geo import calculate_haversine_distances_in_meters
 from core.geo import find_closest_offers_with_h3_index
+from core.geo import find_closest_offers_with_precomputed_table
 from core.user_context import UserContext
+from core.venue_density import venue_density_map_service
+from core.venue_index import item_venue_index_service
 from models.items import NonRecommendableItems
 from schemas.categories import CategoryEnum
 from schemas.categories import SearchGroupNameEnum
@@ -18,6 +26,7 @@ from schemas.categories import SubcategoryEnum
 from schemas.enriched_offer import EnrichedRecommendableOffer
 from schemas.playlist_recommendation import PlaylistRequestParams
 from schemas.vertex_prediction_item import RecommendableItem
+from services.local_cache import LocalLRUCache
 from services.logger import logger
 from utils.benchmark import log_execution_time
 
@@ -30,6 +39,14 @@ PLAYLIST_RECOMMENDATION_RETRIEVAL_SIZE_PER_ENDPOINT = 150
 # ISO v1: OfferRetrievalEndpoint uses size=100.
 SIMILAR_OFFER_RETRIEVAL_SIZE = 100
 
+# Payload fields that identify the caller but do not influence the "tops" retrieval response.
+TOPS_RETRIEVAL_CACHE_IGNORED_FIELDS = ("call_id", "user_id")
+
+tops_retrieval_local_cache = LocalLRUCache(max_entries=settings.VERTEX_TOPS_LOCAL_CACHE_MAX_ENTRIES)
+non_recommendable_items_local_cache = LocalLRUCache(
+    max_entries=settings.NON_RECOMMENDABLE_ITEMS_LOCAL_CACHE_MAX_ENTRIES
+)
+
 # ==============================================================================
 # PLAYLIST RECOMMENDATION
 # ==============================================================================
@@ -106,6 +123,25 @@ def _build_playlist_recommendation_search_filters(
     return {"$and": and_conditions}
 
 
+def _build_excluded_item_ids_condition(excluded_item_ids: set[str]) -> dict[str, Any]:
+    """
+    Builds the Vertex filter condition excluding already booked items from the retrieval.
+
+    The list is capped at RETRIEVAL_BOOKED_ITEMS_EXCLUSION_MAX_ITEMS to bound the payload size:
+    items left out are still removed by filter_out_already_booked_items after retrieval.
+
+    Args:
+        excluded_item_ids (set[str]): The item IDs the user has already booked.
+
+    Returns:
+        dict[str, Any]: A '$nin' condition on item_id, sorted so identical sets build identical payloads.
+
+    Example:
+        {"item_id": {"$nin": ["item-1", "item-2"]}}
+    """
+    return {"item_id": {"$nin": sorted(excluded_item_ids)[: settings.RETRIEVAL_BOOKED_ITEMS_EXCLUSION_MAX_ITEMS]}}
+
+
 def build_playlist_recommendation_retrieval_payload(
     user_context: UserContext, call_id: str, params: PlaylistRequestParams
 ) -> dict[str, Any]:
@@ -172,16 +208,22 @@ def _build_base_playlist_recommendation_payload(
 
 
 def _build_personalized_recommendation_retrieval_payload(
-    user_context: UserContext, call_id: str, params: PlaylistRequestParams
+    user_context: UserContext,
+    call_id: str,
+    params: PlaylistRequestParams,
+    excluded_item_ids: set[str] | None = None,
 ) -> dict[str, Any]:
     """
     Builds the personalized collaborative filtering retrieval payload.
 
     ISO v1: RecommendationRetrievalEndpoint — model_type="recommendation", prefilter=1.
-    Returns items predicted from the user's historical interactions.
+    Returns items predicted from the user's historical interactions, minus the excluded items.
     """
     base = _build_base_playlist_recommendation_payload(user_context, call_id, params)
 
+    if excluded_item_ids:
+        base["params"]["$and"].append(_build_excluded_item_ids_condition(excluded_item_ids))
+
     return {
         **base,
         "model_type": "recommendation",
@@ -244,7 +286,10 @@ def _build_creation_trend_tops_retrieval_payload(
 
 
 def build_all_playlist_recommendation_retrieval_payloads(
-    user_context: UserContext, call_id: str, params: PlaylistRequestParams
+    user_context: UserContext,
+    call_id: str,
+    params: PlaylistRequestParams,
+    excluded_item_ids: set[str] | None = None,
 ) -> list[dict[str, Any]]:
     """
     Returns all retrieval payloads to be sent to Vertex AI in parallel.
@@ -265,10 +310,14 @@ def build_all_playlist_recommendation_retrieval_payloads(
 
     Maximum candidate pool before deduplication: 4 * 150 = 600 items.
 
+    Excluded items (already booked) are filtered out by Vertex in the personalized payload only:
+    tops payloads are shared between users and cached as such (see tops_retrieval_local_cache).
+
     Args:
         user_context (UserContext): The contextual data of the current user.
         call_id (str): The unique identifier for the current API call.
         params (PlaylistRequestParams): Filtering constraints provided by the API client.
+        excluded_item_ids (set[str] | None): Item IDs Vertex must not return.
 
     Returns:
         list[dict[str, Any]]: A list of prediction payloads ready to be sent in parallel to Vertex AI.
@@ -282,7 +331,7 @@ def build_all_playlist_recommendation_retrieval_payloads(
         return [_build_booking_number_tops_retrieval_payload(user_context, call_id, params)]
 
     return [
-        _build_personalized_recommendation_retrieval_payload(user_context, call_id, params),
+        _build_personalized_recommendation_retrieval_payload(user_context, call_id, params, excluded_item_ids),
         _build_booking_number_tops_retrieval_payload(user_context, call_id, params),
         _build_release_trend_tops_retrieval_payload(user_context, call_id, params),
         _build_creation_trend_tops_retrieval_payload(user_context, call_id, params),
@@ -320,6 +369,79 @@ def deduplicate_candidate_items_by_item_id(
     return deduplicated_items
 
 
+def _build_tops_retrieval_cache_key(prediction_payload: dict[str, Any]) -> str:
+    """
+    Builds the local cache key of a "tops" retrieval payload.
+
+    Tops rankings are global: two users sending the same filters receive the same items.
+    The per-call identifiers are therefore stripped before hashing, so the key only depends
+    on the fields that actually shape the Vertex response (filters, vector column, size...).
+
+    Args:
+        prediction_payload (dict[str, Any]): A "tops" retrieval payload.
+
+    Returns:
+        str: The normalized cache key.
+    """
+    normalized_payload = {
+        field_name: field_value
+        for field_name, field_value in prediction_payload.items()
+        if field_name not in TOPS_RETRIEVAL_CACHE_IGNORED_FIELDS
+    }
+
+    return RedisAPI.generate_cache_key(
+        namespace_prefix="vertex_tops_retrieval", request_signature_data=normalized_payload
+    )
+
+
+async def fetch_retrieval_predictions_with_tops_local_cache(
+    prediction_payload: dict[str, Any],
+) -> VertexPredictionResult:
+    """
+    Fetches retrieval predictions, serving "tops" payloads from the worker-local LRU cache.
+
+    Warm-start users send 3 tops payloads per request, and most of them only differ by
+    call_id and user_id. Caching those responses in memory removes up to 3 of the 4
+    Vertex round-trips of a playlist request.
+
+    Only successful, non-empty responses are cached, so a Vertex outage is never pinned
+    in memory. Entries expire after VERTEX_TOPS_LOCAL_CACHE_TTL_SECONDS or at the next
+    database population time (REDIS_CACHE_RESET_HOUR), whichever comes first.
+
+    Args:
+        prediction_payload (dict[str, Any]): A retrieval payload (any model_type).
+
+    Returns:
+        VertexPredictionResult: The cached or freshly fetched prediction result.
+            Cached results are shared between requests and must not be mutated.
+    """
+    if not settings.VERTEX_TOPS_LOCAL_CACHE_ENABLED or prediction_payload.get("model_type") != "tops":
+        return await fetch_retrieval_predictions_from_vertex(prediction_payload)
+
+    cache_key = _build_tops_retrieval_cache_key(prediction_payload)
+
+    cached_result = tops_retrieval_local_cache.get_value(cache_key)
+    if cached_result is not None:
+        logger.debug(
+            "💾 Local tops retrieval cache HIT.",
+            extra={"cache_key": cache_key, "vector_column_name": prediction_payload.get("vector_column_name")},
+        )
+        return cached_result
+
+    prediction_result = await fetch_retrieval_predictions_from_vertex(prediction_payload)
+
+    if prediction_result.status == "success" and prediction_result.predictions:
+        time_to_live_in_seconds = min(
+            settings.VERTEX_TOPS_LOCAL_CACHE_TTL_SECONDS,
+            RedisAPI.calculate_seconds_until_next_database_population_time(),
+        )
+        tops_retrieval_local_cache.set_value(
+            cache_key=cache_key, value_to_cache=prediction_result, time_to_live_in_seconds=time_to_live_in_seconds
+        )
+
+    return prediction_result
+
+
 @log_execution_time
 async def fetch_all_playlist_recommendation_retrieval_predictions_from_vertex(
     retrieval_payloads: list[dict[str, Any]],
@@ -330,6 +452,7 @@ async def fetch_all_playlist_recommendation_retrieval_predictions_from_vertex(
     Calls each Vertex AI retrieval endpoint simultaneously using asyncio.gather, then merges all
     raw predictions into a single flat list and removes duplicates. This mirrors the v1 behavior
     where all retrieval endpoints are called in parallel via asyncio.gather.
+    "Tops" payloads are served from the worker-local cache when possible.
 
     Args:
         retrieval_payloads (list[dict[str, Any]]): One payload per retrieval endpoint,
@@ -342,7 +465,7 @@ async def fetch_all_playlist_recommendation_retrieval_predictions_from_vertex(
         Each endpoint returns up to 150 items → up to 600 raw items → deduplicated output.
     """
     parallel_results: list[VertexPredictionResult] = await asyncio.gather(
-        *[fetch_retrieval_predictions_from_vertex(payload) for payload in retrieval_payloads]
+        *[fetch_retrieval_predictions_with_tops_local_cache(payload) for payload in retrieval_payloads]
     )
 
     all_candidate_items: list[RecommendableItem] = []
@@ -403,13 +526,14 @@ def _build_similar_offer_search_filters(
     return {"$and": and_conditions}
 
 
-def build_similar_offer_retrieval_payload(
+def build_similar_offer_retrieval_payload(  # noqa: PLR0913
     user_context: UserContext,
     call_id: str,
     item_id: str | None,
     categories: list[CategoryEnum] | None = None,
     subcategories: list[SubcategoryEnum] | None = None,
     search_group_names: list[SearchGroupNameEnum] | None = None,
+    excluded_item_ids: set[str] | None = None,
 ) -> dict[str, Any]:
     """
     Constructs the prediction payload for similar offer recommendations.
@@ -421,6 +545,8 @@ def build_similar_offer_retrieval_payload(
         categories (list[CategoryEnum] | None): Filter by categories.
         subcategories (list[SubcategoryEnum] | None): Filter by subcategories.
         search_group_names (list[SearchGroupNameEnum] | None): Filter by search groups.
+        excluded_item_ids (set[str] | None): Item IDs Vertex must not return
+            (ignored by the shared "tops" fallback, see build_all_playlist_recommendation_retrieval_payloads).
 
     Returns:
         dict[str, Any]: The prediction payload required by Vertex API to retrieve similar items.
@@ -453,6 +579,10 @@ def build_similar_offer_retrieval_payload(
     else:
         prediction_payload["model_type"] = "similar_offer"
 
+        if excluded_item_ids:
+            search_filters = prediction_payload.setdefault("params", {"$and": []})
+            search_filters["$and"].append(_build_excluded_item_ids_condition(excluded_item_ids))
+
     return prediction_payload
 
 
@@ -481,8 +611,96 @@ async def fetch_graph_predictions_from_vertex(prediction_payload: dict[str, Any]
     return prediction_result
 
 
+async def fetch_item_ids_to_exclude_from_retrieval(
+    db: AsyncSession, user_id: str, *, is_user_specific_retrieval: bool
+) -> set[str] | None:
+    """
+    Fetches the already booked item IDs to send in the retrieval filters.
+
+    Excluding them in Vertex keeps booked items from taking retrieval slots, but the IDs must then be
+    fetched before the Vertex call instead of concurrently with it. Shared "tops" retrievals never
+    carry the exclusion, so that they stay cacheable across users.
+
+    Args:
+        db (AsyncSession): The asynchronous database session.
+        user_id (str): The unique identifier of the current user.
+        is_user_specific_retrieval (bool): Whether the retrieval payloads depend on the user anyway.
+
+    Returns:
+        set[str] | None: The item IDs to exclude, or None when RETRIEVAL_BOOKED_ITEMS_EXCLUSION_ENABLED
+            is off or the retrieval is shared (the booked items are then filtered after retrieval only).
+    """
+    if not (settings.RETRIEVAL_BOOKED_ITEMS_EXCLUSION_ENABLED and is_user_specific_retrieval):
+        return None
+
+    return await fetch_already_booked_item_ids(db=db, user_id=user_id)
+
+
+def _build_non_recommendable_items_cache_key(user_id: str) -> str:
+    return f"non_recommendable_items:{user_id}"
+
+
+async def _query_already_booked_item_ids(db: AsyncSession, user_id: str) -> set[str]:
+    already_booked_items_query = select(NonRecommendableItems.item_id).where(NonRecommendableItems.user_id == user_id)
+
+    query_result = await db.execute(already_booked_items_query)
+
+    return set(query_result.scalars().all())
+
+
+async def fetch_already_booked_item_ids(db: AsyncSession, user_id: str) -> set[str]:
+    """
+    Fetches the item IDs the user has already booked or consumed.
+
+    This query does not depend on the retrieval results, so pipelines run it concurrently
+    with the Vertex AI retrieval call to take it off the critical path.
+
+    With NON_RECOMMENDABLE_ITEMS_CACHE_ENABLED, the set is read from the worker-local LRU,
+    then from Redis, and only queried from the database on a miss. The Redis copy is an exact
+    set rather than a Bloom filter: a false positive would silently hide a recommendable item,
+    and users book few enough items for exact sets to stay small. It expires at the next
+    database population time, when the 'NonRecommendableItems' table is rebuilt: like the
+    table itself, it does not see the bookings made since the last rebuild.
+
+    Args:
+        db (AsyncSession): The asynchronous database session.
+        user_id (str): The unique identifier of the current user.
+
+    Returns:
+        set[str]: The item IDs found in the 'NonRecommendableItems' table for this user.
+            Cached sets are shared between requests and must not be mutated.
+    """
+    if not settings.NON_RECOMMENDABLE_ITEMS_CACHE_ENABLED:
+        return await _query_already_booked_item_ids(db=db, user_id=user_id)
+
+    cache_key = _build_non_recommendable_items_cache_key(user_id)
+
+    already_booked_item_ids = non_recommendable_items_local_cache.get_value(cache_key)
+    if already_booked_item_ids is not None:
+        return already_booked_item_ids
+
+    already_booked_item_ids = await RedisAPI.fetch_cached_members(cache_key=cache_key)
+    if already_booked_item_ids is None:
+        already_booked_item_ids = await _query_already_booked_item_ids(db=db, user_id=user_id)
+        await RedisAPI.store_members(cache_key=cache_key, members=already_booked_item_ids)
+
+    time_to_live_in_seconds = min(
+        settings.NON_RECOMMENDABLE_ITEMS_LOCAL_CACHE_TTL_SECONDS,
+        RedisAPI.calculate_seconds_until_next_database_population_time(),
+    )
+    non_recommendable_items_local_cache.set_value(
+        cache_key=cache_key, value_to_cache=already_booked_item_ids, time_to_live_in_seconds=time_to_live_in_seconds
+    )
+
+    return already_booked_item_ids
+
+
 async def filter_out_already_booked_items(
-    db: AsyncSession, candidate_items: list[RecommendableItem], user_id: str
+    db: AsyncSession,
+    candidate_items: list[RecommendableItem],
+    user_id: str,
+    *,
+    already_booked_item_ids: set[str] | None = None,
 ) -> list[RecommendableItem]:
     """
     Removes items from the candidate list that the user has already booked or consumed.
@@ -495,6 +713,8 @@ async def filter_out_already_booked_items(
         db (AsyncSession): The asynchronous database session.
         candidate_items (list[RecommendableItem]): The raw candidate items proposed by Vertex AI.
         user_id (str): The unique identifier of the current user.
+        already_booked_item_ids (set[str] | None): Item IDs prefetched with fetch_already_booked_item_ids.
+            When None, they are queried from the database.
 
     Returns:
         list[RecommendableItem]: A filtered list of items containing only new, unseen recommendations.
@@ -507,10 +727,8 @@ async def filter_out_already_booked_items(
     if not candidate_items:
         return []
 
-    already_booked_items_query = select(NonRecommendableItems.item_id).where(NonRecommendableItems.user_id == user_id)
-
-    query_result = await db.execute(already_booked_items_query)
-    already_booked_item_ids = set(query_result.scalars().all())
+    if already_booked_item_ids is None:
+        already_booked_item_ids = await fetch_already_booked_item_ids(db=db, user_id=user_id)
 
     unseen_candidate_items = [item for item in candidate_items if item.item_id not in already_booked_item_ids]
 
@@ -527,6 +745,230 @@ async def filter_out_already_booked_items(
     return unseen_candidate_items
 
 
+def prune_candidate_items_per_group(
+    candidate_items: list[RecommendableItem], max_items_per_group: int
+) -> list[RecommendableItem]:
+    """
+    Keeps the best candidates of each (retrieval source, search group) before venue resolution and ranking.
+
+    Only up to 60 playlist slots (20 similar offers) are ever returned out of up to 600 candidates.
+    Candidates are grouped by (item_origin, search_group_name) and each group keeps its
+    `max_items_per_group` best items: lowest item_rank first, then highest item_score. Capping
+    every group, rather than the whole list, leaves diversification enough material per group.
+
+    Args:
+        candidate_items (list[RecommendableItem]): The unbooked candidate items.
+        max_items_per_group (int): The number of items kept per group (K).
+
+    Returns:
+        list[RecommendableItem]: The kept items, in their original order.
+
+    Example (K = 1):
+        Input:  [A (user_based, CINEMA, rank 2), B (user_based, CINEMA, rank 1), C (tops, CINEMA, rank 5)]
+        Output: [B, C]
+    """
+    candidate_indices_by_group: dict[tuple[str, str], list[int]] = defaultdict(list)
+    for candidate_index, item in enumerate(candidate_items):
+        candidate_indices_by_group[(item.item_origin, item.search_group_name)].append(candidate_index)
+
+    kept_candidate_indices: list[int] = []
+    for group_candidate_indices in candidate_indices_by_group.values():
+        group_candidate_indices.sort(
+            key=lambda candidate_index: (
+                candidate_items[candidate_index].item_rank,
+                -(candidate_items[candidate_index].item_score or 0.0),
+            )
+        )
+        kept_candidate_indices.extend(group_candidate_indices[:max_items_per_group])
+
+    kept_candidate_indices.sort()
+    return [candidate_items[candidate_index] for candidate_index in kept_candidate_indices]
+
+
+def apply_candidate_pruning(candidate_items: list[RecommendableItem], call_id: str) -> list[RecommendableItem]:
+    """
+    Applies prune_candidate_items_per_group when CANDIDATE_PRUNING_ENABLED, with
+    K = CANDIDATE_PRUNING_MAX_ITEMS_PER_GROUP. Returns the candidates unchanged otherwise.
+
+    Args:
+        candidate_items (list[RecommendableItem]): The unbooked candidate items.
+        call_id (str): The identifier of the pipeline call, for logging.
+
+    Returns:
+        list[RecommendableItem]: The candidate items to resolve and rank.
+    """
+    if not settings.CANDIDATE_PRUNING_ENABLED:
+        return candidate_items
+
+    pruned_candidate_items = prune_candidate_items_per_group(
+        candidate_items, max_items_per_group=settings.CANDIDATE_PRUNING_MAX_ITEMS_PER_GROUP
+    )
+
+    logger.info(
+        "✂️ Candidates pruned per retrieval source and search group.",
+        extra={
+            "call_id": call_id,
+            "before_pruning": len(candidate_items),
+            "after_pruning": len(pruned_candidate_items),
+            "max_items_per_group": settings.CANDIDATE_PRUNING_MAX_ITEMS_PER_GROUP,
+        },
+    )
+
+    return pruned_candidate_items
+
+
+def calculate_fast_track_distances_in_meters(
+    fast_track_items: list[RecommendableItem], user_context: UserContext
+) -> np.ndarray:
+    """
+    Computes the user distance of every fast-track item (digital or single-venue) in one call.
+
+    Args:
+        fast_track_items (list[RecommendableItem]): Items resolved from their example offer.
+        user_context (UserContext): Standardized user context (geo, credit, etc.).
+
+    Returns:
+        np.ndarray: The distances in meters, NaN for digital items, when the user is not
+            geolocated or when the example venue has no coordinates.
+    """
+    if not user_context.is_geolocated:
+        return np.full(len(fast_track_items), np.nan)
+
+    # Missing coordinates (None) become NaN in float arrays.
+    venue_latitudes = np.array(
+        [item.example_venue_latitude if item.is_geolocated else None for item in fast_track_items], dtype=np.float64
+    )
+    venue_longitudes = np.array(
+        [item.example_venue_longitude if item.is_geolocated else None for item in fast_track_items], dtype=np.float64
+    )
+
+    return calculate_haversine_distances_in_meters(
+        user_context.latitude, user_context.longitude, venue_latitudes, venue_longitudes
+    )
+
+
+def build_enriched_offer_from_item(  # noqa: PLR0913
+    item: RecommendableItem,
+    *,
+    offer_id: str,
+    offer_creation_date: datetime | None,
+    stock_beginning_date: datetime | None,
+    venue_latitude: float | None,
+    venue_longitude: float | None,
+    offer_user_distance: float | None,
+) -> EnrichedRecommendableOffer:
+    """
+    Builds the enriched offer of a resolved item: offer attributes come from the resolved
+    offer, ML and popularity attributes are read from the referenced Vertex item.
+    """
+    return EnrichedRecommendableOffer(
+        offer_id=offer_id,
+        item=item,
+        offer_creation_date=offer_creation_date,
+        stock_beginning_date=stock_beginning_date,
+        venue_latitude=venue_latitude,
+        venue_longitude=venue_longitude,
+        offer_user_distance=offer_user_distance,
+    )
+
+
+def resolve_fast_track_items(
+    fast_track_items: list[RecommendableItem], user_context: UserContext
+) -> tuple[list[EnrichedRecommendableOffer], int]:
+    """
+    Resolves fast-track items (digital or single-venue) to their example offer.
+
+    Distances are computed for the whole batch in one vectorized call and the default max
+    radius (100km) is applied as a mask. Items without distance (digital items, missing
+    coordinates) are kept.
+
+    Args:
+        fast_track_items (list[RecommendableItem]): Items resolved from their example offer.
+        user_context (UserContext): Standardized user context (geo, credit, etc.).
+
+    Returns:
+        tuple: The enriched offers, and the number of items rejected for being too far.
+    """
+    fast_track_distances = calculate_fast_track_distances_in_meters(fast_track_items, user_context)
+    is_within_max_distance = ~(fast_track_distances > DEFAULT_MAX_DISTANCE_IN_METERS)
+
+    fast_track_enriched_offers = [
+        build_enriched_offer_from_item(
+            item,
+            offer_id=item.example_offer_id,
+            offer_creation_date=item.offer_creation_date,
+            stock_beginning_date=item.stock_beginning_date,
+            venue_latitude=item.example_venue_latitude,
+            venue_longitude=item.example_venue_longitude,
+            offer_user_distance=None if math.isnan(distance) else distance,
+        )
+        for item, distance, is_within in zip(
+            fast_track_items, fast_track_distances.tolist(), is_within_max_distance.tolist(), strict=True
+        )
+        if is_within
+    ]
+
+    return fast_track_enriched_offers, len(fast_track_items) - len(fast_track_enriched_offers)
+
+
+async def find_closest_offers_of_multi_venue_items(
+    db: AsyncSession, multi_venue_item_ids: list[str], user_context: UserContext
+) -> list[Any]:
+    """
+    Finds the closest offer of each multi-venue item, from the fastest source available.
+
+    1. The in-memory item venue index, when loaded (IN_MEMORY_VENUE_RESOLVER_ENABLED): resolves
+       every item without any database round-trip.
+    2. The nightly precomputed closest offers (PRECOMPUTED_CLOSEST_OFFERS_ENABLED): resolves the
+       items whose closest offer can be proven from the table.
+    3. The live H3 / Haversine query for the remaining items, at the H3 resolution picked by the
+       venue density map when loaded (GEOSPATIAL_RETRIEVAL_ADAPTIVE_H3_RESOLUTION_ENABLED).
+
+    Args:
+        db (AsyncSession): The async database session.
+        multi_venue_item_ids (list[str]): IDs of the items to resolve.
+        user_context (UserContext): Standardized user context (geo, credit, etc.).
+
+    Returns:
+        list: (offer, distance in meters) pairs, one per item having an offer within range.
+    """
+    item_venue_index = item_venue_index_service.index
+    if item_venue_index is not None and user_context.latitude is not None and user_context.longitude is not None:
+        in_memory_rows = item_venue_index.find_closest_offers(
+            multi_venue_item_ids, user_context.latitude, user_context.longitude
+        )
+        logger.debug(
+            "📍 Multi-venue items resolved via the in-memory item venue index.",
+            extra={"multi_venue_requested": len(multi_venue_item_ids), "in_memory_resolved_count": len(in_memory_rows)},
+        )
+        return in_memory_rows
+
+    db_rows: list[Any] = []
+    items_to_resolve_with_h3_index = multi_venue_item_ids
+
+    if settings.PRECOMPUTED_CLOSEST_OFFERS_ENABLED:
+        db_rows, items_to_resolve_with_h3_index = await find_closest_offers_with_precomputed_table(
+            db, multi_venue_item_ids, user_context
+        )
+        logger.debug(
+            "📦 Multi-venue items resolved via precomputed closest offers.",
+            extra={
+                "multi_venue_requested": len(multi_venue_item_ids),
+                "precomputed_resolved_count": len(multi_venue_item_ids) - len(items_to_resolve_with_h3_index),
+            },
+        )
+
+    if items_to_resolve_with_h3_index:
+        db_rows += await find_closest_offers_with_h3_index(
+            db,
+            items_to_resolve_with_h3_index,
+            user_context,
+            resolution=venue_density_map_service.select_resolution(user_context.latitude, user_context.longitude),
+        )
+
+    return db_rows
+
+
 async def resolve_closest_venues_from_items(
     db: AsyncSession, candidate_items: list[RecommendableItem], user_context: UserContext
 ) -> list[EnrichedRecommendableOffer]:
@@ -540,7 +982,9 @@ async def resolve_closest_venues_from_items(
     Processing Flow:
     1. Routing: Segregates items into a Fast-Track bucket (digital/single venue) and a SQL bucket (multi-venue).
     2. Spatial Resolution: Uses PostGIS ROW_NUMBER() over ST_Distance
-        to find the single closest venue for each multi-venue item.
+        to find the single closest venue for each multi-venue item. When enabled, the in-memory
+        item venue index or the nightly precomputed closest offers are used first
+        (see find_closest_offers_of_multi_venue_items).
     3. Merge: Combines both buckets into EnrichedRecommendableOffer objects and sorts by distance.
 
     Args:
@@ -556,11 +1000,10 @@ async def resolve_closest_venues_from_items(
         return []
 
     # --- 1. FAST-TRACK & DB ROUTING ---
-    fast_track_enriched_offers: list[EnrichedRecommendableOffer] = []
+    fast_track_items: list[RecommendableItem] = []
     multi_venue_item_ids: list[str] = []
     item_lookup_map: dict[str, RecommendableItem] = {}
     skipped_no_geo_context = 0
-    skipped_too_far = 0
 
     for item in candidate_items:
         # Route A: Fast-Track (Digital or single-venue physical)
@@ -569,51 +1012,15 @@ async def resolve_closest_venues_from_items(
             if item.is_geolocated and not user_context.is_geolocated:
                 skipped_no_geo_context += 1
                 continue
-
-            calculated_distance = None
-            if item.is_geolocated and user_context.is_geolocated:
-                calculated_distance = calculate_haversine_distance_in_meters(
-                    user_context.latitude,
-                    user_context.longitude,
-                    item.example_venue_latitude,
-                    item.example_venue_longitude,
-                )
-
-                # Reject if beyond default max radius (100km)
-                if calculated_distance is not None and calculated_distance > DEFAULT_MAX_DISTANCE_IN_METERS:
-                    skipped_too_far += 1
-                    continue
-
-            # Instantiate the clean DTO directly from the ML Item
-            enriched_offer = EnrichedRecommendableOffer(
-                offer_id=item.example_offer_id,
-                item_id=item.item_id,
-                offer_creation_date=item.offer_creation_date,
-                stock_beginning_date=item.stock_beginning_date,
-                is_geolocated=item.is_geolocated,
-                venue_latitude=item.example_venue_latitude,
-                venue_longitude=item.example_venue_longitude,
-                offer_user_distance=calculated_distance,
-                item_score=item.item_score,
-                item_rank=item.item_rank,
-                item_origin=item.item_origin,
-                semantic_emb_mean=item.semantic_emb_mean,
-                stock_price=item.stock_price,
-                category=item.category,
-                subcategory_id=item.subcategory_id,
-                search_group_name=item.search_group_name,
-                booking_number=item.booking_number,
-                booking_number_last_7_days=item.booking_number_last_7_days,
-                booking_number_last_14_days=item.booking_number_last_14_days,
-                booking_number_last_28_days=item.booking_number_last_28_days,
-            )
-            fast_track_enriched_offers.append(enriched_offer)
+            fast_track_items.append(item)
 
         # Route B: SQL Database Resolution (Multi-venue physical items)
         elif user_context.is_geolocated:
             multi_venue_item_ids.append(item.item_id)
             item_lookup_map[item.item_id] = item
 
+    fast_track_enriched_offers, skipped_too_far = resolve_fast_track_items(fast_track_items, user_context)
+
     logger.debug(
         "🔀 Venue resolution routing.",
         extra={
@@ -629,9 +1036,7 @@ async def resolve_closest_venues_from_items(
     database_resolved_enriched_offers: list[EnrichedRecommendableOffer] = []
 
     if multi_venue_item_ids:
-        db_rows = await find_closest_offers_with_h3_index(
-            db, multi_venue_item_ids, user_context, resolution=settings.GEOSPATIAL_RETRIEVAL_H3_RESOLUTION
-        )
+        db_rows = await find_closest_offers_of_multi_venue_items(db, multi_venue_item_ids, user_context)
 
         # Map SQL results back to Vertex ML data
         for db_offer, distance in db_rows:
@@ -639,27 +1044,14 @@ async def resolve_closest_venues_from_items(
             if not item_data:
                 continue
 
-            enriched_offer = EnrichedRecommendableOffer(
+            enriched_offer = build_enriched_offer_from_item(
+                item_data,
                 offer_id=db_offer.offer_id,
-                item_id=db_offer.item_id,
                 offer_creation_date=db_offer.offer_creation_date,
                 stock_beginning_date=db_offer.stock_beginning_date,
-                is_geolocated=item_data.is_geolocated,
                 venue_latitude=db_offer.venue_latitude,
                 venue_longitude=db_offer.venue_longitude,
                 offer_user_distance=float(distance) if distance is not None else None,
-                item_score=item_data.item_score,
-                item_rank=item_data.item_rank,
-                item_origin=item_data.item_origin,
-                semantic_emb_mean=item_data.semantic_emb_mean,
-                stock_price=item_data.stock_price,
-                category=item_data.category,
-                subcategory_id=item_data.subcategory_id,
-                search_group_name=item_data.search_group_name,
-                booking_number=item_data.booking_number,
-                booking_number_last_7_days=item_data.booking_number_last_7_days,
-                booking_number_last_14_days=item_data.booking_number_last_14_days,
-                booking_number_last_28_days=item_data.booking_number_last_28_days,
             )
             database_resolved_enriched_offers.append(enriched_offer)
 
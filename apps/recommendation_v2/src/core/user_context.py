@@ -2,6 +2,13 @@ from dataclasses import dataclass
 from datetime import UTC
 from datetime import datetime
 
+from sqlalchemy import literal
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.geo import apply_iris_lookup_result
+from core.geo import build_iris_lookup_subqueries
+from core.geo import find_iris_id_in_memory
 from models.user import EnrichedUser
 
 
@@ -156,3 +163,51 @@ class UserContext:
             longitude=longitude,
             iris_id=iris_id,
         )
+
+
+async def fetch_user_record_and_iris_id(
+    db: AsyncSession, user_id: str, latitude: float | None, longitude: float | None
+) -> tuple[EnrichedUser | None, str | None]:
+    """
+    Fetches the user profile and resolves the IRIS zone of the user in a single database round-trip.
+
+    Both reads are independent, but an AsyncSession cannot run two statements concurrently.
+    Instead of awaiting them one after the other (two round-trips), the IRIS lookup is embedded
+    as a scalar subquery next to a LEFT JOIN on the user table:
+
+        SELECT enriched_user_mv.*, (SELECT iris_france.id ... LIMIT 1) AS iris_id
+        FROM (SELECT :user_id AS user_id) AS requested_user
+        LEFT OUTER JOIN enriched_user_mv ON enriched_user_mv.user_id = requested_user.user_id
+
+    When the IRIS zone can be resolved in-process (H3 cell cache or in-memory IRIS index, see
+    core.geo.find_iris_id_in_memory), only the user record is read from the database.
+
+    Args:
+        db (AsyncSession): The active asynchronous database session.
+        user_id (str): The requested user ID.
+        latitude (float | None): GPS latitude provided by the client.
+        longitude (float | None): GPS longitude provided by the client.
+
+    Returns:
+        tuple[EnrichedUser | None, str | None]: The user record (None if unknown) and the IRIS id
+            (None if the user is not geolocated or outside of known IRIS zones).
+    """
+    if latitude is None or longitude is None:
+        return await db.get(EnrichedUser, user_id), None
+
+    in_memory_lookup = find_iris_id_in_memory(latitude, longitude)
+    if in_memory_lookup.is_resolved:
+        return await db.get(EnrichedUser, user_id), in_memory_lookup.iris_id
+
+    requested_user = select(literal(user_id).label("user_id")).subquery("requested_user")
+
+    user_and_iris_query = (
+        select(EnrichedUser, *build_iris_lookup_subqueries(latitude, longitude, in_memory_lookup))
+        .select_from(requested_user)
+        .outerjoin(EnrichedUser, EnrichedUser.user_id == requested_user.c.user_id)
+    )
+
+    query_result = await db.execute(user_and_iris_query)
+    database_user_record, *iris_lookup_values = query_result.one()
+
+    return database_user_record, apply_iris_lookup_result(in_memory_lookup, iris_lookup_values)
@@ -0,0 +1,319 @@
+"""
+In-process venue density map, to pick the H3 resolution of the closest offer query per request.
+
+core.geo.find_closest_offers_with_h3_index scans the venues of the H3 cells within k rings of the
+user. The disk always covers H3_SEARCH_RADIUS_IN_KM, but coarse cells overshoot it further (a
+resolution 5 disk reaches ~68 km, a resolution 9 disk ~50 km): in dense areas, such as Paris, a
+coarse resolution over-fetches thousands of venues. Fine resolutions bind far more cells instead
+(61 at resolution 5, ~63,000 at resolution 9), for no gain in rural areas.
+
+The map is built from the venue count of each resolution 7 cell of venue_h3_mapping_mv, at startup
+and after the nightly table refresh. For every coarse cell (resolution 5) within reach of a venue,
+the venues scanned at each resolution are estimated as the venues of the cells within the disk
+reach of any user of the coarse cell, and the coarsest resolution keeping the estimate under
+GEOSPATIAL_RETRIEVAL_MAX_SCANNED_VENUES is kept. Only resolutions whose disk binds at most
+GEOSPATIAL_RETRIEVAL_MAX_BOUND_H3_CELLS cells are candidates: the disk covers the search radius at
+any resolution, so finer ones only trim its overshoot, and each one binds ~7x more cells. Where no
+candidate meets the target, the one with the fewest estimated venues is kept.
+
+GEOSPATIAL_RETRIEVAL_H3_RESOLUTION stays the fallback: as long as the map is not loaded (startup
+failure, feature flag off), every request uses the global resolution.
+"""
+
+import asyncio
+import time
+from collections import Counter
+from collections.abc import Mapping
+from collections.abc import Sequence
+
+import h3
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from core.geo import H3_SEARCH_RADIUS_IN_KM
+from core.geo import calculate_h3_cell_radius_in_meters
+from core.geo import calculate_haversine_distances_in_meters
+from models.venue import Venue
+from services.db import AsyncSessionFactory
+from services.h3 import calculate_h3_k_rings_to_cover_search_radius
+from services.logger import logger
+
+
+# Coarsest venue H3 column: the resolution of the cells the map is keyed on.
+VENUE_DENSITY_MAP_H3_RESOLUTION = min(settings.VALID_H3_RESOLUTIONS)
+# Resolution of the venue counts the scanned venues are estimated from (~1.4 km edges).
+VENUE_DENSITY_COUNT_H3_RESOLUTION = 7
+
+
+def calculate_h3_disk_reach_in_meters(resolution: int) -> float:
+    """
+    Returns the distance from the user reached by the H3 disk covering the search radius.
+
+    Uses the same approximation as calculate_h3_k_rings_to_cover_search_radius: adjacent cell
+    centers are `edge_length * sqrt(3)` apart.
+
+    Args:
+        resolution (int): The H3 resolution of the disk.
+
+    Returns:
+        float: The reach of the disk in meters.
+    """
+    k_rings = calculate_h3_k_rings_to_cover_search_radius(
+        search_radius_in_km=H3_SEARCH_RADIUS_IN_KM, resolution=resolution
+    )
+    return k_rings * h3.average_hexagon_edge_length(resolution, unit="m") * 1.732
+
+
+def calculate_h3_disk_cell_count(resolution: int) -> int:
+    """
+    Returns the number of H3 cells of the disk covering the search radius, as bound in the query.
+
+    Args:
+        resolution (int): The H3 resolution of the disk.
+
+    Returns:
+        int: The cell count of the disk (pentagons aside).
+    """
+    k_rings = calculate_h3_k_rings_to_cover_search_radius(
+        search_radius_in_km=H3_SEARCH_RADIUS_IN_KM, resolution=resolution
+    )
+    return 3 * k_rings * (k_rings + 1) + 1
+
+
+class VenueDensityMap:
+    """
+    Best H3 resolution of every coarse cell within reach of a venue, with selection counters.
+
+    Args:
+        venue_counts_by_cell: Number of venues of each VENUE_DENSITY_COUNT_H3_RESOLUTION cell.
+        max_scanned_venues: Target maximum of venues scanned per request.
+        resolutions: The resolutions materialised as venue H3 columns.
+        max_bound_cells: Maximum H3 cells bound per request: finer resolutions are never picked.
+    """
+
+    def __init__(
+        self,
+        venue_counts_by_cell: Mapping[str, int],
+        max_scanned_venues: int,
+        resolutions: Sequence[int],
+        max_bound_cells: int,
+    ) -> None:
+        self.max_scanned_venues = max_scanned_venues
+        # The coarsest resolution is always a candidate, whatever the budget
+        sorted_resolutions = sorted(resolutions)
+        self.resolutions = sorted_resolutions[:1] + [
+            resolution
+            for resolution in sorted_resolutions[1:]
+            if calculate_h3_disk_cell_count(resolution) <= max_bound_cells
+        ]
+
+        self._resolution_by_coarse_cell: dict[str, int] = {}
+        self._estimated_scanned_venues_by_coarse_cell: dict[str, int] = {}
+
+        self.selection_counts: Counter[int] = Counter()
+        self.above_target_count = 0
+        self.estimated_scanned_venue_total = 0
+
+        venue_cells = list(venue_counts_by_cell)
+        if not venue_cells:
+            return
+
+        venue_counts = np.fromiter(venue_counts_by_cell.values(), dtype=np.int64, count=len(venue_cells))
+        venue_cell_centers = np.array([h3.cell_to_latlng(venue_cell) for venue_cell in venue_cells])
+        disk_reaches = [calculate_h3_disk_reach_in_meters(resolution) for resolution in self.resolutions]
+
+        venue_cell_positions_by_coarse_cell: dict[str, list[int]] = {}
+        for venue_cell_position, venue_cell in enumerate(venue_cells):
+            coarse_cell = h3.cell_to_parent(venue_cell, VENUE_DENSITY_MAP_H3_RESOLUTION)
+            venue_cell_positions_by_coarse_cell.setdefault(coarse_cell, []).append(venue_cell_position)
+
+        # Users further than the coarsest disk reach from every venue have nothing to scan. The reach is
+        # extended by the radius of the coarse cell of the user and of the coarse parent of the venue cell.
+        coarse_cell_edge_length_in_km = h3.average_hexagon_edge_length(VENUE_DENSITY_MAP_H3_RESOLUTION, unit="km")
+        coarse_k_rings = calculate_h3_k_rings_to_cover_search_radius(
+            search_radius_in_km=max(disk_reaches) / 1000 + 2 * coarse_cell_edge_length_in_km,
+            resolution=VENUE_DENSITY_MAP_H3_RESOLUTION,
+        )
+        reachable_cells = {
+            reachable_cell
+            for venue_coarse_cell in venue_cell_positions_by_coarse_cell
+            for reachable_cell in h3.grid_disk(venue_coarse_cell, coarse_k_rings)
+        }
+
+        for coarse_cell in reachable_cells:
+            nearby_venue_cell_positions = np.fromiter(
+                (
+                    venue_cell_position
+                    for nearby_coarse_cell in h3.grid_disk(coarse_cell, coarse_k_rings)
+                    for venue_cell_position in venue_cell_positions_by_coarse_cell.get(nearby_coarse_cell, ())
+                ),
+                dtype=np.int64,
+            )
+            center_latitude, center_longitude = h3.cell_to_latlng(coarse_cell)
+            distances = calculate_haversine_distances_in_meters(
+                center_latitude,
+                center_longitude,
+                venue_cell_centers[nearby_venue_cell_positions, 0],
+                venue_cell_centers[nearby_venue_cell_positions, 1],
+            )
+            # Users may be anywhere in the coarse cell: the estimate holds for the worst placed one
+            distances -= calculate_h3_cell_radius_in_meters(coarse_cell)
+            nearby_venue_counts = venue_counts[nearby_venue_cell_positions]
+            estimated_scanned_venues_by_resolution = [
+                int(nearby_venue_counts[distances <= disk_reach].sum()) for disk_reach in disk_reaches
+            ]
+            # Where no resolution meets the target, keep the coarsest one scanning the fewest venues
+            accepted_scanned_venues = max(max_scanned_venues, min(estimated_scanned_venues_by_resolution))
+            for resolution, estimated_scanned_venues in zip(
+                self.resolutions, estimated_scanned_venues_by_resolution, strict=True
+            ):
+                if estimated_scanned_venues <= accepted_scanned_venues:
+                    self._resolution_by_coarse_cell[coarse_cell] = resolution
+                    self._estimated_scanned_venues_by_coarse_cell[coarse_cell] = estimated_scanned_venues
+                    break
+
+    def __len__(self) -> int:
+        return len(self._resolution_by_coarse_cell)
+
+    def select_resolution(self, latitude: float, longitude: float) -> int:
+        """
+        Returns the H3 resolution to use around a user, and counts the selection.
+
+        Args:
+            latitude: User latitude in decimal degrees.
+            longitude: User longitude in decimal degrees.
+
+        Returns:
+            int: The coarsest resolution within the cell budget expected to keep the scanned venues
+                under the target, or to scan the fewest if the target cannot be met (the coarsest
+                resolution if no venue is within reach).
+        """
+        coarse_cell = h3.latlng_to_cell(latitude, longitude, VENUE_DENSITY_MAP_H3_RESOLUTION)
+        resolution = self._resolution_by_coarse_cell.get(coarse_cell, self.resolutions[0])
+        estimated_scanned_venues = self._estimated_scanned_venues_by_coarse_cell.get(coarse_cell, 0)
+
+        self.selection_counts[resolution] += 1
+        self.estimated_scanned_venue_total += estimated_scanned_venues
+        if estimated_scanned_venues > self.max_scanned_venues:
+            self.above_target_count += 1
+
+        return resolution
+
+    def get_statistics(self) -> dict[str, int | float]:
+        selection_count = self.selection_counts.total()
+        return {
+            "coarse_cell_count": len(self),
+            "max_scanned_venues": self.max_scanned_venues,
+            "selection_count": selection_count,
+            **{f"resolution_{resolution}_count": self.selection_counts[resolution] for resolution in self.resolutions},
+            "above_target_count": self.above_target_count,
+            "within_target_ratio": 1 - self.above_target_count / selection_count if selection_count else 0.0,
+            "mean_estimated_scanned_venues": (
+                self.estimated_scanned_venue_total / selection_count if selection_count else 0.0
+            ),
+        }
+
+
+async def fetch_venue_counts_by_cell(db: AsyncSession) -> dict[str, int]:
+    """
+    Counts the venues of each VENUE_DENSITY_COUNT_H3_RESOLUTION cell of venue_h3_mapping_mv.
+
+    Args:
+        db (AsyncSession): The active asynchronous database session.
+
+    Returns:
+        dict[str, int]: The number of venues of each cell.
+    """
+    cell_column = getattr(Venue, f"h3_res{VENUE_DENSITY_COUNT_H3_RESOLUTION}")
+    venue_counts_query = select(cell_column, func.count()).where(cell_column.is_not(None)).group_by(cell_column)
+
+    result = await db.execute(venue_counts_query)
+    return {str(cell): int(venue_count) for cell, venue_count in result.tuples()}
+
+
+async def build_venue_density_map(db: AsyncSession) -> VenueDensityMap:
+    """
+    Loads the venue counts from the database and builds the density map.
+
+    Estimating the scanned venues of every reachable coarse cell takes about a second of CPU, so it
+    runs in a worker thread to keep the event loop responsive during the nightly reload.
+
+    Args:
+        db (AsyncSession): The active asynchronous database session.
+
+    Returns:
+        VenueDensityMap: The freshly built map.
+    """
+    venue_counts_by_cell = await fetch_venue_counts_by_cell(db)
+    return await asyncio.to_thread(
+        VenueDensityMap,
+        venue_counts_by_cell,
+        settings.GEOSPATIAL_RETRIEVAL_MAX_SCANNED_VENUES,
+        settings.VALID_H3_RESOLUTIONS,
+        settings.GEOSPATIAL_RETRIEVAL_MAX_BOUND_H3_CELLS,
+    )
+
+
+class VenueDensityMapService:
+    """
+    Holds the venue density map of the worker and reloads it after the nightly table refresh.
+
+    Reloads build a new map on the side and swap it in with a single assignment. A failed reload
+    keeps the previous map (or, at startup, leaves the global resolution in place).
+    """
+
+    def __init__(self) -> None:
+        self.density_map: VenueDensityMap | None = None
+
+    async def reload(self) -> None:
+        """
+        (Re)builds the map from the database. Never raises: errors are logged.
+        """
+        loading_start_time = time.perf_counter()
+
+        try:
+            async with AsyncSessionFactory() as db:
+                new_density_map = await build_venue_density_map(db)
+        except Exception as loading_error:
+            logger.error(
+                "🧭 Venue density map loading failed, H3 resolutions keep using the "
+                f"{'previous map' if self.density_map is not None else 'global resolution'}",
+                extra={"error_type": type(loading_error).__name__, "error_detail": str(loading_error)},
+            )
+            return
+
+        if len(new_density_map) == 0:
+            logger.warning("🧭 Venue density map loading returned no venue, map not replaced")
+            return
+
+        self.density_map = new_density_map
+        logger.info(
+            "🧭 Venue density map loaded",
+            extra={
+                "coarse_cell_count": len(new_density_map),
+                "loading_duration_seconds": time.perf_counter() - loading_start_time,
+            },
+        )
+
+    def select_resolution(self, latitude: float | None, longitude: float | None) -> int:
+        """
+        Returns the H3 resolution of the closest offer query for a user location.
+
+        Args:
+            latitude: User latitude in decimal degrees.
+            longitude: User longitude in decimal degrees.
+
+        Returns:
+            int: The resolution picked by the density map, or GEOSPATIAL_RETRIEVAL_H3_RESOLUTION
+                when the map is not loaded or the location is missing.
+        """
+        density_map = self.density_map
+        if density_map is None or latitude is None or longitude is None:
+            return settings.GEOSPATIAL_RETRIEVAL_H3_RESOLUTION
+        return density_map.select_resolution(latitude, longitude)
+
+
+venue_density_map_service = VenueDensityMapService()
@@ -0,0 +1,346 @@
+"""
+In-process index of the offers of every item, to resolve the closest venue of multi-venue items.
+
+core.geo.find_closest_offers_with_h3_index is the heaviest query of the recommendation path:
+for each multi-venue candidate item it scans the offers of the item around the user, computes
+their distance and keeps the closest one. The offers only change when the tables are
+repopulated overnight, so this module loads them once into worker memory as contiguous NumPy
+arrays sorted by item, and answers the same question with one vectorised distance computation
+and a per-item argmin over all candidate items of the request.
+
+The SQL query stays the fallback: as long as the index is not loaded (startup failure, feature
+flag off), multi-venue items keep being resolved by the database.
+"""
+
+import asyncio
+import math
+import time
+from collections.abc import Iterable
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+import h3
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from core.geo import EARTH_RADIUS_METERS
+from core.geo import H3_SEARCH_RADIUS_IN_KM
+from core.geo import MAX_DISTANCE_METERS_FOR_OFFER_RETRIEVAL
+from models.offer import RecommendableOffers
+from models.venue import Venue
+from services.db import AsyncSessionFactory
+from services.h3 import get_h3_cells_covering_search_radius
+from services.logger import logger
+
+
+# Marks venues without H3 cell: never part of a candidate disk (0 is not a valid H3 index).
+MISSING_H3_CELL = 0
+
+
+@dataclass
+class InMemoryClosestOffer:
+    """
+    Closest offer of an item, with the attributes of RecommendableOffers read by the caller.
+    """
+
+    offer_id: str
+    item_id: str
+    venue_id: int
+    offer_creation_date: datetime | None
+    stock_beginning_date: datetime | None
+    venue_latitude: float | None
+    venue_longitude: float | None
+
+
+class ItemVenueIndex:
+    """
+    Offers of every item, one row per (item_id, offer_id, venue_id), grouped by item.
+
+    The rows of item `item_ids[i]` are `[item_offsets[i], item_offsets[i + 1])` in every
+    per-offer array. Venue coordinates are stored pre-converted to radians (with the sine and
+    cosine of the latitude) so that a lookup only evaluates the terms depending on the user.
+
+    Args:
+        offer_rows: (item_id, offer_id, venue_id, offer_creation_date, stock_beginning_date,
+            offer venue_latitude, offer venue_longitude, venue latitude, venue longitude,
+            venue H3 cell) rows, grouped by item_id.
+        resolution: H3 resolution of the venue cells, used to select the candidate venues.
+    """
+
+    def __init__(self, offer_rows: Iterable[Sequence[Any]], resolution: int) -> None:
+        self.resolution = resolution
+
+        self._item_ids: list[str] = []
+        self._item_positions: dict[str, int] = {}
+        item_offsets: list[int] = []
+
+        self._offer_ids: list[str] = []
+        self._offer_creation_dates: list[datetime | None] = []
+        self._stock_beginning_dates: list[datetime | None] = []
+        venue_ids: list[int] = []
+        offer_venue_latitudes: list[float] = []
+        offer_venue_longitudes: list[float] = []
+        venue_latitudes: list[float] = []
+        venue_longitudes: list[float] = []
+        venue_h3_cells: list[int] = []
+
+        for (
+            item_id,
+            offer_id,
+            venue_id,
+            offer_creation_date,
+            stock_beginning_date,
+            offer_venue_latitude,
+            offer_venue_longitude,
+            venue_latitude,
+            venue_longitude,
+            venue_h3_cell,
+        ) in offer_rows:
+            if not self._item_ids or item_id != self._item_ids[-1]:
+                if item_id in self._item_positions:
+                    raise ValueError(f"Offer rows must be grouped by item_id, {item_id} appears twice")
+                self._item_positions[item_id] = len(self._item_ids)
+                self._item_ids.append(item_id)
+                item_offsets.append(len(self._offer_ids))
+
+            self._offer_ids.append(offer_id)
+            self._offer_creation_dates.append(offer_creation_date)
+            self._stock_beginning_dates.append(stock_beginning_date)
+            venue_ids.append(venue_id)
+            offer_venue_latitudes.append(math.nan if offer_venue_latitude is None else offer_venue_latitude)
+            offer_venue_longitudes.append(math.nan if offer_venue_longitude is None else offer_venue_longitude)
+            venue_latitudes.append(math.nan if venue_latitude is None else venue_latitude)
+            venue_longitudes.append(math.nan if venue_longitude is None else venue_longitude)
+            venue_h3_cells.append(h3.str_to_int(venue_h3_cell) if venue_h3_cell else MISSING_H3_CELL)
+
+        item_offsets.append(len(self._offer_ids))
+
+        self._item_offsets = np.asarray(item_offsets, dtype=np.int64)
+        self._venue_ids = np.asarray(venue_ids, dtype=np.int64)
+        self._offer_venue_latitudes = np.asarray(offer_venue_latitudes, dtype=np.float64)
+        self._offer_venue_longitudes = np.asarray(offer_venue_longitudes, dtype=np.float64)
+
+        venue_latitudes_in_radians = np.radians(np.asarray(venue_latitudes, dtype=np.float64))
+        self._venue_latitude_sines = np.sin(venue_latitudes_in_radians)
+        self._venue_latitude_cosines = np.cos(venue_latitudes_in_radians)
+        self._venue_longitudes_in_radians = np.radians(np.asarray(venue_longitudes, dtype=np.float64))
+        self._venue_h3_cells = np.asarray(venue_h3_cells, dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return len(self._item_ids)
+
+    @property
+    def offer_count(self) -> int:
+        return len(self._offer_ids)
+
+    def _build_candidate_h3_cells(self, latitude: float, longitude: float) -> np.ndarray:
+        """
+        Returns the sorted H3 cells covering the search radius around the user, as in the SQL path.
+        """
+        user_h3_cell = h3.latlng_to_cell(latitude, longitude, self.resolution)
+        candidate_h3_cells = np.fromiter(
+            (
+                h3.str_to_int(h3_cell)
+                for h3_cell in get_h3_cells_covering_search_radius(
+                    user_h3_cell, search_radius_in_km=H3_SEARCH_RADIUS_IN_KM
+                )
+            ),
+            dtype=np.uint64,
+        )
+        candidate_h3_cells.sort()
+        return candidate_h3_cells
+
+    def find_closest_offers(
+        self, item_ids: Sequence[str], latitude: float, longitude: float
+    ) -> list[tuple[InMemoryClosestOffer, float]]:
+        """
+        Finds the closest offer of each item, among the offers located in the H3 cells covering
+        the search radius and closer than MAX_DISTANCE_METERS_FOR_OFFER_RETRIEVAL.
+
+        Args:
+            item_ids: IDs of the items to resolve. Unknown items are ignored.
+            latitude: User latitude in decimal degrees.
+            longitude: User longitude in decimal degrees.
+
+        Returns:
+            list[tuple[InMemoryClosestOffer, float]]: (closest offer, distance in meters) of each
+                item having an offer in range, in the order of `item_ids`.
+        """
+        item_positions = np.fromiter(
+            (self._item_positions[item_id] for item_id in item_ids if item_id in self._item_positions),
+            dtype=np.int64,
+        )
+        if item_positions.size == 0:
+            return []
+
+        # Row indices of all the offers of the requested items, with the item each row belongs to.
+        row_starts = self._item_offsets[item_positions]
+        row_counts = self._item_offsets[item_positions + 1] - row_starts
+        row_item_ranks = np.repeat(np.arange(item_positions.size), row_counts)
+        row_indices = row_starts[row_item_ranks] + (
+            np.arange(row_item_ranks.size) - np.repeat(np.cumsum(row_counts) - row_counts, row_counts)
+        )
+
+        # Same spherical law of cosines as core.geo.build_haversine_distance_expression.
+        user_latitude_in_radians = math.radians(latitude)
+        user_longitude_in_radians = math.radians(longitude)
+        distances = EARTH_RADIUS_METERS * np.arccos(
+            np.minimum(
+                1.0,
+                math.sin(user_latitude_in_radians) * self._venue_latitude_sines[row_indices]
+                + math.cos(user_latitude_in_radians)
+                * self._venue_latitude_cosines[row_indices]
+                * np.cos(self._venue_longitudes_in_radians[row_indices] - user_longitude_in_radians),
+            )
+        )
+
+        candidate_h3_cells = self._build_candidate_h3_cells(latitude, longitude)
+        venue_h3_cells = self._venue_h3_cells[row_indices]
+        candidate_cell_positions = np.minimum(
+            np.searchsorted(candidate_h3_cells, venue_h3_cells), candidate_h3_cells.size - 1
+        )
+        is_in_range = (candidate_h3_cells[candidate_cell_positions] == venue_h3_cells) & (
+            distances <= MAX_DISTANCE_METERS_FOR_OFFER_RETRIEVAL
+        )
+
+        row_indices, row_item_ranks, distances = (
+            row_indices[is_in_range],
+            row_item_ranks[is_in_range],
+            distances[is_in_range],
+        )
+
+        # Per-item argmin: sort by (item, distance), then keep the first row of each item.
+        sorted_positions = np.lexsort((distances, row_item_ranks))
+        sorted_item_ranks = row_item_ranks[sorted_positions]
+        is_first_of_item = np.ones(sorted_item_ranks.size, dtype=bool)
+        is_first_of_item[1:] = sorted_item_ranks[1:] != sorted_item_ranks[:-1]
+        closest_positions = sorted_positions[is_first_of_item]
+
+        return [
+            (self._build_closest_offer(self._item_ids[item_positions[item_rank]], row_index), distance)
+            for item_rank, row_index, distance in zip(
+                row_item_ranks[closest_positions].tolist(),
+                row_indices[closest_positions].tolist(),
+                distances[closest_positions].tolist(),
+                strict=True,
+            )
+        ]
+
+    def _build_closest_offer(self, item_id: str, row_index: int) -> InMemoryClosestOffer:
+        offer_venue_latitude = float(self._offer_venue_latitudes[row_index])
+        offer_venue_longitude = float(self._offer_venue_longitudes[row_index])
+        return InMemoryClosestOffer(
+            offer_id=self._offer_ids[row_index],
+            item_id=item_id,
+            venue_id=int(self._venue_ids[row_index]),
+            offer_creation_date=self._offer_creation_dates[row_index],
+            stock_beginning_date=self._stock_beginning_dates[row_index],
+            venue_latitude=None if math.isnan(offer_venue_latitude) else offer_venue_latitude,
+            venue_longitude=None if math.isnan(offer_venue_longitude) else offer_venue_longitude,
+        )
+
+
+async def fetch_item_offer_rows(db: AsyncSession, resolution: int) -> list[Sequence[Any]]:
+    """
+    Fetches one row per (item_id, offer_id, venue_id) with the venue coordinates and H3 cell,
+    grouped by item_id.
+
+    Offers with several rows per venue (e.g. one row per cinema screening) are deduplicated like
+    in core.geo.find_closest_offers_with_h3_index.
+
+    Args:
+        db (AsyncSession): The active asynchronous database session.
+        resolution (int): H3 resolution of the venue cells to fetch.
+
+    Returns:
+        list[Sequence[Any]]: The rows expected by ItemVenueIndex.
+    """
+    item_offers_query = (
+        select(
+            RecommendableOffers.item_id,
+            RecommendableOffers.offer_id,
+            RecommendableOffers.venue_id,
+            RecommendableOffers.offer_creation_date,
+            RecommendableOffers.stock_beginning_date,
+            RecommendableOffers.venue_latitude,
+            RecommendableOffers.venue_longitude,
+            Venue.latitude,
+            Venue.longitude,
+            getattr(Venue, f"h3_res{resolution}"),
+        )
+        .join(Venue, RecommendableOffers.venue_id == Venue.venue_id)
+        .distinct(RecommendableOffers.item_id, RecommendableOffers.offer_id, RecommendableOffers.venue_id)
+        .order_by(RecommendableOffers.item_id, RecommendableOffers.offer_id, RecommendableOffers.venue_id)
+    )
+
+    result = await db.execute(item_offers_query)
+    return list(result.all())
+
+
+async def build_item_venue_index(db: AsyncSession, resolution: int) -> ItemVenueIndex:
+    """
+    Loads the offers from the database and builds the in-memory index.
+
+    Converting hundreds of thousands of rows into arrays takes a few seconds of CPU, so it runs
+    in a worker thread to keep the event loop responsive during the nightly reload.
+
+    Args:
+        db (AsyncSession): The active asynchronous database session.
+        resolution (int): H3 resolution of the venue cells.
+
+    Returns:
+        ItemVenueIndex: The freshly built index.
+    """
+    item_offer_rows = await fetch_item_offer_rows(db, resolution)
+    return await asyncio.to_thread(ItemVenueIndex, item_offer_rows, resolution)
+
+
+class ItemVenueIndexService:
+    """
+    Holds the item venue index of the worker and reloads it after the nightly table refresh.
+
+    Reloads build a new index on the side and swap it in with a single assignment, so lookups
+    never observe a partially built index. A failed reload keeps the previous index (or, at
+    startup, leaves the SQL fallback in place).
+    """
+
+    def __init__(self) -> None:
+        self.index: ItemVenueIndex | None = None
+
+    async def reload(self) -> None:
+        """
+        (Re)builds the index from the database. Never raises: errors are logged.
+        """
+        loading_start_time = time.perf_counter()
+
+        try:
+            async with AsyncSessionFactory() as db:
+                new_index = await build_item_venue_index(db, settings.GEOSPATIAL_RETRIEVAL_H3_RESOLUTION)
+        except Exception as loading_error:
+            logger.error(
+                "📍 Item venue index loading failed, multi-venue items keep using the "
+                f"{'previous index' if self.index is not None else 'SQL fallback'}",
+                extra={"error_type": type(loading_error).__name__, "error_detail": str(loading_error)},
+            )
+            return
+
+        if len(new_index) == 0:
+            logger.warning("📍 Item venue index loading returned no offer, index not replaced")
+            return
+
+        self.index = new_index
+        logger.info(
+            "📍 Item venue index loaded",
+            extra={
+                "item_count": len(new_index),
+                "offer_count": new_index.offer_count,
+                "loading_duration_seconds": time.perf_counter() - loading_start_time,
+            },
+        )
+
+
+item_venue_index_service = ItemVenueIndexService()
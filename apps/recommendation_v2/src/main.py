@@ -1,3 +1,5 @@
+import asyncio
+import contextlib
 import logging
 import secrets
 import tomllib
@@ -22,6 +24,12 @@ from api.playlist_recommendation import router as playlist_router
 from api.similar_artists import router as similar_artists_router
 from api.similar_offer import router as similar_offer_router
 from config import settings
+from connectors.redis_api import RedisAPI
+from core.iris_index import iris_h3_cell_cache
+from core.iris_index import iris_spatial_index_service
+from core.local_ranking_model import local_ranking_model_service
+from core.venue_density import venue_density_map_service
+from core.venue_index import item_venue_index_service
 from middleware.gcp_trace import GCPTraceMiddleware
 from services.db import async_db_engine
 from services.logger import logger
@@ -112,15 +120,85 @@ def show_api_config() -> None:
         "VERTEX_RETRIEVAL_ENDPOINT_NAME": settings.VERTEX_RETRIEVAL_ENDPOINT_NAME,
         "VERTEX_RANKING_ENDPOINT_NAME": settings.VERTEX_RANKING_ENDPOINT_NAME,
         "VERTEX_PREDICTION_TIMEOUT": settings.VERTEX_PREDICTION_TIMEOUT,
+        "VERTEX_RANKING_BATCH_SIZE": settings.VERTEX_RANKING_BATCH_SIZE,
+        "LOCAL_RANKING_MODEL_ENABLED": settings.LOCAL_RANKING_MODEL_ENABLED,
         "ENABLE_TRACKING_LOGS": settings.ENABLE_TRACKING_LOGS,
+        # In-memory indexes
+        "IRIS_SPATIAL_INDEX_ENABLED": settings.IRIS_SPATIAL_INDEX_ENABLED,
+        "IRIS_H3_CELL_CACHE_ENABLED": settings.IRIS_H3_CELL_CACHE_ENABLED,
+        "IRIS_H3_CELL_CACHE_RESOLUTION": settings.IRIS_H3_CELL_CACHE_RESOLUTION,
+        "IN_MEMORY_VENUE_RESOLVER_ENABLED": settings.IN_MEMORY_VENUE_RESOLVER_ENABLED,
+        "GEOSPATIAL_RETRIEVAL_ADAPTIVE_H3_RESOLUTION_ENABLED": (
+            settings.GEOSPATIAL_RETRIEVAL_ADAPTIVE_H3_RESOLUTION_ENABLED
+        ),
+        # Diversification
+        "PLAYLIST_RECOMMENDATION_DIVERSIFICATION_STRATEGY": settings.PLAYLIST_RECOMMENDATION_DIVERSIFICATION_STRATEGY,
+        "SIMILAR_OFFER_DIVERSIFICATION_STRATEGY": settings.SIMILAR_OFFER_DIVERSIFICATION_STRATEGY,
     }
     logger.info("🔧 API Configuration", extra=config_info)
 
 
+async def load_in_memory_indexes() -> None:
+    """
+    Loads (or reloads) the in-process lookup structures built from the nightly tables.
+
+    Each loader is failsafe: on error it logs and keeps serving from its previous state
+    or from its SQL fallback.
+    """
+    if settings.IRIS_SPATIAL_INDEX_ENABLED:
+        await iris_spatial_index_service.reload()
+    if settings.IN_MEMORY_VENUE_RESOLVER_ENABLED:
+        await item_venue_index_service.reload()
+    if settings.GEOSPATIAL_RETRIEVAL_ADAPTIVE_H3_RESOLUTION_ENABLED:
+        await venue_density_map_service.reload()
+
+
+async def keep_in_memory_indexes_loaded() -> None:
+    """
+    Background task loading the in-process lookup structures, then reloading them once the database
+    has been repopulated, i.e. at REDIS_CACHE_RESET_HOUR (the time at which Redis entries expire too).
+
+    The first load does not delay startup: requests are served from the SQL fallbacks until it completes.
+    """
+    await load_in_memory_indexes()
+    while True:
+        await asyncio.sleep(max(1, RedisAPI.calculate_seconds_until_next_database_population_time()))
+        await load_in_memory_indexes()
+
+
+async def log_iris_h3_cell_cache_statistics_periodically() -> None:
+    """
+    Background task logging the hit / border / miss counters of the IRIS H3 cell cache,
+    used to tune IRIS_H3_CELL_CACHE_RESOLUTION.
+    """
+    while True:
+        await asyncio.sleep(settings.IRIS_H3_CELL_CACHE_STATS_LOG_INTERVAL_SECONDS)
+        logger.info("📊 IRIS H3 cell cache statistics", extra=iris_h3_cell_cache.get_statistics())
+
+
+async def log_h3_resolution_statistics_periodically() -> None:
+    """
+    Background task logging the H3 resolutions picked by the venue density map, and the share of
+    requests estimated within GEOSPATIAL_RETRIEVAL_MAX_SCANNED_VENUES.
+    """
+    while True:
+        await asyncio.sleep(settings.GEOSPATIAL_RETRIEVAL_H3_RESOLUTION_STATS_LOG_INTERVAL_SECONDS)
+        density_map = venue_density_map_service.density_map
+        if density_map is not None:
+            logger.info("📊 H3 resolution selection statistics", extra=density_map.get_statistics())
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await async_db_engine.dispose()
     await redis_cache_service.connect()
+    if settings.LOCAL_RANKING_MODEL_ENABLED:
+        await local_ranking_model_service.load()
+    background_tasks = [asyncio.create_task(keep_in_memory_indexes_loaded())]
+    if settings.IRIS_H3_CELL_CACHE_ENABLED:
+        background_tasks.append(asyncio.create_task(log_iris_h3_cell_cache_statistics_periodically()))
+    if settings.GEOSPATIAL_RETRIEVAL_ADAPTIVE_H3_RESOLUTION_ENABLED:
+        background_tasks.append(asyncio.create_task(log_h3_resolution_statistics_periodically()))
 
     swagger_url = f"http://127.0.0.1:{settings.FASTAPI_SERVER_PORT}/docs"
     show_api_config()
@@ -137,6 +215,11 @@ async def lifespan(app: FastAPI):
 
     yield
 
+    for background_task in background_tasks:
+        background_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await background_task
+
     await async_db_engine.dispose()
     await redis_cache_service.disconnect()
 
@@ -0,0 +1,31 @@
+import sqlalchemy.orm as sa_orm
+from sqlalchemy import Float
+from sqlalchemy import Integer
+from sqlalchemy import String
+
+from models.base import Base
+
+
+class ItemH3ClosestOffer(Base):
+    """
+    Nightly precomputed nearest offers of multi-venue items, per H3 cell of the user.
+
+    For each (item_id, user_h3_cell) pair, stores the offers closest to the center of the cell
+    (offer_rank 1 = closest). next_candidate_distance is the center distance of the first offer
+    that was not stored (NULL when every offer of the item around the cell is stored): it bounds
+    the distance of all the offers left out, so that the exact nearest offer can be proven at
+    request time (see core.geo.find_closest_offers_with_precomputed_table).
+
+    Built by apps/recommendation/db/scripts/create_item_h3_closest_offers_mv.sql.
+    """
+
+    __tablename__ = "item_h3_closest_offers_mv"
+
+    item_id: sa_orm.Mapped[str] = sa_orm.mapped_column(String(256), primary_key=True)
+    user_h3_cell: sa_orm.Mapped[str] = sa_orm.mapped_column(String, primary_key=True)
+    offer_rank: sa_orm.Mapped[int] = sa_orm.mapped_column(Integer, primary_key=True)
+
+    offer_id: sa_orm.Mapped[str] = sa_orm.mapped_column(String(256))
+    venue_id: sa_orm.Mapped[int] = sa_orm.mapped_column(Integer)
+    cell_center_distance: sa_orm.Mapped[float] = sa_orm.mapped_column(Float)
+    next_candidate_distance: sa_orm.Mapped[float | None] = sa_orm.mapped_column(Float, nullable=True)
@@ -1,8 +1,11 @@
 from dataclasses import dataclass
 from datetime import datetime
 
+from schemas.vertex_prediction_item import ItemOrigin
+from schemas.vertex_prediction_item import RecommendableItem
 
-@dataclass
+
+@dataclass(slots=True)
 class EnrichedRecommendableOffer:
     """
     Represents a fully resolved and enriched offer.
@@ -13,36 +16,81 @@ class EnrichedRecommendableOffer:
 
     Using this dedicated class prevents runtime mutation of SQLAlchemy models
     and provides clear, strictly-typed attributes for the rest of the pipeline.
+
+    ML, classification and popularity attributes are not copied: they are read
+    from the source Vertex item, which the offer references. Several offers of
+    the same item share it, and the class is slotted to keep instances small.
     """
 
     # --- Core Identifiers & DB Data ---
     offer_id: str
-    item_id: str
+    item: RecommendableItem
     offer_creation_date: datetime | None
     stock_beginning_date: datetime | None
 
     # --- Geographical Context ---
-    is_geolocated: bool | None
     venue_latitude: float | None
     venue_longitude: float | None
     offer_user_distance: float | None
 
-    # --- ML & Ranking Features ---
-    item_score: float | None
-    item_rank: int
-    item_origin: str
-    semantic_emb_mean: float | None
+    ranking_score: float = 0.0
 
-    # --- Item Metadata & Classification ---
-    stock_price: float
-    category: str
-    subcategory_id: str
-    search_group_name: str
+    # --- Core Identifiers (from the item) ---
+    @property
+    def item_id(self) -> str:
+        return self.item.item_id
 
-    # --- Popularity & Engagement Metrics ---
-    booking_number: int
-    booking_number_last_7_days: int
-    booking_number_last_14_days: int
-    booking_number_last_28_days: int
+    @property
+    def is_geolocated(self) -> bool | None:
+        return self.item.is_geolocated
 
-    ranking_score: float = 0.0
+    # --- ML & Ranking Features (from the item) ---
+    @property
+    def item_score(self) -> float | None:
+        return self.item.item_score
+
+    @property
+    def item_rank(self) -> int:
+        return self.item.item_rank
+
+    @property
+    def item_origin(self) -> ItemOrigin:
+        return self.item.item_origin
+
+    @property
+    def semantic_emb_mean(self) -> float | None:
+        return self.item.semantic_emb_mean
+
+    # --- Item Metadata & Classification (from the item) ---
+    @property
+    def stock_price(self) -> float:
+        return self.item.stock_price
+
+    @property
+    def category(self) -> str:
+        return self.item.category
+
+    @property
+    def subcategory_id(self) -> str:
+        return self.item.subcategory_id
+
+    @property
+    def search_group_name(self) -> str:
+        return self.item.search_group_name
+
+    # --- Popularity & Engagement Metrics (from the item) ---
+    @property
+    def booking_number(self) -> int:
+        return self.item.booking_number
+
+    @property
+    def booking_number_last_7_days(self) -> int:
+        return self.item.booking_number_last_7_days
+
+    @property
+    def booking_number_last_14_days(self) -> int:
+        return self.item.booking_number_last_14_days
+
+    @property
+    def booking_number_last_28_days(self) -> int:
+        return self.item.booking_number_last_28_days
@@ -10,6 +10,7 @@ from config import settings
 # --- 1. Database Engine Initialization ---
 # Create an asynchronous SQLAlchemy engine.
 # pool_pre_ping=True ensures connections are verified before being leased from the pool.
+# Each connection keeps its prepared statements (see DATABASE_PREPARED_STATEMENT_CACHE_SIZE).
 async_db_engine = create_async_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
@@ -17,7 +18,11 @@ async_db_engine = create_async_engine(
     max_overflow=15,
     echo=False,
     connect_args={
-        "server_settings": {"statement_timeout": str(settings.DATABASE_STATEMENT_TIMEOUT_MS)},
+        "prepared_statement_cache_size": settings.DATABASE_PREPARED_STATEMENT_CACHE_SIZE,
+        "server_settings": {
+            "statement_timeout": str(settings.DATABASE_STATEMENT_TIMEOUT_MS),
+            "plan_cache_mode": settings.DATABASE_PLAN_CACHE_MODE,
+        },
     },
 )
 
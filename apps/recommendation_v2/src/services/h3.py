@@ -1,7 +1,10 @@
+import functools
 import math
 
 import h3
 
+from config import settings
+
 
 def get_h3_index_from_coordinates(latitude: float | None, longitude: float | None, *, resolution) -> str | None:
     """
@@ -13,13 +16,15 @@ def get_h3_index_from_coordinates(latitude: float | None, longitude: float | Non
     return h3.latlng_to_cell(latitude, longitude, resolution)
 
 
+@functools.cache
 def calculate_h3_k_rings_to_cover_search_radius(search_radius_in_km: float, *, resolution) -> int:
     """
     Calculates the number of H3 k-rings required to completely cover a given search radius.
 
     In H3, grid distances are measured in "rings" around a central cell. To ensure that
     we retrieve all cells within a circular radius, we estimate the number of rings based
-    on the average size of a hexagon at the given resolution.
+    on the average size of a hexagon at the given resolution. The result only depends on
+    the arguments, so it is computed once per (radius, resolution).
 
     The constant 1.732 is an approximation of sqrt(3). In a regular hexagon, the distance
     between the centers of two adjacent hexagons is `edge_length * sqrt(3)`.
@@ -41,3 +46,37 @@ def calculate_h3_k_rings_to_cover_search_radius(search_radius_in_km: float, *, r
     required_number_of_rings = math.ceil(search_radius_in_km / distance_between_centers_in_km) + 1
 
     return required_number_of_rings
+
+
+@functools.lru_cache(maxsize=settings.H3_GRID_DISK_CACHE_MAX_ENTRIES)
+def get_h3_cells_covering_search_radius(h3_cell: str, *, search_radius_in_km: float) -> tuple[str, ...]:
+    """
+    Returns the H3 cells (filled disk) covering a search radius around a cell, at the cell resolution.
+
+    Users in the same cell share the same disk, so disks are kept in an LRU cache keyed on the
+    cell (which encodes its resolution). The tuple is shared between callers.
+
+    Args:
+        h3_cell (str): The H3 cell of the user.
+        search_radius_in_km (float): The maximum distance in kilometers to cover.
+
+    Returns:
+        tuple[str, ...]: The cells within calculate_h3_k_rings_to_cover_search_radius rings of `h3_cell`.
+    """
+    k_rings = calculate_h3_k_rings_to_cover_search_radius(
+        search_radius_in_km=search_radius_in_km, resolution=h3.get_resolution(h3_cell)
+    )
+    return tuple(h3.grid_disk(h3_cell, k_rings))
+
+
+def get_h3_cell_boundary_wkt(h3_cell: str) -> str:
+    """
+    Returns the hexagon of an H3 cell as a WKT polygon, in the (longitude latitude) order
+    expected by PostGIS.
+
+    H3 cell edges are geodesic arcs; drawing them as straight segments is accurate to well
+    below a millimetre at the fine resolutions this is used for.
+    """
+    cell_boundary = h3.cell_to_boundary(h3_cell)
+    closed_ring = [*cell_boundary, cell_boundary[0]]
+    return "POLYGON((" + ", ".join(f"{longitude} {latitude}" for latitude, longitude in closed_ring) + "))"
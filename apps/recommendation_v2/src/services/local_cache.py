@@ -0,0 +1,85 @@
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+
+class LocalLRUCache:
+    """
+    Bounded in-process cache with Least-Recently-Used eviction and per-entry expiry.
+
+    Unlike Redis, this cache lives in the memory of a single worker: lookups cost a
+    dictionary access instead of a network round-trip, but entries are not shared
+    across workers. It is meant for small, hot payloads that many requests share.
+
+    The event loop is single-threaded, so no locking is required as long as the
+    cache is only accessed from coroutines (never from a thread pool).
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        """
+        Initializes an empty cache.
+
+        Args:
+            max_entries: Maximum number of entries kept in memory. When full, the
+                least recently used entry is evicted.
+        """
+        self.max_entries = max_entries
+        self.hit_count = 0
+        self.miss_count = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_value(self, cache_key: Hashable) -> Any | None:
+        """
+        Returns the cached value for a key, or None if it is missing or expired.
+
+        Args:
+            cache_key: The unique identifier of the entry.
+
+        Returns:
+            Optional[Any]: The cached value, or None.
+        """
+        cached_entry = self._entries.get(cache_key)
+
+        if cached_entry is None:
+            self.miss_count += 1
+            return None
+
+        expiration_timestamp, cached_value = cached_entry
+        if time.monotonic() >= expiration_timestamp:
+            del self._entries[cache_key]
+            self.miss_count += 1
+            return None
+
+        self._entries.move_to_end(cache_key)
+        self.hit_count += 1
+        return cached_value
+
+    def set_value(self, cache_key: Hashable, value_to_cache: Any, time_to_live_in_seconds: float) -> None:
+        """
+        Stores a value, evicting the least recently used entry if the cache is full.
+
+        Args:
+            cache_key: The unique identifier of the entry.
+            value_to_cache: The value to store (stored by reference, callers must not mutate it).
+            time_to_live_in_seconds: Lifetime of the entry in seconds.
+        """
+        if self.max_entries <= 0 or time_to_live_in_seconds <= 0:
+            return
+
+        self._entries[cache_key] = (time.monotonic() + time_to_live_in_seconds, value_to_cache)
+        self._entries.move_to_end(cache_key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Drops every entry and resets the hit/miss counters.
+        """
+        self._entries.clear()
+        self.hit_count = 0
+        self.miss_count = 0
@@ -11,6 +11,18 @@ from config import settings
 from services.logger import logger
 
 
+# Deletes the lock only if it is still owned by the caller (it may have expired and been re-acquired).
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+# Member stored in every cached set: Redis deletes empty sets, so an empty result stays cacheable.
+_SET_PRESENCE_SENTINEL = ""
+
+
 class RedisCacheService:
     """
     Service responsible for managing interactions with the Redis cache database.
@@ -181,5 +193,111 @@ class RedisCacheService:
                 extra={"cache_key": cache_key, "error": str(redis_set_error), "traceback": traceback.format_exc()},
             )
 
+    async def acquire_lock(self, lock_key: str, lock_token: str, time_to_live_in_seconds: int) -> bool:
+        """
+        Tries to acquire a short-lived distributed lock (SET NX EX).
+
+        The lock fails open: if Redis is unavailable, the caller is told it owns the lock,
+        so a Redis outage never blocks request processing.
+
+        Args:
+            lock_key: The string identifier of the lock.
+            lock_token: A value unique to the caller, required to release the lock.
+            time_to_live_in_seconds: Expiry of the lock, in case its owner never releases it.
+
+        Returns:
+            bool: False only if another owner currently holds the lock.
+        """
+        if self.redis_client is None:
+            return True
+
+        try:
+            acquired = await self.redis_client.set(name=lock_key, value=lock_token, nx=True, ex=time_to_live_in_seconds)
+            return bool(acquired)
+
+        except Exception as redis_lock_error:
+            logger.warning(
+                "Failed to acquire Redis lock",
+                extra={"lock_key": lock_key, "error": str(redis_lock_error), "traceback": traceback.format_exc()},
+            )
+
+        return True
+
+    async def release_lock(self, lock_key: str, lock_token: str) -> None:
+        """
+        Releases a lock previously acquired with the same token.
+
+        Args:
+            lock_key: The string identifier of the lock.
+            lock_token: The value given when the lock was acquired.
+        """
+        if self.redis_client is None:
+            return
+
+        try:
+            release_result = self.redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, lock_token)
+            if inspect.isawaitable(release_result):  # pragma: no branch
+                await release_result
+
+        except Exception as redis_release_error:
+            logger.warning(
+                "Failed to release Redis lock",
+                extra={"lock_key": lock_key, "error": str(redis_release_error), "traceback": traceback.format_exc()},
+            )
+
+    async def get_set_members(self, cache_key: str) -> set[str] | None:
+        """
+        Retrieves the members of a set stored with replace_set_members.
+
+        Args:
+            cache_key: The unique string identifier.
+
+        Returns:
+            Optional[set[str]]: The members (possibly none) if the set is cached, otherwise None.
+        """
+        if self.redis_client is None:
+            return None
+
+        try:
+            cached_members = self.redis_client.smembers(name=cache_key)
+            if inspect.isawaitable(cached_members):  # pragma: no branch
+                cached_members = await cached_members
+
+            if isinstance(cached_members, set) and cached_members:
+                return {str(member) for member in cached_members if member != _SET_PRESENCE_SENTINEL}
+
+        except Exception as redis_get_error:
+            logger.warning(
+                "Failed to retrieve set members from Redis",
+                extra={"cache_key": cache_key, "error": str(redis_get_error), "traceback": traceback.format_exc()},
+            )
+
+        return None
+
+    async def replace_set_members(self, cache_key: str, members: set[str], time_to_live_in_seconds: int) -> None:
+        """
+        Atomically replaces a cached set (an empty set is cached too).
+
+        Args:
+            cache_key: The string identifier of the set.
+            members: The members to store.
+            time_to_live_in_seconds: Specific TTL in seconds for the cache key.
+        """
+        if self.redis_client is None:
+            return
+
+        try:
+            async with self.redis_client.pipeline(transaction=True) as pipeline:
+                pipeline.delete(cache_key)
+                pipeline.sadd(cache_key, _SET_PRESENCE_SENTINEL, *members)
+                pipeline.expire(cache_key, time_to_live_in_seconds)
+                await pipeline.execute()
+
+        except Exception as redis_set_error:
+            logger.warning(
+                "Failed to store set members in Redis",
+                extra={"cache_key": cache_key, "error": str(redis_set_error), "traceback": traceback.format_exc()},
+            )
+
 
 redis_cache_service = RedisCacheService()
@@ -0,0 +1,76 @@
+import asyncio
+from collections.abc import Awaitable
+from collections.abc import Callable
+from typing import Any
+
+
+class _LeaderCancelledError(Exception):
+    """Raised to followers when the leader call was cancelled (e.g. client disconnected)."""
+
+
+class SingleFlightService:
+    """
+    Coalesces identical concurrent calls inside a worker ("single-flight" pattern).
+
+    When several requests with the same key arrive while a call is already running,
+    only the first one (the leader) executes it. The others (the followers) await the
+    leader's outcome instead of running the same expensive work in parallel.
+
+    Example:
+        10 identical cache misses arrive within 200 ms
+        → 1 pipeline run (leader) + 9 followers sharing its result.
+
+    A leader that fails propagates its exception to its followers. A leader that is
+    cancelled does not: followers then retry the call themselves.
+    """
+
+    def __init__(self) -> None:
+        self._in_flight_calls: dict[str, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._in_flight_calls)
+
+    async def run(self, flight_key: str, run_call: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """
+        Runs the call once per key, sharing its result with concurrent callers.
+
+        Args:
+            flight_key: Identifies identical calls (e.g. the Redis cache key of the request).
+            run_call: Factory creating the coroutine to execute. Only the leader invokes it.
+
+        Returns:
+            tuple[Any, bool]: The call result, and True if it was produced by another caller
+                (the result object is then shared and must not be mutated in place).
+        """
+        while True:
+            in_flight_call = self._in_flight_calls.get(flight_key)
+            if in_flight_call is None:
+                break
+
+            try:
+                return await asyncio.shield(in_flight_call), True
+            except _LeaderCancelledError:
+                # The leader went away without a result: loop to elect a new leader.
+                continue
+
+        leader_future = asyncio.get_running_loop().create_future()
+        self._in_flight_calls[flight_key] = leader_future
+
+        try:
+            call_result = await run_call()
+        except asyncio.CancelledError:
+            leader_future.set_exception(_LeaderCancelledError())
+            leader_future.exception()  # Mark as retrieved: having no follower is not an error.
+            raise
+        except Exception as call_error:
+            leader_future.set_exception(call_error)
+            leader_future.exception()
+            raise
+        else:
+            leader_future.set_result(call_result)
+            return call_result, False
+        finally:
+            self._in_flight_calls.pop(flight_key, None)
+
+
+single_flight_service = SingleFlightService()
@@ -7,6 +7,7 @@ from google.api_core import exceptions as gcp_exceptions
 from google.api_core.client_options import ClientOptions
 from google.cloud import aiplatform_v1
 from google.protobuf import json_format
+from google.protobuf.struct_pb2 import ListValue
 from google.protobuf.struct_pb2 import Value
 
 from config import settings
@@ -76,12 +77,13 @@ class VertexService:
             raise error
 
     @log_execution_time
-    async def execute_grpc_prediction(self, feature_payloads: list[dict]) -> Any:
+    async def execute_grpc_prediction(self, feature_payloads: list[dict] | ListValue) -> Any:
         """
         Transforms native Python dicts to Protobuf and executes the gRPC call.
 
         Args:
-            feature_payloads (list[dict]): The flat dictionary instances to predict on.
+            feature_payloads (list[dict] | ListValue): The flat dictionary instances to predict on,
+                or the Protobuf instances already built by the caller (e.g. the ranking features).
 
         Returns:
             Any: The raw Protobuf response wrapper from the Vertex AI Prediction API.
@@ -91,7 +93,10 @@ class VertexService:
             endpoint_resource_path = await self._resolve_endpoint_resource_path(self.endpoint_name)
 
             # Convert standard Python dictionaries into Protobuf 'Value' objects required by gRPC
-            protobuf_instances = [json_format.ParseDict(payload, Value()) for payload in feature_payloads]
+            if isinstance(feature_payloads, ListValue):
+                protobuf_instances = feature_payloads.values
+            else:
+                protobuf_instances = [json_format.ParseDict(payload, Value()) for payload in feature_payloads]
 
             # The payload is only logged for retrieval endpoints (not ranking),
             # because the ranking payload is very large: up to 24 fields per offer,
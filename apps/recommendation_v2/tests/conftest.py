@@ -20,6 +20,9 @@ from testcontainers.redis import RedisContainer
 
 from config import settings
 from connectors.vertex_api import VertexAPI
+from core.iris_index import iris_h3_cell_cache
+from core.iris_index import iris_spatial_index_service
+from core.venue_index import item_venue_index_service
 from main import app
 from models.base import Base
 from services.db import get_database_session
@@ -206,6 +209,24 @@ def mock_vertex_ranking(mocker):
     return mock_rank_playlist, mock_rank_similar
 
 
+@pytest.fixture(autouse=True)
+def reset_in_memory_indexes() -> Generator[None]:
+    """
+    Start every test with the in-memory IRIS and item venue indexes unloaded and an empty
+    H3 cell cache.
+
+    They are worker-level singletons: without this reset, a polygon indexed (or a cell
+    classified, or an offer loaded) by one test would answer the lookups of the next ones.
+    """
+    iris_spatial_index_service.index = None
+    item_venue_index_service.index = None
+    iris_h3_cell_cache.clear()
+    yield
+    iris_spatial_index_service.index = None
+    item_venue_index_service.index = None
+    iris_h3_cell_cache.clear()
+
+
 # ---------------------------------------------------------------------------
 # PostgreSQL integration fixtures
 # ---------------------------------------------------------------------------
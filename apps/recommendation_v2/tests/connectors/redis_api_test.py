@@ -1,3 +1,4 @@
+import asyncio
 from datetime import UTC
 from datetime import datetime
 from datetime import time
@@ -228,6 +229,125 @@ async def test_store_calls_set_with_serialized_payload_and_ttl(mocker):
     assert kwargs["time_to_live_in_seconds"] > 0
 
 
+# ---------------------------------------------------------------------------
+# RedisAPI.run_pipeline_once
+# ---------------------------------------------------------------------------
+
+
+def _build_response(call_id: str) -> RecommendationResponse:
+    return RecommendationResponse(
+        playlist_recommended_offers=["offer-1"],
+        params=RecommendationMetadata(reco_origin="algo", model_origin="default", call_id=call_id),
+        from_cache=False,
+    )
+
+
+@pytest.mark.asyncio
+async def test_run_pipeline_once_coalesces_identical_concurrent_requests(mocker):
+    """Identical concurrent misses in the same worker run the pipeline once."""
+    mocker.patch.object(_settings, "SINGLE_FLIGHT_ENABLED", new=True)
+    mocker.patch.object(_settings, "REDIS_CACHE_ENABLED", new=False)
+    pipeline_call_count = 0
+
+    async def _run_pipeline():
+        nonlocal pipeline_call_count
+        pipeline_call_count += 1
+        await asyncio.sleep(0.01)
+        return _build_response(call_id="leader-call")
+
+    outcomes = await asyncio.gather(
+        *[
+            RedisAPI.run_pipeline_once(
+                namespace_prefix="playlist_recommendation",
+                request_signature_data={"user_id": "x"},
+                response_model_class=RecommendationResponse,
+                run_pipeline=_run_pipeline,
+            )
+            for _ in range(3)
+        ]
+    )
+
+    assert pipeline_call_count == 1
+    assert [is_shared for _, is_shared in outcomes] == [False, True, True]
+    assert {response.params.call_id for response, _ in outcomes} == {"leader-call"}
+
+
+@pytest.mark.asyncio
+async def test_run_pipeline_once_waits_for_other_worker_when_lock_is_taken(mocker):
+    """When another worker holds the Redis lock, its cached response is reused."""
+    mocker.patch.object(_settings, "REDIS_CACHE_ENABLED", new=True)
+    mocker.patch.object(_settings, "REDIS_SINGLE_FLIGHT_ENABLED", new=True)
+    mocker.patch.object(_settings, "REDIS_SINGLE_FLIGHT_POLL_INTERVAL_SECONDS", new=0)
+    mocker.patch(
+        "connectors.redis_api.redis_cache_service.acquire_lock", new_callable=mocker.AsyncMock, return_value=False
+    )
+    mocker.patch(
+        "connectors.redis_api.redis_cache_service.get_cached_value",
+        new_callable=mocker.AsyncMock,
+        side_effect=[None, _build_response(call_id="other-worker-call").model_dump(mode="json")],
+    )
+    mock_pipeline = mocker.AsyncMock()
+
+    response, is_shared = await RedisAPI.run_pipeline_once(
+        namespace_prefix="playlist_recommendation",
+        request_signature_data={"user_id": "x"},
+        response_model_class=RecommendationResponse,
+        run_pipeline=mock_pipeline,
+    )
+
+    assert is_shared is True
+    assert response.params.call_id == "other-worker-call"
+    mock_pipeline.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_run_pipeline_once_runs_pipeline_after_wait_timeout(mocker):
+    """If the lock owner never stores a response, the waiter runs the pipeline itself."""
+    mocker.patch.object(_settings, "REDIS_CACHE_ENABLED", new=True)
+    mocker.patch.object(_settings, "REDIS_SINGLE_FLIGHT_ENABLED", new=True)
+    mocker.patch.object(_settings, "REDIS_SINGLE_FLIGHT_WAIT_TIMEOUT_SECONDS", new=0.02)
+    mocker.patch.object(_settings, "REDIS_SINGLE_FLIGHT_POLL_INTERVAL_SECONDS", new=0.01)
+    mocker.patch(
+        "connectors.redis_api.redis_cache_service.acquire_lock", new_callable=mocker.AsyncMock, return_value=False
+    )
+    mocker.patch(
+        "connectors.redis_api.redis_cache_service.get_cached_value", new_callable=mocker.AsyncMock, return_value=None
+    )
+    mock_pipeline = mocker.AsyncMock(return_value=_build_response(call_id="local-call"))
+
+    response, is_shared = await RedisAPI.run_pipeline_once(
+        namespace_prefix="playlist_recommendation",
+        request_signature_data={"user_id": "x"},
+        response_model_class=RecommendationResponse,
+        run_pipeline=mock_pipeline,
+    )
+
+    assert is_shared is False
+    assert response.params.call_id == "local-call"
+    mock_pipeline.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_run_pipeline_once_releases_lock_after_running_pipeline(mocker):
+    mocker.patch.object(_settings, "REDIS_CACHE_ENABLED", new=True)
+    mocker.patch.object(_settings, "REDIS_SINGLE_FLIGHT_ENABLED", new=True)
+    mocker.patch(
+        "connectors.redis_api.redis_cache_service.acquire_lock", new_callable=mocker.AsyncMock, return_value=True
+    )
+    mock_release = mocker.patch("connectors.redis_api.redis_cache_service.release_lock", new_callable=mocker.AsyncMock)
+
+    _, is_shared = await RedisAPI.run_pipeline_once(
+        namespace_prefix="playlist_recommendation",
+        request_signature_data={"user_id": "x"},
+        response_model_class=RecommendationResponse,
+        run_pipeline=mocker.AsyncMock(return_value=_build_response(call_id="leader-call")),
+    )
+
+    assert is_shared is False
+    mock_release.assert_awaited_once()
+    assert mock_release.call_args.kwargs["lock_key"].endswith(":lock")
+
+
 # ---------------------------------------------------------------------------
 # Integration tests — require a live Redis container (redis_service fixture)
 # ---------------------------------------------------------------------------
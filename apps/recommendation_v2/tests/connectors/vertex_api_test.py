@@ -3,6 +3,8 @@ from unittest.mock import MagicMock
 import pytest
 from fastapi import HTTPException
 from fastapi import status
+from google.cloud import aiplatform_v1
+from google.protobuf import json_format
 
 from schemas.vertex_prediction_item import ItemOrigin
 
@@ -45,6 +47,15 @@ def _make_raw_retrieval_prediction(**overrides) -> dict:
     return {**base, **overrides}
 
 
+def _protobuf_response(predictions: list[dict], deployed_model_id: str = "model-v1") -> aiplatform_v1.PredictResponse:
+    """Real PredictResponse, as returned by the Vertex client (predictions are protobuf Structs)."""
+    raw_response = json_format.ParseDict(
+        {"predictions": predictions, "deployed_model_id": deployed_model_id},
+        aiplatform_v1.PredictResponse.pb(aiplatform_v1.PredictResponse()),
+    )
+    return aiplatform_v1.PredictResponse.wrap(raw_response)
+
+
 # ---------------------------------------------------------------------------
 # fetch_retrieval_predictions
 # ---------------------------------------------------------------------------
@@ -146,6 +157,75 @@ async def test_fetch_retrieval_returns_error_result_on_unexpected_exception(vert
     assert result.model_display_name == "test-endpoint"
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("strict_decoding", [False, True])
+async def test_fetch_retrieval_decodes_protobuf_response(vertex_api, mocker, strict_decoding):
+    """Raw protobuf decoding gives the same items as reading the predictions as mappings."""
+    mocker.patch("connectors.vertex_api.settings.VERTEX_RETRIEVAL_STRICT_DECODING", strict_decoding)
+    raw_predictions = [
+        _make_raw_retrieval_prediction(item_id="a", idx=0, is_geolocated=1),
+        _make_raw_retrieval_prediction(
+            item_id="b",
+            idx=1,
+            is_geolocated=0,
+            _distance=None,
+            gtl_id=None,
+            stock_beginning_date=None,
+            example_venue_latitude=None,
+            example_venue_longitude=None,
+        ),
+    ]
+    expected_response = _grpc_response(raw_predictions)
+    vertex_api.vertex_infrastructure_service.execute_grpc_prediction.return_value = expected_response
+    expected_result = await vertex_api.fetch_retrieval_predictions(feature_payloads=[{"model_type": "recommendation"}])
+
+    vertex_api.vertex_infrastructure_service.execute_grpc_prediction.return_value = _protobuf_response(raw_predictions)
+    result = await vertex_api.fetch_retrieval_predictions(feature_payloads=[{"model_type": "recommendation"}])
+
+    assert result.status == "success"
+    assert result.model_version == "model-v1"
+    assert result.predictions == expected_result.predictions
+    assert result.predictions[1].item_score is None
+    assert result.predictions[1].is_geolocated is False
+
+
+@pytest.mark.asyncio
+async def test_fetch_retrieval_decodes_missing_optional_protobuf_fields_as_none(vertex_api):
+    raw_prediction = _make_raw_retrieval_prediction()
+    del raw_prediction["cluster_id"], raw_prediction["semantic_emb_mean"]
+    vertex_api.vertex_infrastructure_service.execute_grpc_prediction.return_value = _protobuf_response([raw_prediction])
+
+    item = (await vertex_api.fetch_retrieval_predictions(feature_payloads=[{"model_type": "tops"}])).predictions[0]
+
+    assert item.item_cluster_id is None
+    assert item.semantic_emb_mean is None
+
+
+@pytest.mark.asyncio
+async def test_fetch_retrieval_returns_error_result_on_missing_required_protobuf_field(vertex_api):
+    raw_prediction = _make_raw_retrieval_prediction()
+    del raw_prediction["total_offers"]
+    vertex_api.vertex_infrastructure_service.execute_grpc_prediction.return_value = _protobuf_response([raw_prediction])
+
+    result = await vertex_api.fetch_retrieval_predictions(feature_payloads=[{"model_type": "recommendation"}])
+
+    assert result.status == "error"
+    assert result.predictions == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("invalid_field", [{"category": None}, {"idx": "first"}, {"item_id": 12.0}])
+async def test_fetch_retrieval_returns_error_result_on_protobuf_field_of_unexpected_kind(vertex_api, invalid_field):
+    """Values of another kind than expected are validated as sent, not read as the default of the expected kind."""
+    raw_prediction = _make_raw_retrieval_prediction(**invalid_field)
+    vertex_api.vertex_infrastructure_service.execute_grpc_prediction.return_value = _protobuf_response([raw_prediction])
+
+    result = await vertex_api.fetch_retrieval_predictions(feature_payloads=[{"model_type": "recommendation"}])
+
+    assert result.status == "error"
+    assert result.predictions == []
+
+
 # ---------------------------------------------------------------------------
 # fetch_ranking_predictions
 # ---------------------------------------------------------------------------
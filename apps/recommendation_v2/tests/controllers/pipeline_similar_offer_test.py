@@ -7,6 +7,7 @@ from schemas.playlist_recommendation import RecommendationMetadata
 from schemas.playlist_recommendation import RecommendationResponse
 from schemas.similar_offer import SimilarOfferModelChoices
 from schemas.similar_offer import SimilarOfferResponse
+from schemas.vertex_prediction_item import ItemOrigin
 
 from tests.factories.models import EnrichedUserFactory
 from tests.factories.models import NonRecommendableItemsFactory
@@ -26,25 +27,27 @@ def _make_enriched_offer(
 ) -> EnrichedRecommendableOffer:
     return EnrichedRecommendableOffer(
         offer_id=offer_id,
-        item_id=f"item-{offer_id}",
+        item=RecommendableItemFactory.build(
+            item_id=f"item-{offer_id}",
+            is_geolocated=False,
+            item_score=item_score,
+            item_rank=1,
+            item_origin=ItemOrigin.USER_BASED,
+            semantic_emb_mean=None,
+            stock_price=0.0,
+            category="LIVRES_PAPIER",
+            subcategory_id="LIVRE_PAPIER",
+            search_group_name=search_group_name,
+            booking_number=0,
+            booking_number_last_7_days=0,
+            booking_number_last_14_days=0,
+            booking_number_last_28_days=0,
+        ),
         offer_creation_date=None,
         stock_beginning_date=None,
-        is_geolocated=False,
         venue_latitude=None,
         venue_longitude=None,
         offer_user_distance=None,
-        item_score=item_score,
-        item_rank=1,
-        item_origin="default",
-        semantic_emb_mean=None,
-        stock_price=0.0,
-        category="LIVRES_PAPIER",
-        subcategory_id="LIVRE_PAPIER",
-        search_group_name=search_group_name,
-        booking_number=0,
-        booking_number_last_7_days=0,
-        booking_number_last_14_days=0,
-        booking_number_last_28_days=0,
     )
 
 
@@ -0,0 +1,253 @@
+import dataclasses
+import random
+
+import pytest
+
+from config import settings
+from core.diversification import MMR_CLUSTER_SIMILARITY_WEIGHT
+from core.diversification import MMR_EMBEDDING_SIMILARITY_WEIGHT
+from core.diversification import MMR_TOPIC_SIMILARITY_WEIGHT
+from core.diversification import PRIMARY_MIXING_FEATURE
+from core.diversification import MaximalMarginalRelevanceDiversification
+from core.diversification import RoundRobinDiversification
+from core.diversification import _group_offers_by_attribute
+from core.diversification import apply_offer_diversification
+from core.diversification import get_diversification_strategy
+
+from tests.factories.schemas import EnrichedRecommendableOfferFactory
+
+
+def _legacy_interleave_offer_groups_round_robin(offer_groups):
+    """Round-Robin as first written (list.pop(0) and list.remove), kept as the reference behaviour."""
+    interleaved_result = []
+    sorted_group_keys = sorted(
+        offer_groups.keys(),
+        key=lambda key: (len(offer_groups[key]), max(offer.item_score or 0 for offer in offer_groups[key])),
+        reverse=True,
+    )
+    active_buckets = [list(offer_groups[key]) for key in sorted_group_keys]
+    while active_buckets:
+        for bucket in list(active_buckets):
+            if not bucket:
+                active_buckets.remove(bucket)
+                continue
+            interleaved_result.append(bucket.pop(0))
+    return interleaved_result
+
+
+def _legacy_apply_offer_diversification(offers, sub_mixing_configuration):
+    primary_offer_groups = _group_offers_by_attribute(offers, PRIMARY_MIXING_FEATURE)
+    for category, sub_attribute in sub_mixing_configuration.items():
+        if category in primary_offer_groups:
+            sub_grouped_offers = _group_offers_by_attribute(primary_offer_groups[category], sub_attribute)
+            primary_offer_groups[category] = _legacy_interleave_offer_groups_round_robin(sub_grouped_offers)
+    return _legacy_interleave_offer_groups_round_robin(primary_offer_groups)
+
+
+def _build_random_offers(seed):
+    random_generator = random.Random(seed)
+    search_group_names = ["LIVRES", "CINEMA", "SPECTACLES", "MUSIQUE", ""][: random_generator.randint(1, 5)]
+    template_offer = EnrichedRecommendableOfferFactory.build()
+    return [
+        dataclasses.replace(
+            template_offer,
+            offer_id=f"offer-{offer_index}",
+            item=dataclasses.replace(
+                template_offer.item,
+                search_group_name=random_generator.choice(search_group_names),
+                gtl_id=random_generator.choice(["gtl-1", "gtl-2", "gtl-3", None]),
+                # Few distinct scores, so that groups of the same size also tie on their maximum score
+                item_score=random_generator.choice([None, 0.1, 0.5, 0.9]),
+            ),
+        )
+        for offer_index in range(random_generator.randint(1, 150))
+    ]
+
+
+# ---------------------------------------------------------------------------
+# apply_offer_diversification
+# ---------------------------------------------------------------------------
+
+
+def test_diversification_interleaves_groups_by_size_then_score():
+    offers = [
+        EnrichedRecommendableOfferFactory.build(offer_id="A1", search_group_name="A", item_score=0.1),
+        EnrichedRecommendableOfferFactory.build(offer_id="C1", search_group_name="C", item_score=0.9),
+        EnrichedRecommendableOfferFactory.build(offer_id="A2", search_group_name="A", item_score=0.1),
+        EnrichedRecommendableOfferFactory.build(offer_id="B1", search_group_name="B", item_score=0.2),
+        EnrichedRecommendableOfferFactory.build(offer_id="A3", search_group_name="A", item_score=0.1),
+        EnrichedRecommendableOfferFactory.build(offer_id="B2", search_group_name="B", item_score=0.2),
+    ]
+
+    result = apply_offer_diversification(offers, sub_mixing_configuration={})
+
+    assert [offer.offer_id for offer in result] == ["A1", "B1", "C1", "A2", "B2", "A3"]
+
+
+@pytest.mark.parametrize("seed", range(30))
+@pytest.mark.parametrize("limit", [None, 1, 20, 60])
+def test_diversification_matches_the_legacy_round_robin(seed, limit):
+    offers = _build_random_offers(seed)
+    sub_mixing_configuration = {"LIVRES": "gtl_id", "CINEMA": "gtl_id"}
+    expected_offer_ids = [
+        offer.offer_id for offer in _legacy_apply_offer_diversification(offers, sub_mixing_configuration)
+    ]
+
+    result = apply_offer_diversification(offers, sub_mixing_configuration, limit=limit)
+
+    assert [offer.offer_id for offer in result] == expected_offer_ids[:limit]
+
+
+# ---------------------------------------------------------------------------
+# MaximalMarginalRelevanceDiversification
+# ---------------------------------------------------------------------------
+
+
+def _build_offer(offer_id, ranking_score, item_cluster_id, item_topic_id, semantic_emb_mean=None):
+    return EnrichedRecommendableOfferFactory.build(
+        offer_id=offer_id,
+        ranking_score=ranking_score,
+        item_cluster_id=item_cluster_id,
+        item_topic_id=item_topic_id,
+        semantic_emb_mean=semantic_emb_mean,
+    )
+
+
+def test_mmr_picks_a_less_relevant_offer_over_a_near_duplicate():
+    offers = [
+        _build_offer("best", 1.0, "cluster-1", "topic-1"),
+        _build_offer("near-duplicate", 0.95, "cluster-1", "topic-1"),
+        _build_offer("other-cluster", 0.9, "cluster-2", "topic-2"),
+        _build_offer("least-relevant", 0.0, "cluster-3", "topic-3"),
+    ]
+
+    result = MaximalMarginalRelevanceDiversification(relevance_weight=0.5).diversify(offers)
+
+    assert [offer.offer_id for offer in result] == ["best", "other-cluster", "near-duplicate", "least-relevant"]
+
+
+def test_mmr_keeps_the_ranking_order_with_full_relevance_weight():
+    offers = [
+        _build_offer(f"offer-{offer_index}", 1.0 - offer_index / 10, "cluster-1", "topic-1", semantic_emb_mean=0.5)
+        for offer_index in range(10)
+    ]
+
+    result = MaximalMarginalRelevanceDiversification(relevance_weight=1.0).diversify(offers, limit=4)
+
+    assert [offer.offer_id for offer in result] == ["offer-0", "offer-1", "offer-2", "offer-3"]
+
+
+def test_mmr_handles_missing_labels_and_embeddings():
+    offers = [
+        _build_offer("no-features", 0.0, None, None),
+        _build_offer("embedded", 0.0, None, None, semantic_emb_mean=0.2),
+        _build_offer("clustered", 0.0, "cluster-1", None),
+    ]
+
+    result = MaximalMarginalRelevanceDiversification(relevance_weight=0.7).diversify(offers, limit=5)
+
+    # Equal ranking scores: the relevance falls back to the ranked position
+    assert [offer.offer_id for offer in result] == ["no-features", "embedded", "clustered"]
+
+
+def _reference_mmr(offers, relevance_weight, limit):
+    """Textbook greedy MMR, every pairwise similarity recomputed at each step."""
+    scores = [offer.ranking_score for offer in offers]
+    score_range = max(scores) - min(scores)
+    relevances = [
+        (score - min(scores)) / score_range if score_range > 0 else 1.0 - index / len(offers)
+        for index, score in enumerate(scores)
+    ]
+    embeddings = [offer.item.semantic_emb_mean for offer in offers if offer.item.semantic_emb_mean is not None]
+    embedding_range = (max(embeddings) - min(embeddings)) if embeddings else 0.0
+
+    def similarity(first_offer, second_offer):
+        first, second = first_offer.item, second_offer.item
+        value = 0.0
+        if first.item_cluster_id is not None and first.item_cluster_id == second.item_cluster_id:
+            value += MMR_CLUSTER_SIMILARITY_WEIGHT
+        if first.item_topic_id is not None and first.item_topic_id == second.item_topic_id:
+            value += MMR_TOPIC_SIMILARITY_WEIGHT
+        if first.semantic_emb_mean is not None and second.semantic_emb_mean is not None:
+            distance = abs(first.semantic_emb_mean - second.semantic_emb_mean) / embedding_range
+            value += MMR_EMBEDDING_SIMILARITY_WEIGHT * max(0.0, 1.0 - distance)
+        return value
+
+    selected_indices = []
+    remaining_indices = list(range(len(offers)))
+    while remaining_indices and len(selected_indices) < limit:
+        best_index = max(
+            remaining_indices,
+            key=lambda index: (
+                relevance_weight * relevances[index]
+                - (1 - relevance_weight)
+                * max((similarity(offers[index], offers[selected]) for selected in selected_indices), default=0.0),
+                -index,
+            ),
+        )
+        selected_indices.append(best_index)
+        remaining_indices.remove(best_index)
+    return [offers[index] for index in selected_indices]
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("limit", [1, 40, 100])
+def test_mmr_matches_the_reference_greedy(seed, limit):
+    random_generator = random.Random(seed)
+    offers = [
+        _build_offer(
+            f"offer-{offer_index}",
+            random_generator.random(),
+            random_generator.choice([None, *(f"cluster-{index}" for index in range(12))]),
+            random_generator.choice([None, *(f"topic-{index}" for index in range(5))]),
+            semantic_emb_mean=random_generator.choice([None, random_generator.gauss(0, 1)]),
+        )
+        for offer_index in range(200)
+    ]
+    expected_offer_ids = [offer.offer_id for offer in _reference_mmr(offers, 0.7, limit)]
+
+    result = MaximalMarginalRelevanceDiversification(relevance_weight=0.7).diversify(offers, limit=limit)
+
+    assert [offer.offer_id for offer in result] == expected_offer_ids
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("relevance_weight", [0.0, 0.7, 1.0])
+def test_mmr_matches_the_reference_greedy_on_tied_scores(seed, relevance_weight):
+    random_generator = random.Random(seed)
+    offers = [
+        _build_offer(
+            f"offer-{offer_index}",
+            random_generator.choice([0.1, 0.5, 0.9]),
+            random_generator.choice([None, "cluster-1", "cluster-2"]),
+            random_generator.choice([None, "topic-1"]),
+        )
+        for offer_index in range(80)
+    ]
+    expected_offer_ids = [offer.offer_id for offer in _reference_mmr(offers, relevance_weight, 50)]
+
+    result = MaximalMarginalRelevanceDiversification(relevance_weight=relevance_weight).diversify(offers, limit=50)
+
+    assert [offer.offer_id for offer in result] == expected_offer_ids
+
+
+@pytest.mark.parametrize("relevance_weight", [0.0, 0.7])
+@pytest.mark.parametrize("limit", [1, None])
+def test_mmr_picks_identical_offers_in_ranked_order(relevance_weight, limit):
+    offers = [_build_offer(f"offer-{offer_index}", 0.5, "cluster-1", "topic-1", 0.2) for offer_index in range(3)]
+
+    result = MaximalMarginalRelevanceDiversification(relevance_weight=relevance_weight).diversify(offers, limit=limit)
+
+    assert [offer.offer_id for offer in result] == ["offer-0", "offer-1", "offer-2"][:limit]
+
+
+def test_get_diversification_strategy_builds_the_configured_strategy(mocker):
+    mocker.patch.object(settings, "MMR_DIVERSIFICATION_RELEVANCE_WEIGHT", new=0.4)
+
+    mmr_strategy = get_diversification_strategy("mmr")
+
+    assert isinstance(mmr_strategy, MaximalMarginalRelevanceDiversification)
+    assert mmr_strategy.relevance_weight == 0.4  # noqa: PLR2004
+    assert isinstance(get_diversification_strategy("round_robin"), RoundRobinDiversification)
+    with pytest.raises(ValueError, match="random"):
+        get_diversification_strategy("random")
@@ -0,0 +1,161 @@
+"""
+Generates the LightGBM reference fixtures of tests/core/local_ranking_model_test.py.
+
+Trains two small boosters with LightGBM itself on synthetic ranking features, then writes, for each:
+- `<name>.txt`: the model saved with `booster.save_model`, as exported for LOCAL_RANKING_MODEL_PATH,
+- `<name>_predictions.json`: held-out instances (in the Vertex instance format, None for missing
+  values) with the scores returned by `booster.predict` on the same rows as a pandas DataFrame.
+
+The models cover what LocalRankingModel has to reproduce without pandas: a binary objective with NaN
+missing values and pandas category features with more than 32 categories, and a lambdarank objective
+trained with `zero_as_missing`. The instances include unseen and missing categories, and missing
+values on features that had none at training time.
+
+pandas is not a dependency of the API, so run it with it on the side:
+
+Usage:
+    uv run --with pandas python tests/core/fixtures/generate_lightgbm_reference_models.py
+"""
+
+import json
+import math
+from pathlib import Path
+
+import lightgbm
+import numpy as np
+import pandas as pd
+
+
+FIXTURES_DIRECTORY = Path(__file__).parent
+
+SUBCATEGORIES = [f"SUBCATEGORY_{subcategory_index:02d}" for subcategory_index in range(48)]
+CONTEXTS = ["recommendation", "similar_offer", "playlist"]
+NUMERICAL_FEATURES = [
+    "offer_item_score",
+    "offer_user_distance",
+    "offer_stock_price",
+    "offer_booking_number",
+    "hour_of_the_day",
+    "user_deposit_remaining_credit",
+]
+CATEGORICAL_FEATURES = ["offer_subcategory_id", "context"]
+
+TRAINING_ROW_COUNT = 4000
+REFERENCE_ROW_COUNT = 120
+RANKING_GROUP_SIZE = 20
+# Share of the offers without a venue, hence without a distance
+MISSING_DISTANCE_RATIO = 0.2
+
+
+def build_features(row_count: int, random_generator: np.random.Generator) -> pd.DataFrame:
+    features = pd.DataFrame(
+        {
+            "offer_item_score": random_generator.uniform(0, 1, row_count),
+            "offer_user_distance": random_generator.exponential(8000, row_count),
+            "offer_subcategory_id": random_generator.choice(SUBCATEGORIES, row_count),
+            "offer_stock_price": random_generator.choice([0.0, 5.0, 10.0, 15.0, 30.0, 80.0], row_count),
+            "offer_booking_number": random_generator.poisson(20, row_count).astype(float),
+            "hour_of_the_day": random_generator.integers(0, 24, row_count).astype(float),
+            "user_deposit_remaining_credit": random_generator.choice([0.0, 50.0, 150.0, 300.0], row_count),
+            "context": random_generator.choice(CONTEXTS, row_count),
+        }
+    )
+    features.loc[random_generator.uniform(0, 1, row_count) < MISSING_DISTANCE_RATIO, "offer_user_distance"] = np.nan
+    return features
+
+
+def build_labels(features: pd.DataFrame, random_generator: np.random.Generator) -> np.ndarray:
+    subcategory_effects = dict(zip(SUBCATEGORIES, random_generator.normal(0, 1, len(SUBCATEGORIES)), strict=True))
+    logits = (
+        3 * features["offer_item_score"]
+        - features["offer_user_distance"].fillna(30000) / 10000
+        + features["offer_subcategory_id"].map(subcategory_effects)
+        + np.where(features["offer_stock_price"] == 0, 1.0, 0.0)
+        + np.where(features["context"] == "playlist", 0.5, 0.0)
+        + random_generator.normal(0, 0.5, len(features))
+    )
+    return (logits > np.median(logits)).astype(int).to_numpy()
+
+
+def as_categories(features: pd.DataFrame) -> pd.DataFrame:
+    """Plain pandas categories: at prediction time, LightGBM maps them to the categories of the training set."""
+    return features.astype(dict.fromkeys(CATEGORICAL_FEATURES, "category"))
+
+
+def build_reference_features(random_generator: np.random.Generator) -> pd.DataFrame:
+    """Held-out rows, the first ones edited to hit the missing value and category edge cases."""
+    features = build_features(REFERENCE_ROW_COUNT, random_generator)
+    features.loc[0, "offer_subcategory_id"] = "UNKNOWN_SUBCATEGORY"
+    features.loc[1, "offer_subcategory_id"] = None
+    features.loc[2, "context"] = None
+    # No missing value at training time: LightGBM reads NaN as 0.0
+    features.loc[3, "offer_item_score"] = np.nan
+    features.loc[4, "hour_of_the_day"] = np.nan
+    features.loc[5, ["offer_stock_price", "user_deposit_remaining_credit"]] = 0.0
+    features.loc[6, "offer_user_distance"] = 0.0
+    features.loc[7, "offer_stock_price"] = -1.0
+    features.loc[8, "offer_subcategory_id"] = SUBCATEGORIES[-1]
+    return features
+
+
+def write_reference_model(
+    name: str, booster: lightgbm.Booster, reference_features: pd.DataFrame, feature_names: list[str]
+) -> None:
+    booster.save_model(FIXTURES_DIRECTORY / f"{name}.txt")
+    scores = booster.predict(as_categories(reference_features)[feature_names])
+
+    instances = [
+        {
+            feature_name: (None if isinstance(value, float) and math.isnan(value) else value)
+            for feature_name, value in row.items()
+        }
+        for row in reference_features[feature_names].astype(object).to_dict(orient="records")
+    ]
+    predictions = [
+        {"instance": instance, "score": float(score)} for instance, score in zip(instances, scores, strict=True)
+    ]
+    (FIXTURES_DIRECTORY / f"{name}_predictions.json").write_text(json.dumps(predictions, indent=1) + "\n")
+
+
+def main() -> None:
+    random_generator = np.random.default_rng(42)
+    feature_names = (
+        NUMERICAL_FEATURES[:2] + CATEGORICAL_FEATURES[:1] + NUMERICAL_FEATURES[2:] + CATEGORICAL_FEATURES[1:]
+    )
+
+    training_features = build_features(TRAINING_ROW_COUNT, random_generator)
+    labels = build_labels(training_features, random_generator)
+    reference_features = build_reference_features(random_generator)
+
+    common_parameters = {
+        "num_leaves": 15,
+        "learning_rate": 0.1,
+        "min_data_per_group": 10,
+        "cat_smooth": 1,
+        "max_cat_to_onehot": 4,
+        "seed": 42,
+        "deterministic": True,
+        "verbosity": -1,
+    }
+
+    binary_booster = lightgbm.train(
+        {"objective": "binary", **common_parameters},
+        lightgbm.Dataset(as_categories(training_features)[feature_names], label=labels),
+        num_boost_round=60,
+    )
+    write_reference_model("lightgbm_binary_model", binary_booster, reference_features, feature_names)
+
+    lambdarank_booster = lightgbm.train(
+        {"objective": "lambdarank", "zero_as_missing": True, **common_parameters},
+        lightgbm.Dataset(
+            as_categories(training_features)[feature_names],
+            label=labels,
+            group=[RANKING_GROUP_SIZE] * (TRAINING_ROW_COUNT // RANKING_GROUP_SIZE),
+        ),
+        num_boost_round=60,
+    )
+    write_reference_model("lightgbm_lambdarank_model", lambdarank_booster, reference_features, feature_names)
+
+
+if __name__ == "__main__":
+    main()
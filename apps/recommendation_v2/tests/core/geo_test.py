@@ -1,6 +1,20 @@
+import h3
+import numpy as np
 import pytest
+from sqlalchemy.dialects.postgresql import asyncpg as postgresql_asyncpg
 
+from config import settings
+from core.geo import PRECOMPUTED_CLOSEST_OFFERS_H3_RESOLUTION
+from core.geo import calculate_h3_cell_radius_in_meters
 from core.geo import calculate_haversine_distance_in_meters
+from core.geo import calculate_haversine_distances_in_meters
+from core.geo import find_closest_offers_with_h3_index
+from core.geo import find_closest_offers_with_precomputed_table
+from core.user_context import UserContext
+
+from tests.factories.models import ItemH3ClosestOfferFactory
+from tests.factories.models import RecommendableOffersFactory
+from tests.factories.models import VenueFactory
 
 
 # ---------------------------------------------------------------------------
@@ -27,3 +41,152 @@ def test_haversine_computes_correct_distance_for_known_coordinates():
     distance_precision_meters = 10
     assert distance is not None
     assert abs(distance - 343_560) <= distance_precision_meters
+
+
+# ---------------------------------------------------------------------------
+# calculate_h3_cell_radius_in_meters
+# ---------------------------------------------------------------------------
+
+
+def test_h3_cell_radius_bounds_the_distance_to_every_vertex():
+    h3_cell = h3.latlng_to_cell(48.8566, 2.3522, PRECOMPUTED_CLOSEST_OFFERS_H3_RESOLUTION)
+    center_lat, center_lon = h3.cell_to_latlng(h3_cell)
+
+    radius = calculate_h3_cell_radius_in_meters(h3_cell)
+
+    # Resolution 6 cells have edges of ~3.7 km
+    assert 3_000 < radius < 5_000  # noqa: PLR2004
+    for vertex_lat, vertex_lon in h3.cell_to_boundary(h3_cell):
+        assert calculate_haversine_distance_in_meters(center_lat, center_lon, vertex_lat, vertex_lon) < radius
+
+
+# ---------------------------------------------------------------------------
+# find_closest_offers_with_precomputed_table
+# ---------------------------------------------------------------------------
+
+_PARIS = (48.8566, 2.3522)
+_ORLY = (48.7262, 2.3652)  # ~15 km from Paris
+_VERSAILLES = (48.8044, 2.1204)  # ~17 km from Paris
+
+
+async def _create_precomputed_offer(
+    item_id: str, offer_id: str, location: tuple[float, float], offer_rank: int, next_candidate_distance: float | None
+) -> None:
+    h3_resolution = settings.GEOSPATIAL_RETRIEVAL_H3_RESOLUTION
+    venue = await VenueFactory.create_async(
+        latitude=location[0],
+        longitude=location[1],
+        **{f"h3_res{h3_resolution}": h3.latlng_to_cell(location[0], location[1], h3_resolution)},
+    )
+    await RecommendableOffersFactory.create_async(
+        unique_id=f"unique-{offer_id}",
+        offer_id=offer_id,
+        item_id=item_id,
+        venue_id=venue.venue_id,
+        venue_latitude=location[0],
+        venue_longitude=location[1],
+    )
+    user_h3_cell = h3.latlng_to_cell(_PARIS[0], _PARIS[1], PRECOMPUTED_CLOSEST_OFFERS_H3_RESOLUTION)
+    center_lat, center_lon = h3.cell_to_latlng(user_h3_cell)
+    await ItemH3ClosestOfferFactory.create_async(
+        item_id=item_id,
+        user_h3_cell=user_h3_cell,
+        offer_rank=offer_rank,
+        offer_id=offer_id,
+        venue_id=venue.venue_id,
+        cell_center_distance=calculate_haversine_distance_in_meters(center_lat, center_lon, *location),
+        next_candidate_distance=next_candidate_distance,
+    )
+
+
+@pytest.mark.asyncio
+async def test_precomputed_closest_offers_are_skipped_without_user_location(mocker):
+    db = mocker.AsyncMock()
+
+    result = await find_closest_offers_with_precomputed_table(db, ["item-1"], UserContext(user_id="u"))
+
+    assert result == ([], [])
+    db.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_precomputed_closest_offers_resolve_proven_items_and_return_the_others(db_session):
+    # Every offer of the item is stored: the closest one is proven.
+    await _create_precomputed_offer("item-complete", "offer-orly", _ORLY, 1, None)
+    await _create_precomputed_offer("item-complete", "offer-versailles", _VERSAILLES, 2, None)
+    # An offer left out may be 16 km away from the center of the cell: it could be closer than Orly.
+    await _create_precomputed_offer("item-truncated", "offer-orly-2", _ORLY, 1, 16_000.0)
+    # A far away offer left out: Orly stays the closest one.
+    await _create_precomputed_offer("item-bounded", "offer-orly-3", _ORLY, 1, 40_000.0)
+    user = UserContext(user_id="u", latitude=_PARIS[0], longitude=_PARIS[1])
+
+    resolved_rows, unresolved_item_ids = await find_closest_offers_with_precomputed_table(
+        db_session, ["item-complete", "item-truncated", "item-bounded", "item-missing"], user
+    )
+
+    assert sorted(offer.offer_id for offer, _ in resolved_rows) == ["offer-orly", "offer-orly-3"]
+    assert unresolved_item_ids == ["item-truncated", "item-missing"]
+
+    live_rows = await find_closest_offers_with_h3_index(
+        db_session, ["item-complete"], user, resolution=settings.GEOSPATIAL_RETRIEVAL_H3_RESOLUTION
+    )
+    assert [(offer.offer_id, distance) for offer, distance in resolved_rows if offer.item_id == "item-complete"] == [
+        (live_rows[0][0].offer_id, pytest.approx(live_rows[0][1]))
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Statement shape of the closest offer queries
+# ---------------------------------------------------------------------------
+
+
+async def _render_executed_statements(mocker, find_closest_offers, item_ids, location):
+    db = mocker.AsyncMock()
+    db.execute.return_value = mocker.Mock(all=mocker.Mock(return_value=[]))
+    user = UserContext(user_id="u", latitude=location[0], longitude=location[1])
+
+    await find_closest_offers(db, item_ids, user)
+
+    return [str(call.args[0].compile(dialect=postgresql_asyncpg.dialect())) for call in db.execute.call_args_list]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "find_closest_offers",
+    [
+        lambda db, item_ids, user: find_closest_offers_with_h3_index(db, item_ids, user, resolution=6),
+        find_closest_offers_with_precomputed_table,
+    ],
+    ids=["h3_index", "precomputed_table"],
+)
+async def test_closest_offer_queries_keep_the_same_text_for_any_request(mocker, find_closest_offers):
+    single_item_statements = await _render_executed_statements(mocker, find_closest_offers, ["item-1"], _PARIS)
+    many_items_statements = await _render_executed_statements(
+        mocker, find_closest_offers, [f"item-{index}" for index in range(50)], _ORLY
+    )
+
+    assert single_item_statements == many_items_statements
+    assert "= ANY ($" in single_item_statements[0]
+    assert " IN (" not in single_item_statements[0]
+
+
+# ---------------------------------------------------------------------------
+# calculate_haversine_distances_in_meters
+# ---------------------------------------------------------------------------
+
+
+def test_vectorized_haversine_matches_the_scalar_version():
+    offer_latitudes = np.array([51.5074, 43.2965, 48.8566, np.nan])
+    offer_longitudes = np.array([-0.1278, 5.3698, 2.3522, 2.3522])
+
+    distances = calculate_haversine_distances_in_meters(48.8566, 2.3522, offer_latitudes, offer_longitudes)
+
+    for distance, offer_lat, offer_lon in zip(distances[:3], offer_latitudes[:3], offer_longitudes[:3], strict=True):
+        assert distance == pytest.approx(calculate_haversine_distance_in_meters(48.8566, 2.3522, offer_lat, offer_lon))
+    assert np.isnan(distances[3])
+
+
+def test_vectorized_haversine_returns_nan_without_user_coordinates():
+    distances = calculate_haversine_distances_in_meters(None, 2.3522, np.array([48.8]), np.array([2.3]))
+
+    assert np.isnan(distances).all()
@@ -0,0 +1,258 @@
+import h3
+import pytest
+
+from config import settings
+from core.geo import find_iris_id_in_memory
+from core.geo import get_iris_id_from_coordinates
+from core.iris_index import IRIS_H3_BORDER_CELL
+from core.iris_index import IrisH3CellCache
+from core.iris_index import IrisSpatialIndex
+from core.iris_index import IrisSpatialIndexService
+from core.iris_index import build_iris_spatial_index
+from core.iris_index import iris_h3_cell_cache
+from core.iris_index import iris_spatial_index_service
+
+from tests.factories.models import IrisFranceFactory
+
+
+@pytest.fixture(autouse=True)
+def _iris_h3_cell_cache_enabled(mocker):
+    """Force the H3 cell cache on regardless of its default (off) or the local .env."""
+    mocker.patch.object(settings, "IRIS_H3_CELL_CACHE_ENABLED", new=True)
+
+
+# A square around Paris center: longitude 2.3 → 2.4, latitude 48.8 → 48.9.
+_PARIS_SQUARE = {
+    "type": "Polygon",
+    "coordinates": [[[2.3, 48.8], [2.4, 48.8], [2.4, 48.9], [2.3, 48.9], [2.3, 48.8]]],
+}
+
+# The same square with a hole in its middle (longitude 2.34 → 2.36, latitude 48.84 → 48.86).
+_PARIS_SQUARE_WITH_HOLE = {
+    "type": "Polygon",
+    "coordinates": [
+        [[2.3, 48.8], [2.4, 48.8], [2.4, 48.9], [2.3, 48.9], [2.3, 48.8]],
+        [[2.34, 48.84], [2.36, 48.84], [2.36, 48.86], [2.34, 48.86], [2.34, 48.84]],
+    ],
+}
+
+# An L-shaped (concave) zone: the top-right quarter of the 5.3 → 5.5 / 43.2 → 43.4 square is missing.
+_MARSEILLE_L_SHAPE = {
+    "type": "Polygon",
+    "coordinates": [[[5.3, 43.2], [5.5, 43.2], [5.5, 43.3], [5.4, 43.3], [5.4, 43.4], [5.3, 43.4]]],
+}
+
+# Two islands in Guadeloupe (negative longitudes), stored as a single IRIS.
+_GUADELOUPE_ISLANDS = {
+    "type": "MultiPolygon",
+    "coordinates": [
+        [[[-61.8, 16.0], [-61.6, 16.0], [-61.6, 16.2], [-61.8, 16.2], [-61.8, 16.0]]],
+        [[[-61.4, 16.3], [-61.2, 16.3], [-61.2, 16.5], [-61.4, 16.5], [-61.4, 16.3]]],
+    ],
+}
+
+
+# ---------------------------------------------------------------------------
+# IrisSpatialIndex
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize(
+    ("latitude", "longitude", "expected_iris_id"),
+    [
+        (48.85, 2.35, "paris"),
+        (48.81, 2.39, "paris"),
+        (48.95, 2.35, None),
+        (43.25, 5.35, "marseille"),
+        (43.35, 5.35, "marseille"),
+        (43.35, 5.45, None),  # In the notch of the L shape, but inside its bounding box
+        (16.1, -61.7, "guadeloupe"),
+        (16.4, -61.3, "guadeloupe"),
+        (16.25, -61.5, None),  # Between the two islands
+    ],
+)
+def test_iris_spatial_index_finds_the_containing_polygon(latitude, longitude, expected_iris_id):
+    index = IrisSpatialIndex(
+        [("paris", _PARIS_SQUARE), ("marseille", _MARSEILLE_L_SHAPE), ("guadeloupe", _GUADELOUPE_ISLANDS)]
+    )
+
+    assert index.find_iris_id(latitude, longitude) == expected_iris_id
+
+
+def test_iris_spatial_index_excludes_points_inside_holes():
+    index = IrisSpatialIndex([("paris", _PARIS_SQUARE_WITH_HOLE)])
+
+    assert index.find_iris_id(48.85, 2.35) is None
+    assert index.find_iris_id(48.82, 2.32) == "paris"
+
+
+def test_iris_spatial_index_builds_from_geojson_rows_and_skips_empty_geometries():
+    index = IrisSpatialIndex.from_geojson_rows(
+        [
+            ("paris", '{"type": "Polygon", "coordinates": [[[2.3, 48.8], [2.4, 48.8], [2.4, 48.9], [2.3, 48.9]]]}'),
+            ("no-shape", ""),
+        ]
+    )
+
+    assert len(index) == 1
+    assert index.find_iris_id(48.85, 2.35) == "paris"
+
+
+def test_iris_spatial_index_covers_h3_cells_only_when_no_border_crosses_them():
+    tiny_hole_center_latitude, tiny_hole_center_longitude = h3.cell_to_latlng(h3.latlng_to_cell(48.87, 2.37, 10))
+    square_with_tiny_hole = {
+        "type": "Polygon",
+        "coordinates": [
+            _PARIS_SQUARE["coordinates"][0],
+            [
+                [tiny_hole_center_longitude - 1e-5, tiny_hole_center_latitude - 1e-5],
+                [tiny_hole_center_longitude + 1e-5, tiny_hole_center_latitude - 1e-5],
+                [tiny_hole_center_longitude + 1e-5, tiny_hole_center_latitude + 1e-5],
+                [tiny_hole_center_longitude - 1e-5, tiny_hole_center_latitude - 1e-5],
+            ],
+        ],
+    }
+    index = IrisSpatialIndex([("paris", square_with_tiny_hole)])
+
+    assert index.covers_area("paris", h3.cell_to_boundary(h3.latlng_to_cell(48.85, 2.35, 10)))
+    # Crossed by the southern edge of the square
+    assert not index.covers_area("paris", h3.cell_to_boundary(h3.latlng_to_cell(48.8001, 2.35, 10)))
+    # Contains the tiny hole, although all its vertices are inside the polygon
+    assert not index.covers_area("paris", h3.cell_to_boundary(h3.latlng_to_cell(48.87, 2.37, 10)))
+    assert not index.covers_area("unknown", h3.cell_to_boundary(h3.latlng_to_cell(48.85, 2.35, 10)))
+
+
+# ---------------------------------------------------------------------------
+# IrisH3CellCache
+# ---------------------------------------------------------------------------
+
+
+def test_iris_h3_cell_cache_counts_hits_borders_and_misses():
+    cache = IrisH3CellCache(resolution=10, max_entries=10)
+
+    assert cache.get_cached_entry("interior-cell") is None
+    cache.store("interior-cell", "paris", is_cell_inside_iris=True)
+    cache.store("border-cell", "paris", is_cell_inside_iris=False)
+    cache.store("outside-cell", None, is_cell_inside_iris=False)
+
+    assert cache.get_cached_entry("interior-cell") == "paris"
+    assert cache.get_cached_entry("border-cell") == IRIS_H3_BORDER_CELL
+    assert cache.get_cached_entry("outside-cell") == IRIS_H3_BORDER_CELL
+    assert cache.get_statistics() == {
+        "h3_resolution": 10,
+        "cached_cell_count": 3,
+        "hit_count": 1,
+        "border_count": 2,
+        "miss_count": 1,
+        "hit_ratio": 0.25,
+    }
+
+
+def test_find_iris_id_in_memory_resolves_interior_cells_from_the_cache(mocker):
+    iris_spatial_index_service.index = IrisSpatialIndex([("paris", _PARIS_SQUARE)])
+    find_iris_id_spy = mocker.spy(iris_spatial_index_service.index, "find_iris_id")
+
+    first_lookup = find_iris_id_in_memory(48.85, 2.35)
+    second_lookup = find_iris_id_in_memory(48.85001, 2.35001)  # Same resolution-10 cell
+
+    assert first_lookup.iris_id == second_lookup.iris_id == "paris"
+    assert second_lookup.is_resolved
+    assert find_iris_id_spy.call_count == 1
+    assert iris_h3_cell_cache.hit_count == 1
+
+
+def test_find_iris_id_in_memory_runs_the_exact_test_in_border_cells():
+    iris_spatial_index_service.index = IrisSpatialIndex([("paris", _PARIS_SQUARE)])
+    border_cell_latitude, border_cell_longitude = h3.cell_to_latlng(h3.latlng_to_cell(48.8, 2.35, 10))
+
+    find_iris_id_in_memory(border_cell_latitude, border_cell_longitude)
+    inside_lookup = find_iris_id_in_memory(48.8 + 1e-6, border_cell_longitude)
+    outside_lookup = find_iris_id_in_memory(48.8 - 1e-6, border_cell_longitude)
+
+    assert inside_lookup.iris_id == "paris"
+    assert outside_lookup.iris_id is None
+    assert iris_h3_cell_cache.border_count == 2  # noqa: PLR2004
+
+
+def test_find_iris_id_in_memory_requests_cell_classification_without_index():
+    lookup = find_iris_id_in_memory(48.85, 2.35)
+
+    assert not lookup.is_resolved
+    assert lookup.h3_cell_to_classify == h3.latlng_to_cell(48.85, 2.35, iris_h3_cell_cache.resolution)
+
+
+# ---------------------------------------------------------------------------
+# IrisSpatialIndexService
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_iris_spatial_index_service_keeps_previous_index_when_reload_fails(mocker):
+    service = IrisSpatialIndexService()
+    previous_index = IrisSpatialIndex([("paris", _PARIS_SQUARE)])
+    service.index = previous_index
+    mocker.patch("core.iris_index.build_iris_spatial_index", side_effect=ConnectionError("database unreachable"))
+
+    await service.reload()
+
+    assert service.index is previous_index
+
+
+@pytest.mark.asyncio
+async def test_iris_spatial_index_service_swaps_in_the_new_index(mocker):
+    service = IrisSpatialIndexService()
+    new_index = IrisSpatialIndex([("paris", _PARIS_SQUARE)])
+    mocker.patch("core.iris_index.build_iris_spatial_index", return_value=new_index)
+
+    await service.reload()
+
+    assert service.index is new_index
+
+
+# ---------------------------------------------------------------------------
+# get_iris_id_from_coordinates
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_get_iris_id_from_coordinates_uses_loaded_index_without_querying(mocker):
+    iris_spatial_index_service.index = IrisSpatialIndex([("paris", _PARIS_SQUARE)])
+    db = mocker.AsyncMock()
+
+    iris_id = await get_iris_id_from_coordinates(db, 48.85, 2.35)
+
+    assert iris_id == "paris"
+    db.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_iris_spatial_index_matches_postgis(db_session):
+    await IrisFranceFactory.create_async(
+        id="iris-paris", shape="POLYGON((2.3 48.8, 2.4 48.8, 2.4 48.9, 2.3 48.9, 2.3 48.8))"
+    )
+    await IrisFranceFactory.create_async(
+        id="iris-marseille", shape="POLYGON((5.3 43.2, 5.5 43.2, 5.5 43.3, 5.4 43.3, 5.4 43.4, 5.3 43.4, 5.3 43.2))"
+    )
+    sampled_points = [(48.85, 2.35), (48.95, 2.35), (43.25, 5.35), (43.35, 5.45), (43.35, 5.35)]
+
+    postgis_iris_ids = [await get_iris_id_from_coordinates(db_session, lat, lon) for lat, lon in sampled_points]
+    index = await build_iris_spatial_index(db_session)
+
+    assert len(index) == 2  # noqa: PLR2004
+    assert [index.find_iris_id(lat, lon) for lat, lon in sampled_points] == postgis_iris_ids
+
+
+@pytest.mark.asyncio
+async def test_get_iris_id_from_coordinates_classifies_h3_cells_with_postgis(db_session, mocker):
+    await IrisFranceFactory.create_async(
+        id="iris-paris", shape="POLYGON((2.3 48.8, 2.4 48.8, 2.4 48.9, 2.3 48.9, 2.3 48.8))"
+    )
+
+    assert await get_iris_id_from_coordinates(db_session, 48.85, 2.35) == "iris-paris"
+    assert await get_iris_id_from_coordinates(db_session, 48.8001, 2.35) == "iris-paris"
+
+    # Interior cell: answered from the cache. Border cell: PostGIS is queried again.
+    db = mocker.AsyncMock()
+    assert await get_iris_id_from_coordinates(db, 48.85001, 2.35001) == "iris-paris"
+    db.execute.assert_not_called()
+    assert iris_h3_cell_cache.get_cached_entry(h3.latlng_to_cell(48.8001, 2.35, 10)) == IRIS_H3_BORDER_CELL
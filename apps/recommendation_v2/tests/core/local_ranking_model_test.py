@@ -0,0 +1,135 @@
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+import pytest
+from google.protobuf import json_format
+
+from config import settings
+from connectors.vertex_api import RankingPrediction
+from core.local_ranking_model import LocalRankingModel
+from core.local_ranking_model import local_ranking_model_service
+from core.ranking import build_vertex_ranking_instances
+from core.ranking import rank_and_sort_offers_with_vertex
+
+from tests.factories.schemas import EnrichedRecommendableOfferFactory
+from tests.factories.schemas import UserContextFactory
+
+
+# Models trained and saved with LightGBM, with the scores of `booster.predict` on held-out instances
+LIGHTGBM_REFERENCE_FIXTURES_DIRECTORY = Path(__file__).parent / "fixtures"
+
+
+@pytest.fixture
+def local_ranking_model(mocker):
+    model = LocalRankingModel.from_file(LIGHTGBM_REFERENCE_FIXTURES_DIRECTORY / "lightgbm_binary_model.txt")
+    mocker.patch.object(local_ranking_model_service, "model", new=model)
+    mocker.patch.object(settings, "LOCAL_RANKING_MODEL_ENABLED", new=True)
+    return local_ranking_model_service.model
+
+
+# ---------------------------------------------------------------------------
+# LocalRankingModel
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize("model_name", ["lightgbm_binary_model", "lightgbm_lambdarank_model"])
+def test_local_model_scores_match_lightgbm_predictions(model_name):
+    """Models saved and scored by LightGBM itself (see fixtures/generate_lightgbm_reference_models.py)."""
+    model = LocalRankingModel.from_file(LIGHTGBM_REFERENCE_FIXTURES_DIRECTORY / f"{model_name}.txt")
+    predictions = json.loads((LIGHTGBM_REFERENCE_FIXTURES_DIRECTORY / f"{model_name}_predictions.json").read_text())
+    feature_columns = {
+        feature_name: [prediction["instance"][feature_name] for prediction in predictions]
+        for feature_name in model.feature_names
+    }
+
+    scores = model.predict_columns(feature_columns, row_count=len(predictions))
+
+    assert scores.tolist() == pytest.approx([prediction["score"] for prediction in predictions], rel=1e-12, abs=1e-12)
+
+
+def test_local_model_broadcasts_scalar_request_features(local_ranking_model):
+    feature_matrix = local_ranking_model.build_feature_matrix(
+        {
+            "offer_item_score": np.array([0.1, 0.9]),
+            "offer_user_distance": None,
+            "offer_subcategory_id": ["SUBCATEGORY_02", None],
+            "offer_stock_price": 10.0,
+            "offer_booking_number": [3, 4],
+            "hour_of_the_day": 14,
+            "user_deposit_remaining_credit": 150.0,
+            "context": "playlist",
+        },
+        row_count=2,
+    )
+
+    np.testing.assert_array_equal(feature_matrix[:, 0], [0.1, 0.9])
+    assert np.isnan(feature_matrix[:, 1]).all()
+    assert feature_matrix[0, 2] == 2.0  # noqa: PLR2004
+    assert math.isnan(feature_matrix[1, 2])
+    np.testing.assert_array_equal(feature_matrix[:, 5], [14.0, 14.0])
+    # Categories are coded in the order of the training pandas categories
+    np.testing.assert_array_equal(feature_matrix[:, 7], [0.0, 0.0])
+
+
+def test_local_model_rejects_missing_feature(local_ranking_model):
+    with pytest.raises(ValueError, match="offer_subcategory_id"):
+        local_ranking_model.build_feature_matrix({"offer_item_score": 0.1, "offer_user_distance": 1.0}, row_count=1)
+
+
+def test_local_model_reads_the_ranking_instances_features(local_ranking_model):
+    """The columns built by core.ranking carry every feature the model was trained on."""
+    offers = [EnrichedRecommendableOfferFactory.build(subcategory_id="CINE") for _ in range(3)]
+    instances = json_format.MessageToDict(build_vertex_ranking_instances(offers, UserContextFactory.build()))
+
+    feature_columns = {
+        feature_name: [instance[feature_name] for instance in instances]
+        for feature_name in local_ranking_model.feature_names
+    }
+
+    assert local_ranking_model.predict_columns(feature_columns, row_count=3).shape == (3,)
+
+
+# ---------------------------------------------------------------------------
+# rank_and_sort_offers_with_vertex — local model
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("local_ranking_model")
+async def test_rank_scores_offers_with_local_model_without_calling_vertex(mocker):
+    fetch_ranking_predictions = mocker.patch(
+        "core.ranking.ranking_api_client.fetch_ranking_predictions", new_callable=mocker.AsyncMock
+    )
+    offers = [
+        EnrichedRecommendableOfferFactory.build(
+            offer_id="far", offer_user_distance=20000.0, item_score=0.2, subcategory_id="CINE"
+        ),
+        EnrichedRecommendableOfferFactory.build(
+            offer_id="close", offer_user_distance=10.0, item_score=0.2, subcategory_id="CINE"
+        ),
+    ]
+
+    result = await rank_and_sort_offers_with_vertex(offers, UserContextFactory.build())
+
+    assert [offer.offer_id for offer in result] == ["close", "far"]
+    assert result[0].ranking_score > result[1].ranking_score
+    fetch_ranking_predictions.assert_not_called()
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("local_ranking_model")
+async def test_rank_falls_back_to_vertex_when_local_model_fails(mocker):
+    mocker.patch.object(local_ranking_model_service, "score", side_effect=ValueError("Missing ranking feature"))
+    mocker.patch(
+        "core.ranking.ranking_api_client.fetch_ranking_predictions",
+        new_callable=mocker.AsyncMock,
+        return_value=[RankingPrediction(offer_id="offer-a", score=0.4)],
+    )
+
+    result = await rank_and_sort_offers_with_vertex(
+        [EnrichedRecommendableOfferFactory.build(offer_id="offer-a")], UserContextFactory.build()
+    )
+
+    assert result[0].ranking_score == 0.4  # noqa: PLR2004
@@ -2,9 +2,11 @@ from datetime import UTC
 from datetime import datetime
 
 import pytest
+from google.protobuf import json_format
 
+from config import settings
 from connectors.vertex_api import RankingPrediction
-from core.ranking import _build_vertex_ranking_features
+from core.ranking import build_vertex_ranking_instances
 from core.ranking import calculate_days_since
 from core.ranking import rank_and_sort_offers_with_vertex
 from core.user_context import UserContext
@@ -41,23 +43,30 @@ def test_calculate_days_since_handles_timezone_naive_date():
 
 
 # ---------------------------------------------------------------------------
-# _build_vertex_ranking_features
+# build_vertex_ranking_instances
 # ---------------------------------------------------------------------------
 
 
+def _build_ranking_features(offers, user, **kwargs) -> list[dict]:
+    """Decodes the protobuf instances sent to Vertex back into one dict per offer."""
+    return json_format.MessageToDict(build_vertex_ranking_instances(offers, user, **kwargs))
+
+
 def test_build_ranking_features_maps_offer_is_geolocated_to_float():
     """The ML model expects 1.0/0.0, not Python booleans."""
     offer_geo = EnrichedRecommendableOfferFactory.build(is_geolocated=True)
     offer_non_geo = EnrichedRecommendableOfferFactory.build(is_geolocated=False)
     user = UserContextFactory.build()
 
-    assert _build_vertex_ranking_features(offer_geo, user)["offer_is_geolocated"] == 1.0
-    assert _build_vertex_ranking_features(offer_non_geo, user)["offer_is_geolocated"] == 0.0
+    features_geo, features_non_geo = _build_ranking_features([offer_geo, offer_non_geo], user)
+
+    assert features_geo["offer_is_geolocated"] == 1.0
+    assert features_non_geo["offer_is_geolocated"] == 0.0
 
 
 def test_build_ranking_features_returns_none_for_user_iris_when_coordinates_absent():
     user = UserContext(user_id="u", latitude=None, longitude=None)
-    features = _build_vertex_ranking_features(EnrichedRecommendableOfferFactory.build(), user)
+    [features] = _build_ranking_features([EnrichedRecommendableOfferFactory.build()], user)
     assert features["user_iris_x"] is None
     assert features["user_iris_y"] is None
 
@@ -66,17 +75,57 @@ def test_build_ranking_features_returns_none_for_zero_coordinates():
     """Truthiness check means longitude=0.0 (Greenwich) and latitude=0.0 (equator) are both treated as absent."""
 
     user = UserContext(user_id="u", latitude=0.0, longitude=0.0)
-    features = _build_vertex_ranking_features(EnrichedRecommendableOfferFactory.build(), user)
+    [features] = _build_ranking_features([EnrichedRecommendableOfferFactory.build()], user)
     assert features["user_iris_x"] is None
     assert features["user_iris_y"] is None
 
 
 def test_build_ranking_features_context_field_combines_context_name_and_item_origin():
     offer = EnrichedRecommendableOfferFactory.build(item_origin="user_based")
-    features = _build_vertex_ranking_features(offer, UserContextFactory.build(), context_name="similar_offer")
+    [features] = _build_ranking_features([offer], UserContextFactory.build(), context_name="similar_offer")
     assert features["context"] == "similar_offer:user_based"
 
 
+def test_build_ranking_features_computes_temporal_features_from_request_time():
+    """Day, hour and elapsed days all derive from the single reference time of the request."""
+    now = datetime(2026, 3, 12, 15, 30, tzinfo=UTC)  # A Thursday
+    offers = [
+        EnrichedRecommendableOfferFactory.build(
+            offer_creation_date=datetime(2026, 3, 2, 15, 30, tzinfo=UTC), stock_beginning_date=None
+        ),
+        EnrichedRecommendableOfferFactory.build(
+            offer_creation_date=datetime(2026, 3, 2, 15, 31),  # noqa: DTZ001
+            stock_beginning_date=datetime(2026, 3, 20, tzinfo=UTC),
+        ),
+    ]
+
+    features = _build_ranking_features(offers, UserContextFactory.build(), now=now)
+
+    assert [feature["day_of_the_week"] for feature in features] == [3, 3]
+    assert [feature["hour_of_the_day"] for feature in features] == [15, 15]
+    assert [feature["offer_creation_days"] for feature in features] == [10, 9]
+    assert [feature["offer_stock_beginning_days"] for feature in features] == [None, -8]
+
+
+def test_build_ranking_features_keeps_every_offer_feature_in_offer_order():
+    user = UserContext(user_id="u", latitude=48.85, longitude=2.35, bookings_count=4)
+    offers = [
+        EnrichedRecommendableOfferFactory.build(offer_id="offer-a", offer_user_distance=None, item_score=None),
+        EnrichedRecommendableOfferFactory.build(offer_id="offer-b", offer_user_distance=1500.0, item_rank=7),
+    ]
+
+    features_a, features_b = _build_ranking_features(offers, user)
+
+    assert (features_a["offer_id"], features_b["offer_id"]) == ("offer-a", "offer-b")
+    assert features_a["offer_user_distance"] is None
+    assert features_a["offer_item_score"] == 0.0
+    assert features_b["offer_user_distance"] == 1500.0  # noqa: PLR2004
+    assert features_b["offer_item_rank"] == 7.0  # noqa: PLR2004
+    assert features_b["offer_subcategory_id"] == offers[1].subcategory_id
+    assert features_a["user_bookings_count"] == features_b["user_bookings_count"] == 4.0  # noqa: PLR2004
+    assert len(features_a) == len(features_b) == 24  # noqa: PLR2004
+
+
 # ---------------------------------------------------------------------------
 # rank_and_sort_offers_with_vertex
 # ---------------------------------------------------------------------------
@@ -150,3 +199,45 @@ async def test_rank_assigns_zero_score_to_offer_absent_from_predictions(mocker):
     assert result[0].offer_id == "offer-scored"
     assert result[-1].offer_id == "offer-unscored"
     assert result[-1].ranking_score == 0.0
+
+
+@pytest.mark.asyncio
+async def test_rank_sends_one_concurrent_call_per_batch(mocker):
+    mocker.patch.object(settings, "VERTEX_RANKING_BATCH_SIZE", new=2)
+    fetch_ranking_predictions = mocker.patch(
+        "core.ranking.ranking_api_client.fetch_ranking_predictions", new_callable=mocker.AsyncMock, return_value=[]
+    )
+    offers = [EnrichedRecommendableOfferFactory.build(offer_id=f"offer-{index}") for index in range(5)]
+
+    await rank_and_sort_offers_with_vertex(offers, UserContextFactory.build())
+
+    sent_offer_ids = [
+        [instance["offer_id"] for instance in json_format.MessageToDict(call.kwargs["feature_payloads"])]
+        for call in fetch_ranking_predictions.call_args_list
+    ]
+    assert sent_offer_ids == [["offer-0", "offer-1"], ["offer-2", "offer-3"], ["offer-4"]]
+
+
+@pytest.mark.asyncio
+async def test_rank_keeps_scores_of_other_batches_when_one_batch_fails(mocker):
+    """The offers of a failed batch fall back to item_rank ordering, after the offers scored by the other batches."""
+    mocker.patch.object(settings, "VERTEX_RANKING_BATCH_SIZE", new=2)
+    offers = [
+        EnrichedRecommendableOfferFactory.build(offer_id="offer-a", item_rank=4),
+        EnrichedRecommendableOfferFactory.build(offer_id="offer-b", item_rank=3),
+        EnrichedRecommendableOfferFactory.build(offer_id="offer-c", item_rank=2),
+        EnrichedRecommendableOfferFactory.build(offer_id="offer-d", item_rank=1),
+    ]
+    mocker.patch(
+        "core.ranking.ranking_api_client.fetch_ranking_predictions",
+        new_callable=mocker.AsyncMock,
+        side_effect=[
+            [RankingPrediction(offer_id="offer-a", score=0.2), RankingPrediction(offer_id="offer-b", score=0.7)],
+            [],
+        ],
+    )
+
+    result = await rank_and_sort_offers_with_vertex(offers, UserContextFactory.build())
+
+    assert [o.offer_id for o in result] == ["offer-b", "offer-a", "offer-d", "offer-c"]
+    assert [o.ranking_score for o in result[:2]] == [0.7, 0.2]
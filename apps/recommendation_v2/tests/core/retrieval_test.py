@@ -3,18 +3,28 @@ from datetime import datetime
 
 import pytest
 
+from config import settings
+from core.geo import calculate_haversine_distance_in_meters
 from core.retrieval import _build_playlist_recommendation_search_filters
 from core.retrieval import _build_similar_offer_search_filters
+from core.retrieval import build_all_playlist_recommendation_retrieval_payloads
 from core.retrieval import build_playlist_recommendation_retrieval_payload
 from core.retrieval import build_similar_offer_retrieval_payload
 from core.retrieval import fetch_all_playlist_recommendation_retrieval_predictions_from_vertex
+from core.retrieval import fetch_already_booked_item_ids
+from core.retrieval import fetch_item_ids_to_exclude_from_retrieval
+from core.retrieval import fetch_retrieval_predictions_with_tops_local_cache
 from core.retrieval import filter_out_already_booked_items
+from core.retrieval import non_recommendable_items_local_cache
+from core.retrieval import prune_candidate_items_per_group
 from core.retrieval import resolve_closest_venues_from_items
+from core.retrieval import tops_retrieval_local_cache
 from core.user_context import UserContext
 from schemas.categories import CategoryEnum
 from schemas.categories import SearchGroupNameEnum
 from schemas.categories import SubcategoryEnum
 from schemas.playlist_recommendation import PlaylistRequestParams
+from schemas.vertex_prediction_item import ItemOrigin
 
 from tests.factories.models import NonRecommendableItemsFactory
 from tests.factories.schemas import RecommendableItemFactory
@@ -211,6 +221,20 @@ def test_playlist_payload_warm_user_uses_recommendation_model():
     assert "re_rank" not in payload
 
 
+def test_playlist_payloads_exclude_booked_items_from_the_personalized_payload_only(mocker):
+    """Tops payloads are shared between users: the exclusion would make them uncacheable."""
+    mocker.patch.object(settings, "RETRIEVAL_BOOKED_ITEMS_EXCLUSION_MAX_ITEMS", new=2)
+    user = UserContext(user_id="u", is_authenticated=True, bookings_count=2)
+
+    payloads = build_all_playlist_recommendation_retrieval_payloads(
+        user, "call-1", PlaylistRequestParams(), excluded_item_ids={"item-3", "item-1", "item-2"}
+    )
+
+    personalized_payload, *tops_payloads = payloads
+    assert personalized_payload["params"]["$and"][-1] == {"item_id": {"$nin": ["item-1", "item-2"]}}
+    assert all("item_id" not in condition for payload in tops_payloads for condition in payload["params"]["$and"])
+
+
 # ---------------------------------------------------------------------------
 # build_similar_offer_retrieval_payload
 # ---------------------------------------------------------------------------
@@ -238,6 +262,38 @@ def test_similar_offer_payload_omits_params_when_no_filters_provided():
     assert "params" not in payload
 
 
+def test_similar_offer_payload_excludes_booked_items_unless_falling_back_to_tops():
+    similar_payload = build_similar_offer_retrieval_payload(
+        UserContextFactory.build(), "call-1", item_id="item-1", excluded_item_ids={"item-booked"}
+    )
+    tops_payload = build_similar_offer_retrieval_payload(
+        UserContextFactory.build(), "call-1", item_id=None, excluded_item_ids={"item-booked"}
+    )
+
+    assert similar_payload["params"] == {"$and": [{"item_id": {"$nin": ["item-booked"]}}]}
+    assert "params" not in tops_payload
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("is_enabled", "is_user_specific_retrieval", "expected_item_ids"),
+    [(True, True, {"item-booked"}), (True, False, None), (False, True, None)],
+)
+async def test_fetch_item_ids_to_exclude_from_retrieval(
+    mocker, is_enabled, is_user_specific_retrieval, expected_item_ids
+):
+    mocker.patch.object(settings, "RETRIEVAL_BOOKED_ITEMS_EXCLUSION_ENABLED", new=is_enabled)
+    mocker.patch(
+        "core.retrieval.fetch_already_booked_item_ids", new_callable=mocker.AsyncMock, return_value={"item-booked"}
+    )
+
+    result = await fetch_item_ids_to_exclude_from_retrieval(
+        None, "user-1", is_user_specific_retrieval=is_user_specific_retrieval
+    )
+
+    assert result == expected_item_ids
+
+
 # ---------------------------------------------------------------------------
 # filter_out_already_booked_items
 # ---------------------------------------------------------------------------
@@ -265,6 +321,115 @@ async def test_filter_booked_items_removes_booked_and_keeps_new(db_session):
     assert result[0].item_id == "item-new"
 
 
+@pytest.mark.asyncio
+async def test_filter_booked_items_uses_prefetched_ids_without_querying(mocker):
+    """Prefetched booked item IDs (fetched concurrently with Vertex) skip the database query."""
+    mock_db = mocker.AsyncMock()
+    candidates = [
+        RecommendableItemFactory.build(item_id="item-booked"),
+        RecommendableItemFactory.build(item_id="item-new"),
+    ]
+
+    result = await filter_out_already_booked_items(
+        mock_db, candidates, "user-1", already_booked_item_ids={"item-booked"}
+    )
+
+    assert [item.item_id for item in result] == ["item-new"]
+    mock_db.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_fetch_already_booked_item_ids_returns_only_the_user_items(db_session):
+    await NonRecommendableItemsFactory.create_async(user_id="user-1", item_id="item-booked")
+    await NonRecommendableItemsFactory.create_async(user_id="user-2", item_id="item-other-user")
+
+    result = await fetch_already_booked_item_ids(db_session, "user-1")
+
+    assert result == {"item-booked"}
+
+
+@pytest.fixture
+def non_recommendable_items_cache(mocker):
+    """Enables the cache with an empty local layer and a mocked Redis layer."""
+    mocker.patch.object(settings, "NON_RECOMMENDABLE_ITEMS_CACHE_ENABLED", new=True)
+    non_recommendable_items_local_cache.clear()
+    yield {
+        "query": mocker.patch(
+            "core.retrieval._query_already_booked_item_ids", new_callable=mocker.AsyncMock, return_value={"item-a"}
+        ),
+        "fetch": mocker.patch("core.retrieval.RedisAPI.fetch_cached_members", new_callable=mocker.AsyncMock),
+        "store": mocker.patch("core.retrieval.RedisAPI.store_members", new_callable=mocker.AsyncMock),
+    }
+    non_recommendable_items_local_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_fetch_already_booked_item_ids_queries_once_then_serves_the_local_cache(non_recommendable_items_cache):
+    non_recommendable_items_cache["fetch"].return_value = None
+
+    first_result = await fetch_already_booked_item_ids(None, "user-1")
+    second_result = await fetch_already_booked_item_ids(None, "user-1")
+
+    assert first_result == second_result == {"item-a"}
+    non_recommendable_items_cache["query"].assert_awaited_once()
+    non_recommendable_items_cache["fetch"].assert_awaited_once()
+    non_recommendable_items_cache["store"].assert_awaited_once_with(
+        cache_key="non_recommendable_items:user-1", members={"item-a"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_fetch_already_booked_item_ids_skips_the_database_on_a_redis_hit(non_recommendable_items_cache):
+    non_recommendable_items_cache["fetch"].return_value = {"item-redis"}
+
+    result = await fetch_already_booked_item_ids(None, "user-1")
+
+    assert result == {"item-redis"}
+    non_recommendable_items_cache["query"].assert_not_awaited()
+    non_recommendable_items_cache["store"].assert_not_awaited()
+
+
+# ---------------------------------------------------------------------------
+# prune_candidate_items_per_group
+# ---------------------------------------------------------------------------
+
+
+def test_prune_keeps_best_ranked_items_of_each_source_and_search_group_in_original_order():
+    def item(item_id, item_origin, search_group_name, item_rank, item_score=None):
+        return RecommendableItemFactory.build(
+            item_id=item_id,
+            item_origin=item_origin,
+            search_group_name=search_group_name,
+            item_rank=item_rank,
+            item_score=item_score,
+        )
+
+    candidate_items = [
+        item("cinema-3", ItemOrigin.USER_BASED, "CINEMA", item_rank=3),
+        item("cinema-1", ItemOrigin.USER_BASED, "CINEMA", item_rank=1),
+        item("livre-tied-low", ItemOrigin.USER_BASED, "LIVRES", item_rank=2, item_score=0.1),
+        item("cinema-2", ItemOrigin.USER_BASED, "CINEMA", item_rank=2),
+        item("tops-cinema-9", ItemOrigin.TOPS, "CINEMA", item_rank=9),
+        item("livre-tied-high", ItemOrigin.USER_BASED, "LIVRES", item_rank=2, item_score=0.9),
+        item("livre-1", ItemOrigin.USER_BASED, "LIVRES", item_rank=1),
+    ]
+
+    result = prune_candidate_items_per_group(candidate_items, max_items_per_group=2)
+
+    assert [kept.item_id for kept in result] == [
+        "cinema-1",
+        "cinema-2",
+        "tops-cinema-9",
+        "livre-tied-high",
+        "livre-1",
+    ]
+
+
+def test_prune_keeps_every_item_of_groups_smaller_than_k():
+    candidate_items = RecommendableItemFactory.batch(size=3, search_group_name="CINEMA")
+    assert prune_candidate_items_per_group(candidate_items, max_items_per_group=30) == candidate_items
+
+
 # ---------------------------------------------------------------------------
 # resolve_closest_venues_from_items
 # ---------------------------------------------------------------------------
@@ -338,6 +503,52 @@ async def test_resolve_skips_item_beyond_100km(db_session):
     assert result == []
 
 
+@pytest.mark.asyncio
+async def test_resolve_computes_fast_track_distances_in_one_batch(mocker):
+    """Fast-track items are resolved without the database, with the same distances as the scalar haversine."""
+    user = UserContext(user_id="u", latitude=_PARIS[0], longitude=_PARIS[1])
+    digital_item = RecommendableItemFactory.build(item_id="item-digital", is_geolocated=False, total_offers=10)
+    close_item = RecommendableItemFactory.build(
+        item_id="item-versailles",
+        is_geolocated=True,
+        total_offers=1,
+        example_venue_latitude=_VERSAILLES[0],
+        example_venue_longitude=_VERSAILLES[1],
+    )
+    far_item = RecommendableItemFactory.build(
+        item_id="item-london",
+        is_geolocated=True,
+        total_offers=1,
+        example_venue_latitude=_LONDON[0],
+        example_venue_longitude=_LONDON[1],
+    )
+    db = mocker.AsyncMock()
+
+    result = await resolve_closest_venues_from_items(db, [digital_item, close_item, far_item], user)
+
+    distances_by_item_id = {offer.item_id: offer.offer_user_distance for offer in result}
+    assert distances_by_item_id.keys() == {"item-digital", "item-versailles"}
+    assert distances_by_item_id["item-digital"] is None
+    assert distances_by_item_id["item-versailles"] == pytest.approx(
+        calculate_haversine_distance_in_meters(_PARIS[0], _PARIS[1], _VERSAILLES[0], _VERSAILLES[1])
+    )
+    db.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_resolve_enriched_offers_reference_their_item(mocker):
+    """Item attributes are read from the Vertex item, not copied onto the offer."""
+    user = UserContext(user_id="u", latitude=_PARIS[0], longitude=_PARIS[1])
+    item = RecommendableItemFactory.build(item_id="item-digital", is_geolocated=False, total_offers=10, item_rank=4)
+
+    [offer] = await resolve_closest_venues_from_items(mocker.AsyncMock(), [item], user)
+
+    assert offer.item is item
+    assert (offer.item_id, offer.item_rank, offer.category) == (item.item_id, 4, item.category)
+    assert not hasattr(offer, "__dict__")
+    assert not hasattr(item, "__dict__")
+
+
 @pytest.mark.asyncio
 async def test_resolve_drops_multi_venue_item_when_user_has_no_gps(db_session):
     """
@@ -439,3 +650,97 @@ async def test_fetch_all_predictions_deduplicates_items_across_endpoints(mocker)
     assert result_item_ids == ["item-A", "item-B", "item-C", "item-D", "item-E"], (
         "First-occurrence order must be preserved across endpoints."
     )
+
+
+# ---------------------------------------------------------------------------
+# fetch_retrieval_predictions_with_tops_local_cache
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def empty_tops_retrieval_local_cache():
+    tops_retrieval_local_cache.clear()
+    yield tops_retrieval_local_cache
+    tops_retrieval_local_cache.clear()
+
+
+def _build_tops_payload(user_id: str, call_id: str) -> dict:
+    return {
+        "call_id": call_id,
+        "user_id": user_id,
+        "params": {"$and": [{"stock_price": {"$lte": 150.0}}]},
+        "model_type": "tops",
+        "vector_column_name": "booking_number_desc",
+    }
+
+
+def _build_successful_tops_result():
+    return VertexPredictionResultFactory.build(status="success", predictions=RecommendableItemFactory.batch(3))
+
+
+@pytest.mark.asyncio
+async def test_tops_local_cache_serves_same_filters_for_different_users(mocker, empty_tops_retrieval_local_cache):
+    """Two tops payloads differing only by call_id and user_id trigger a single Vertex call."""
+    vertex_result = _build_successful_tops_result()
+    mock_fetch = mocker.patch(
+        "core.retrieval.fetch_retrieval_predictions_from_vertex",
+        new_callable=mocker.AsyncMock,
+        return_value=vertex_result,
+    )
+
+    first_result = await fetch_retrieval_predictions_with_tops_local_cache(_build_tops_payload("user-1", "call-1"))
+    second_result = await fetch_retrieval_predictions_with_tops_local_cache(_build_tops_payload("user-2", "call-2"))
+
+    assert first_result is vertex_result
+    assert second_result is vertex_result
+    mock_fetch.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_tops_local_cache_misses_when_filters_differ(mocker, empty_tops_retrieval_local_cache):
+    """A different price ceiling must not be served from another payload's cache entry."""
+    mock_fetch = mocker.patch(
+        "core.retrieval.fetch_retrieval_predictions_from_vertex",
+        new_callable=mocker.AsyncMock,
+        return_value=_build_successful_tops_result(),
+    )
+    other_filters_payload = _build_tops_payload("user-1", "call-2")
+    other_filters_payload["params"] = {"$and": [{"stock_price": {"$lte": 20.0}}]}
+
+    await fetch_retrieval_predictions_with_tops_local_cache(_build_tops_payload("user-1", "call-1"))
+    await fetch_retrieval_predictions_with_tops_local_cache(other_filters_payload)
+
+    assert mock_fetch.await_count == 2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_tops_local_cache_does_not_store_failed_responses(mocker, empty_tops_retrieval_local_cache):
+    """An error response from Vertex is never cached, so the next request retries the endpoint."""
+    mock_fetch = mocker.patch(
+        "core.retrieval.fetch_retrieval_predictions_from_vertex",
+        new_callable=mocker.AsyncMock,
+        return_value=VertexPredictionResultFactory.build(status="error", predictions=[]),
+    )
+
+    await fetch_retrieval_predictions_with_tops_local_cache(_build_tops_payload("user-1", "call-1"))
+    await fetch_retrieval_predictions_with_tops_local_cache(_build_tops_payload("user-1", "call-2"))
+
+    assert mock_fetch.await_count == 2  # noqa: PLR2004
+    assert len(empty_tops_retrieval_local_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_tops_local_cache_is_bypassed_for_personalized_payloads(mocker, empty_tops_retrieval_local_cache):
+    """Personalized payloads depend on the user embedding and must always reach Vertex."""
+    mock_fetch = mocker.patch(
+        "core.retrieval.fetch_retrieval_predictions_from_vertex",
+        new_callable=mocker.AsyncMock,
+        return_value=_build_successful_tops_result(),
+    )
+    personalized_payload = {**_build_tops_payload("user-1", "call-1"), "model_type": "recommendation"}
+
+    await fetch_retrieval_predictions_with_tops_local_cache(personalized_payload)
+    await fetch_retrieval_predictions_with_tops_local_cache(personalized_payload)
+
+    assert mock_fetch.await_count == 2  # noqa: PLR2004
+    assert len(empty_tops_retrieval_local_cache) == 0
@@ -0,0 +1,91 @@
+import pytest
+
+from core.iris_index import IrisSpatialIndex
+from core.iris_index import iris_h3_cell_cache
+from core.iris_index import iris_spatial_index_service
+from core.user_context import fetch_user_record_and_iris_id
+
+from tests.factories.models import EnrichedUserFactory
+from tests.factories.models import IrisFranceFactory
+
+
+# A square IRIS zone around Paris center: longitude 2.3 → 2.4, latitude 48.8 → 48.9.
+_PARIS_IRIS_SHAPE = "POLYGON((2.3 48.8, 2.4 48.8, 2.4 48.9, 2.3 48.9, 2.3 48.8))"
+
+
+# ---------------------------------------------------------------------------
+# fetch_user_record_and_iris_id
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_fetch_user_record_and_iris_id_returns_both_in_one_query(db_session):
+    user = await EnrichedUserFactory.create_warm()
+    await IrisFranceFactory.create_async(id="iris-paris", shape=_PARIS_IRIS_SHAPE)
+
+    database_user_record, iris_id = await fetch_user_record_and_iris_id(db_session, user.user_id, 48.85, 2.35)
+
+    assert database_user_record is not None
+    assert database_user_record.user_id == user.user_id
+    assert iris_id == "iris-paris"
+
+
+@pytest.mark.asyncio
+async def test_fetch_user_record_and_iris_id_resolves_iris_for_unknown_user(db_session):
+    await IrisFranceFactory.create_async(id="iris-paris", shape=_PARIS_IRIS_SHAPE)
+
+    database_user_record, iris_id = await fetch_user_record_and_iris_id(db_session, "unknown-user", 48.85, 2.35)
+
+    assert database_user_record is None
+    assert iris_id == "iris-paris"
+
+
+@pytest.mark.asyncio
+async def test_fetch_user_record_and_iris_id_returns_no_iris_outside_known_zones(db_session):
+    user = await EnrichedUserFactory.create_warm()
+    await IrisFranceFactory.create_async(id="iris-paris", shape=_PARIS_IRIS_SHAPE)
+
+    database_user_record, iris_id = await fetch_user_record_and_iris_id(db_session, user.user_id, 43.3, 5.4)
+
+    assert database_user_record is not None
+    assert iris_id is None
+
+
+@pytest.mark.asyncio
+async def test_fetch_user_record_and_iris_id_skips_iris_lookup_without_coordinates(db_session):
+    user = await EnrichedUserFactory.create_warm()
+
+    database_user_record, iris_id = await fetch_user_record_and_iris_id(db_session, user.user_id, None, None)
+
+    assert database_user_record is not None
+    assert iris_id is None
+
+
+@pytest.mark.asyncio
+async def test_fetch_user_record_and_iris_id_resolves_iris_in_memory_when_index_is_loaded(mocker):
+    paris_square = {
+        "type": "Polygon",
+        "coordinates": [[[2.3, 48.8], [2.4, 48.8], [2.4, 48.9], [2.3, 48.9], [2.3, 48.8]]],
+    }
+    mocker.patch.object(iris_spatial_index_service, "index", IrisSpatialIndex([("iris-paris", paris_square)]))
+    db = mocker.AsyncMock()
+    db.get.return_value = None
+
+    database_user_record, iris_id = await fetch_user_record_and_iris_id(db, "unknown-user", 48.85, 2.35)
+
+    assert database_user_record is None
+    assert iris_id == "iris-paris"
+    db.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_fetch_user_record_and_iris_id_caches_interior_h3_cells(db_session):
+    user = await EnrichedUserFactory.create_warm()
+    await IrisFranceFactory.create_async(id="iris-paris", shape=_PARIS_IRIS_SHAPE)
+
+    await fetch_user_record_and_iris_id(db_session, user.user_id, 48.85, 2.35)
+    database_user_record, iris_id = await fetch_user_record_and_iris_id(db_session, user.user_id, 48.85001, 2.35001)
+
+    assert database_user_record is not None
+    assert iris_id == "iris-paris"
+    assert iris_h3_cell_cache.hit_count == 1
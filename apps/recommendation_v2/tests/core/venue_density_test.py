@@ -0,0 +1,103 @@
+import h3
+import pytest
+
+from config import settings
+from core.retrieval import find_closest_offers_of_multi_venue_items
+from core.user_context import UserContext
+from core.venue_density import VENUE_DENSITY_COUNT_H3_RESOLUTION
+from core.venue_density import VENUE_DENSITY_MAP_H3_RESOLUTION
+from core.venue_density import VenueDensityMap
+from core.venue_density import VenueDensityMapService
+
+
+_PARIS = (48.8566, 2.3522)
+# ~71 km from the center of the coarse cell of Paris: within the reach of a resolution 5 disk of its
+# users (~78 km, coarse cell radius included), out of the reach of a resolution 6 disk (~68 km)
+_BEAUVAIS = (49.4295, 2.0807)
+_MARSEILLE = (43.2965, 5.3698)  # ~660 km from Paris
+_BREST = (48.3904, -4.4861)  # ~500 km from Paris, ~600 km from Marseille
+
+
+def _venue_cell(location):
+    return h3.latlng_to_cell(location[0], location[1], VENUE_DENSITY_COUNT_H3_RESOLUTION)
+
+
+def _build_density_map(max_scanned_venues=1000, max_bound_cells=settings.GEOSPATIAL_RETRIEVAL_MAX_BOUND_H3_CELLS):
+    return VenueDensityMap(
+        {_venue_cell(_PARIS): 800, _venue_cell(_BEAUVAIS): 5000, _venue_cell(_MARSEILLE): 300},
+        max_scanned_venues=max_scanned_venues,
+        resolutions=settings.VALID_H3_RESOLUTIONS,
+        max_bound_cells=max_bound_cells,
+    )
+
+
+# ---------------------------------------------------------------------------
+# VenueDensityMap
+# ---------------------------------------------------------------------------
+
+
+def test_density_map_picks_finer_resolutions_in_dense_areas_only():
+    density_map = _build_density_map()
+
+    # Resolution 5 also scans the venues of Beauvais, resolution 6 stays within the target
+    assert density_map.select_resolution(*_PARIS) == 6  # noqa: PLR2004
+    assert density_map.select_resolution(*_MARSEILLE) == VENUE_DENSITY_MAP_H3_RESOLUTION
+    # No venue within reach
+    assert density_map.select_resolution(*_BREST) == VENUE_DENSITY_MAP_H3_RESOLUTION
+
+
+def test_density_map_keeps_the_coarsest_resolution_within_the_target():
+    density_map = _build_density_map(max_scanned_venues=10_000)
+
+    assert density_map.select_resolution(*_PARIS) == VENUE_DENSITY_MAP_H3_RESOLUTION
+
+
+def test_density_map_never_picks_a_resolution_binding_more_cells_than_the_budget():
+    # The 5000 venues of Beauvais are scanned at any resolution: the finest one within budget is kept
+    assert _build_density_map().select_resolution(*_BEAUVAIS) == 6  # noqa: PLR2004
+    # Resolution 6 binds 271 cells: only the coarsest resolution is left
+    density_map = _build_density_map(max_bound_cells=100)
+
+    assert density_map.resolutions == [VENUE_DENSITY_MAP_H3_RESOLUTION]
+    assert density_map.select_resolution(*_PARIS) == VENUE_DENSITY_MAP_H3_RESOLUTION
+
+
+def test_density_map_counts_selections_within_and_above_the_target():
+    density_map = _build_density_map()
+
+    for location in (_PARIS, _MARSEILLE, _BREST, _BEAUVAIS):
+        density_map.select_resolution(*location)
+
+    statistics = density_map.get_statistics()
+    assert statistics["selection_count"] == 4  # noqa: PLR2004
+    assert statistics["resolution_5_count"] == 2  # noqa: PLR2004
+    assert statistics["resolution_6_count"] == 2  # noqa: PLR2004
+    assert statistics["above_target_count"] == 1
+    assert statistics["within_target_ratio"] == pytest.approx(0.75)
+
+
+# ---------------------------------------------------------------------------
+# VenueDensityMapService
+# ---------------------------------------------------------------------------
+
+
+def test_density_map_service_falls_back_to_the_global_resolution():
+    service = VenueDensityMapService()
+
+    assert service.select_resolution(*_PARIS) == settings.GEOSPATIAL_RETRIEVAL_H3_RESOLUTION
+
+    service.density_map = _build_density_map()
+
+    assert service.select_resolution(*_PARIS) == 6  # noqa: PLR2004
+    assert service.select_resolution(None, None) == settings.GEOSPATIAL_RETRIEVAL_H3_RESOLUTION
+
+
+@pytest.mark.asyncio
+async def test_multi_venue_items_are_resolved_at_the_resolution_of_the_density_map(mocker):
+    mocker.patch("core.retrieval.venue_density_map_service.density_map", new=_build_density_map())
+    find_closest_offers = mocker.patch("core.retrieval.find_closest_offers_with_h3_index", return_value=[])
+    user = UserContext(user_id="u", latitude=_PARIS[0], longitude=_PARIS[1])
+
+    await find_closest_offers_of_multi_venue_items(mocker.AsyncMock(), ["item-1"], user)
+
+    assert find_closest_offers.call_args.kwargs["resolution"] == 6  # noqa: PLR2004
@@ -0,0 +1,174 @@
+import random
+from datetime import UTC
+from datetime import datetime
+
+import h3
+import pytest
+
+from config import settings
+from core.geo import find_closest_offers_with_h3_index
+from core.retrieval import resolve_closest_venues_from_items
+from core.user_context import UserContext
+from core.venue_index import ItemVenueIndex
+from core.venue_index import ItemVenueIndexService
+from core.venue_index import build_item_venue_index
+from core.venue_index import item_venue_index_service
+
+from tests.factories.models import RecommendableOffersFactory
+from tests.factories.models import VenueFactory
+from tests.factories.schemas import RecommendableItemFactory
+
+
+_RESOLUTION = settings.GEOSPATIAL_RETRIEVAL_H3_RESOLUTION
+
+_PARIS = (48.8566, 2.3522)
+_ORLY = (48.7262, 2.3652)  # ~15 km from Paris
+_VERSAILLES = (48.8044, 2.1204)  # ~17 km from Paris
+_MARSEILLE = (43.2965, 5.3698)  # ~660 km from Paris
+
+
+def _build_offer_row(item_id: str, offer_id: str, location: tuple[float, float], *, venue_h3_cell: str | None = ""):
+    if venue_h3_cell == "":
+        venue_h3_cell = h3.latlng_to_cell(location[0], location[1], _RESOLUTION)
+    return (
+        item_id,
+        offer_id,
+        1,
+        datetime(2026, 1, 1, tzinfo=UTC),
+        None,
+        location[0],
+        location[1],
+        location[0],
+        location[1],
+        venue_h3_cell,
+    )
+
+
+# ---------------------------------------------------------------------------
+# ItemVenueIndex
+# ---------------------------------------------------------------------------
+
+
+def test_item_venue_index_finds_the_closest_offer_of_each_item():
+    index = ItemVenueIndex(
+        [
+            _build_offer_row("item-cinema", "offer-versailles", _VERSAILLES),
+            _build_offer_row("item-cinema", "offer-orly", _ORLY),
+            _build_offer_row("item-cinema", "offer-marseille", _MARSEILLE),
+            _build_offer_row("item-book", "offer-book-versailles", _VERSAILLES),
+            _build_offer_row("item-book", "offer-book-marseille", _MARSEILLE),
+        ],
+        _RESOLUTION,
+    )
+
+    closest_offers = index.find_closest_offers(["item-book", "item-cinema", "item-unknown"], *_PARIS)
+
+    assert len(index) == 2  # noqa: PLR2004
+    assert [(offer.item_id, offer.offer_id) for offer, _ in closest_offers] == [
+        ("item-book", "offer-book-versailles"),
+        ("item-cinema", "offer-orly"),
+    ]
+    assert closest_offers[1][1] == pytest.approx(14_520, abs=100)
+
+
+def test_item_venue_index_skips_offers_out_of_range_or_without_h3_cell():
+    index = ItemVenueIndex(
+        [
+            _build_offer_row("item-far", "offer-marseille", _MARSEILLE),
+            _build_offer_row("item-far", "offer-marseille-2", _MARSEILLE),
+            _build_offer_row("item-unmapped", "offer-orly", _ORLY, venue_h3_cell=None),
+        ],
+        _RESOLUTION,
+    )
+
+    assert index.find_closest_offers(["item-far", "item-unmapped"], *_PARIS) == []
+
+
+def test_item_venue_index_rejects_rows_not_grouped_by_item():
+    with pytest.raises(ValueError, match="grouped by item_id"):
+        ItemVenueIndex(
+            [
+                _build_offer_row("item-a", "offer-1", _ORLY),
+                _build_offer_row("item-b", "offer-2", _ORLY),
+                _build_offer_row("item-a", "offer-3", _ORLY),
+            ],
+            _RESOLUTION,
+        )
+
+
+# ---------------------------------------------------------------------------
+# ItemVenueIndexService
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_item_venue_index_service_keeps_previous_index_when_reload_fails(mocker):
+    service = ItemVenueIndexService()
+    previous_index = ItemVenueIndex([_build_offer_row("item-cinema", "offer-orly", _ORLY)], _RESOLUTION)
+    service.index = previous_index
+    mocker.patch("core.venue_index.build_item_venue_index", side_effect=ConnectionError("database unreachable"))
+
+    await service.reload()
+
+    assert service.index is previous_index
+
+
+# ---------------------------------------------------------------------------
+# resolve_closest_venues_from_items
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_resolve_uses_loaded_item_venue_index_without_querying(mocker):
+    item_venue_index_service.index = ItemVenueIndex(
+        [
+            _build_offer_row("item-cinema", "offer-versailles", _VERSAILLES),
+            _build_offer_row("item-cinema", "offer-orly", _ORLY),
+        ],
+        _RESOLUTION,
+    )
+    db = mocker.AsyncMock()
+    user = UserContext(user_id="u", latitude=_PARIS[0], longitude=_PARIS[1])
+    item = RecommendableItemFactory.build(item_id="item-cinema", is_geolocated=True, total_offers=2)
+
+    result = await resolve_closest_venues_from_items(db, [item], user)
+
+    assert [offer.offer_id for offer in result] == ["offer-orly"]
+    db.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_item_venue_index_matches_sql_resolution(db_session):
+    random_generator = random.Random(7)
+    item_ids = [f"item-{item_number}" for item_number in range(20)]
+
+    for offer_number in range(120):
+        latitude = _PARIS[0] + random_generator.uniform(-0.6, 0.6)
+        longitude = _PARIS[1] + random_generator.uniform(-0.9, 0.9)
+        venue = await VenueFactory.create_async(
+            latitude=latitude,
+            longitude=longitude,
+            **{f"h3_res{_RESOLUTION}": h3.latlng_to_cell(latitude, longitude, _RESOLUTION)},
+        )
+        await RecommendableOffersFactory.create_async(
+            unique_id=f"unique-{offer_number}",
+            offer_id=f"offer-{offer_number}",
+            item_id=random_generator.choice(item_ids),
+            venue_id=venue.venue_id,
+            venue_latitude=latitude,
+            venue_longitude=longitude,
+        )
+
+    index = await build_item_venue_index(db_session, _RESOLUTION)
+
+    for user_latitude, user_longitude in [_PARIS, _ORLY, _VERSAILLES, (49.3, 2.35)]:
+        user = UserContext(user_id="u", latitude=user_latitude, longitude=user_longitude)
+        sql_rows = await find_closest_offers_with_h3_index(db_session, item_ids, user, resolution=_RESOLUTION)
+        in_memory_rows = index.find_closest_offers(item_ids, user_latitude, user_longitude)
+
+        assert sorted((offer.item_id, offer.offer_id) for offer, _ in in_memory_rows) == sorted(
+            (offer.item_id, offer.offer_id) for offer, _ in sql_rows
+        )
+        sql_distances = {offer.item_id: distance for offer, distance in sql_rows}
+        for offer, distance in in_memory_rows:
+            assert distance == pytest.approx(sql_distances[offer.item_id], abs=1e-6)
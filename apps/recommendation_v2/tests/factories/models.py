@@ -11,6 +11,7 @@ from polyfactory.factories.sqlalchemy_factory import SQLAlchemyFactory
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.iris import IrisFrance
+from models.item_h3_closest_offer import ItemH3ClosestOffer
 from models.items import NonRecommendableItems
 from models.offer import RecommendableOffers
 from models.past_offer_context import PastOfferContext
@@ -167,6 +168,12 @@ class IrisFranceFactory(BaseModelFactory[IrisFrance]):
     shape = None
 
 
+class ItemH3ClosestOfferFactory(BaseModelFactory[ItemH3ClosestOffer]):
+    __model__ = ItemH3ClosestOffer
+
+    next_candidate_distance = None
+
+
 class NonRecommendableItemsFactory(BaseModelFactory[NonRecommendableItems]):
     __model__ = NonRecommendableItems
 
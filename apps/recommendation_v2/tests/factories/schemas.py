@@ -1,4 +1,6 @@
+import dataclasses
 import random
+from typing import Any
 
 from polyfactory.factories.dataclass_factory import DataclassFactory
 from polyfactory.factories.pydantic_factory import ModelFactory
@@ -16,7 +18,7 @@ from schemas.similar_offer import SimilarOfferResponse
 from schemas.vertex_prediction_item import RecommendableItem
 
 
-class RecommendableItemFactory(ModelFactory[RecommendableItem]):
+class RecommendableItemFactory(DataclassFactory[RecommendableItem]):
     __model__ = RecommendableItem
 
     category = Use(lambda: random.choice(list(CategoryEnum)).value)
@@ -33,11 +35,23 @@ class RankingPredictionFactory(ModelFactory[RankingPrediction]):
 
 
 class EnrichedRecommendableOfferFactory(DataclassFactory[EnrichedRecommendableOffer]):
+    """
+    Item attributes (item_rank, category...) may be passed as for the offer itself:
+    they are used to build the referenced item, unless the offer has its own field.
+    """
+
     __model__ = EnrichedRecommendableOffer
 
-    category = Use(lambda: random.choice(list(CategoryEnum)).value)
-    subcategory_id = Use(lambda: random.choice(list(SubcategoryEnum)).value)
-    search_group_name = Use(lambda: random.choice(list(SearchGroupNameEnum)).value)
+    @classmethod
+    def build(cls, *_: Any, **kwargs: Any) -> EnrichedRecommendableOffer:
+        offer_field_names = {field.name for field in dataclasses.fields(EnrichedRecommendableOffer)}
+        item_kwargs = {
+            field.name: kwargs.pop(field.name)
+            for field in dataclasses.fields(RecommendableItem)
+            if field.name in kwargs and field.name not in offer_field_names
+        }
+        kwargs.setdefault("item", RecommendableItemFactory.build(**item_kwargs))
+        return super().build(**kwargs)
 
 
 class UserContextFactory(DataclassFactory[UserContext]):
@@ -0,0 +1,22 @@
+import h3
+
+from services.h3 import calculate_h3_k_rings_to_cover_search_radius
+from services.h3 import get_h3_cells_covering_search_radius
+
+
+_PARIS_H3_CELL_RES7 = h3.latlng_to_cell(48.8566, 2.3522, 7)
+
+
+# ---------------------------------------------------------------------------
+# get_h3_cells_covering_search_radius
+# ---------------------------------------------------------------------------
+
+
+def test_search_radius_disk_is_the_filled_disk_of_the_covering_k_rings():
+    k_rings = calculate_h3_k_rings_to_cover_search_radius(search_radius_in_km=50.0, resolution=7)
+
+    disk = get_h3_cells_covering_search_radius(_PARIS_H3_CELL_RES7, search_radius_in_km=50.0)
+
+    assert sorted(disk) == sorted(h3.grid_disk(_PARIS_H3_CELL_RES7, k_rings))
+    # Users of the same cell share the cached disk
+    assert get_h3_cells_covering_search_radius(_PARIS_H3_CELL_RES7, search_radius_in_km=50.0) is disk
@@ -0,0 +1,51 @@
+from services.local_cache import LocalLRUCache
+
+
+# ---------------------------------------------------------------------------
+# LocalLRUCache
+# ---------------------------------------------------------------------------
+
+
+def test_local_cache_returns_stored_value_and_counts_hits_and_misses():
+    cache = LocalLRUCache(max_entries=2)
+
+    assert cache.get_value("key-a") is None
+
+    cache.set_value("key-a", "value-a", time_to_live_in_seconds=60)
+
+    assert cache.get_value("key-a") == "value-a"
+    assert cache.hit_count == 1
+    assert cache.miss_count == 1
+
+
+def test_local_cache_evicts_least_recently_used_entry_when_full():
+    cache = LocalLRUCache(max_entries=2)
+    cache.set_value("key-a", "value-a", time_to_live_in_seconds=60)
+    cache.set_value("key-b", "value-b", time_to_live_in_seconds=60)
+
+    # Touching key-a makes key-b the least recently used entry.
+    cache.get_value("key-a")
+    cache.set_value("key-c", "value-c", time_to_live_in_seconds=60)
+
+    assert cache.get_value("key-b") is None
+    assert cache.get_value("key-a") == "value-a"
+    assert cache.get_value("key-c") == "value-c"
+    assert len(cache) == 2  # noqa: PLR2004
+
+
+def test_local_cache_drops_expired_entries(mocker):
+    mock_monotonic = mocker.patch("services.local_cache.time.monotonic", return_value=1000.0)
+    cache = LocalLRUCache(max_entries=2)
+    cache.set_value("key-a", "value-a", time_to_live_in_seconds=10)
+
+    mock_monotonic.return_value = 1010.0
+
+    assert cache.get_value("key-a") is None
+    assert len(cache) == 0
+
+
+def test_local_cache_ignores_non_positive_ttl():
+    cache = LocalLRUCache(max_entries=2)
+    cache.set_value("key-a", "value-a", time_to_live_in_seconds=0)
+
+    assert len(cache) == 0
@@ -229,3 +229,74 @@ async def test_disconnect_closes_connection(redis_service):
     await service.disconnect()
 
     assert service._monitor_task is None
+
+
+# ---------------------------------------------------------------------------
+# RedisCacheService.acquire_lock / release_lock
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_lock_cannot_be_acquired_twice_until_released(redis_service):
+    """SET NX semantics: a second owner is refused until the first one releases the lock."""
+    assert await redis_service.acquire_lock(lock_key="lock", lock_token="owner-1", time_to_live_in_seconds=10)
+    assert not await redis_service.acquire_lock(lock_key="lock", lock_token="owner-2", time_to_live_in_seconds=10)
+
+    await redis_service.release_lock(lock_key="lock", lock_token="owner-1")
+
+    assert await redis_service.acquire_lock(lock_key="lock", lock_token="owner-2", time_to_live_in_seconds=10)
+
+
+@pytest.mark.asyncio
+async def test_release_lock_ignores_lock_owned_by_someone_else(redis_service):
+    """An expired owner must not release a lock re-acquired by another worker."""
+    await redis_service.acquire_lock(lock_key="lock", lock_token="owner-1", time_to_live_in_seconds=10)
+
+    await redis_service.release_lock(lock_key="lock", lock_token="owner-2")
+
+    assert not await redis_service.acquire_lock(lock_key="lock", lock_token="owner-2", time_to_live_in_seconds=10)
+
+
+@pytest.mark.asyncio
+async def test_acquire_lock_fails_open_on_redis_exception(redis_service):
+    """A Redis failure must never block the pipeline: the caller proceeds as lock owner."""
+    service = RedisCacheService()
+    service.redis_client = redis_service.redis_client
+
+    with patch.object(service.redis_client, "set", side_effect=Exception("Redis down")):
+        acquired = await service.acquire_lock(lock_key="lock", lock_token="owner-1", time_to_live_in_seconds=10)
+
+    assert acquired is True
+
+
+# ---------------------------------------------------------------------------
+# RedisCacheService.get_set_members / replace_set_members
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_empty_set_is_cached_and_distinguished_from_a_missing_set(redis_service):
+    """A user without bookings is cached too, and the presence sentinel never leaks."""
+    await redis_service.replace_set_members(cache_key="empty-set", members=set(), time_to_live_in_seconds=60)
+
+    assert await redis_service.get_set_members(cache_key="empty-set") == set()
+    assert await redis_service.get_set_members(cache_key="missing-set") is None
+
+
+@pytest.mark.asyncio
+async def test_replace_set_members_drops_previous_members(redis_service):
+    await redis_service.replace_set_members(cache_key="set", members={"a", "b"}, time_to_live_in_seconds=60)
+    await redis_service.replace_set_members(cache_key="set", members={"c"}, time_to_live_in_seconds=60)
+
+    assert await redis_service.get_set_members(cache_key="set") == {"c"}
+
+
+@pytest.mark.asyncio
+async def test_get_set_members_returns_none_on_redis_exception(redis_service):
+    service = RedisCacheService()
+    service.redis_client = redis_service.redis_client
+
+    with patch.object(service.redis_client, "smembers", side_effect=Exception("Redis down")):
+        result = await service.get_set_members(cache_key="set")
+
+    assert result is None
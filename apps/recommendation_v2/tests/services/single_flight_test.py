@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from services.single_flight import SingleFlightService
+
+
+# ---------------------------------------------------------------------------
+# SingleFlightService.run
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_single_flight_runs_identical_concurrent_calls_once():
+    """Concurrent calls with the same key share the leader's result."""
+    service = SingleFlightService()
+    call_count = 0
+
+    async def _slow_call():
+        nonlocal call_count
+        call_count += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    outcomes = await asyncio.gather(*[service.run("key", _slow_call) for _ in range(5)])
+
+    assert call_count == 1
+    assert [result for result, _ in outcomes] == ["result"] * 5
+    assert [is_shared for _, is_shared in outcomes] == [False, True, True, True, True]
+    assert len(service) == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_does_not_coalesce_different_keys():
+    service = SingleFlightService()
+    call_count = 0
+
+    async def _slow_call():
+        nonlocal call_count
+        call_count += 1
+        await asyncio.sleep(0.01)
+        return call_count
+
+    await asyncio.gather(service.run("key-a", _slow_call), service.run("key-b", _slow_call))
+
+    assert call_count == 2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_single_flight_propagates_leader_error_to_followers():
+    service = SingleFlightService()
+
+    async def _failing_call():
+        await asyncio.sleep(0.01)
+        raise ValueError("pipeline failed")
+
+    outcomes = await asyncio.gather(
+        service.run("key", _failing_call), service.run("key", _failing_call), return_exceptions=True
+    )
+
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+    assert len(service) == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_follower_runs_call_itself_when_leader_is_cancelled():
+    """A cancelled leader (e.g. client disconnected) must not cancel its followers."""
+    service = SingleFlightService()
+    leader_started = asyncio.Event()
+
+    async def _leader_call():
+        leader_started.set()
+        await asyncio.sleep(10)
+        return "leader"
+
+    async def _follower_call():
+        return "follower"
+
+    leader_task = asyncio.create_task(service.run("key", _leader_call))
+    await leader_started.wait()
+    follower_task = asyncio.create_task(service.run("key", _follower_call))
+    await asyncio.sleep(0)
+
+    leader_task.cancel()
+
+    assert await follower_task == ("follower", False)
+    with pytest.raises(asyncio.CancelledError):
+        await leader_task
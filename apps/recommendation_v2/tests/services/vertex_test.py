@@ -2,6 +2,8 @@ import pytest
 from fastapi import HTTPException
 from fastapi import status
 from google.api_core import exceptions as gcp_exceptions
+from google.protobuf import json_format
+from google.protobuf.struct_pb2 import ListValue
 
 from services.vertex import VertexService
 
@@ -55,3 +57,29 @@ async def test_execute_grpc_prediction_reraises_non_auth_service_unavailable(moc
         await service.execute_grpc_prediction(feature_payloads=[{"user_id": "u"}])
 
     assert exc_info.value is original_error
+
+
+# ---------------------------------------------------------------------------
+# VertexService.execute_grpc_prediction — instances
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_execute_grpc_prediction_sends_prebuilt_protobuf_instances_as_is(mocker):
+    """Instances already built as a ListValue (ranking features) are sent without any conversion."""
+    service = VertexService(endpoint_name="test-endpoint")
+    mock_client = mocker.AsyncMock()
+    mocker.patch.object(
+        service, "_get_cached_prediction_client", new_callable=mocker.AsyncMock, return_value=mock_client
+    )
+    mocker.patch.object(
+        service, "_resolve_endpoint_resource_path", new_callable=mocker.AsyncMock, return_value="endpoint-path"
+    )
+    parse_dict = mocker.spy(json_format, "ParseDict")
+    ranking_instances = ListValue()
+    ranking_instances.append({"offer_id": "offer-1", "offer_item_rank": 1.0})
+
+    await service.execute_grpc_prediction(feature_payloads=ranking_instances)
+
+    assert list(mock_client.predict.call_args.kwargs["instances"]) == list(ranking_instances.values)
+    parse_dict.assert_not_called()